@@ -0,0 +1,136 @@
+"""
+Share of request time spent rendering responses, per renderer.
+
+Seeds a throwaway in-memory database with one mailbox, then requests the
+email list (full and compact views) and the settings document repeatedly
+under ninja's stock JSONRenderer and under FastRenderer (orjson, and
+MessagePack via Accept). For each it reports the mean request time, the mean
+time inside ``render()`` and the rendering share of the request.
+
+Usage (from backend/, with the usual environment variables set):
+
+    python benchmarks/renderers.py [--emails 200] [--page-size 50] [--rounds 30]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "penguin_mail.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from ninja.renderers import JSONRenderer  # noqa: E402
+
+from factories import AccountFactory, EmailFactory, LabelFactory, RecipientFactory, UserFactory  # noqa: E402
+from penguin_mail.api import api  # noqa: E402
+from penguin_mail.api.auth import create_access_token  # noqa: E402
+from penguin_mail.api.renderers import MSGPACK, FastRenderer  # noqa: E402
+
+# A newsletter-sized HTML body: markup, links and an inline image
+BODY = (
+    "<html><body>"
+    + "<p>Quarterly numbers are in. <a href='https://example.com/r'>Read the report</a> &amp; reply.</p>" * 60
+    + "<img src='data:image/png;base64,"
+    + "iVBORw0KGgo" * 200
+    + "'>"
+    + "</body></html>"
+)
+
+
+class TimedRenderer:
+    """Wraps a renderer, accumulating the wall time spent in ``render()``."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.media_type = inner.media_type
+        self.charset = inner.charset
+        self.elapsed = 0.0
+
+    def render(self, request, data, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.inner.render(request, data, **kwargs)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def content_type(self, request):
+        if isinstance(self.inner, FastRenderer):
+            return self.inner.content_type(request)
+        return f"{self.media_type}; charset={self.charset}"
+
+
+def seed(emails: int) -> str:
+    user = UserFactory()
+    account = AccountFactory(user=user)
+    labels = [LabelFactory(user=user) for _ in range(5)]
+    for i in range(emails):
+        email = EmailFactory(account=account, body=BODY)
+        RecipientFactory(email=email, kind="TO")
+        RecipientFactory(email=email, kind="CC")
+        email.labels.add(labels[i % len(labels)])
+    token, _ = create_access_token(user)
+    return token
+
+
+def measure(client: Client, path: str, renderer, accept: str, rounds: int) -> tuple[float, float, int]:
+    timed = TimedRenderer(renderer)
+    api.renderer = timed
+    client.get(path, HTTP_ACCEPT=accept)  # warm-up
+    timed.elapsed = 0.0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = client.get(path, HTTP_ACCEPT=accept)
+    total = time.perf_counter() - start
+    return total / rounds, timed.elapsed / rounds, len(response.content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    settings.IMAP_SYNC_ENABLED = False
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    token = seed(args.emails)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    original = api.renderer
+
+    cases = [
+        ("stock JSONRenderer", JSONRenderer(), "application/json"),
+        ("FastRenderer (orjson)", FastRenderer(), "application/json"),
+        ("FastRenderer (msgpack)", FastRenderer(), MSGPACK),
+    ]
+    paths = [
+        f"/api/v1/emails/?pageSize={args.page_size}",
+        f"/api/v1/emails/?pageSize={args.page_size}&view=compact",
+        "/api/v1/settings/",
+    ]
+    out = sys.stdout
+    out.write(f"{'endpoint':<44} {'renderer':<24} {'request ms':>10} {'render ms':>10} {'share':>6} {'bytes':>9}\n")
+    try:
+        for path in paths:
+            for name, renderer, accept in cases:
+                request_s, render_s, size = measure(client, path, renderer, accept, args.rounds)
+                out.write(
+                    f"{path:<44} {name:<24} {request_s * 1000:>10.2f} {render_s * 1000:>10.2f} "
+                    f"{render_s / request_s:>6.1%} {size:>9}\n"
+                )
+    finally:
+        api.renderer = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Email list reads on SQLite while IMAP sync writes, per SQLite profile.
+
+For each profile, a child process migrates a fresh database file, seeds one
+mailbox, then runs sync threads (``sync_account_folder`` with the IMAP fetch
+replaced by a generator of new messages) next to reader processes requesting
+the email list. It reports read throughput and latency, messages stored and
+the number of requests and sync writes that failed, typically with
+"database is locked".
+
+Usage (from backend/, with the usual environment variables set):
+
+    python benchmarks/sqlite_concurrency.py [--seconds 10] [--readers 4] [--syncers 2]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "penguin_mail.settings")
+
+PROFILES = [
+    ("rollback journal", {"DB_SQLITE_CONCURRENT": "false", "SYNC_WRITE_QUEUE": "false"}),
+    ("concurrent, no write queue", {"DB_SQLITE_CONCURRENT": "true", "SYNC_WRITE_QUEUE": "false"}),
+    ("concurrent + write queue", {"DB_SQLITE_CONCURRENT": "true", "SYNC_WRITE_QUEUE": "true"}),
+]
+
+BODY = "<p>" + "A synced message body with some text in it. " * 40 + "</p>"
+
+
+def child(args: argparse.Namespace) -> None:
+    """Run one profile against the database named in DB_NAME and print the results as JSON."""
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from factories import AccountFactory, EmailFactory, UserFactory
+    from penguin_mail.api.auth import create_access_token
+    from penguin_mail.services.sync import sync_account_folder
+
+    settings.IMAP_SYNC_ENABLED = False
+    setup_test_environment()
+    call_command("migrate", verbosity=0)
+    user = UserFactory()
+    account = AccountFactory(user=user)
+    for _ in range(args.emails):
+        EmailFactory(account=account, body=BODY)
+    token, _ = create_access_token(user)
+
+    uids = itertools.count(1)
+    uid_lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    counts = {"stored": 0, "read errors": 0, "sync errors": 0}
+    counts_lock = threading.Lock()
+
+    def fetch(*_args, **_kwargs):
+        with uid_lock:
+            batch = [next(uids) for _ in range(args.batch)]
+        return [
+            {
+                "imap_uid": uid,
+                "subject": f"Synced {uid}",
+                "body": BODY,
+                "sender_name": "Sender",
+                "sender_email": f"sender{uid}@example.com",
+                "date": datetime.now(UTC),
+                "recipients_to": [{"address": "me@example.com"}],
+            }
+            for uid in batch
+        ]
+
+    def syncer() -> None:
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    stored = sync_account_folder(account, "INBOX", "inbox", limit=args.batch)
+                except Exception:
+                    stored = 0
+                    with counts_lock:
+                        counts["sync errors"] += 1
+                with counts_lock:
+                    counts["stored"] += stored
+        finally:
+            connection.close()
+
+    # Readers are processes, as web workers would be, so they are not serialized with the sync threads by the GIL
+    results: multiprocessing.Queue = multiprocessing.get_context("fork").Queue()
+
+    def reader() -> None:
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        latencies, errors = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = client.get("/api/v1/emails/?pageSize=50").status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        results.put((latencies, errors))
+
+    connections.close_all()
+    readers = [multiprocessing.get_context("fork").Process(target=reader) for _ in range(args.readers)]
+    for process in readers:
+        process.start()
+    with patch("penguin_mail.services.imap.fetch_emails", side_effect=fetch):
+        threads = [threading.Thread(target=syncer) for _ in range(args.syncers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    latencies: list[float] = []
+    for _ in readers:
+        process_latencies, errors = results.get()
+        latencies += process_latencies
+        counts["read errors"] += errors
+    for process in readers:
+        process.join()
+
+    latencies.sort()
+    sys.stdout.write(
+        json.dumps(
+            {
+                "reads/s": len(latencies) / args.seconds,
+                "p50 ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+                "p95 ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+                "stored/s": counts["stored"] / args.seconds,
+                "read errors": counts["read errors"],
+                "sync errors": counts["sync errors"],
+            }
+        )
+        + "\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--syncers", type=int, default=2)
+    parser.add_argument("--emails", type=int, default=500, help="Emails in the mailbox before syncing starts.")
+    parser.add_argument("--batch", type=int, default=20, help="Messages per simulated IMAP fetch.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    columns = ["reads/s", "p50 ms", "p95 ms", "stored/s", "read errors", "sync errors"]
+    out = sys.stdout
+    out.write(f"{'profile':<28}" + "".join(f"{c:>12}" for c in columns) + "\n")
+    for name, env in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            child_env = {**os.environ, **env, "DB_ENGINE": "sqlite", "DB_NAME": str(Path(tmp) / "bench.sqlite3")}
+            result = subprocess.run(  # noqa: S603
+                [sys.executable, __file__, "--child", *sys.argv[1:]],
+                env=child_env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        out.write(f"{name:<28}" + "".join(f"{row[c]:>12.1f}" for c in columns) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
 from django.test import Client
 
 from penguin_mail.api.auth import create_access_token
@@ -24,6 +26,21 @@ def _use_tmp_media(settings, tmp_path):
     settings.MEDIA_ROOT = tmp_path / "media"
 
 
+@pytest.fixture
+def body_column_apps(transactional_db):
+    """
+    Migrate back to 0015, where emails still have a ``body`` column, and return
+    that state's app registry for data migrations written against it. The
+    schema is migrated forward again afterwards.
+    """
+    target = [("penguin_mail", "0015_bulk_job")]
+    executor = MigrationExecutor(connection)
+    executor.migrate(target)
+    yield executor.loader.project_state(target).apps
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
 @pytest.fixture
 def user(db):
     u = User.objects.create_user(
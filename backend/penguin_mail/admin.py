@@ -32,8 +32,8 @@ class AttachmentInline(admin.TabularInline):
 class EmailAdmin(admin.ModelAdmin):
     list_display = ("subject", "sender_email", "folder", "is_read", "is_starred", "is_draft", "created_at")
     list_filter = ("folder", "is_read", "is_starred", "is_draft", "has_attachment")
-    search_fields = ("subject", "sender_email", "body")
-    readonly_fields = ("uuid",)
+    search_fields = ("subject", "sender_email")
+    readonly_fields = ("uuid", "body")
     inlines = [RecipientInline, AttachmentInline]
 
 
@@ -107,3 +107,41 @@ class KeyboardShortcutAdmin(admin.ModelAdmin):
     list_display = ("action", "key", "user", "enabled")
     list_filter = ("enabled",)
     search_fields = ("action",)
+
+
+@admin.register(models.BulkSend)
+class BulkSendAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "account", "status", "total", "sent_count", "failed_count", "created_at")
+    list_filter = ("status",)
+    readonly_fields = ("uuid",)
+
+
+@admin.register(models.BulkJob)
+class BulkJobAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "user", "operation", "status", "total", "processed_count", "created_at")
+    list_filter = ("status", "operation")
+    readonly_fields = ("uuid",)
+
+
+@admin.register(models.MailboxCounter)
+class MailboxCounterAdmin(admin.ModelAdmin):
+    list_display = ("account", "folder", "label", "total", "unread")
+    list_filter = ("folder",)
+
+
+@admin.register(models.ChangeCounter)
+class ChangeCounterAdmin(admin.ModelAdmin):
+    list_display = ("user", "scope", "version")
+    list_filter = ("scope",)
+
+
+@admin.register(models.ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "object_id", "op", "created_at")
+    list_filter = ("kind", "op")
+
+
+@admin.register(models.BodyArchive)
+class BodyArchiveAdmin(admin.ModelAdmin):
+    list_display = ("file", "account", "created_at")
+    readonly_fields = ("file", "account", "created_at")
@@ -1,21 +1,45 @@
+from typing import Any
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
 from ninja import NinjaAPI
 
+from .renderers import FastRenderer
 from .routers import (
     accounts_router,
     attachments_router,
     auth_router,
+    bulk_jobs_router,
+    bulk_sends_router,
+    changes_router,
     contact_groups_router,
     contacts_router,
     emails_router,
+    events_router,
     folders_router,
     labels_router,
     settings_router,
+    threads_router,
 )
 
-api = NinjaAPI(title="Penguin Mail API", version="1.0.0")
+
+class PenguinAPI(NinjaAPI):
+    """NinjaAPI whose responses are JSON or MessagePack, negotiated per request."""
+
+    renderer: FastRenderer
+
+    def create_response(self, request: HttpRequest, data: Any, **kwargs: Any) -> HttpResponse:
+        response = super().create_response(request, data, **kwargs)
+        response["Content-Type"] = self.renderer.content_type(request)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+api = PenguinAPI(title="Penguin Mail API", version="1.0.0", renderer=FastRenderer())
 
 api.add_router("/auth", auth_router, tags=["auth"])
 api.add_router("/emails", emails_router, tags=["emails"])
+api.add_router("/threads", threads_router, tags=["threads"])
 api.add_router("/accounts", accounts_router, tags=["accounts"])
 api.add_router("/contacts", contacts_router, tags=["contacts"])
 api.add_router("/contact-groups", contact_groups_router, tags=["contact-groups"])
@@ -23,3 +47,7 @@ api.add_router("/folders", folders_router, tags=["folders"])
 api.add_router("/labels", labels_router, tags=["labels"])
 api.add_router("/settings", settings_router, tags=["settings"])
 api.add_router("/attachments", attachments_router, tags=["attachments"])
+api.add_router("/bulk-sends", bulk_sends_router, tags=["bulk-sends"])
+api.add_router("/bulk-jobs", bulk_jobs_router, tags=["bulk-jobs"])
+api.add_router("/changes", changes_router, tags=["changes"])
+api.add_router("/events", events_router, tags=["events"])
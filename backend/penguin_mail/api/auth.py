@@ -1,14 +1,17 @@
 import datetime
+import secrets
 
 import jwt
 from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
-from ninja.security import HttpBearer
+from ninja.security import APIKeyQuery, HttpBearer
 
 from penguin_mail.models import User
 
 ACCESS_TOKEN_LIFETIME = datetime.timedelta(minutes=15)
 REFRESH_TOKEN_LIFETIME = datetime.timedelta(days=7)
+STREAM_TICKET_LIFETIME = datetime.timedelta(seconds=60)
 ALGORITHM = "HS256"
 
 
@@ -36,6 +39,20 @@ def create_refresh_token(user: User) -> str:
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)  # type: ignore[return-value]
 
 
+def create_stream_ticket(user: User) -> tuple[str, int]:
+    """A single-use token that only opens an event stream, for URLs where an access token would be logged."""
+    now = datetime.datetime.now(datetime.UTC)
+    payload = {
+        "sub": str(user.uuid),
+        "type": "stream",
+        "jti": secrets.token_urlsafe(16),
+        "iat": now,
+        "exp": now + STREAM_TICKET_LIFETIME,
+    }
+    ticket: str = jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)  # type: ignore[assignment]
+    return ticket, int(STREAM_TICKET_LIFETIME.total_seconds())
+
+
 def decode_token(token: str) -> dict | None:
     try:
         return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
@@ -43,12 +60,38 @@ def decode_token(token: str) -> dict | None:
         return None
 
 
+def user_for_access_token(token: str) -> User | None:
+    payload = decode_token(token)
+    if payload is None or payload.get("type") != "access":
+        return None
+    try:
+        return User.objects.get(uuid=payload["sub"])
+    except User.DoesNotExist:
+        return None
+
+
 class JWTAuth(HttpBearer):
     def authenticate(self, request: HttpRequest, token: str) -> User | None:
-        payload = decode_token(token)
-        if payload is None or payload.get("type") != "access":
-            return None
-        try:
-            return User.objects.get(uuid=payload["sub"])
-        except User.DoesNotExist:
-            return None
+        return user_for_access_token(token)
+
+
+def user_for_stream_ticket(ticket: str) -> User | None:
+    payload = decode_token(ticket)
+    if payload is None or payload.get("type") != "stream":
+        return None
+    # Spent on first use; with more than one web process this needs a shared cache (CACHES)
+    if not cache.add(f"stream-ticket:{payload['jti']}", True, timeout=int(STREAM_TICKET_LIFETIME.total_seconds())):
+        return None
+    try:
+        return User.objects.get(uuid=payload["sub"])
+    except User.DoesNotExist:
+        return None
+
+
+class StreamTicketAuth(APIKeyQuery):
+    """A stream ticket in the ``ticket`` query parameter, for clients that cannot set headers (EventSource)."""
+
+    param_name = "ticket"
+
+    def authenticate(self, request: HttpRequest, key: str | None) -> User | None:
+        return user_for_stream_ticket(key) if key else None
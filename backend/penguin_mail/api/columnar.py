@@ -0,0 +1,173 @@
+"""
+Columnar serialization of email lists.
+
+``EmailOut.from_model`` builds a model instance, its related objects and a
+pydantic model per row. For list pages this module instead reads plain rows
+with ``values()`` (one query for the emails, one each for recipients,
+attachments and labels), joins them in dicts keyed by email pk and emits
+the JSON-ready dicts ``EmailOut`` (or, for the compact view,
+``EmailSummaryOut``) would have produced. ``tests/test_columnar.py`` holds
+the two paths to the same output.
+"""
+
+from typing import Any
+
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+from penguin_mail.models import Attachment, Email, Recipient, decompress_body
+from penguin_mail.services.archive import archived_texts
+
+# Email columns (and the uuids of its to-one relations) an EmailOut is built from
+EMAIL_COLUMNS = (
+    "id",
+    "uuid",
+    "account__uuid",
+    "account__color",
+    "sender_name",
+    "sender_email",
+    "subject",
+    "preview",
+    "stored_body__data",
+    "stored_body__archive",
+    "created_at",
+    "is_read",
+    "is_starred",
+    "has_attachment",
+    "folder",
+    "thread_id",
+    "reply_to__uuid",
+    "forwarded_from__uuid",
+    "is_draft",
+    "scheduled_send_at",
+    "snooze_until",
+    "snoozed_from_folder",
+    "send_status",
+)
+
+# Columns of a compact (``view=compact``) row: no body, recipients or attachment details
+SUMMARY_COLUMNS = (
+    "id",
+    "uuid",
+    "account__uuid",
+    "sender_name",
+    "sender_email",
+    "subject",
+    "preview",
+    "created_at",
+    "is_read",
+    "is_starred",
+    "is_draft",
+    "has_attachment",
+    "folder",
+    "thread_id",
+    "attachment_count",
+)
+
+_RECIPIENT_KEYS = {"TO": "to", "CC": "cc", "BCC": "bcc"}
+
+
+def email_rows(qs: QuerySet[Email]) -> QuerySet[Any]:
+    """``qs`` as rows of ``EMAIL_COLUMNS``, keeping its filters and ordering."""
+    return qs.values(*EMAIL_COLUMNS)
+
+
+def summary_rows(qs: QuerySet[Email]) -> QuerySet[Any]:
+    """``qs`` as rows of ``SUMMARY_COLUMNS``, with the attachment count as an inline subquery."""
+    attachment_count = (
+        Attachment.objects.filter(email=OuterRef("pk")).order_by().values("email").annotate(n=Count("pk")).values("n")
+    )
+    return qs.annotate(attachment_count=Coalesce(Subquery(attachment_count), 0)).values(*SUMMARY_COLUMNS)
+
+
+def _label_ids(out: dict[int, dict[str, Any]]) -> None:
+    links = Email.labels.through.objects.filter(email_id__in=list(out)).order_by("pk")
+    for email_id, label_uuid in links.values_list("email_id", "label__uuid"):
+        out[email_id]["labels"].append(str(label_uuid))
+
+
+def serialize_summaries(rows: list[dict[str, Any]], snippets: dict[int, str] | None = None) -> list[dict[str, Any]]:
+    """EmailSummaryOut-shaped dicts for ``rows`` (from ``summary_rows``), in the same order."""
+    out: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        out[row["id"]] = item = {
+            "id": str(row["uuid"]),
+            "accountId": str(row["account__uuid"]),
+            "subject": row["subject"],
+            "preview": row["preview"],
+            "date": row["created_at"],
+            "isRead": row["is_read"],
+            "isStarred": row["is_starred"],
+            "isDraft": row["is_draft"],
+            "hasAttachment": row["has_attachment"],
+            "attachmentCount": row["attachment_count"],
+            "folder": row["folder"],
+            "labels": [],
+            "threadId": str(row["thread_id"]) if row["thread_id"] else None,
+            "from": {"name": row["sender_name"], "email": row["sender_email"]},
+        }
+        if snippets and row["id"] in snippets:
+            item["snippet"] = snippets[row["id"]]
+    if out:
+        _label_ids(out)
+    return list(out.values())
+
+
+def serialize_emails(rows: list[dict[str, Any]], snippets: dict[int, str] | None = None) -> list[dict[str, Any]]:
+    """
+    EmailOut-shaped dicts for ``rows`` (from ``email_rows``), in the same
+    order; rows in ``snippets`` also carry their search ``snippet``.
+    """
+    pks = [row["id"] for row in rows]
+    out: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        out[row["id"]] = item = {
+            "id": str(row["uuid"]),
+            "accountId": str(row["account__uuid"]),
+            "accountColor": row["account__color"],
+            "to": [],
+            "cc": [],
+            "bcc": [],
+            "subject": row["subject"],
+            "preview": row["preview"],
+            "body": decompress_body(row["stored_body__data"]),
+            "date": row["created_at"],
+            "isRead": row["is_read"],
+            "isStarred": row["is_starred"],
+            "hasAttachment": row["has_attachment"],
+            "attachments": [],
+            "folder": row["folder"],
+            "labels": [],
+            "threadId": str(row["thread_id"]) if row["thread_id"] else None,
+            "replyToId": str(row["reply_to__uuid"]) if row["reply_to__uuid"] else None,
+            "forwardedFromId": str(row["forwarded_from__uuid"]) if row["forwarded_from__uuid"] else None,
+            "isDraft": row["is_draft"],
+            "scheduledSendAt": row["scheduled_send_at"],
+            "snoozeUntil": row["snooze_until"],
+            "snoozedFromFolder": row["snoozed_from_folder"],
+            "sendStatus": row["send_status"],
+            "from": {"name": row["sender_name"], "email": row["sender_email"]},
+        }
+        if snippets and row["id"] in snippets:
+            item["snippet"] = snippets[row["id"]]
+    if not pks:
+        return []
+
+    if archived := [row["id"] for row in rows if row["stored_body__archive"] is not None]:
+        for email_id, text in archived_texts(archived).items():
+            out[email_id]["body"] = text
+
+    recipients = Recipient.objects.filter(email_id__in=pks).order_by("pk")
+    for email_id, kind, name, address in recipients.values_list("email_id", "kind", "name", "address"):
+        out[email_id][_RECIPIENT_KEYS[kind]].append({"name": name, "email": address})
+
+    storage = Attachment._meta.get_field("file").storage
+    attachments = Attachment.objects.filter(email_id__in=pks).order_by("pk")
+    for email_id, uuid, name, size, mime_type, file in attachments.values_list(
+        "email_id", "uuid", "name", "size", "mime_type", "file"
+    ):
+        attachment = {"id": str(uuid), "name": name, "size": size, "mimeType": mime_type}
+        out[email_id]["attachments"].append({**attachment, "url": storage.url(file) if file else None})
+
+    _label_ids(out)
+    return [out[pk] for pk in pks]
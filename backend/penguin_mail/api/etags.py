@@ -0,0 +1,37 @@
+"""
+Version-based ETags for polled GET endpoints.
+
+The tag is built from the caller's ``ChangeCounter`` versions for the scopes
+a response depends on, so checking ``If-None-Match`` costs one indexed read
+and nothing is hashed. Views call ``not_modified`` before their own queries
+and return its 304 when the client's copy is current.
+"""
+
+from collections.abc import Sequence
+
+from django.http import HttpResponse, HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from penguin_mail.api.renderers import wants_msgpack
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.services import versions
+
+
+def etag(request: AuthenticatedRequest, scopes: Sequence[str]) -> str:
+    """Quoted ETag for the user's current ``scopes`` versions, distinct per representation."""
+    tag = ".".join(str(version) for version in versions.current(request.auth, scopes))
+    # JSON and MessagePack bodies of the same data must not share a validator
+    suffix = "-msgpack" if wants_msgpack(request) else ""
+    return f'"{request.auth.pk}-{tag}{suffix}"'
+
+
+def not_modified(request: AuthenticatedRequest, response: HttpResponse, *scopes: str) -> HttpResponseBase | None:
+    """
+    Set the ETag on ninja's temporal ``response``. Returns the 304 (or, for a
+    failed ``If-Match``, 412) to send instead of the body, else None.
+    """
+    response["ETag"] = tag = etag(request, scopes)
+    patch_vary_headers(response, ["Accept"])
+    conditional = get_conditional_response(request, etag=tag, response=response)
+    # Django hands back the response it was given when no precondition applies
+    return None if conditional is response else conditional
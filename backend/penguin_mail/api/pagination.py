@@ -1,6 +1,12 @@
+import base64
+import binascii
 import math
+from datetime import datetime
 from typing import Any
 
+from django.db.models import Q
+from ninja.errors import HttpError
+
 MAX_PAGE_SIZE = 200
 
 
@@ -20,3 +26,48 @@ def paginate_queryset(qs: Any, page: int = 1, page_size: int = 50) -> dict:
             "totalPages": total_pages,
         },
     }
+
+
+def encode_cursor(obj: Any) -> str:
+    """Opaque cursor pointing just past ``obj`` (a model instance or ``values()`` row) in (-created_at, -id) order."""
+    created_at, pk = (obj["created_at"], obj["id"]) if isinstance(obj, dict) else (obj.created_at, obj.pk)
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        position = datetime.fromisoformat(created_at), int(pk)
+        if position[0].tzinfo is None:
+            raise ValueError("naive timestamp")
+        return position
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HttpError(400, "Invalid cursor") from e
+
+
+def paginate_keyset(qs: Any, cursor: str = "", page_size: int = 50) -> dict:
+    """
+    Cursor pagination over (-created_at, -id).
+
+    Instead of counting and OFFSET-skipping, each page seeks straight to the
+    row after the cursor, so every page costs the same as the first. ``qs``
+    must be ordered by ``-created_at, -id``. ``nextCursor`` is None on the
+    last page.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    # One extra row tells us whether another page exists without a COUNT
+    items = list(qs[: page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    return {
+        "items": items,
+        "pagination": {
+            "pageSize": page_size,
+            "nextCursor": encode_cursor(items[-1]) if has_more else None,
+        },
+    }
@@ -1,21 +1,31 @@
 from .accounts import router as accounts_router
 from .attachments import router as attachments_router
 from .auth import router as auth_router
+from .bulk_jobs import router as bulk_jobs_router
+from .bulk_sends import router as bulk_sends_router
+from .changes import router as changes_router
 from .contact_groups import router as contact_groups_router
 from .contacts import router as contacts_router
 from .emails import router as emails_router
+from .events import router as events_router
 from .folders import router as folders_router
 from .labels import router as labels_router
 from .settings import router as settings_router
+from .threads import router as threads_router
 
 __all__ = [
     "accounts_router",
     "attachments_router",
     "auth_router",
+    "bulk_jobs_router",
+    "bulk_sends_router",
+    "changes_router",
     "contact_groups_router",
     "contacts_router",
     "emails_router",
+    "events_router",
     "folders_router",
     "labels_router",
     "settings_router",
+    "threads_router",
 ]
@@ -0,0 +1,22 @@
+from ninja import Router
+
+from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.schemas.email import BulkJobOut
+from penguin_mail.api.shortcuts import get_object_or_404
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.models import BulkJob
+
+router = Router(auth=JWTAuth())
+
+
+@router.get("/", response=list[BulkJobOut])
+def list_bulk_jobs(request: AuthenticatedRequest) -> list[BulkJobOut]:
+    """The caller's query bulk operations (queued by ``POST /emails/bulk``), newest first."""
+    jobs = BulkJob.objects.filter(user=request.auth).order_by("-created_at")
+    return [BulkJobOut.from_model(j) for j in jobs]
+
+
+@router.get("/{job_id}", response=BulkJobOut)
+def get_bulk_job(request: AuthenticatedRequest, job_id: str) -> BulkJobOut:
+    job = get_object_or_404(BulkJob, user=request.auth, uuid=job_id)
+    return BulkJobOut.from_model(job)
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import transaction
+from ninja import Router
+from ninja.errors import HttpError
+
+from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.schemas.bulk_send import BulkSendIn, BulkSendOut
+from penguin_mail.api.shortcuts import get_object_or_404
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.models import Account, BulkSend, BulkSendStatus, ContactGroup
+from penguin_mail.services import bulk_send
+
+router = Router(auth=JWTAuth())
+
+
+@router.post("/", response={202: BulkSendOut})
+def create_bulk_send(request: AuthenticatedRequest, payload: BulkSendIn) -> tuple[int, BulkSendOut]:
+    """Queue a mail merge: one personalised message per group member, sent in the background."""
+    user = request.auth
+    account = get_object_or_404(Account, user=user, uuid=payload.accountId)
+    group = get_object_or_404(ContactGroup, user=user, uuid=payload.groupId)
+
+    unknown = bulk_send.unknown_fields(payload.subject) | bulk_send.unknown_fields(payload.body)
+    if unknown:
+        raise HttpError(422, f"Unknown merge fields: {', '.join(sorted(unknown))}")
+
+    # With sending disabled the job could never start, so it fails straight away rather than stay queued
+    enabled = getattr(settings, "SMTP_SEND_ENABLED", True)
+    with transaction.atomic():
+        job = BulkSend.objects.create(
+            user=user,
+            account=account,
+            group=group,
+            subject_template=payload.subject,
+            body_template=payload.body,
+            total=group.contacts.count(),
+            status=BulkSendStatus.QUEUED if enabled else BulkSendStatus.FAILED,
+            error="" if enabled else "Sending email is disabled on this server",
+        )
+        if enabled:
+            bulk_send.enqueue(job.pk)
+    return 202, BulkSendOut.from_model(job)
+
+
+@router.get("/", response=list[BulkSendOut])
+def list_bulk_sends(request: AuthenticatedRequest) -> list[BulkSendOut]:
+    jobs = BulkSend.objects.filter(user=request.auth).select_related("account", "group").order_by("-created_at")
+    return [BulkSendOut.from_model(j) for j in jobs]
+
+
+@router.get("/{bulk_send_id}", response=BulkSendOut)
+def get_bulk_send(request: AuthenticatedRequest, bulk_send_id: str) -> BulkSendOut:
+    job = get_object_or_404(BulkSend, user=request.auth, uuid=bulk_send_id)
+    return BulkSendOut.from_model(job)
@@ -0,0 +1,92 @@
+import base64
+import binascii
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from django.utils import timezone
+from ninja import Router
+from ninja.errors import HttpError
+
+from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.schemas.change import ChangeOut, ChangesOut
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.models import ChangeLogEntry
+from penguin_mail.services import changelog
+from penguin_mail.services.changelog import Position
+
+router = Router(auth=JWTAuth())
+
+MAX_CHANGES = 1000
+
+
+def encode_cursor(position: Position) -> str:
+    # The issue time lets an expired cursor be told apart from one with nothing new
+    txid, pk = position
+    raw = f"{txid}.{pk}|{int(timezone.now().timestamp())}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[Position, datetime]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        position, issued = raw.split("|")
+        txid, pk = position.split(".")
+        return (int(txid), int(pk)), datetime.fromtimestamp(int(issued), tz=UTC)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError) as e:
+        raise HttpError(400, "Invalid cursor") from e
+
+
+def cursor_position(cursor: str) -> Position:
+    """The log position ``cursor`` points at; 400 when malformed, 410 when past retention."""
+    position, issued = _decode(cursor)
+    if issued < timezone.now() - changelog.retention():
+        raise HttpError(410, "Cursor expired; reload and start from a new cursor")
+    return position
+
+
+def latest_position(user: Any) -> Position:
+    return changelog.newest(ChangeLogEntry.objects.filter(user=user))
+
+
+def entries_after(user_id: int, position: Position, limit: int) -> list[tuple[Position, str, Any, str]]:
+    """Up to ``limit`` of the user's ``(position, kind, object_id, op)`` entries after ``position``."""
+    rows = changelog.after(position).filter(user_id=user_id).values_list("txid", "id", "kind", "object_id", "op")
+    return [((txid, pk), kind, object_id, op) for txid, pk, kind, object_id, op in rows[:limit]]
+
+
+def collapse(rows: Iterable[tuple[Position, str, Any, str]]) -> list[tuple[Position, str, str, str]]:
+    """
+    ``(position, kind, object_id, op)`` rows reduced to the latest op per
+    object, ordered by that op's position.
+    """
+    latest: dict[tuple[str, str], tuple[Position, str]] = {}
+    for position, kind, object_id, op in rows:
+        key = (kind, str(object_id))
+        latest.pop(key, None)
+        latest[key] = (position, op)
+    return [(position, kind, object_id, op) for (kind, object_id), (position, op) in latest.items()]
+
+
+@router.get("/", response=ChangesOut)
+def list_changes(request: AuthenticatedRequest, since: str | None = None, limit: int = 500) -> ChangesOut:
+    """
+    What changed since ``since``, oldest first, one entry per object.
+
+    Without ``since`` no changes are returned, only a cursor for the current
+    position: fetch it before a full load, then poll with it. A cursor older
+    than the retention window gets 410, and the client must reload in full.
+    """
+    if not since:
+        return ChangesOut(changes=[], cursor=encode_cursor(latest_position(request.auth)), hasMore=False)
+
+    position = cursor_position(since)
+    limit = max(1, min(limit, MAX_CHANGES))
+    rows = entries_after(request.auth.pk, position, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return ChangesOut(
+        changes=[ChangeOut(type=kind, id=object_id, op=op) for _, kind, object_id, op in collapse(rows)],
+        cursor=encode_cursor(rows[-1][0] if rows else position),
+        hasMore=has_more,
+    )
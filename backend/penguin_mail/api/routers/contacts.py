@@ -1,20 +1,26 @@
 from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBase
 from ninja import Router
 from ninja.errors import HttpError
 
 from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.etags import not_modified
 from penguin_mail.api.pagination import paginate_queryset
 from penguin_mail.api.schemas.auth import SuccessOut
 from penguin_mail.api.schemas.contact import ContactCreateIn, ContactOut, ContactUpdateIn
 from penguin_mail.api.shortcuts import get_object_or_404
 from penguin_mail.api.types import AuthenticatedRequest
-from penguin_mail.models import Contact, ContactGroup
+from penguin_mail.models import ChangeScope, Contact, ContactGroup
 
 router = Router(auth=JWTAuth())
 
 
 @router.get("/", response=dict)
-def list_contacts(request: AuthenticatedRequest, page: int = 1, pageSize: int = 50) -> dict:
+def list_contacts(
+    request: AuthenticatedRequest, response: HttpResponse, page: int = 1, pageSize: int = 50
+) -> dict | HttpResponseBase:
+    if unchanged := not_modified(request, response, ChangeScope.CONTACTS):
+        return unchanged
     qs = Contact.objects.filter(user=request.auth).prefetch_related("groups").order_by("name")
     result = paginate_queryset(qs, page, pageSize)
     return {
@@ -1,27 +1,51 @@
 import logging
 import threading
 import uuid as uuid_mod
-from collections.abc import Iterable
-from typing import Any
+from collections.abc import Iterable, Iterator
+from typing import Any, Literal
 
 from django.conf import settings
-from django.db.models import Q, QuerySet
+from django.db import transaction
+from django.db.models import Count, F, Max, QuerySet, Sum
+from django.http import HttpResponse, HttpResponseBase
 from django.utils.timezone import now
 from ninja import Router
 from ninja.errors import HttpError
 
 from penguin_mail.api.auth import JWTAuth
-from penguin_mail.api.pagination import paginate_queryset
+from penguin_mail.api.columnar import email_rows, serialize_emails, serialize_summaries, summary_rows
+from penguin_mail.api.etags import not_modified
+from penguin_mail.api.pagination import encode_cursor, paginate_keyset, paginate_queryset
 from penguin_mail.api.schemas.auth import SuccessOut
 from penguin_mail.api.schemas.email import (
+    AccountCountOut,
+    BulkJobOut,
     BulkOpIn,
     EmailCreateIn,
     EmailOut,
+    EmailQueryIn,
     EmailUpdateIn,
+    FolderCountOut,
+    LabelCountOut,
     LabelOpIn,
+    MailboxCountsOut,
 )
 from penguin_mail.api.types import AuthenticatedRequest
-from penguin_mail.models import Account, Email, Label, Recipient
+from penguin_mail.html_text import html_preview
+from penguin_mail.models import (
+    Account,
+    Attachment,
+    BulkJob,
+    ChangeScope,
+    Email,
+    Label,
+    MailboxCounter,
+    Recipient,
+    SendStatus,
+)
+from penguin_mail.search import rank_emails, snippets
+from penguin_mail.search.query import QuerySyntaxError
+from penguin_mail.services import bulk_ops, counters
 
 router = Router(auth=JWTAuth())
 
@@ -29,32 +53,23 @@ logger = logging.getLogger(__name__)
 
 SYNC_STALENESS_SECONDS = 300  # 5 minutes
 
+# Ids handled per statement by the bulk endpoints
+BULK_CHUNK_SIZE = 500
+
+# Everything an email list or count response is built from
+_LIST_SCOPES = (ChangeScope.EMAILS, ChangeScope.LABELS, ChangeScope.ACCOUNTS)
+
 
 def _base_qs(user: Any) -> QuerySet[Email]:
     return (
         Email.objects.filter(account__user=user)
-        .select_related("account", "reply_to", "forwarded_from")
+        .select_related("account", "reply_to", "forwarded_from", "stored_body")
         .prefetch_related("recipients", "attachments", "labels")
     )
 
 
 def _strip_html(html: str, max_length: int = 200) -> str:
-    import re
-    from html import unescape
-
-    # Strip CDATA sections before tag removal
-    text = re.sub(r"<!\[CDATA\[.*?\]\]>", "", html, flags=re.DOTALL)
-    # Strip comments
-    text = re.sub(r"<!--.*?-->", "", text, flags=re.DOTALL)
-    # Strip style/script blocks
-    text = re.sub(r"<(style|script)[^>]*>.*?</(style|script)>", "", text, flags=re.DOTALL | re.IGNORECASE)
-    # Strip remaining tags
-    text = re.sub(r"<[^>]+>", "", text)
-    text = unescape(text)
-    # Remove zero-width / invisible Unicode characters common in email spam traps
-    text = re.sub(r"[\u034f\u200b-\u200f\u2028\u2029\u00ad\uFEFF]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text[:max_length]
+    return html_preview(html, max_length)
 
 
 def _create_recipients(email: Email, addresses: list[Any], kind: str) -> None:
@@ -68,6 +83,19 @@ def _create_recipients(email: Email, addresses: list[Any], kind: str) -> None:
         )
 
 
+def _link_attachments(email: Email, attachment_ids: list[str], user: Any) -> None:
+    """Attach the caller's staged uploads to ``email``; unknown or already-linked ids are ignored."""
+    if not attachment_ids:
+        return
+    linked = Attachment.objects.filter(uuid__in=attachment_ids, email__isnull=True, uploaded_by=user).update(
+        email=email
+    )
+    if linked:
+        email.has_attachment = True
+        email.size = len(email.body.encode()) + (email.attachments.aggregate(total=Sum("size"))["total"] or 0)
+        email.save(update_fields=["has_attachment", "size"])
+
+
 def _fire_imap_op(op: str, email_obj: Email, folder_map: dict) -> None:
     """Fire an IMAP write operation for a single email in a background thread."""
     from penguin_mail.services.imap import (
@@ -101,19 +129,34 @@ def _fire_imap_op(op: str, email_obj: Email, folder_map: dict) -> None:
         logger.exception("IMAP op %s failed for email %s", op, email_obj.uuid)
 
 
-def _apply_label_op(op: str, emails: QuerySet[Email], label_ids: list[str] | None, user: Any) -> None:
-    """Apply addLabel / removeLabel to a queryset, raising 400 if labelIds is absent."""
-    if not label_ids:
-        raise HttpError(400, f"labelIds is required for {op} operation")
-    labels = Label.objects.filter(uuid__in=label_ids, user=user)
-    method = "add" if op == "addLabel" else "remove"
-    for email in emails:
-        getattr(email.labels, method)(*labels)
+def _sync_stale_accounts(user: Any, account_id: str | None) -> None:
+    """Start a background sync for the listed accounts that have not synced recently."""
+    from penguin_mail.services.sync import sync_all_folders
+
+    accounts_to_check = (
+        Account.objects.filter(uuid=account_id, user=user) if account_id else Account.objects.filter(user=user)
+    )
+    for account in accounts_to_check:
+        needs_sync = (
+            account.last_sync_at is None or (now() - account.last_sync_at).total_seconds() > SYNC_STALENESS_SECONDS
+        )
+        if needs_sync:
+            t = threading.Thread(target=sync_all_folders, args=(account,), daemon=True)
+            t.start()
+
+
+def _page_data(rows: list[dict[str, Any]], view: str, search: str | None) -> list[dict[str, Any]]:
+    # Highlighted excerpts are only computed for the page being returned
+    excerpts = snippets([row["id"] for row in rows], search) if search else {}
+    if view == "full":
+        return serialize_emails(rows, excerpts)
+    return serialize_summaries(rows, excerpts)
 
 
 @router.get("/", response=dict)
 def list_emails(
     request: AuthenticatedRequest,
+    response: HttpResponse,
     folder: str | None = None,
     accountId: str | None = None,
     isRead: bool | None = None,
@@ -124,54 +167,53 @@ def list_emails(
     labelIds: str | None = None,
     page: int = 1,
     pageSize: int = 50,
-) -> dict:
+    cursor: str | None = None,
+    sort: Literal["date", "relevance"] = "date",
+    view: Literal["full", "compact"] = "full",
+) -> dict | HttpResponseBase:
+    if sort == "relevance" and cursor is not None:
+        raise HttpError(400, "sort=relevance cannot be combined with cursor pagination")
     if getattr(settings, "IMAP_SYNC_ENABLED", True):
-        from penguin_mail.services.sync import sync_all_folders
+        _sync_stale_accounts(request.auth, accountId)
+    # A sync started above bumps the version as it saves, so pollers still see new mail
+    if unchanged := not_modified(request, response, *_LIST_SCOPES):
+        return unchanged
+
+    # Both views are serialized column-wise from values() rows, so no select/prefetch is needed
+    qs = Email.objects.filter(account__user=request.auth)
 
-        accounts_to_check = (
-            Account.objects.filter(uuid=accountId, user=request.auth)
-            if accountId
-            else Account.objects.filter(user=request.auth)
+    try:
+        qs = bulk_ops.filter_mailbox(
+            qs,
+            {
+                "folder": folder,
+                "accountId": accountId,
+                "isRead": isRead,
+                "isStarred": isStarred,
+                "hasAttachment": hasAttachment,
+                "search": search,
+                "threadId": threadId,
+                "labelIds": labelIds.split(",") if labelIds else None,
+            },
         )
-        for account in accounts_to_check:
-            needs_sync = (
-                account.last_sync_at is None or (now() - account.last_sync_at).total_seconds() > SYNC_STALENESS_SECONDS
-            )
-            if needs_sync:
-                t = threading.Thread(target=sync_all_folders, args=(account,), daemon=True)
-                t.start()
-
-    qs = _base_qs(request.auth)
-
-    if folder:
-        qs = qs.filter(folder=folder)
-    if accountId:
-        qs = qs.filter(account__uuid=accountId)
-    if isRead is not None:
-        qs = qs.filter(is_read=isRead)
-    if isStarred is not None:
-        qs = qs.filter(is_starred=isStarred)
-    if hasAttachment is not None:
-        qs = qs.filter(has_attachment=hasAttachment)
-    if search:
-        qs = qs.filter(
-            Q(subject__icontains=search)
-            | Q(body__icontains=search)
-            | Q(sender_name__icontains=search)
-            | Q(sender_email__icontains=search)
+    except QuerySyntaxError as e:
+        raise HttpError(400, str(e))
+    if search and sort == "relevance":
+        qs = rank_emails(qs, search).order_by(F("search_rank").desc(), "-created_at", "-id")
+
+    qs = email_rows(qs) if view == "full" else summary_rows(qs)
+    if cursor is not None:
+        # Keyset mode (an empty cursor starts at the newest email): no COUNT, no OFFSET
+        result = paginate_keyset(qs, cursor, pageSize)
+    else:
+        result = paginate_queryset(qs, page, pageSize)
+        more = result["pagination"]["page"] < result["pagination"]["totalPages"]
+        # Lets page-numbered clients switch to cursors from any page; cursors follow date order only
+        by_date = sort == "date"
+        result["pagination"]["nextCursor"] = (
+            encode_cursor(result["items"][-1]) if by_date and more and result["items"] else None
         )
-    if threadId:
-        qs = qs.filter(thread_id=threadId)
-    if labelIds:
-        ids = labelIds.split(",")
-        for lid in ids:
-            qs = qs.filter(labels__uuid=lid)
-
-    result = paginate_queryset(qs, page, pageSize)
-    return {
-        "data": [EmailOut.from_model(e) for e in result["items"]],
-        **result["pagination"],
-    }
+    return {"data": _page_data(result["items"], view, search), **result["pagination"]}
 
 
 @router.post("/", response={201: EmailOut})
@@ -186,65 +228,60 @@ def create_email(request: AuthenticatedRequest, payload: EmailCreateIn) -> tuple
     sender_name = account.display_name or account.name
     sender_email = account.email
 
-    email = Email.objects.create(
-        account=account,
-        subject=payload.subject,
-        body=payload.body,
-        preview=_strip_html(payload.body),
-        sender_name=sender_name,
-        sender_email=sender_email,
-        folder="sent",
-        thread_id=uuid_mod.uuid4(),
-        has_attachment=False,
-    )
-
-    # Handle reply/forward references
-    if payload.replyToId:
-        try:
-            reply_to = Email.objects.get(uuid=payload.replyToId, account__user=user)
-            email.reply_to = reply_to
-            email.thread_id = reply_to.thread_id or reply_to.uuid
-            email.save(update_fields=["reply_to", "thread_id"])
-        except Email.DoesNotExist:
-            pass
-
-    if payload.forwardedFromId:
-        try:
-            fwd = Email.objects.get(uuid=payload.forwardedFromId, account__user=user)
-            email.forwarded_from = fwd
-            email.save(update_fields=["forwarded_from"])
-        except Email.DoesNotExist:
-            pass
-
-    if payload.scheduledSendAt:
-        email.scheduled_send_at = payload.scheduledSendAt
-        email.folder = "scheduled"
-        email.save(update_fields=["scheduled_send_at", "folder"])
-
-    # Create recipients
-    _create_recipients(email, payload.to, "TO")
-    _create_recipients(email, payload.cc, "CC")
-    _create_recipients(email, payload.bcc, "BCC")
-
-    # Send via SMTP (skip for scheduled sends and when SMTP is disabled)
-    if not payload.scheduledSendAt:
-        from django.conf import settings
-
-        if getattr(settings, "SMTP_SEND_ENABLED", True):
-            from penguin_mail.services.smtp import send_email as smtp_send
+    # Immediate sends go to the outbox worker pool; scheduled sends wait for the dispatcher.
+    send_status = ""
+    if getattr(settings, "SMTP_SEND_ENABLED", True):
+        send_status = SendStatus.SCHEDULED if payload.scheduledSendAt else SendStatus.OUTBOX
+
+    with transaction.atomic():
+        email = Email.objects.create(  # type: ignore[misc]  # body is a property
+            account=account,
+            subject=payload.subject,
+            body=payload.body,
+            preview=_strip_html(payload.body),
+            size=len(payload.body.encode()),
+            sender_name=sender_name,
+            sender_email=sender_email,
+            folder="sent",
+            thread_id=uuid_mod.uuid4(),
+            has_attachment=False,
+            send_status=send_status,
+        )
 
+        # Handle reply/forward references
+        if payload.replyToId:
             try:
-                smtp_send(
-                    account=account,
-                    recipients_to=[r.email for r in payload.to],
-                    recipients_cc=[r.email for r in payload.cc],
-                    recipients_bcc=[r.email for r in payload.bcc],
-                    subject=payload.subject,
-                    body_html=payload.body,
-                )
-            except Exception as e:
-                email.delete()
-                raise HttpError(502, f"Failed to send email: {e}")
+                reply_to = Email.objects.get(uuid=payload.replyToId, account__user=user)
+                email.reply_to = reply_to
+                email.thread_id = reply_to.thread_id or reply_to.uuid
+                email.save(update_fields=["reply_to", "thread_id"])
+            except Email.DoesNotExist:
+                pass
+
+        if payload.forwardedFromId:
+            try:
+                fwd = Email.objects.get(uuid=payload.forwardedFromId, account__user=user)
+                email.forwarded_from = fwd
+                email.save(update_fields=["forwarded_from"])
+            except Email.DoesNotExist:
+                pass
+
+        if payload.scheduledSendAt:
+            email.scheduled_send_at = payload.scheduledSendAt
+            email.folder = "scheduled"
+            email.save(update_fields=["scheduled_send_at", "folder"])
+
+        # Create recipients
+        _create_recipients(email, payload.to, "TO")
+        _create_recipients(email, payload.cc, "CC")
+        _create_recipients(email, payload.bcc, "BCC")
+        _link_attachments(email, payload.attachmentIds, user)
+        counters.record_new([email.pk])
+
+        if send_status == SendStatus.OUTBOX:
+            from penguin_mail.services.outbox import enqueue
+
+            enqueue(email.pk)
 
     # Reload with prefetched data
     email = _base_qs(user).get(pk=email.pk)
@@ -262,21 +299,25 @@ def create_draft(request: AuthenticatedRequest, payload: EmailCreateIn) -> tuple
 
     sender_name = account.display_name or account.name
 
-    email = Email.objects.create(
-        account=account,
-        subject=payload.subject,
-        body=payload.body,
-        preview=_strip_html(payload.body),
-        sender_name=sender_name,
-        sender_email=account.email,
-        folder="drafts",
-        is_draft=True,
-        thread_id=uuid_mod.uuid4(),
-    )
+    with transaction.atomic():
+        email = Email.objects.create(  # type: ignore[misc]  # body is a property
+            account=account,
+            subject=payload.subject,
+            body=payload.body,
+            preview=_strip_html(payload.body),
+            size=len(payload.body.encode()),
+            sender_name=sender_name,
+            sender_email=account.email,
+            folder="drafts",
+            is_draft=True,
+            thread_id=uuid_mod.uuid4(),
+        )
 
-    _create_recipients(email, payload.to, "TO")
-    _create_recipients(email, payload.cc, "CC")
-    _create_recipients(email, payload.bcc, "BCC")
+        _create_recipients(email, payload.to, "TO")
+        _create_recipients(email, payload.cc, "CC")
+        _create_recipients(email, payload.bcc, "BCC")
+        _link_attachments(email, payload.attachmentIds, user)
+        counters.record_new([email.pk])
 
     email = _base_qs(user).get(pk=email.pk)
     return 201, EmailOut.from_model(email)
@@ -300,51 +341,103 @@ def _fire_imap_ops_for_queryset(imap_op: str, emails: Iterable[Email]) -> None:
             t.start()
 
 
-@router.post("/bulk", response=SuccessOut)
-def bulk_operation(request: AuthenticatedRequest, payload: BulkOpIn) -> SuccessOut:
-    user = request.auth
-    emails = Email.objects.filter(uuid__in=payload.ids, account__user=user)
-
-    op = payload.operation
-    imap_op = None
-
-    if op == "markRead":
-        emails.update(is_read=True)
-        imap_op = "markRead"
-    elif op == "markUnread":
-        emails.update(is_read=False)
-        imap_op = "markUnread"
-    elif op == "star":
-        emails.update(is_starred=True)
-    elif op == "unstar":
-        emails.update(is_starred=False)
-    elif op == "archive":
-        emails.update(folder="archive")
-        imap_op = "archive"
-    elif op == "delete":
-        emails.update(folder="trash")
-        imap_op = "delete"
-    elif op == "deletePermanent":
-        email_list = list(emails)
-        emails.delete()
-        # For permanent delete we already consumed the queryset; fire IMAP ops directly
-        _fire_imap_ops_for_queryset("deletePermanent", email_list)
-        return SuccessOut()
-    elif op == "move":
-        if not payload.folder:
-            raise HttpError(400, "folder is required for move operation")
-        emails.update(folder=payload.folder)
-        if payload.folder == "spam":
-            imap_op = "moveSpam"
-    elif op in ("addLabel", "removeLabel"):
-        _apply_label_op(op, emails, payload.labelIds, user)
-
-    if imap_op:
-        _fire_imap_ops_for_queryset(imap_op, emails)
-
+def bulk_chunks(ids: list[str]) -> Iterator[list[str]]:
+    """``ids`` in slices of ``BULK_CHUNK_SIZE``, keeping each ``IN`` list well under SQLite's bound-variable limit."""
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        yield ids[start : start + BULK_CHUNK_SIZE]
+
+
+def validate_bulk_op(payload: BulkOpIn) -> None:
+    """Reject a bulk operation missing the arguments it needs, before anything is changed."""
+    if payload.operation == "move" and not payload.folder:
+        raise HttpError(400, "folder is required for move operation")
+    if payload.operation in ("addLabel", "removeLabel") and not payload.labelIds:
+        raise HttpError(400, f"labelIds is required for {payload.operation} operation")
+
+
+@router.post("/bulk", response={200: SuccessOut, 202: BulkJobOut})
+def bulk_operation(request: AuthenticatedRequest, payload: BulkOpIn) -> SuccessOut | tuple[int, BulkJobOut]:
+    """
+    Apply an operation to the emails ``payload.ids``, or queue a background
+    job applying it to every email matching ``payload.query``.
+    """
+    validate_bulk_op(payload)
+    if (payload.ids is None) == (payload.query is None):
+        raise HttpError(400, "Exactly one of ids or query is required")
+    if payload.query is not None:
+        return 202, BulkJobOut.from_model(_queue_bulk_job(request.auth, payload, payload.query))
+    # All chunks commit together, so a failure part way leaves nothing half-applied
+    with transaction.atomic():
+        for chunk in bulk_chunks(payload.ids or []):
+            apply_bulk_operation(
+                request.auth, Email.objects.filter(uuid__in=chunk, account__user=request.auth), payload
+            )
     return SuccessOut()
 
 
+def _queue_bulk_job(user: Any, payload: BulkOpIn, query: EmailQueryIn) -> BulkJob:
+    filters = query.model_dump(exclude_none=True)
+    try:
+        matching = bulk_ops.filter_mailbox(Email.objects.filter(account__user=user), filters)
+    except QuerySyntaxError as e:
+        raise HttpError(400, str(e))
+    # Bounded by the newest match now, so mail arriving while the job runs is left alone
+    stats = matching.aggregate(total=Count("pk"), newest=Max("pk"))
+    with transaction.atomic():
+        job = BulkJob.objects.create(
+            user=user,
+            operation=payload.operation,
+            folder=payload.folder or "",
+            label_ids=payload.labelIds or [],
+            query=filters,
+            total=stats["total"],
+            max_email_id=stats["newest"] or 0,
+        )
+        bulk_ops.enqueue(job.pk)
+    return job
+
+
+def apply_bulk_operation(user: Any, emails: QuerySet[Email], payload: BulkOpIn) -> None:
+    """Apply ``payload.operation`` to ``emails`` (already scoped to ``user``), ignoring ``payload.ids``."""
+    targets = bulk_ops.apply(user, emails, payload.operation, payload.folder, payload.labelIds)
+    if imap_op := bulk_ops.imap_op(payload.operation, payload.folder):
+        _fire_imap_ops_for_queryset(imap_op, targets)
+
+
+@router.get("/counts", response=MailboxCountsOut)
+def email_counts(request: AuthenticatedRequest, response: HttpResponse) -> MailboxCountsOut | HttpResponseBase:
+    if unchanged := not_modified(request, response, *_LIST_SCOPES):
+        return unchanged
+    return mailbox_counts(request.auth)
+
+
+def mailbox_counts(user: Any) -> MailboxCountsOut:
+    # One indexed read of the materialized counters instead of a COUNT(*) per folder
+    rows = (
+        MailboxCounter.objects.filter(account__user=user)
+        .exclude(total=0)
+        .order_by("account_id", "folder", "label_id")
+        .values_list("account__uuid", "folder", "label__uuid", "total", "unread")
+    )
+    accounts: dict[str, list[int]] = {}
+    labels: dict[str, list[int]] = {}
+    folders = []
+    for account_id, folder, label_id, total, unread in rows:
+        if label_id:
+            # Labels span accounts, so their counts are summed
+            bucket = labels.setdefault(str(label_id), [0, 0])
+        else:
+            folders.append(FolderCountOut(accountId=str(account_id), folder=folder, total=total, unread=unread))
+            bucket = accounts.setdefault(str(account_id), [0, 0])
+        bucket[0] += total
+        bucket[1] += unread
+    return MailboxCountsOut(
+        accounts=[AccountCountOut(accountId=k, total=t, unread=u) for k, (t, u) in accounts.items()],
+        folders=folders,
+        labels=[LabelCountOut(labelId=k, total=t, unread=u) for k, (t, u) in labels.items()],
+    )
+
+
 # Parameterized routes after literal ones
 @router.get("/{email_id}", response=EmailOut)
 def get_email(request: AuthenticatedRequest, email_id: str) -> EmailOut:
@@ -369,15 +462,30 @@ def update_email(request: AuthenticatedRequest, email_id: str, payload: EmailUpd
         email.is_starred = payload.isStarred
     if payload.folder is not None:
         email.folder = payload.folder
+        # Moving a scheduled email out of the scheduled folder cancels the send
+        if email.send_status == SendStatus.SCHEDULED and payload.folder != "scheduled":
+            email.send_status = ""
     if payload.snoozeUntil is not None:
         email.snooze_until = payload.snoozeUntil
     if payload.snoozedFromFolder is not None:
         email.snoozed_from_folder = payload.snoozedFromFolder
-    email.save()
+    with counters.tracking([email.pk]):
+        # Only flag and placement fields change here, so the search document is left alone
+        email.save(
+            update_fields=[
+                "is_read",
+                "is_starred",
+                "folder",
+                "send_status",
+                "snooze_until",
+                "snoozed_from_folder",
+                "updated_at",
+            ]
+        )
 
-    if payload.labels is not None:
-        label_objs = Label.objects.filter(uuid__in=payload.labels, user=user)
-        email.labels.set(label_objs)
+        if payload.labels is not None:
+            label_objs = Label.objects.filter(uuid__in=payload.labels, user=user)
+            email.labels.set(label_objs)
 
     email = _base_qs(user).get(pk=email.pk)
     return EmailOut.from_model(email)
@@ -391,8 +499,9 @@ def delete_email(request: AuthenticatedRequest, email_id: str) -> SuccessOut:
     except Email.DoesNotExist:
         raise HttpError(404, "Not found")
 
-    email.folder = "trash"
-    email.save(update_fields=["folder"])
+    with counters.tracking([email.pk]):
+        email.folder = "trash"
+        email.save(update_fields=["folder"])
     return SuccessOut()
 
 
@@ -404,7 +513,8 @@ def delete_email_permanent(request: AuthenticatedRequest, email_id: str) -> Succ
     except Email.DoesNotExist:
         raise HttpError(404, "Not found")
 
-    email.delete()
+    with counters.tracking([email.pk]):
+        email.delete()
     return SuccessOut()
 
 
@@ -417,7 +527,8 @@ def add_labels(request: AuthenticatedRequest, email_id: str, payload: LabelOpIn)
         raise HttpError(404, "Not found")
 
     labels = Label.objects.filter(uuid__in=payload.labelIds, user=user)
-    email.labels.add(*labels)
+    with counters.tracking([email.pk]):
+        email.labels.add(*labels)
     return SuccessOut()
 
 
@@ -430,5 +541,6 @@ def remove_labels(request: AuthenticatedRequest, email_id: str, payload: LabelOp
         raise HttpError(404, "Not found")
 
     labels = Label.objects.filter(uuid__in=payload.labelIds, user=user)
-    email.labels.remove(*labels)
+    with counters.tracking([email.pk]):
+        email.labels.remove(*labels)
     return SuccessOut()
@@ -0,0 +1,136 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from ninja import Router
+from ninja.errors import HttpError
+
+from penguin_mail.api.auth import JWTAuth, StreamTicketAuth, create_stream_ticket
+from penguin_mail.api.columnar import serialize_summaries, summary_rows
+from penguin_mail.api.renderers import dumps
+from penguin_mail.api.routers.changes import (
+    MAX_CHANGES,
+    collapse,
+    cursor_position,
+    encode_cursor,
+    entries_after,
+    latest_position,
+)
+from penguin_mail.api.routers.emails import mailbox_counts
+from penguin_mail.api.schemas import StreamTicketOut
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.models import ChangeKind, ChangeOp, Email, FolderType
+from penguin_mail.services.changelog import Position
+from penguin_mail.services.events import Entry, broker
+
+router = Router(auth=JWTAuth())
+
+# How long a client waits before reconnecting after the stream drops
+RETRY_MS = 3000
+
+# Emails created in these folders were written by the user, not received
+_OUTGOING = (FolderType.DRAFTS, FolderType.SENT, FolderType.SCHEDULED)
+
+_FLAG_KEYS = ("id", "isRead", "isStarred", "folder", "labels")
+
+
+def keepalive_interval() -> float:
+    return float(getattr(settings, "EVENTS_KEEPALIVE_SECONDS", 15.0))
+
+
+def _event(name: str, data: Any, event_id: str | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {name}\ndata: {dumps(data).decode()}\n\n"
+
+
+def _render(user: Any, entries: list[Entry]) -> str:
+    """The events for one batch of the user's change log entries."""
+    changes = collapse(entries)
+    out = [
+        _event("change", {"type": kind, "id": object_id, "op": op}, encode_cursor(position))
+        for position, kind, object_id, op in changes
+    ]
+    emails = {object_id: op for _, kind, object_id, op in changes if kind == ChangeKind.EMAIL}
+    live = [object_id for object_id, op in emails.items() if op != ChangeOp.DELETED]
+    if live:
+        rows = summary_rows(Email.objects.filter(account__user=user, uuid__in=live).order_by("created_at", "id"))
+        for summary in serialize_summaries(list(rows)):
+            op = emails[summary["id"]]
+            if op == ChangeOp.CREATED and summary["folder"] not in _OUTGOING:
+                out.append(_event("new-mail", summary))
+            elif op == ChangeOp.UPDATED:
+                out.append(_event("flags", {key: summary[key] for key in _FLAG_KEYS}))
+    if emails:
+        out.append(_event("counts", mailbox_counts(user).model_dump()))
+    return "".join(out)
+
+
+async def _stream(user: Any, position: Position) -> AsyncIterator[str]:
+    # Subscribe before replaying so nothing written in between is missed; positions drop the overlap
+    queue = await broker.subscribe(user.pk)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            backlog = await sync_to_async(entries_after)(user.pk, position, MAX_CHANGES)
+            if backlog:
+                position = backlog[-1][0]
+                yield await sync_to_async(_render)(user, backlog)
+            if len(backlog) < MAX_CHANGES:
+                break
+        while True:
+            try:
+                batch = await asyncio.wait_for(queue.get(), keepalive_interval())
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if batch is None:
+                # Dropped for falling behind; the client reconnects and resumes from Last-Event-ID
+                return
+            fresh = [entry for entry in batch if entry[0] > position]
+            if fresh:
+                position = fresh[-1][0]
+                yield await sync_to_async(_render)(user, fresh)
+    finally:
+        broker.unsubscribe(user.pk, queue)
+
+
+@router.post("/ticket", response=StreamTicketOut)
+def create_ticket(request: AuthenticatedRequest) -> StreamTicketOut:
+    """
+    A ticket that opens one event stream as ``?ticket=``. EventSource cannot
+    set headers, and an access token in the URL would end up in server and
+    proxy logs and browser history.
+    """
+    ticket, expires_in = create_stream_ticket(request.auth)
+    return StreamTicketOut(ticket=ticket, expires_in=expires_in)
+
+
+# EventSource cannot set headers, so a stream ticket may come as ?ticket= instead
+@router.get("/", auth=[JWTAuth(), StreamTicketAuth()])
+async def stream_events(request: AuthenticatedRequest, since: str | None = None) -> StreamingHttpResponse:
+    """
+    Server-sent events for the caller's mailbox: ``change`` for every change
+    log entry (its id is a ``/changes`` cursor), ``new-mail`` with the
+    summary of each received email, ``flags`` when an email's flags, folder
+    or labels change, and ``counts`` after any email change.
+
+    Starts after ``Last-Event-ID`` (sent by browsers on reconnect) or
+    ``since``, else at the current position.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A sync worker would be held for the life of the stream
+        raise HttpError(501, "Event streams need the ASGI server")
+    cursor = request.headers.get("Last-Event-ID") or since
+    if cursor:
+        position = cursor_position(cursor)
+    else:
+        position = await sync_to_async(latest_position)(request.auth)
+    response = StreamingHttpResponse(_stream(request.auth, position), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Keep reverse proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
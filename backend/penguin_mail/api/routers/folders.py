@@ -1,18 +1,22 @@
+from django.http import HttpResponse, HttpResponseBase
 from ninja import Router
 from ninja.errors import HttpError
 
 from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.etags import not_modified
 from penguin_mail.api.schemas.auth import SuccessOut
 from penguin_mail.api.schemas.folder import FolderCreateIn, FolderOut, FolderUpdateIn
 from penguin_mail.api.shortcuts import get_object_or_404
 from penguin_mail.api.types import AuthenticatedRequest
-from penguin_mail.models import CustomFolder
+from penguin_mail.models import ChangeScope, CustomFolder
 
 router = Router(auth=JWTAuth())
 
 
 @router.get("/", response=list[FolderOut])
-def list_folders(request: AuthenticatedRequest) -> list[FolderOut]:
+def list_folders(request: AuthenticatedRequest, response: HttpResponse) -> list[FolderOut] | HttpResponseBase:
+    if unchanged := not_modified(request, response, ChangeScope.FOLDERS):
+        return unchanged
     folders = CustomFolder.objects.filter(user=request.auth).select_related("parent").order_by("order", "name")
     return [FolderOut.from_model(f) for f in folders]
 
@@ -1,17 +1,21 @@
+from django.http import HttpResponse, HttpResponseBase
 from ninja import Router
 
 from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.etags import not_modified
 from penguin_mail.api.schemas.auth import SuccessOut
 from penguin_mail.api.schemas.label import LabelCreateIn, LabelOut, LabelUpdateIn
 from penguin_mail.api.shortcuts import get_object_or_404
 from penguin_mail.api.types import AuthenticatedRequest
-from penguin_mail.models import Label
+from penguin_mail.models import ChangeScope, Label
 
 router = Router(auth=JWTAuth())
 
 
 @router.get("/", response=list[LabelOut])
-def list_labels(request: AuthenticatedRequest) -> list[LabelOut]:
+def list_labels(request: AuthenticatedRequest, response: HttpResponse) -> list[LabelOut] | HttpResponseBase:
+    if unchanged := not_modified(request, response, ChangeScope.LABELS):
+        return unchanged
     labels = Label.objects.filter(user=request.auth).order_by("name")
     return [LabelOut.from_model(l) for l in labels]
 
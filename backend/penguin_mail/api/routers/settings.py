@@ -1,7 +1,9 @@
+from django.http import HttpResponse, HttpResponseBase
 from ninja import Router
 from ninja.errors import HttpError
 
 from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.etags import not_modified
 from penguin_mail.api.schemas.auth import SuccessOut
 from penguin_mail.api.schemas.settings import (
     BlockAddressIn,
@@ -13,7 +15,7 @@ from penguin_mail.api.schemas.settings import (
     SignatureUpdateIn,
 )
 from penguin_mail.api.types import AuthenticatedRequest
-from penguin_mail.models import BlockedAddress, FilterRule, KeyboardShortcut, Signature, UserSettings
+from penguin_mail.models import BlockedAddress, ChangeScope, FilterRule, KeyboardShortcut, Signature, UserSettings
 
 router = Router(auth=JWTAuth())
 
@@ -24,7 +26,9 @@ router = Router(auth=JWTAuth())
 
 
 @router.get("/", response=SettingsOut)
-def get_settings(request: AuthenticatedRequest) -> SettingsOut:
+def get_settings(request: AuthenticatedRequest, response: HttpResponse) -> SettingsOut | HttpResponseBase:
+    if unchanged := not_modified(request, response, ChangeScope.SETTINGS):
+        return unchanged
     return SettingsOut.from_user(request.auth)
 
 
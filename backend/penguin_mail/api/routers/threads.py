@@ -0,0 +1,167 @@
+from collections.abc import Sequence
+from typing import Any
+from uuid import UUID
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, HttpResponseBase
+from ninja import Router
+from ninja.errors import HttpError
+
+from penguin_mail.api.auth import JWTAuth
+from penguin_mail.api.columnar import serialize_summaries, summary_rows
+from penguin_mail.api.etags import not_modified
+from penguin_mail.api.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from penguin_mail.api.routers.emails import apply_bulk_operation, bulk_chunks, validate_bulk_op
+from penguin_mail.api.schemas.auth import SuccessOut
+from penguin_mail.api.schemas.email import BulkOpIn
+from penguin_mail.api.types import AuthenticatedRequest
+from penguin_mail.models import ChangeScope, Email, FolderType
+
+router = Router(auth=JWTAuth())
+
+# Everything a thread list is built from, as for email lists
+_LIST_SCOPES = (ChangeScope.EMAILS, ChangeScope.LABELS, ChangeScope.ACCOUNTS)
+
+# A message without a thread id is its own thread; replies to it carry its uuid as their thread id
+THREAD_KEY = Coalesce("thread_id", "uuid")
+
+# Trashed and spam messages only count toward a thread when listing those folders
+_HIDDEN = (FolderType.TRASH, FolderType.SPAM)
+
+# Archiving or moving a conversation leaves the user's own messages where they are
+_OUTGOING = (FolderType.DRAFTS, FolderType.SENT, FolderType.SCHEDULED)
+
+
+def in_threads(qs: QuerySet[Email], keys: Sequence[Any]) -> QuerySet[Email]:
+    """The messages of ``qs`` in the threads ``keys``, found through the thread_id and uuid indexes."""
+    return qs.filter(Q(thread_id__in=keys) | Q(thread_id__isnull=True, uuid__in=keys))
+
+
+def _in_thread(qs: QuerySet[Email], key: Any) -> QuerySet[Email]:
+    """``in_threads`` for one thread, typically an ``OuterRef`` from a subquery."""
+    return qs.filter(Q(thread_id=key) | Q(thread_id__isnull=True, uuid=key))
+
+
+def _heads(messages: QuerySet[Email], threads: QuerySet[Email] | None) -> QuerySet[Any]:
+    """
+    The latest message of each thread of ``messages`` (with a message in
+    ``threads``), newest first. Threads are paged on their latest message's
+    own (created_at, id) in WHERE, so a page reads the mailbox down to its
+    last thread instead of grouping all of it.
+    """
+    newer = _in_thread(messages, OuterRef("key")).filter(
+        Q(created_at__gt=OuterRef("created_at")) | Q(created_at=OuterRef("created_at"), id__gt=OuterRef("id"))
+    )
+    heads = messages.annotate(key=THREAD_KEY).filter(~Exists(newer))
+    if threads is not None:
+        heads = heads.filter(Exists(_in_thread(threads, OuterRef("key"))))
+    return heads.order_by("-created_at", "-id")
+
+
+def _thread_rows(messages: QuerySet[Email], page: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Thread rows for one page of ``_heads``, in the same order. A thread
+    deleted since the page was read is left out.
+    """
+    keys = [head["key"] for head in page]
+    # Every message of the page's threads, oldest first, for counts, participants and the latest message
+    members: dict[UUID, list[tuple[int, str, str, bool, bool]]] = {key: [] for key in keys}
+    rows = (
+        in_threads(messages, keys)
+        .annotate(key=THREAD_KEY)
+        .order_by("created_at", "id")
+        .values_list("key", "id", "sender_name", "sender_email", "is_read", "has_attachment")
+    )
+    for key, pk, name, address, is_read, has_attachment in rows:
+        members[key].append((pk, name, address, is_read, has_attachment))
+
+    heads = [thread[-1][0] for thread in members.values() if thread]
+    latest_rows = list(summary_rows(messages.filter(pk__in=heads)))
+    latest = {row["id"]: summary for row, summary in zip(latest_rows, serialize_summaries(latest_rows), strict=True)}
+
+    owners = {pk: key for key, thread in members.items() for pk, *_ in thread}
+    labels: dict[UUID, dict[str, None]] = {key: {} for key in keys}
+    links = Email.labels.through.objects.filter(email_id__in=list(owners)).order_by("pk")
+    for email_id, label_uuid in links.values_list("email_id", "label__uuid"):
+        labels[owners[email_id]][str(label_uuid)] = None
+
+    out = []
+    for head in page:
+        thread = members[head["key"]]
+        if not thread or (last := latest.get(thread[-1][0])) is None:
+            continue
+        participants: dict[str, str] = {}
+        for _, name, address, _, _ in thread:
+            participants.setdefault(address.lower(), name)
+        out.append(
+            {
+                "id": str(head["key"]),
+                "subject": last["subject"],
+                "date": head["created_at"],
+                "messageCount": len(thread),
+                "unreadCount": sum(not is_read for *_, is_read, _ in thread),
+                "hasAttachment": any(has_attachment for *_, has_attachment in thread),
+                "participants": [{"name": name, "email": address} for address, name in participants.items()],
+                "labels": list(labels[head["key"]]),
+                "latest": last,
+            }
+        )
+    return out
+
+
+@router.get("/", response=dict)
+def list_threads(
+    request: AuthenticatedRequest,
+    response: HttpResponse,
+    folder: str | None = None,
+    accountId: str | None = None,
+    labelId: str | None = None,
+    cursor: str = "",
+    pageSize: int = 50,
+) -> dict | HttpResponseBase:
+    """
+    One row per conversation with a message matching the filters, by latest
+    activity: counts, participants and labels cover the whole thread.
+    Keyset-paginated like ``GET /emails?cursor=``.
+    """
+    if unchanged := not_modified(request, response, *_LIST_SCOPES):
+        return unchanged
+
+    messages = Email.objects.filter(account__user=request.auth)
+    if folder not in _HIDDEN:
+        messages = messages.exclude(folder__in=_HIDDEN)
+    threads = messages
+    if folder:
+        threads = threads.filter(folder=folder)
+    if accountId:
+        threads = threads.filter(account__uuid=accountId)
+    if labelId:
+        threads = threads.filter(labels__uuid=labelId)
+
+    page_size = max(1, min(pageSize, MAX_PAGE_SIZE))
+    heads = _heads(messages, None if threads is messages else threads)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        heads = heads.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    page = list(heads.values("key", "id", "created_at")[: page_size + 1])
+    has_more = len(page) > page_size
+    page = page[:page_size]
+    next_cursor = encode_cursor(page[-1]) if has_more else None
+    return {"data": _thread_rows(messages, page), "pageSize": page_size, "nextCursor": next_cursor}
+
+
+@router.post("/bulk", response=SuccessOut)
+def bulk_thread_operation(request: AuthenticatedRequest, payload: BulkOpIn) -> SuccessOut:
+    """Apply a bulk email operation to every message of the threads ``payload.ids``."""
+    validate_bulk_op(payload)
+    if payload.ids is None or payload.query is not None:
+        raise HttpError(400, "ids is required for thread operations")
+    with transaction.atomic():
+        for chunk in bulk_chunks(payload.ids):
+            emails = in_threads(Email.objects.filter(account__user=request.auth), chunk)
+            if payload.operation in ("archive", "move"):
+                emails = emails.exclude(folder__in=_OUTGOING)
+            apply_bulk_operation(request.auth, emails, payload)
+    return SuccessOut()
@@ -1,6 +1,7 @@
 from .account import *  # noqa: F403
 from .attachment import *  # noqa: F403
 from .auth import *  # noqa: F403
+from .change import *  # noqa: F403
 from .contact import *  # noqa: F403
 from .email import *  # noqa: F403
 from .folder import *  # noqa: F403
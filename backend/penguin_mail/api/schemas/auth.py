@@ -23,5 +23,10 @@ class RefreshOut(Schema):
     token_type: str = "Bearer"
 
 
+class StreamTicketOut(Schema):
+    ticket: str
+    expires_in: int
+
+
 class SuccessOut(Schema):
     success: bool = True
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from ninja import Schema
+
+
+class BulkSendIn(Schema):
+    accountId: str
+    groupId: str
+    subject: str = ""
+    body: str = ""
+
+
+class BulkSendOut(Schema):
+    id: str
+    accountId: str
+    groupId: str | None
+    status: str
+    total: int
+    sent: int
+    failed: int
+    error: str
+    createdAt: datetime
+    updatedAt: datetime
+
+    @staticmethod
+    def from_model(job) -> "BulkSendOut":
+        return BulkSendOut(
+            id=str(job.uuid),
+            accountId=str(job.account.uuid),
+            groupId=str(job.group.uuid) if job.group else None,
+            status=job.status,
+            total=job.total,
+            sent=job.sent_count,
+            failed=job.failed_count,
+            error=job.error,
+            createdAt=job.created_at,
+            updatedAt=job.updated_at,
+        )
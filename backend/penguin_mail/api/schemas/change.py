@@ -0,0 +1,13 @@
+from ninja import Schema
+
+
+class ChangeOut(Schema):
+    type: str  # email | label | folder | contact
+    id: str
+    op: str  # created | updated | deleted
+
+
+class ChangesOut(Schema):
+    changes: list[ChangeOut]
+    cursor: str
+    hasMore: bool
@@ -56,6 +56,7 @@ class EmailOut(Schema):
     scheduledSendAt: datetime | None = None
     snoozeUntil: datetime | None = None
     snoozedFromFolder: str | None = None
+    sendStatus: str = ""
 
     class Config:
         json_schema_extra = {"properties": {"from": {"$ref": "#/$defs/EmailAddressOut"}}}
@@ -112,9 +113,42 @@ class EmailOut(Schema):
             scheduledSendAt=email.scheduled_send_at,
             snoozeUntil=email.snooze_until,
             snoozedFromFolder=email.snoozed_from_folder,
+            sendStatus=email.send_status,
         )
 
 
+class EmailSummaryOut(Schema):
+    """Body-free list row (``view=compact``); the full email comes from GET /emails/{id}."""
+
+    id: str
+    accountId: str
+    from_: EmailAddressOut = Field(serialization_alias="from")
+    subject: str
+    preview: str
+    date: datetime
+    isRead: bool
+    isStarred: bool
+    isDraft: bool
+    hasAttachment: bool
+    attachmentCount: int
+    folder: str
+    labels: list[str] = []
+    threadId: str | None = None
+    snippet: str | None = None
+
+    class Config:
+        json_schema_extra = {"properties": {"from": {"$ref": "#/$defs/EmailAddressOut"}}}
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler):
+        d = handler(self)
+        if "from_" in d:
+            d["from"] = d.pop("from_")
+        if d.get("snippet") is None:
+            d.pop("snippet", None)
+        return d
+
+
 class EmailAddressIn(Schema):
     name: str = ""
     email: str
@@ -130,6 +164,7 @@ class EmailCreateIn(Schema):
     replyToId: str | None = None
     forwardedFromId: str | None = None
     scheduledSendAt: datetime | None = None
+    attachmentIds: list[str] = []
 
 
 class EmailUpdateIn(Schema):
@@ -155,12 +190,74 @@ BulkOperation = Literal[
 ]
 
 
+class EmailQueryIn(Schema):
+    """The ``GET /emails`` filters, with ``labelIds`` as a list."""
+
+    folder: str | None = None
+    accountId: str | None = None
+    isRead: bool | None = None
+    isStarred: bool | None = None
+    hasAttachment: bool | None = None
+    search: str | None = None
+    threadId: str | None = None
+    labelIds: list[str] | None = None
+
+
 class BulkOpIn(Schema):
-    ids: list[str]
+    ids: list[str] | None = None
+    query: EmailQueryIn | None = None
     operation: BulkOperation
     folder: ValidFolder | None = None
     labelIds: list[str] | None = None
 
 
+class BulkJobOut(Schema):
+    id: str
+    operation: str
+    status: str
+    total: int
+    processed: int
+    error: str
+    createdAt: datetime
+    updatedAt: datetime
+
+    @staticmethod
+    def from_model(job) -> "BulkJobOut":
+        return BulkJobOut(
+            id=str(job.uuid),
+            operation=job.operation,
+            status=job.status,
+            total=job.total,
+            processed=job.processed_count,
+            error=job.error,
+            createdAt=job.created_at,
+            updatedAt=job.updated_at,
+        )
+
+
 class LabelOpIn(Schema):
     labelIds: list[str]
+
+
+class CountOut(Schema):
+    total: int
+    unread: int
+
+
+class AccountCountOut(CountOut):
+    accountId: str
+
+
+class FolderCountOut(CountOut):
+    accountId: str
+    folder: str
+
+
+class LabelCountOut(CountOut):
+    labelId: str
+
+
+class MailboxCountsOut(Schema):
+    accounts: list[AccountCountOut]
+    folders: list[FolderCountOut]
+    labels: list[LabelCountOut]
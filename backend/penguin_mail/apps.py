@@ -5,3 +5,7 @@ class PenguinMailConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "penguin_mail"
     verbose_name = "Penguin Mail App"
+
+    def ready(self) -> None:
+        from penguin_mail.search import signals  # noqa: F401
+        from penguin_mail.services import archive, changelog, versions  # noqa: F401
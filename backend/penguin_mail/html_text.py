@@ -0,0 +1,167 @@
+"""
+Single-pass HTML-to-text extraction for previews and plaintext alternatives.
+
+One ``html.parser`` pass replaces the chains of regex substitutions previously
+duplicated across compose, sync and SMTP. The document is fed to the parser
+as is: attributes, inline ``data:`` URIs included, are dropped unread as each
+tag is handled, and preview extraction stops as soon as enough text has been
+collected.
+"""
+
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+PREVIEW_LENGTH = 200
+
+# Elements whose text content is never shown
+_SKIPPED = frozenset({"script", "style", "title", "template"})
+
+# Elements that start a new line in the plaintext rendering
+_BLOCKS = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "tr",
+        "ul",
+    }
+)
+
+# Zero-width / invisible characters common in email spam traps
+_INVISIBLE = dict.fromkeys(map(ord, "\u034f\u200b\u200c\u200d\u200e\u200f\u2028\u2029\u00ad\ufeff"))
+
+# Tag-shaped text the parser reported as data (malformed markup such as "<scr\0ipt>")
+_TAG_RESIDUE = re.compile(r"<[^>]+>")
+
+
+class _PreviewFullError(Exception):
+    """Raised from inside the parser once a preview has collected enough text."""
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, limit: int | None, lines: bool) -> None:
+        # Character references are decoded per run of text, after tag residue is removed
+        super().__init__(convert_charrefs=False)
+        self.limit = limit
+        self.lines = lines
+        self.parts: list[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.pending_space = False
+        self.pending_newlines = 0
+        self.run: list[str] = []  # raw text since the last tag, references still encoded
+
+    def handle_starttag(self, tag: str, _attrs: list) -> None:
+        # Attribute values (such as <img src="data:...">) never reach the text, so they are not kept
+        self.flush()
+        if tag in _SKIPPED:
+            self.skip_depth += 1
+        elif tag == "br":
+            self._break(1)
+        elif tag in _BLOCKS:
+            self._break(2 if tag == "p" else 1)
+
+    def handle_startendtag(self, tag: str, _attrs: list) -> None:
+        self.flush()
+        if tag == "br" or tag in _BLOCKS:
+            self._break(1)
+
+    def handle_endtag(self, tag: str) -> None:
+        self.flush()
+        if tag in _SKIPPED:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in _BLOCKS:
+            self._break(2 if tag == "p" else 1)
+
+    def _break(self, newlines: int) -> None:
+        self.pending_space = True
+        self.pending_newlines = max(self.pending_newlines, newlines)
+
+    def handle_data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.run.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self.handle_data(f"&#{name};")
+
+    def flush(self) -> None:
+        """Add the text run collected since the last tag: tag residue removed first, then references decoded."""
+        if not self.run:
+            return
+        data = "".join(self.run)
+        self.run.clear()
+        if "<" in data:
+            data = _TAG_RESIDUE.sub("", data)
+        self._add_text(unescape(data))
+
+    def _add_text(self, data: str) -> None:
+        data = data.translate(_INVISIBLE)
+        if not data:
+            return
+        if data[0].isspace():
+            self.pending_space = True
+        words = data.split()
+        for word in words:
+            if self.parts and self.pending_space:
+                sep = "\n" * self.pending_newlines if self.lines and self.pending_newlines else " "
+                self.parts.append(sep)
+                self.length += len(sep)
+            self.parts.append(word)
+            self.length += len(word)
+            self.pending_space = True
+            self.pending_newlines = 0
+        if words:
+            self.pending_space = data[-1].isspace()
+        if self.limit is not None and self.length >= self.limit:
+            raise _PreviewFullError
+
+    def text(self) -> str:
+        text = "".join(self.parts)
+        return text if self.limit is None else text[: self.limit]
+
+
+def _extract(html: str, limit: int | None, lines: bool) -> str:
+    parser = _TextExtractor(limit, lines)
+    try:
+        parser.feed(html)
+        parser.close()
+        parser.flush()
+    except _PreviewFullError:
+        pass
+    return parser.text()
+
+
+def html_preview(html: str, max_length: int = PREVIEW_LENGTH) -> str:
+    """Single-line visible text of ``html``, whitespace-collapsed and cut to ``max_length``."""
+    return _extract(html, max_length, lines=False)
+
+
+def html_to_text(html: str) -> str:
+    """Full plaintext rendering of ``html`` with block elements and <br> on their own lines."""
+    return _extract(html, None, lines=True)
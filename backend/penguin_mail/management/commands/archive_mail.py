@@ -0,0 +1,20 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from penguin_mail.services.archive import archive_old_mail
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the bodies of emails older than ARCHIVE_AFTER_DAYS into compressed per-account archive files, "
+        "and delete archive files no email uses any more."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--days", type=int, default=None, help="Archive emails older than this many days.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Bodies per archive file.")
+
+    def handle(self, *_args: Any, **options: Any) -> None:
+        moved = archive_old_mail(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(f"Archived {moved} email bodies")
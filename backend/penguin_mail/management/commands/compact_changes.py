@@ -0,0 +1,12 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from penguin_mail.services.changelog import compact
+
+
+class Command(BaseCommand):
+    help = "Drop change log entries past CHANGE_LOG_RETENTION_DAYS or superseded by a later entry for the same object."
+
+    def handle(self, *_args: Any, **_options: Any) -> None:
+        self.stdout.write(f"Removed {compact()} change log entries")
@@ -0,0 +1,92 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.utils import load_backend
+
+SOURCE = "sqlite_import"
+
+
+def _app_models() -> list[type[models.Model]]:
+    """penguin_mail's tables, link tables included, minus links to Django's own groups and permissions."""
+    return [
+        model
+        for model in apps.get_app_config("penguin_mail").get_models(include_auto_created=True)
+        if all(
+            field.related_model is None or field.related_model._meta.app_label == "penguin_mail"
+            for field in model._meta.concrete_fields
+        )
+    ]
+
+
+@contextmanager
+def _copied_timestamps(tables: list[type[models.Model]]) -> Iterator[None]:
+    """Stop auto_now / auto_now_add fields replacing the copied values while inside."""
+    fields = [
+        field
+        for model in tables
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags, strict=True):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy all mail data from an SQLite database file (e.g. the old db.sqlite3) into the configured database. "
+        "Both must be migrated to the same migration and the configured one must be empty. Sessions, admin log "
+        "entries, groups and permissions are not copied."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="The SQLite database file to copy from.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT.")
+
+    def handle(self, *_args: Any, **options: Any) -> None:
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist")
+        # A connection for this command only, not a configured alias
+        sqlite = {**connections.settings[DEFAULT_DB_ALIAS], "ENGINE": "django.db.backends.sqlite3", "NAME": str(path)}
+        sqlite.update(USER="", PASSWORD="", HOST="", PORT="", CONN_MAX_AGE=0, OPTIONS={})
+        connections[SOURCE] = load_backend(sqlite["ENGINE"]).DatabaseWrapper(sqlite, SOURCE)
+        try:
+            self._copy(options["batch_size"])
+        finally:
+            connections[SOURCE].close()
+            del connections[SOURCE]
+
+    def _copy(self, batch_size: int) -> None:
+        applied = [set(MigrationRecorder(db).applied_migrations()) for db in (connections[SOURCE], connection)]
+        if applied[0] != applied[1]:
+            raise CommandError("Both databases must be migrated to the same migration first")
+        tables = _app_models()
+        if any(model._base_manager.exists() for model in tables):
+            raise CommandError("The configured database already holds data")
+
+        # One transaction: foreign keys are checked at commit, so tables can be copied in any order
+        with transaction.atomic(), _copied_timestamps(tables):
+            for model in tables:
+                rows = model._base_manager.using(SOURCE).order_by("pk").iterator(chunk_size=batch_size)
+                copied = 0
+                while batch := list(islice(rows, batch_size)):
+                    copied += len(model._base_manager.bulk_create(batch))
+                self.stdout.write(f"{model._meta.label}: {copied}")
+            # Rows keep their primary keys, so sequences (Postgres) must continue after them
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), tables):
+                    cursor.execute(sql)
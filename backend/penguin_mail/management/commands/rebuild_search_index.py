@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from penguin_mail.search.documents import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recreate every email's full-text search document (and so the search index) from the email table."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500, help="Documents written per INSERT.")
+
+    def handle(self, *_args: Any, **options: Any) -> None:
+        written = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(f"Indexed {written} emails")
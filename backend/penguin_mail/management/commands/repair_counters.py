@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from penguin_mail.models import Account
+from penguin_mail.services.counters import recompute
+
+
+class Command(BaseCommand):
+    help = "Recompute per-folder and per-label message and unread counters from the email table."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--account", default=None, help="Only repair the account with this ID.")
+
+    def handle(self, *_args: Any, **options: Any) -> None:
+        accounts = Account.objects.all()
+        if options["account"]:
+            accounts = accounts.filter(uuid=options["account"])
+        repaired = rows = 0
+        for account in accounts.iterator():
+            rows += recompute(account)
+            repaired += 1
+        self.stdout.write(f"Rebuilt {rows} counters for {repaired} accounts")
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from penguin_mail.services.dispatcher import Dispatcher, dispatch_due
+
+
+class Command(BaseCommand):
+    help = "Send scheduled emails when they come due and retry queued outbox deliveries."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--once", action="store_true", help="Send everything currently due, then exit.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Emails claimed per batch.")
+
+    def handle(self, *_args: Any, **options: Any) -> None:
+        if options["once"]:
+            total = 0
+            while True:
+                claimed, sent = dispatch_due(batch_size=options["batch_size"])
+                if not claimed:
+                    break
+                total += sent
+            self.stdout.write(f"Sent {total} emails")
+            return
+
+        dispatcher = Dispatcher(batch_size=options["batch_size"])
+        try:
+            dispatcher.run_forever()
+        except KeyboardInterrupt:
+            dispatcher.stop_event.set()
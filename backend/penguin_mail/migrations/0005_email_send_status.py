@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0004_email_imap_folder_email_imap_uid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="next_send_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="email",
+            name="send_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="email",
+            name="send_error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="email",
+            name="send_status",
+            field=models.CharField(
+                blank=True,
+                choices=[("outbox", "Outbox"), ("sending", "Sending"), ("sent", "Sent"), ("failed", "Failed")],
+                default="",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(fields=["send_status", "next_send_attempt_at"], name="penguin_mai_send_st_0f300e_idx"),
+        ),
+    ]
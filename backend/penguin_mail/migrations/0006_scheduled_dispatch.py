@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0005_email_send_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="send_claim",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="email",
+            name="send_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("outbox", "Outbox"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(fields=["send_status", "scheduled_send_at"], name="penguin_mai_send_st_7570a1_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0007_bulk_send"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="message_id",
+            field=models.CharField(blank=True, default="", max_length=998),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(fields=["account", "message_id"], name="penguin_mai_account_6c4ebd_idx"),
+        ),
+    ]
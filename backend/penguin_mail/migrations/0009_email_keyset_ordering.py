@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0008_email_message_id"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="email",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.RemoveIndex(
+            model_name="email",
+            name="penguin_mai_account_ad21da_idx",
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(
+                fields=["account", "folder", "-created_at", "-id"], name="penguin_mai_account_2a13f4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(fields=["account", "-created_at", "-id"], name="penguin_mai_account_744984_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(fields=["thread_id", "-created_at", "-id"], name="penguin_mai_thread__b90862_idx"),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, _schema_editor):
+    Email = apps.get_model("penguin_mail", "Email")
+    MailboxCounter = apps.get_model("penguin_mail", "MailboxCounter")
+    unread = Count("pk", filter=Q(is_read=False))
+    counters = [
+        MailboxCounter(account_id=account_id, folder=folder, total=total, unread=unread_count)
+        for account_id, folder, total, unread_count in Email.objects.order_by()
+        .values_list("account_id", "folder")
+        .annotate(total=Count("pk"), unread=unread)
+    ]
+    links = Email.labels.through.objects.order_by().values_list("email__account_id", "label_id")
+    counters += [
+        MailboxCounter(account_id=account_id, label_id=label_id, total=total, unread=unread_count)
+        for account_id, label_id, total, unread_count in links.annotate(
+            total=Count("pk"), unread=Count("pk", filter=Q(email__is_read=False))
+        )
+    ]
+    MailboxCounter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0009_email_keyset_ordering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailboxCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("folder", models.CharField(blank=True, default="", max_length=20)),
+                ("total", models.IntegerField(default=0)),
+                ("unread", models.IntegerField(default=0)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="counters", to="penguin_mail.account"
+                    ),
+                ),
+                (
+                    "label",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to="penguin_mail.label",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("label__isnull", True)),
+                        fields=("account", "folder"),
+                        name="unique_folder_counter",
+                    ),
+                    models.UniqueConstraint(fields=("account", "label"), name="unique_label_counter"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
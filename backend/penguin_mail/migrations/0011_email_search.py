@@ -0,0 +1,101 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DOCUMENTS = "penguin_mail_emailsearchdocument"
+FTS = "penguin_mail_email_fts"
+COLUMNS = "subject, sender, recipients, body"
+OLD = "old.subject, old.sender, old.recipients, old.body"
+NEW = "new.subject, new.sender, new.recipients, new.body"
+
+# FTS5 external-content index over the documents table, kept in step by triggers
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE {FTS} USING fts5({COLUMNS}, content='{DOCUMENTS}', content_rowid='email_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS}_ai AFTER INSERT ON {DOCUMENTS} BEGIN "
+    f"INSERT INTO {FTS}(rowid, {COLUMNS}) VALUES (new.email_id, {NEW}); END",
+    f"CREATE TRIGGER {FTS}_ad AFTER DELETE ON {DOCUMENTS} BEGIN "
+    f"INSERT INTO {FTS}({FTS}, rowid, {COLUMNS}) VALUES ('delete', old.email_id, {OLD}); END",
+    f"CREATE TRIGGER {FTS}_au AFTER UPDATE ON {DOCUMENTS} BEGIN "
+    f"INSERT INTO {FTS}({FTS}, rowid, {COLUMNS}) VALUES ('delete', old.email_id, {OLD}); "
+    f"INSERT INTO {FTS}(rowid, {COLUMNS}) VALUES (new.email_id, {NEW}); END",
+]
+SQLITE_UNINSTALL = [f"DROP TABLE IF EXISTS {FTS}"]  # triggers are dropped with the documents table
+
+# Weighted tsvector generated from the document (body capped below the 1 MB tsvector limit), GIN-indexed
+POSTGRES_INSTALL = [
+    f"ALTER TABLE {DOCUMENTS} ADD COLUMN vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', subject), 'A') || setweight(to_tsvector('simple', sender), 'B') || "
+    "setweight(to_tsvector('simple', recipients), 'C') || setweight(to_tsvector('simple', left(body, 200000)), 'D')"
+    ") STORED",
+    f"CREATE INDEX {DOCUMENTS}_vector ON {DOCUMENTS} USING GIN (vector)",
+]
+POSTGRES_UNINSTALL = [f"ALTER TABLE {DOCUMENTS} DROP COLUMN IF EXISTS vector"]
+
+
+def install_index(_apps, schema_editor):
+    statements = {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRES_INSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_index(_apps, schema_editor):
+    statements = {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRES_UNINSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def backfill_documents(apps, _schema_editor):
+    from penguin_mail.html_text import html_to_text
+
+    Email = apps.get_model("penguin_mail", "Email")
+    Recipient = apps.get_model("penguin_mail", "Recipient")
+    EmailSearchDocument = apps.get_model("penguin_mail", "EmailSearchDocument")
+    emails = Email.objects.order_by("pk").values_list("pk", "subject", "sender_name", "sender_email", "body")
+    for start in range(0, emails.count(), 500):
+        chunk = list(emails[start : start + 500])
+        recipients = {}
+        rows = Recipient.objects.filter(email_id__in=[row[0] for row in chunk]).order_by("kind", "order")
+        for email_id, name, address in rows.values_list("email_id", "name", "address"):
+            recipients.setdefault(email_id, []).append(f"{name} {address}".strip())
+        EmailSearchDocument.objects.bulk_create(
+            EmailSearchDocument(
+                email_id=pk,
+                subject=subject,
+                sender=f"{sender_name} {sender_email}".strip(),
+                recipients=" ".join(recipients.get(pk, [])),
+                body=html_to_text(body),
+            )
+            for pk, subject, sender_name, sender_email, body in chunk
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0010_mailbox_counter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailSearchDocument",
+            fields=[
+                (
+                    "email",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="penguin_mail.email",
+                    ),
+                ),
+                ("subject", models.TextField(blank=True, default="")),
+                ("sender", models.TextField(blank=True, default="")),
+                ("recipients", models.TextField(blank=True, default="")),
+                ("body", models.TextField(blank=True, default="")),
+            ],
+        ),
+        migrations.RunPython(install_index, uninstall_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-19 05:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Length
+
+
+def backfill_sizes(apps, _schema_editor):
+    # Body characters stand in for bytes here; new rows store the encoded length
+    Email = apps.get_model("penguin_mail", "Email")
+    Attachment = apps.get_model("penguin_mail", "Attachment")
+    attached = Attachment.objects.filter(email=OuterRef("pk")).order_by().values("email").annotate(total=Sum("size"))
+    Email.objects.update(size=Length("body") + Coalesce(Subquery(attached.values("total")), Value(0)))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0011_email_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="size",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SCOPES = ("emails", "labels", "folders", "contacts", "settings", "accounts")
+
+
+def create_counters(apps, _schema_editor):
+    User = apps.get_model("penguin_mail", "User")
+    ChangeCounter = apps.get_model("penguin_mail", "ChangeCounter")
+    ChangeCounter.objects.bulk_create(
+        ChangeCounter(user_id=user_id, scope=scope)
+        for user_id in User.objects.values_list("pk", flat=True).iterator()
+        for scope in SCOPES
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0012_email_size"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[
+                            ("emails", "Emails"),
+                            ("labels", "Labels"),
+                            ("folders", "Folders"),
+                            ("contacts", "Contacts"),
+                            ("settings", "Settings"),
+                            ("accounts", "Accounts"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="change_counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("user", "scope"), name="unique_change_counter")],
+            },
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
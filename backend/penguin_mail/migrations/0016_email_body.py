@@ -0,0 +1,63 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:02
+
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH = 1000
+
+
+def move_bodies(apps, _schema_editor):
+    # Walks pk ranges so only one batch of bodies is in memory at a time; empty bodies get no row
+    Email = apps.get_model("penguin_mail", "Email")
+    EmailBody = apps.get_model("penguin_mail", "EmailBody")
+    emails = Email.objects.exclude(body="").order_by("pk").values_list("pk", "body")
+    last = 0
+    while chunk := list(emails.filter(pk__gt=last)[:BATCH]):
+        EmailBody.objects.bulk_create(
+            EmailBody(email_id=pk, data=zlib.compress(body.encode()), unresolved_cid="cid:" in body)
+            for pk, body in chunk
+        )
+        last = chunk[-1][0]
+
+
+def restore_bodies(apps, _schema_editor):
+    Email = apps.get_model("penguin_mail", "Email")
+    EmailBody = apps.get_model("penguin_mail", "EmailBody")
+    bodies = EmailBody.objects.order_by("pk").values_list("pk", "data")
+    last = 0
+    while chunk := list(bodies.filter(pk__gt=last)[:BATCH]):
+        Email.objects.bulk_update([Email(pk=pk, body=zlib.decompress(data).decode()) for pk, data in chunk], ["body"])
+        last = chunk[-1][0]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0015_bulk_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailBody",
+            fields=[
+                (
+                    "email",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stored_body",
+                        serialize=False,
+                        to="penguin_mail.email",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("unresolved_cid", models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunPython(move_bodies, restore_bodies),
+        migrations.RemoveField(
+            model_name="email",
+            name="body",
+        ),
+    ]
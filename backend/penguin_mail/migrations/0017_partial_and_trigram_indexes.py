@@ -0,0 +1,61 @@
+# Generated by Django 5.1.15 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+CONTACT_TRIGRAM = "penguin_mail_contact_search_trgm"
+
+# Trigram GIN index for the contact search's UPPER(col) LIKE UPPER('%q%') filters (Postgres only)
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX {CONTACT_TRIGRAM} ON penguin_mail_contact USING GIN "
+    "(UPPER(name::text) gin_trgm_ops, UPPER(email::text) gin_trgm_ops, UPPER(company::text) gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL = [f"DROP INDEX IF EXISTS {CONTACT_TRIGRAM}"]
+
+
+def install_trigram_index(_apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_INSTALL:
+            schema_editor.execute(sql)
+
+
+def uninstall_trigram_index(_apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_UNINSTALL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0016_email_body"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(fields=["user", "name"], name="penguin_mai_user_id_12ed45_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                condition=models.Q(("is_favorite", True)), fields=["user", "name"], name="contact_favorite_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=["account", "-created_at", "-id"],
+                name="email_unread_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="email",
+            index=models.Index(
+                condition=models.Q(("is_starred", True)),
+                fields=["account", "-created_at", "-id"],
+                name="email_starred_idx",
+            ),
+        ),
+        migrations.RunPython(install_trigram_index, uninstall_trigram_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0017_partial_and_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailbody",
+            name="archive_length",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="emailbody",
+            name="archive_offset",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="emailbody",
+            name="data",
+            field=models.BinaryField(null=True),
+        ),
+        migrations.CreateModel(
+            name="BodyArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file", models.FileField(upload_to="archive/%Y/%m/")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="body_archives",
+                        to="penguin_mail.account",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="emailbody",
+            name="archive",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="bodies",
+                to="penguin_mail.bodyarchive",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+import penguin_mail.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("penguin_mail", "0018_body_archive"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="changelogentry",
+            name="changelog_user_seq",
+        ),
+        migrations.AddField(
+            model_name="changelogentry",
+            name="txid",
+            field=models.BigIntegerField(db_default=penguin_mail.models.TransactionId(), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="changelogentry",
+            index=models.Index(fields=["txid", "id"], name="changelog_seq"),
+        ),
+        migrations.AddIndex(
+            model_name="changelogentry",
+            index=models.Index(fields=["user", "txid", "id"], name="changelog_user_seq"),
+        ),
+    ]
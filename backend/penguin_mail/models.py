@@ -1,4 +1,6 @@
 import uuid
+import zlib
+from typing import Any
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
@@ -109,12 +111,19 @@ class FolderType(models.TextChoices):
     SCHEDULED = "scheduled"
 
 
+class SendStatus(models.TextChoices):
+    SCHEDULED = "scheduled"
+    OUTBOX = "outbox"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 # Database table for emails
 class Email(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="emails")
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
     subject = models.CharField(max_length=255, blank=True, default="")
-    body = models.TextField(blank=True, default="")
     preview = models.CharField(max_length=300, blank=True, default="")
     sender_name = models.CharField(max_length=255, blank=True, default="")
     sender_email = models.EmailField(max_length=254)
@@ -122,6 +131,7 @@ class Email(models.Model):
     is_starred = models.BooleanField(default=False)
     is_draft = models.BooleanField(default=False)
     has_attachment = models.BooleanField(default=False)
+    size = models.PositiveIntegerField(default=0)  # approximate message size in bytes, body plus attachments
     folder = models.CharField(max_length=20, choices=FolderType.choices, default=FolderType.INBOX, db_index=True)
     thread_id = models.UUIDField(null=True, blank=True, db_index=True)
     reply_to = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="replies")
@@ -134,19 +144,187 @@ class Email(models.Model):
     labels = models.ManyToManyField("Label", blank=True, related_name="emails")  # type: ignore[var-annotated]
     imap_uid = models.PositiveIntegerField(null=True, blank=True, db_index=True)
     imap_folder = models.CharField(max_length=255, blank=True, default="")
+    # Outbound delivery state — blank for received mail and drafts
+    send_status = models.CharField(max_length=10, choices=SendStatus.choices, blank=True, default="")
+    send_attempts = models.PositiveSmallIntegerField(default=0)
+    send_error = models.TextField(blank=True, default="")
+    next_send_attempt_at = models.DateTimeField(null=True, blank=True)
+    send_claim = models.UUIDField(null=True, blank=True)  # set by the dispatcher batch that claimed the row
+    message_id = models.CharField(max_length=998, blank=True, default="")  # RFC 5322 Message-ID header
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        # id breaks created_at ties so keyset pagination has a total order
+        ordering = ["-created_at", "-id"]
         indexes = [
-            models.Index(fields=["account", "folder", "-created_at"]),
+            models.Index(fields=["account", "folder", "-created_at", "-id"]),
+            models.Index(fields=["account", "-created_at", "-id"]),
+            models.Index(fields=["thread_id", "-created_at", "-id"]),
             models.Index(fields=["account", "is_read"]),
+            models.Index(fields=["send_status", "next_send_attempt_at"]),
+            models.Index(fields=["send_status", "scheduled_send_at"]),
+            models.Index(fields=["account", "message_id"]),
+            # Partial: the unread and starred views only touch the (usually few) matching rows
+            models.Index(
+                fields=["account", "-created_at", "-id"], condition=models.Q(is_read=False), name="email_unread_idx"
+            ),
+            models.Index(
+                fields=["account", "-created_at", "-id"], condition=models.Q(is_starred=True), name="email_starred_idx"
+            ),
         ]
 
+    # The HTML body lives in EmailBody; these hold it once read or assigned
+    _body: str | None = None
+    _body_changed = False
+
     def __str__(self):
         return f"{self.subject} ({self.uuid})"
 
+    @property
+    def body(self) -> str:
+        """The HTML body, decompressed from its ``EmailBody`` row on first use."""
+        if self._body is None:
+            try:
+                self._body = self.stored_body.text
+            except EmailBody.DoesNotExist:
+                self._body = ""
+        return self._body
+
+    @body.setter
+    def body(self, value: str) -> None:
+        self._body = value
+        self._body_changed = True
+
+    @property
+    def body_archived(self) -> bool:
+        """Whether the stored body is in a ``BodyArchive`` (and no new body has been assigned since)."""
+        if self._body_changed:
+            return False
+        try:
+            return self.stored_body.archive_id is not None
+        except EmailBody.DoesNotExist:
+            return False
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save the row, then the body if it was assigned (``body`` is not a column, so not an ``update_fields`` name)."""
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if self._body_changed:
+            body = EmailBody.build(self.pk, self._body or "")
+            if not adding:
+                # A new body is hot again, even if the old one was archived
+                EmailBody.objects.update_or_create(
+                    email_id=self.pk,
+                    defaults={"data": body.data, "unresolved_cid": body.unresolved_cid, "archive": None},
+                )
+            elif self._body:
+                body.save(force_insert=True)
+            self._body_changed = False
+            self._state.fields_cache.pop("stored_body", None)
+
+    def refresh_from_db(self, using: str | None = None, fields: Any = None, from_queryset: Any = None) -> None:
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None:
+            self._body, self._body_changed = None, False
+
+
+# ---------------------------------------------------------------------------
+# EmailBody (compressed HTML body, one-to-one with Email)
+# ---------------------------------------------------------------------------
+
+
+class EmailBody(models.Model):
+    """
+    An email's HTML body, zlib-compressed, kept off the ``Email`` row.
+
+    Bodies are most of an email's bytes but only single-email reads, sends
+    and the search index need them, so list, count and sync queries scan
+    narrow rows. ``Email.body`` reads and writes this row.
+    """
+
+    email = models.OneToOneField(Email, primary_key=True, on_delete=models.CASCADE, related_name="stored_body")
+    data = models.BinaryField(null=True)  # None once archived
+    # Still references cid: parts missing when it was fetched; sync downloads such messages again
+    unresolved_cid = models.BooleanField(default=False)
+    # Where an archived body's compressed bytes are (see penguin_mail.services.archive)
+    archive = models.ForeignKey("BodyArchive", null=True, blank=True, on_delete=models.RESTRICT, related_name="bodies")
+    archive_offset = models.PositiveBigIntegerField(default=0)
+    archive_length = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Body of email {self.email_id}"
+
+    @classmethod
+    def build(cls, email_id: int, text: str) -> "EmailBody":
+        return cls(email_id=email_id, data=compress_body(text), unresolved_cid="cid:" in text)
+
+    @property
+    def text(self) -> str:
+        if self.archive is not None:
+            return decompress_body(self.archive.read(self.archive_offset, self.archive_length))
+        return decompress_body(self.data)
+
+
+# ---------------------------------------------------------------------------
+# BodyArchive (cold tier: a file of old emails' compressed bodies)
+# ---------------------------------------------------------------------------
+
+
+class BodyArchive(models.Model):
+    """
+    A file holding the compressed bodies of a batch of one account's old emails.
+
+    Each body keeps its own zlib stream, so one is read back with a seek and
+    a read. ``EmailBody`` rows point into the file; the archive job deletes
+    the file once no body points into it.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="body_archives")
+    file = models.FileField(upload_to="archive/%Y/%m/")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Body archive {self.file.name}"
+
+    def read(self, offset: int, length: int) -> bytes:
+        with self.file.open("rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+
+def compress_body(text: str) -> bytes:
+    return zlib.compress(text.encode())
+
+
+def decompress_body(data: bytes | memoryview | None) -> str:
+    """The text of compressed body ``data``; None (an email stored without a body) is empty."""
+    return zlib.decompress(data).decode() if data is not None else ""
+
+
+# ---------------------------------------------------------------------------
+# EmailSearchDocument (plaintext indexed by the full-text search backend)
+# ---------------------------------------------------------------------------
+
+
+class EmailSearchDocument(models.Model):
+    """
+    The searchable text of one email, kept current by ``penguin_mail.search``.
+
+    ``body`` is the plaintext rendering of the HTML, so markup and inline
+    ``data:`` URIs never reach the index. The SQLite FTS5 table and the
+    Postgres tsvector column are maintained from this table by the database.
+    """
+
+    email = models.OneToOneField(Email, primary_key=True, on_delete=models.CASCADE, related_name="search_document")
+    subject = models.TextField(blank=True, default="")
+    sender = models.TextField(blank=True, default="")
+    recipients = models.TextField(blank=True, default="")
+    body = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"Search document for email {self.email_id}"
+
 
 # ---------------------------------------------------------------------------
 # Recipient (normalized — no JSON duplication on Email)
@@ -221,6 +399,132 @@ class Label(models.Model):
         return self.name
 
 
+# ---------------------------------------------------------------------------
+# MailboxCounter (materialized message / unread counts)
+# ---------------------------------------------------------------------------
+
+
+class MailboxCounter(models.Model):
+    """
+    Message and unread totals for one folder (``label`` NULL) or one label
+    (``folder`` empty) of an account.
+
+    Maintained by ``services.counters`` inside every write transaction and
+    rebuilt from the email table by the ``repair_counters`` command.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="counters")
+    folder = models.CharField(max_length=20, blank=True, default="")
+    label = models.ForeignKey(Label, null=True, blank=True, on_delete=models.CASCADE, related_name="counters")
+    total = models.IntegerField(default=0)
+    unread = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "folder"], condition=models.Q(label__isnull=True), name="unique_folder_counter"
+            ),
+            models.UniqueConstraint(fields=["account", "label"], name="unique_label_counter"),
+        ]
+
+    def __str__(self):
+        return f"{self.label or self.folder}: {self.unread}/{self.total}"
+
+
+# ---------------------------------------------------------------------------
+# ChangeCounter (per-user versions behind ETags)
+# ---------------------------------------------------------------------------
+
+
+class ChangeScope(models.TextChoices):
+    EMAILS = "emails"
+    LABELS = "labels"
+    FOLDERS = "folders"
+    CONTACTS = "contacts"
+    SETTINGS = "settings"
+    ACCOUNTS = "accounts"
+
+
+class ChangeCounter(models.Model):
+    """
+    Version of one scope of a user's data, bumped by every write to it.
+
+    Created for each scope with the user and maintained by
+    ``services.versions``; GET endpoints build their ETags from it.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="change_counters")
+    scope = models.CharField(max_length=20, choices=ChangeScope.choices)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope"], name="unique_change_counter"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}: {self.version}"
+
+
+# ---------------------------------------------------------------------------
+# ChangeLogEntry (append-only per-user change log behind GET /changes)
+# ---------------------------------------------------------------------------
+
+
+class ChangeKind(models.TextChoices):
+    EMAIL = "email"
+    LABEL = "label"
+    FOLDER = "folder"
+    CONTACT = "contact"
+
+
+class ChangeOp(models.TextChoices):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class TransactionId(models.Func):
+    """
+    The id of the writing transaction on PostgreSQL. Elsewhere 0: SQLite
+    commits one writer at a time, so there ids already follow commit order.
+    """
+
+    function = "txid_current"
+    output_field = models.BigIntegerField()
+
+    def as_sqlite(self, compiler: Any, connection: Any, **extra_context: Any) -> Any:
+        return self.as_sql(compiler, connection, template="0", **extra_context)
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One create, update or delete of an email, label, folder or contact.
+
+    Appended by ``services.changelog`` in the writing transaction; its
+    ``(txid, id)`` pair is the sync position clients resume from.
+    ``compact_changes`` drops expired entries and those superseded by a
+    later entry for the same object.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="change_log")
+    kind = models.CharField(max_length=10, choices=ChangeKind.choices)
+    object_id = models.UUIDField()
+    op = models.CharField(max_length=10, choices=ChangeOp.choices)
+    txid = models.BigIntegerField(db_default=TransactionId(), editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["txid", "id"], name="changelog_seq"),
+            models.Index(fields=["user", "txid", "id"], name="changelog_user_seq"),
+            models.Index(fields=["user", "kind", "object_id"], name="changelog_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} {self.op}"
+
+
 # ---------------------------------------------------------------------------
 # CustomFolder
 # ---------------------------------------------------------------------------
@@ -264,6 +568,13 @@ class Contact(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Substring search over name, email and company has a trigram index on Postgres (migration 0017)
+        indexes = [
+            models.Index(fields=["user", "name"]),
+            models.Index(fields=["user", "name"], condition=models.Q(is_favorite=True), name="contact_favorite_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} <{self.email}>"
 
@@ -286,6 +597,73 @@ class ContactGroup(models.Model):
         return self.name
 
 
+# ---------------------------------------------------------------------------
+# BulkSend (mail merge to a contact group)
+# ---------------------------------------------------------------------------
+
+
+class BulkSendStatus(models.TextChoices):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BulkSend(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="bulk_sends")
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="bulk_sends")
+    group = models.ForeignKey(ContactGroup, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
+    subject_template = models.CharField(max_length=998, blank=True, default="")
+    body_template = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=10, choices=BulkSendStatus.choices, default=BulkSendStatus.QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_contact_id = models.BigIntegerField(default=0)  # resume point: contacts are sent in pk order
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    def __str__(self):
+        return f"Bulk send {self.uuid} ({self.status})"
+
+
+class BulkJobStatus(models.TextChoices):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BulkJob(models.Model):
+    """A bulk email operation over every email matching a query, applied in the background."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="bulk_jobs")
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
+    operation = models.CharField(max_length=20)
+    folder = models.CharField(max_length=20, blank=True, default="")  # destination of "move"
+    label_ids = models.JSONField(default=list, blank=True)  # label uuids for addLabel / removeLabel
+    query = models.JSONField(default=dict, blank=True)  # GET /emails filters
+    status = models.CharField(max_length=10, choices=BulkJobStatus.choices, default=BulkJobStatus.QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    last_email_id = models.BigIntegerField(default=0)  # resume point: emails are processed in pk order
+    max_email_id = models.BigIntegerField(default=0)  # mail arriving after the job was queued is left alone
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    def __str__(self):
+        return f"Bulk job {self.uuid} ({self.operation}, {self.status})"
+
+
 # ---------------------------------------------------------------------------
 # UserSettings (one-to-one with User, JSON fields for flexible settings)
 # ---------------------------------------------------------------------------
@@ -1,3 +1,7 @@
+# ``send_rate_per_minute``/``send_burst`` pace bulk sends below each provider's
+# published sending limits so a large mail merge doesn't get the account locked.
+# ``saves_sent`` marks providers that file SMTP-submitted mail in Sent themselves,
+# so we must not APPEND a second copy.
 PROVIDER_PRESETS = {
     "gmail": {
         "label": "Gmail",
@@ -7,6 +11,9 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.gmail.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 20,
+        "send_burst": 10,
+        "saves_sent": True,
     },
     "yahoo": {
         "label": "Yahoo",
@@ -16,6 +23,8 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.mail.yahoo.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 10,
+        "send_burst": 5,
     },
     "outlook": {
         "label": "Outlook",
@@ -25,6 +34,9 @@ PROVIDER_PRESETS = {
         "imap_host": "outlook.office365.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 30,
+        "send_burst": 10,
+        "saves_sent": True,
     },
     "icloud": {
         "label": "iCloud",
@@ -34,6 +46,8 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.mail.me.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 10,
+        "send_burst": 5,
     },
     "aol": {
         "label": "AOL",
@@ -43,6 +57,8 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.aol.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 10,
+        "send_burst": 5,
     },
     "zoho": {
         "label": "Zoho",
@@ -52,6 +68,8 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.zoho.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 20,
+        "send_burst": 10,
     },
     "fastmail": {
         "label": "Fastmail",
@@ -61,6 +79,8 @@ PROVIDER_PRESETS = {
         "imap_host": "imap.fastmail.com",
         "imap_port": 993,
         "imap_security": "ssl",
+        "send_rate_per_minute": 30,
+        "send_burst": 10,
     },
 }
 
@@ -0,0 +1,155 @@
+"""
+Read-replica routing.
+
+Reads made while handling a GET or HEAD request go to one of the replicas in
+``DATABASE_REPLICAS``; writes, other requests, background threads and
+management commands use the primary. A request stays on the primary once it
+has written and inside transactions.
+
+Users read their own writes: every request that writes records its time for
+its user in the cache, and a replica serves that user only once its replay
+lag shows it has caught up past that time. Lag is sampled per replica at most
+every ``REPLICA_LAG_CHECK_SECONDS`` per process; replicas further behind than
+``REPLICA_MAX_LAG_SECONDS``, or unreachable, are skipped until they catch up.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD")
+
+# Seconds since the last replayed transaction, or 0 when everything received has been replayed
+POSTGRES_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class _RequestState:
+    request: HttpRequest
+    wrote: bool
+    alias: str | None = None  # chosen on the first read after authentication
+
+
+_state: ContextVar[_RequestState | None] = ContextVar("replica_request", default=None)
+
+_lag: dict[str, tuple[float, float]] = {}  # alias -> (monotonic time sampled, lag in seconds)
+_lag_lock = threading.Lock()
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def max_lag() -> float:
+    return float(getattr(settings, "REPLICA_MAX_LAG_SECONDS", 10.0))
+
+
+def _last_write_key(user_id: int) -> str:
+    return f"replicas:last-write:{user_id}"
+
+
+def record_write(user_id: int) -> None:
+    # Past the maximum lag every usable replica has the write, so the entry can expire
+    cache.set(_last_write_key(user_id), time.time(), timeout=math.ceil(max_lag()))
+
+
+def last_write(user_id: int) -> float:
+    return float(cache.get(_last_write_key(user_id), 0.0))
+
+
+def replica_lag(alias: str) -> float:
+    """How far ``alias`` is behind the primary in seconds, sampled at most every REPLICA_LAG_CHECK_SECONDS."""
+    now = time.monotonic()
+    with _lag_lock:
+        sampled = _lag.get(alias)
+    if sampled is not None and now - sampled[0] < getattr(settings, "REPLICA_LAG_CHECK_SECONDS", 1.0):
+        return sampled[1]
+    lag = _measure_lag(alias)
+    with _lag_lock:
+        _lag[alias] = (now, lag)
+    return lag
+
+
+def _measure_lag(alias: str) -> float:
+    replica = connections[alias]
+    if replica.vendor != "postgresql":
+        return 0.0
+    try:
+        with replica.cursor() as cursor:
+            cursor.execute(POSTGRES_LAG_SQL)
+            (lag,) = cursor.fetchone()
+    except DatabaseError:
+        logger.warning("Replica %s is unavailable", alias, exc_info=True)
+        return math.inf
+    return float(lag)
+
+
+def _choose(user_id: int) -> str:
+    """A random replica that is within the maximum lag and has the user's last write, else the primary."""
+    written, now = last_write(user_id), time.time()
+    usable = [alias for alias in replicas() if (lag := replica_lag(alias)) <= max_lag() and now - lag > written]
+    return random.choice(usable) if usable else DEFAULT_DB_ALIAS  # noqa: S311
+
+
+class ReplicaRouter:
+    """Database router; see the module docstring."""
+
+    def db_for_read(self, model: Any, **_hints: Any) -> str | None:
+        state = _state.get()
+        if state is None or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if state.alias is None:
+            # Before authentication the user, and so their last write, is unknown
+            user = getattr(state.request, "auth", None)
+            if user is None:
+                return None
+            state.alias = _choose(user.pk)
+        return state.alias
+
+    def db_for_write(self, model: Any, **_hints: Any) -> str | None:
+        if (state := _state.get()) is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, *_objs: Any, **_hints: Any) -> bool:
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **_hints: Any) -> bool | None:
+        return False if db in replicas() else None
+
+
+class ReplicaMiddleware:
+    """Tracks each request for ReplicaRouter and records the time of the user's writes."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not replicas():
+            return self.get_response(request)
+        # Unsafe methods count as writes from the start: not every write goes through the router
+        state = _RequestState(request, wrote=request.method not in SAFE_METHODS)
+        token = _state.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+            if state.wrote and (user := getattr(request, "auth", None)) is not None:
+                record_write(user.pk)
@@ -0,0 +1,57 @@
+"""
+Full-text search over emails.
+
+Every email has an ``EmailSearchDocument`` holding its searchable plaintext,
+refreshed by signal handlers whenever the email or its recipients are written.
+The configured backend (``SEARCH_BACKEND``) indexes those documents and answers
+queries: SQLite FTS5, a Postgres tsvector column, or a portable fallback.
+Queries use Gmail-style operators (see ``penguin_mail.search.query``).
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import QuerySet
+
+from penguin_mail.models import Email
+from penguin_mail.search.backends import SearchBackend, SQLiteBackend
+from penguin_mail.search.query import parse, plan
+
+_VENDOR_BACKENDS = {"sqlite": "sqlite", "postgresql": "postgres"}
+
+
+def get_backend() -> SearchBackend:
+    name = getattr(settings, "SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = _VENDOR_BACKENDS.get(connection.vendor, "basic")
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "postgres":
+        from penguin_mail.search.postgres import PostgresBackend
+
+        return PostgresBackend()
+    return SearchBackend()
+
+
+def filter_emails(qs: QuerySet[Email], query: str) -> QuerySet[Email]:
+    """
+    Restrict ``qs`` to emails matching every term of ``query``. Text terms go
+    to the search index as one predicate; column filters follow. Raises
+    QuerySyntaxError for invalid operator values.
+    """
+    query_plan = plan(parse(query))
+    if query_plan.empty:
+        return qs.none()
+    qs = get_backend().match(qs, query_plan.texts)
+    for condition in query_plan.filters:
+        qs = qs.exclude(condition.q()) if condition.negated else qs.filter(condition.q())
+    return qs
+
+
+def rank_emails(qs: QuerySet[Email], query: str) -> QuerySet[Email]:
+    """Annotate ``search_rank`` (higher is more relevant) on a queryset already filtered by ``query``."""
+    return get_backend().rank(qs, plan(parse(query)).positive_texts)
+
+
+def snippets(pks: list[int], query: str) -> dict[int, str]:
+    """HTML-safe excerpts with matches wrapped in <mark>, keyed by email pk."""
+    return get_backend().snippets(pks, plan(parse(query)).positive_texts)
@@ -0,0 +1,117 @@
+import operator
+import re
+from collections.abc import Sequence
+from functools import reduce
+from html import escape
+
+from django.db import connection
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from penguin_mail.models import Email, EmailSearchDocument
+from penguin_mail.search.query import Text
+
+# Private-use characters bracketing matches in raw snippets; swapped for <mark> after escaping
+MARK_START, MARK_END = "\ue000", "\ue001"
+# Approximate snippet length, in words for the database backends and characters for the fallback
+SNIPPET_WORDS = 16
+SNIPPET_CHARS = 120
+
+_DOCUMENT_FIELDS = ("subject", "sender", "recipients", "body")
+
+
+def highlight(raw: str) -> str:
+    """HTML-escape a snippet and turn its match markers into <mark> tags."""
+    return escape(raw).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+class SearchBackend:
+    """
+    Portable fallback: every word must appear (case-insensitively) in the
+    subject, sender, recipients or plaintext body, or in the one column a
+    ``from:``/``to:``/``subject:`` term names. Unranked, and still a scan, but
+    over plaintext rather than raw HTML.
+    """
+
+    def q(self, texts: Sequence[Text]) -> Q:
+        """A predicate matching emails that contain every one of ``texts``."""
+        q = Q()
+        for text in texts:
+            fields = [text.field] if text.field else _DOCUMENT_FIELDS
+            needles = [text.value] if text.phrase else text.words
+            for needle in needles:
+                q &= reduce(operator.or_, (Q(**{f"search_document__{f}__icontains": needle}) for f in fields))
+        return q
+
+    def match(self, qs: QuerySet[Email], texts: Sequence[Text]) -> QuerySet[Email]:
+        """Apply ``texts`` to ``qs``: positive ones as one predicate, each negated one as an exclusion."""
+        positive = [t for t in texts if not t.negated]
+        if positive:
+            qs = qs.filter(self.q(positive))
+        for text in texts:
+            if text.negated:
+                qs = qs.exclude(self.q([text]))
+        return qs
+
+    def rank(self, qs: QuerySet[Email], _texts: Sequence[Text]) -> QuerySet[Email]:
+        """Annotate ``search_rank`` (higher is better) on an already-filtered queryset."""
+        return qs.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def snippets(self, pks: list[int], texts: Sequence[Text]) -> dict[int, str]:
+        """Highlighted body excerpts around the first match, keyed by email pk."""
+        words = [word for text in texts for word in text.words]
+        if not words or not pks:
+            return {}
+        pattern = re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+        result = {}
+        for pk, body in EmailSearchDocument.objects.filter(email_id__in=pks).values_list("email_id", "body"):
+            match = pattern.search(body)
+            start = max(0, match.start() - SNIPPET_CHARS // 3) if match else 0
+            excerpt = body[start : start + SNIPPET_CHARS]
+            marked = pattern.sub(lambda m: f"{MARK_START}{m.group(0)}{MARK_END}", excerpt)
+            result[pk] = highlight(("…" if start else "") + marked + ("…" if start + SNIPPET_CHARS < len(body) else ""))
+        return result
+
+
+class SQLiteBackend(SearchBackend):
+    """
+    FTS5 index over ``EmailSearchDocument`` (an external-content table kept in
+    step by triggers), ranked with bm25 weighting subject over sender over
+    recipients over body.
+    """
+
+    table = "penguin_mail_email_fts"
+
+    def _match(self, texts: Sequence[Text]) -> str:
+        # Implicitly ANDed, prefix-matched unless quoted: 'sender : "ann"* "quarterly report"'
+        parts = []
+        for text in texts:
+            phrase = f'"{" ".join(text.words)}"' + ("" if text.phrase else "*")
+            parts.append(f"{text.field} : {phrase}" if text.field else phrase)
+        return " ".join(parts)
+
+    def q(self, texts: Sequence[Text]) -> Q:
+        sql = f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+        return Q(pk__in=RawSQL(sql, [self._match(texts)]))
+
+    def rank(self, qs: QuerySet[Email], texts: Sequence[Text]) -> QuerySet[Email]:
+        if not texts:
+            return super().rank(qs, texts)
+        # bm25() is lower-is-better; negated so callers sort descending like the other backends
+        sql = (
+            f"SELECT -bm25({self.table}, 10.0, 5.0, 2.0, 1.0) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {Email._meta.db_table}.id"
+        )
+        return qs.annotate(search_rank=RawSQL(sql, [self._match(texts)], output_field=FloatField()))
+
+    def snippets(self, pks: list[int], texts: Sequence[Text]) -> dict[int, str]:
+        if not texts or not pks:
+            return {}
+        placeholders = ", ".join(["%s"] * len(pks))
+        sql = (
+            f"SELECT rowid, snippet({self.table}, -1, %s, %s, '…', %s) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid IN ({placeholders})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [MARK_START, MARK_END, SNIPPET_WORDS, self._match(texts), *pks])
+            return {pk: highlight(raw) for pk, raw in cursor.fetchall()}
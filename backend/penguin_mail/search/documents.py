@@ -0,0 +1,64 @@
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Prefetch
+
+from penguin_mail.html_text import html_to_text
+from penguin_mail.models import Email, EmailSearchDocument, Recipient
+
+# Email fields that feed the search document; saves touching none of them skip re-indexing.
+# The body is not a column: a body change is saved without update_fields, which always re-indexes.
+INDEXED_FIELDS = frozenset({"subject", "sender_name", "sender_email"})
+
+_RECIPIENT_ORDER = ("kind", "order")
+
+
+def _join(recipients: Iterable[Recipient]) -> str:
+    return " ".join(f"{r.name} {r.address}".strip() for r in recipients)
+
+
+def _document(email: Email, recipients: str) -> EmailSearchDocument:
+    return EmailSearchDocument(
+        email_id=email.pk,
+        subject=email.subject,
+        sender=f"{email.sender_name} {email.sender_email}".strip(),
+        recipients=recipients,
+        # Archived bodies leave the index (see penguin_mail.services.archive)
+        body="" if email.body_archived else html_to_text(email.body),
+    )
+
+
+def refresh(email: Email) -> None:
+    """Write ``email``'s search document (subject, sender, recipients, plaintext body)."""
+    recipients = _join(Recipient.objects.filter(email_id=email.pk).order_by(*_RECIPIENT_ORDER))
+    document = _document(email, recipients)
+    EmailSearchDocument.objects.update_or_create(
+        email_id=email.pk,
+        defaults={f: getattr(document, f) for f in ("subject", "sender", "recipients", "body")},
+    )
+
+
+def refresh_recipients(email_pk: int) -> None:
+    recipients = _join(Recipient.objects.filter(email_id=email_pk).order_by(*_RECIPIENT_ORDER))
+    EmailSearchDocument.objects.filter(email_id=email_pk).update(recipients=recipients)
+
+
+def rebuild(batch_size: int = 500) -> int:
+    """Recreate every search document from the email table. Returns the number of documents written."""
+    emails = (
+        Email.objects.order_by("pk")
+        .select_related("stored_body")
+        .only("pk", "subject", "sender_name", "sender_email", "stored_body__data", "stored_body__archive")
+        .prefetch_related(Prefetch("recipients", queryset=Recipient.objects.order_by(*_RECIPIENT_ORDER)))
+    )
+    written = 0
+    batch: list[EmailSearchDocument] = []
+    with transaction.atomic():
+        EmailSearchDocument.objects.all().delete()
+        for email in emails.iterator(chunk_size=batch_size):
+            batch.append(_document(email, _join(email.recipients.all())))
+            if len(batch) == batch_size:
+                written += len(EmailSearchDocument.objects.bulk_create(batch))
+                batch = []
+        written += len(EmailSearchDocument.objects.bulk_create(batch))
+    return written
@@ -0,0 +1,59 @@
+from collections.abc import Sequence
+
+from django.db import connection
+from django.db.models import FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from penguin_mail.models import Email, EmailSearchDocument
+from penguin_mail.search.backends import MARK_END, MARK_START, SNIPPET_WORDS, SearchBackend, highlight
+from penguin_mail.search.query import Text
+
+# tsvector weight each search document column is stored under (see migration 0011)
+_WEIGHTS = {"subject": "A", "sender": "B", "recipients": "C", "body": "D"}
+
+
+class PostgresBackend(SearchBackend):
+    """
+    tsvector search over ``EmailSearchDocument.vector``, a generated column
+    (subject, sender, recipients, body weighted A to D) with a GIN index,
+    created by migration 0011 on PostgreSQL.
+    """
+
+    table = EmailSearchDocument._meta.db_table
+
+    def _tsquery(self, texts: Sequence[Text]) -> str:
+        # Phrases as followed-by chains, prefix-matched unless quoted, restricted to a column's
+        # weight for fielded terms: 'ann:*B & quarterly <-> report'
+        parts = []
+        for text in texts:
+            weight = _WEIGHTS[text.field] if text.field else ""
+            words = text.words
+            lexemes = [f"{word}:{weight}" if weight else word for word in words[:-1]]
+            last = f"{words[-1]}:{'' if text.phrase else '*'}{weight}".rstrip(":")
+            parts.append(" <-> ".join([*lexemes, last]))
+        return " & ".join(parts)
+
+    def q(self, texts: Sequence[Text]) -> Q:
+        sql = f"SELECT email_id FROM {self.table} WHERE vector @@ to_tsquery('simple', %s)"
+        return Q(pk__in=RawSQL(sql, [self._tsquery(texts)]))
+
+    def rank(self, qs: QuerySet[Email], texts: Sequence[Text]) -> QuerySet[Email]:
+        if not texts:
+            return super().rank(qs, texts)
+        sql = (
+            f"SELECT ts_rank(vector, to_tsquery('simple', %s)) FROM {self.table} "
+            f"WHERE email_id = {Email._meta.db_table}.id"
+        )
+        return qs.annotate(search_rank=RawSQL(sql, [self._tsquery(texts)], output_field=FloatField()))
+
+    def snippets(self, pks: list[int], texts: Sequence[Text]) -> dict[int, str]:
+        if not texts or not pks:
+            return {}
+        options = f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=1"
+        sql = (
+            f"SELECT email_id, ts_headline('simple', body, to_tsquery('simple', %s), %s) "
+            f"FROM {self.table} WHERE email_id = ANY(%s)"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self._tsquery(texts), options, list(pks)])
+            return {pk: highlight(raw) for pk, raw in cursor.fetchall()}
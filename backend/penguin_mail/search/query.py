@@ -0,0 +1,191 @@
+"""
+Gmail-style search operators.
+
+A query is a whitespace-separated list of terms, all of which must match::
+
+    from:ann subject:"quarterly report" has:attachment -label:done after:2024-01-01 larger:5M budget
+
+``parse`` turns the string into a list of nodes: ``Text`` for anything answered
+by the full-text index (bare words, quoted phrases, ``from:``, ``to:``,
+``subject:``) and ``Filter`` for column predicates. ``plan`` then folds
+redundant bounds and spots contradictions. A leading ``-`` negates any term; an unknown ``name:value``
+is searched as plain text.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Any
+
+from django.db.models import Q
+from django.utils import timezone
+
+from penguin_mail.models import FolderType
+
+_WORD = re.compile(r"\w+")
+_TOKEN = re.compile(r'(?P<neg>-)?(?:(?P<op>\w+):)?(?:"(?P<quoted>[^"]*)"?|(?P<bare>\S+))')
+_SIZE = re.compile(r"(?P<number>\d+)(?P<unit>[kmg]?)b?", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+
+# Operators answered by the full-text index, mapped to the search document column they target
+TEXT_FIELDS = {"from": "sender", "to": "recipients", "subject": "subject"}
+
+_FLAGS = {
+    ("is", "read"): ("is_read", True),
+    ("is", "unread"): ("is_read", False),
+    ("is", "starred"): ("is_starred", True),
+    ("is", "unstarred"): ("is_starred", False),
+    ("is", "draft"): ("is_draft", True),
+    ("has", "attachment"): ("has_attachment", True),
+}
+
+
+def terms(text: str) -> list[str]:
+    """Words in ``text``. Punctuation is dropped so no input can break backend query syntax."""
+    return _WORD.findall(text)
+
+
+class QuerySyntaxError(ValueError):
+    """An operator was given a value it cannot use (a bad date, size, flag or folder)."""
+
+
+@dataclass(frozen=True)
+class Text:
+    """Words to find in the search document; ``field`` of None means any column."""
+
+    value: str
+    field: str | None = None
+    phrase: bool = False
+    negated: bool = False
+
+    @property
+    def words(self) -> list[str]:
+        return terms(self.value)
+
+
+@dataclass(frozen=True)
+class Filter:
+    """A predicate on an Email column (or its labels)."""
+
+    key: str
+    value: Any
+    negated: bool = False
+
+    def q(self) -> Q:
+        if self.key == "label":
+            return Q(labels__name__iexact=self.value)
+        if self.key in ("after", "before"):
+            start = timezone.make_aware(datetime.combine(self.value, time.min), timezone.get_current_timezone())
+            return Q(created_at__gte=start) if self.key == "after" else Q(created_at__lt=start)
+        if self.key in ("larger", "smaller"):
+            return Q(size__gt=self.value) if self.key == "larger" else Q(size__lt=self.value)
+        return Q(**{self.key: self.value})
+
+
+Node = Text | Filter
+
+
+@dataclass
+class Plan:
+    texts: list[Text] = field(default_factory=list)
+    filters: list[Filter] = field(default_factory=list)
+    empty: bool = False
+
+    @property
+    def positive_texts(self) -> list[Text]:
+        return [t for t in self.texts if not t.negated]
+
+
+def _parse_date(op: str, value: str) -> date:
+    try:
+        return date.fromisoformat(value.replace("/", "-"))
+    except ValueError:
+        raise QuerySyntaxError(f"{op}: expects a date like 2024-01-31, got {value!r}") from None
+
+
+def _parse_size(op: str, value: str) -> int:
+    match = _SIZE.fullmatch(value)
+    if not match:
+        raise QuerySyntaxError(f"{op}: expects a size like 500K or 10M, got {value!r}")
+    return int(match["number"]) * _UNITS[match["unit"].lower()]
+
+
+def _operator(op: str, value: str, phrase: bool, negated: bool) -> Node | None:
+    if op in TEXT_FIELDS:
+        return Text(value, field=TEXT_FIELDS[op], phrase=phrase, negated=negated)
+    if op in ("is", "has"):
+        flag = _FLAGS.get((op, value.lower()))
+        if flag is None:
+            raise QuerySyntaxError(f"Unknown search operator {op}:{value}")
+        return Filter(*flag, negated=negated)
+    if op == "in":
+        if value.lower() not in FolderType.values:
+            raise QuerySyntaxError(f"Unknown folder in:{value}")
+        return Filter("folder", value.lower(), negated)
+    if op == "label":
+        return Filter("label", value, negated)
+    if op in ("before", "after"):
+        return Filter(op, _parse_date(op, value), negated)
+    if op in ("larger", "smaller"):
+        return Filter(op, _parse_size(op, value), negated)
+    return None
+
+
+def parse(query: str) -> list[Node]:
+    """Split ``query`` into nodes. Raises QuerySyntaxError for invalid operator values."""
+    nodes: list[Node] = []
+    for match in _TOKEN.finditer(query):
+        negated = bool(match["neg"])
+        op = (match["op"] or "").lower()
+        phrase = match["quoted"] is not None
+        value = match["quoted"] if phrase else match["bare"]
+        node = _operator(op, value, phrase, negated) if op and value else None
+        if node is None:
+            text = f"{match['op']}:{value}" if match["op"] else value
+            node = Text(text, phrase=phrase, negated=negated)
+        if isinstance(node, Filter) or node.words:
+            nodes.append(node)
+    return nodes
+
+
+def plan(nodes: list[Node]) -> Plan:
+    """
+    Simplify parsed nodes. Repeated bounds collapse to the tightest, and
+    contradictory ones (``is:read is:unread``, ``after:`` on or past ``before:``)
+    make the plan empty.
+    """
+    result = Plan(empty=not nodes)
+    bounds: dict[str, Filter] = {}
+    seen: dict[str, Any] = {}
+    for node in nodes:
+        if isinstance(node, Text):
+            result.texts.append(node)
+        elif node.key in ("after", "larger") and not node.negated:
+            current = bounds.get(node.key)
+            bounds[node.key] = node if current is None or node.value > current.value else current
+        elif node.key in ("before", "smaller") and not node.negated:
+            current = bounds.get(node.key)
+            bounds[node.key] = node if current is None or node.value < current.value else current
+        else:
+            if node.key in seen and _conflicts(node, seen[node.key]):
+                result.empty = True
+            seen[node.key] = (node.value, node.negated)
+            result.filters.append(node)
+    after, before = bounds.get("after"), bounds.get("before")
+    larger, smaller = bounds.get("larger"), bounds.get("smaller")
+    if (after and before and after.value >= before.value) or (larger and smaller and smaller.value - larger.value <= 1):
+        result.empty = True
+    result.filters.extend(bounds.values())
+    return result
+
+
+def _conflicts(node: Filter, previous: tuple[Any, bool]) -> bool:
+    value, negated = previous
+    if node.key == "label":
+        value, current = value.lower(), node.value.lower()
+    else:
+        current = node.value
+    if node.negated != negated:
+        return current == value
+    # Two different required values for a single-valued column can never both hold
+    return not negated and node.key != "label" and current != value
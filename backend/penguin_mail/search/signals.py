@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from penguin_mail.models import Email, Recipient
+from penguin_mail.search.documents import INDEXED_FIELDS, refresh, refresh_recipients
+
+
+@receiver(post_save, sender=Email)
+def index_email(
+    instance: Email, created: bool, update_fields: frozenset[str] | None, raw: bool, **_kwargs: Any
+) -> None:
+    if raw:
+        return
+    if created or update_fields is None or not INDEXED_FIELDS.isdisjoint(update_fields):
+        refresh(instance)
+
+
+@receiver(post_save, sender=Recipient)
+@receiver(post_delete, sender=Recipient)
+def index_recipients(instance: Recipient, raw: bool = False, **_kwargs: Any) -> None:
+    if not raw:
+        refresh_recipients(instance.email_id)
@@ -0,0 +1,113 @@
+"""
+The cold tier for old mail.
+
+Bodies are most of the database and old mail is rarely opened. ``archive_old_mail``
+moves the compressed bodies of emails older than ``ARCHIVE_AFTER_DAYS`` out
+of ``EmailBody`` into per-account ``BodyArchive`` files, ``ARCHIVE_BATCH_SIZE``
+bodies per file and transaction, and drops their text from the search
+index. The emails themselves stay: lists, counts, labels and searches on
+subject, sender and recipients work as before, and ``Email.body`` reads an
+archived body back from its file. Assigning a new body makes it hot again.
+An archive's file is deleted along with its row, however the row goes.
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from penguin_mail.models import Account, BodyArchive, EmailBody, EmailSearchDocument, SendStatus, decompress_body
+
+
+def archivable(account_id: int, cutoff: datetime) -> QuerySet[EmailBody]:
+    """Hot bodies of the account's emails created before ``cutoff``, minus drafts and mail still to be sent."""
+    return EmailBody.objects.filter(
+        email__account_id=account_id,
+        email__created_at__lt=cutoff,
+        email__is_draft=False,
+        email__send_status__in=["", SendStatus.SENT],
+        archive__isnull=True,
+        unresolved_cid=False,
+    )
+
+
+def archive_batch(account_id: int, cutoff: datetime, batch_size: int) -> int:
+    """Move up to ``batch_size`` of the account's archivable bodies into a new archive. Returns how many moved."""
+    archive = BodyArchive(account_id=account_id)
+    try:
+        with transaction.atomic():
+            bodies = list(
+                archivable(account_id, cutoff).select_for_update(of=("self",)).order_by("email_id")[:batch_size]
+            )
+            if not bodies:
+                return 0
+            content = bytearray()
+            for body in bodies:
+                data = body.data or b""
+                body.archive, body.archive_offset, body.archive_length = archive, len(content), len(data)
+                content += data
+                body.data = None
+            archive.file.save(f"{account_id}.bin", ContentFile(bytes(content)), save=False)
+            archive.save()
+            EmailBody.objects.bulk_update(bodies, ["data", "archive", "archive_offset", "archive_length"])
+            EmailSearchDocument.objects.filter(email_id__in=[body.email_id for body in bodies]).update(body="")
+    except Exception:
+        # The file was written outside the transaction
+        if archive.file:
+            archive.file.delete(save=False)
+        raise
+    return len(bodies)
+
+
+def prune() -> int:
+    """Delete archives no body points into any more (all their emails were deleted). Returns how many."""
+    pruned = 0
+    for archive in BodyArchive.objects.filter(bodies__isnull=True):
+        archive.delete()
+        pruned += 1
+    return pruned
+
+
+def archive_old_mail(now: datetime | None = None, days: int | None = None, batch_size: int | None = None) -> int:
+    """Archive every account's bodies older than ``days`` (ARCHIVE_AFTER_DAYS), then prune. Returns bodies moved."""
+    days = days if days is not None else int(getattr(settings, "ARCHIVE_AFTER_DAYS", 180))
+    batch_size = batch_size or int(getattr(settings, "ARCHIVE_BATCH_SIZE", 1000))
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    moved = 0
+    for account_id in Account.objects.order_by("pk").values_list("pk", flat=True):
+        while count := archive_batch(account_id, cutoff, batch_size):
+            moved += count
+    prune()
+    return moved
+
+
+def archived_texts(email_ids: list[int]) -> dict[int, str]:
+    """The archived bodies of ``email_ids`` (others are left out), opening each archive file once."""
+    bodies = list(
+        EmailBody.objects.filter(email_id__in=email_ids, archive__isnull=False)
+        .order_by("archive_id", "archive_offset")
+        .values_list("archive_id", "email_id", "archive_offset", "archive_length")
+    )
+    archives = BodyArchive.objects.in_bulk({archive_id for archive_id, *_ in bodies})
+    texts: dict[int, str] = {}
+    for archive_id, in_file in groupby(bodies, key=itemgetter(0)):
+        with archives[archive_id].file.open("rb") as f:
+            for _, email_id, offset, length in in_file:
+                f.seek(offset)
+                texts[email_id] = decompress_body(f.read(length))
+    return texts
+
+
+@receiver(post_delete, sender=BodyArchive)
+def archive_deleted(instance: BodyArchive, **_kwargs: Any) -> None:
+    # Also reached through the CASCADE from a deleted account or user. The
+    # file goes once the deletion commits, so a rollback keeps the bodies.
+    transaction.on_commit(lambda: instance.file.delete(save=False))
@@ -0,0 +1,251 @@
+"""
+Bulk email operations.
+
+``apply`` changes a set of emails with a few set-based statements; counters,
+versions and the change log follow in the same transaction. ``POST
+/emails/bulk`` runs it on the posted ids straight away. Given a ``query``
+instead, it queues a ``BulkJob``, which a background thread works through
+in pk order, one chunk per transaction. Progress is saved with each chunk,
+so a restarted job resumes after the last chunk it committed. The job's
+IMAP write-back is batched too: one connection per account and one UID
+command per source folder for each chunk.
+
+A running job is a lease on its heartbeat (``updated_at``): every save is
+conditional on the value the worker last wrote, so once ``resume_stalled``
+hands the job to a new worker, the old one stops at its next save instead of
+racing it.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from penguin_mail.models import Account, BulkJob, BulkJobStatus, Email, Label
+from penguin_mail.search import filter_emails
+from penguin_mail.services import changelog, counters
+
+logger = logging.getLogger(__name__)
+
+# Operations mirrored on the IMAP server under their own name (``move`` to spam is mirrored as ``moveSpam``)
+_IMAP_OPS = ("markRead", "markUnread", "archive", "delete", "deletePermanent")
+
+
+def chunk_size() -> int:
+    return int(getattr(settings, "BULK_JOB_CHUNK_SIZE", 500))
+
+
+def filter_mailbox(qs: QuerySet[Email], filters: Mapping[str, Any]) -> QuerySet[Email]:
+    """
+    Restrict ``qs`` by ``filters``, keyed like the ``GET /emails`` parameters
+    (unset filters may be None or absent); an email must carry every label in
+    ``labelIds``. Raises QuerySyntaxError for an invalid ``search``.
+    """
+    if folder := filters.get("folder"):
+        qs = qs.filter(folder=folder)
+    if account_id := filters.get("accountId"):
+        qs = qs.filter(account__uuid=account_id)
+    for key, field in (("isRead", "is_read"), ("isStarred", "is_starred"), ("hasAttachment", "has_attachment")):
+        if filters.get(key) is not None:
+            qs = qs.filter(**{field: filters[key]})
+    if search := filters.get("search"):
+        qs = filter_emails(qs, search)
+    if thread_id := filters.get("threadId"):
+        qs = qs.filter(thread_id=thread_id)
+    for label_id in filters.get("labelIds") or ():
+        qs = qs.filter(labels__uuid=label_id)
+    return qs
+
+
+def imap_op(operation: str, folder: str | None) -> str | None:
+    """The IMAP write-back for ``operation``, or None if it stays local."""
+    if operation == "move":
+        return "moveSpam" if folder == "spam" else None
+    return operation if operation in _IMAP_OPS else None
+
+
+def apply(
+    user: Any, emails: QuerySet[Email], operation: str, folder: str | None, label_ids: list[str] | None
+) -> Iterable[Email]:
+    """
+    Apply ``operation`` to ``emails`` (already scoped to ``user``; ``folder``
+    and ``label_ids`` already validated). Returns the emails to mirror on the
+    IMAP server, loaded before a permanent delete removes them.
+    """
+    # Resolved once, so each statement below filters on integer keys rather than recompiling ``emails``
+    emails = Email.objects.filter(pk__in=list(emails.values_list("pk", flat=True)))
+    targets: Iterable[Email] = emails
+
+    with counters.tracking(emails):
+        if operation == "markRead":
+            emails.update(is_read=True)
+        elif operation == "markUnread":
+            emails.update(is_read=False)
+        elif operation == "star":
+            emails.update(is_starred=True)
+        elif operation == "unstar":
+            emails.update(is_starred=False)
+        elif operation == "archive":
+            emails.update(folder="archive")
+        elif operation == "delete":
+            emails.update(folder="trash")
+        elif operation == "deletePermanent":
+            # Load the rows first: the queryset is empty once they are deleted
+            targets = list(emails)
+            emails.delete()
+        elif operation == "move":
+            emails.update(folder=folder)
+        elif operation in ("addLabel", "removeLabel"):
+            _apply_label_op(operation, emails, label_ids or [], user)
+        if operation != "deletePermanent":
+            # update() and the link-table writes send no signals, so these changes are logged here
+            changelog.record_emails(emails)
+    return targets
+
+
+def _apply_label_op(op: str, emails: QuerySet[Email], label_ids: list[str], user: Any) -> None:
+    """
+    Apply addLabel / removeLabel with one bulk statement on the link table
+    (batched to the database's parameter limit). No m2m signals are sent; the
+    caller tracks counters and logs the change.
+    """
+    labels = list(Label.objects.filter(uuid__in=label_ids, user=user).values_list("pk", flat=True))
+    through = Email.labels.through
+    if op == "removeLabel":
+        through.objects.filter(email__in=emails, label_id__in=labels).delete()
+        return
+    # Existing links are skipped by the (email, label) unique constraint
+    through.objects.bulk_create(
+        [through(email_id=pk, label_id=label) for pk in emails.values_list("pk", flat=True) for label in labels],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue(job_pk: int) -> None:
+    """Start the job on a background thread once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _spawn(job_pk))
+
+
+def _spawn(job_pk: int) -> None:
+    threading.Thread(target=_run, args=(job_pk,), name=f"bulk-job-{job_pk}", daemon=True).start()
+
+
+def _run(job_pk: int) -> None:
+    try:
+        run(job_pk)
+    except Exception:
+        logger.exception("Bulk job %s crashed", job_pk)
+    finally:
+        connection.close()
+
+
+class _SupersededError(Exception):
+    """The job was resumed by another worker after this one was taken for stalled."""
+
+
+def run(job_pk: int) -> bool:
+    """Claim a queued job and apply it to every remaining matching email. Returns False if not claimable."""
+    claimed = BulkJob.objects.filter(pk=job_pk, status=BulkJobStatus.QUEUED).update(
+        status=BulkJobStatus.RUNNING, updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = BulkJob.objects.select_related("user").get(pk=job_pk)
+    try:
+        _process(job)
+    except _SupersededError:
+        logger.warning("Bulk job %s was resumed by another worker", job.uuid)
+        return True
+    except Exception as e:
+        logger.exception("Bulk job %s failed", job.uuid)
+        job.status = BulkJobStatus.FAILED
+        job.error = str(e)[:1000]
+    else:
+        job.status = BulkJobStatus.COMPLETED
+    _save(job, "status", "error")
+    return True
+
+
+def _save(job: BulkJob, *fields: str) -> bool:
+    """
+    Save ``fields`` and touch the heartbeat, unless the job was resumed since
+    this worker last saved it. Returns False (saving nothing) in that case.
+    """
+    now = timezone.now()
+    saved = BulkJob.objects.filter(pk=job.pk, status=BulkJobStatus.RUNNING, updated_at=job.updated_at).update(
+        updated_at=now, **{field: getattr(job, field) for field in fields}
+    )
+    if saved:
+        job.updated_at = now
+    return bool(saved)
+
+
+def _process(job: BulkJob) -> None:
+    emails = Email.objects.filter(account__user=job.user, pk__lte=job.max_email_id)
+    matching = filter_mailbox(emails, job.query).order_by("pk")
+    write_back = imap_op(job.operation, job.folder)
+    while True:
+        pks = list(matching.filter(pk__gt=job.last_email_id).values_list("pk", flat=True)[: chunk_size()])
+        if not pks:
+            return
+        uids: dict[int, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+        if write_back:
+            # Read before the chunk is applied: a permanent delete removes the rows
+            rows = Email.objects.filter(pk__in=pks).order_by("pk").values_list("account_id", "imap_folder", "imap_uid")
+            for account_id, imap_folder, uid in rows:
+                if uid:
+                    uids[account_id][imap_folder or "INBOX"].append(uid)
+        with transaction.atomic():
+            apply(job.user, Email.objects.filter(pk__in=pks), job.operation, job.folder, job.label_ids)
+            job.processed_count += len(pks)
+            job.last_email_id = pks[-1]
+            # Saving per chunk doubles as the heartbeat checked by resume_stalled()
+            if not _save(job, "processed_count", "last_email_id"):
+                raise _SupersededError  # rolls the chunk back; the new worker applies it
+        if write_back:
+            _write_back(job, write_back, uids)
+
+
+def _write_back(job: BulkJob, op: str, uids: dict[int, dict[str, list[int]]]) -> None:
+    from penguin_mail.services.imap import imap_write_back
+
+    for account in Account.objects.filter(pk__in=list(uids)):
+        try:
+            imap_write_back(account, op, uids[account.pk])
+        except Exception:
+            # The local change stands either way, as with the per-email write-backs
+            logger.exception("IMAP write-back %s failed for account %s", op, account.uuid)
+        # Heartbeat, so a slow server does not get the job taken for stalled. The
+        # chunk is committed, so its write-back completes even if it was anyway.
+        _save(job)
+
+
+def resume_stalled(now: datetime | None = None) -> int:
+    """
+    Restart jobs whose worker stopped reporting progress, or never started:
+    a job is queued in the request's transaction and only claimed by the
+    thread started once it commits, so a restart in between leaves it queued.
+    Called from the dispatcher loop; jobs resume after the last chunk they
+    committed. Returns the number of jobs restarted.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, "BULK_JOB_STALL_SECONDS", 300))
+    resumed = 0
+    statuses = (BulkJobStatus.QUEUED, BulkJobStatus.RUNNING)
+    stalled = BulkJob.objects.filter(status__in=statuses, updated_at__lte=cutoff)
+    for pk in stalled.values_list("pk", flat=True):
+        # Conditional UPDATE so two dispatchers cannot both restart the same job
+        if BulkJob.objects.filter(pk=pk, status__in=statuses, updated_at__lte=cutoff).update(
+            status=BulkJobStatus.QUEUED, updated_at=now
+        ):
+            _spawn(pk)
+            resumed += 1
+    return resumed
@@ -0,0 +1,224 @@
+import logging
+import re
+import smtplib
+import threading
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.html import escape
+
+from penguin_mail.html_text import html_preview
+from penguin_mail.models import (
+    BulkSend,
+    BulkSendStatus,
+    Contact,
+    Email,
+    FolderType,
+    Recipient,
+    RecipientKind,
+    SendStatus,
+)
+from penguin_mail.services import counters, sent_copies
+
+logger = logging.getLogger(__name__)
+
+# Contacts loaded per keyset page while streaming group membership
+MEMBER_PAGE_SIZE = 500
+# Consecutive reconnects allowed before a job is failed
+MAX_RECONNECTS = 3
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LINE_BREAKS = re.compile(r"[\r\n]+")
+
+MERGE_FIELDS = {
+    "name": lambda c: c.name,
+    "firstName": lambda c: c.name.split(" ", 1)[0],
+    "lastName": lambda c: c.name.split(" ", 1)[1] if " " in c.name else "",
+    "email": lambda c: c.email,
+    "company": lambda c: c.company,
+    "phone": lambda c: c.phone,
+}
+
+
+def unknown_fields(template: str) -> set[str]:
+    """Placeholders in ``template`` that are not merge fields."""
+    return {name for name in PLACEHOLDER.findall(template) if name not in MERGE_FIELDS}
+
+
+def render(template: str, contact: Contact, html: bool = False) -> str:
+    """Substitute ``{{ field }}`` placeholders with the contact's values (HTML-escaped when ``html``)."""
+
+    def substitute(match: re.Match) -> str:
+        value = MERGE_FIELDS[match.group(1)](contact)
+        return str(escape(value)) if html else value
+
+    return PLACEHOLDER.sub(substitute, template)
+
+
+def render_header(template: str, contact: Contact) -> str:
+    """``render`` for a header value: line breaks, from the template or a contact's fields, become spaces."""
+    return LINE_BREAKS.sub(" ", render(template, contact))
+
+
+def iter_members(group_id: int, after_pk: int = 0) -> Iterator[Contact]:
+    """
+    Stream a group's contacts in pk order, one keyset page at a time.
+
+    Only one page is held in memory, no cursor stays open while messages are
+    sent, and contacts added to the group mid-send are still picked up.
+    """
+    while True:
+        page = list(
+            Contact.objects.filter(groups__id=group_id, pk__gt=after_pk)
+            .order_by("pk")
+            .only("pk", "name", "email", "company", "phone")[:MEMBER_PAGE_SIZE]
+        )
+        yield from page
+        if len(page) < MEMBER_PAGE_SIZE:
+            return
+        after_pk = page[-1].pk
+
+
+def enqueue(job_pk: int) -> None:
+    """Start the job on a background thread once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _spawn(job_pk))
+
+
+def _spawn(job_pk: int) -> None:
+    threading.Thread(target=_run, args=(job_pk,), name=f"bulk-send-{job_pk}", daemon=True).start()
+
+
+def _run(job_pk: int) -> None:
+    try:
+        run(job_pk)
+    except Exception:
+        logger.exception("Bulk send %s crashed", job_pk)
+    finally:
+        connection.close()
+
+
+def run(job_pk: int) -> bool:
+    """Claim a queued job and send it to every remaining group member. Returns False if not claimable."""
+    claimed = BulkSend.objects.filter(pk=job_pk, status=BulkSendStatus.QUEUED).update(
+        status=BulkSendStatus.RUNNING, updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = BulkSend.objects.select_related("account").get(pk=job_pk)
+    try:
+        _send_all(job)
+    except Exception as e:
+        logger.exception("Bulk send %s failed", job.uuid)
+        job.status = BulkSendStatus.FAILED
+        job.error = str(e)[:1000]
+    else:
+        job.status = BulkSendStatus.COMPLETED
+    job.save(update_fields=["status", "error", "updated_at"])
+    return True
+
+
+def _send_all(job: BulkSend) -> None:
+    from penguin_mail.services.ratelimit import bucket_for
+    from penguin_mail.services.smtp import send_email, smtp_session
+
+    if job.group_id is None:
+        raise ValueError("Contact group was deleted")
+
+    bucket = bucket_for(job.account)
+    members = iter_members(job.group_id, job.last_contact_id)
+    contact = next(members, None)
+    reconnects = 0
+    while contact is not None:
+        with smtp_session(job.account) as session:
+            while contact is not None:
+                bucket.acquire()
+                subject = render_header(job.subject_template, contact)
+                body = render(job.body_template, contact, html=True)
+                message, error = None, None
+                try:
+                    message = send_email(
+                        account=job.account,
+                        recipients_to=[contact.email],
+                        recipients_cc=[],
+                        recipients_bcc=[],
+                        subject=subject,
+                        body_html=body,
+                        session=session,
+                    )
+                except smtplib.SMTPServerDisconnected:
+                    reconnects += 1
+                    if reconnects > MAX_RECONNECTS:
+                        raise
+                    break  # reopen the session and retry this contact
+                except Exception as e:
+                    # Refused by the server, or a message that could not be built: this contact fails alone
+                    logger.warning("Bulk send %s: sending to %s failed: %s", job.uuid, contact.email, e)
+                    error = e
+                    job.failed_count += 1
+                else:
+                    job.sent_count += 1
+                    reconnects = 0
+                _record(job, contact, subject, body, message, error)
+                contact = next(members, None)
+
+
+def _record(job: BulkSend, contact: Contact, subject: str, body: str, message: Any, error: Exception | None) -> None:
+    """
+    Store the message to ``contact`` in Sent (as failed when ``error``) and the
+    job's progress, in one transaction so a resumed job never stores it twice.
+    """
+    with transaction.atomic():
+        email = Email.objects.create(  # type: ignore[misc]  # body is a property
+            account=job.account,
+            subject=subject[: Email._meta.get_field("subject").max_length],
+            body=body,
+            preview=html_preview(body),
+            size=len(body.encode()),
+            sender_name=job.account.display_name or job.account.name,
+            sender_email=job.account.email,
+            folder=FolderType.SENT,
+            thread_id=uuid.uuid4(),
+            send_status=SendStatus.SENT if error is None else SendStatus.FAILED,
+            send_attempts=1,
+            send_error="" if error is None else str(error)[:1000],
+            message_id=message.message_id if message is not None else "",
+        )
+        Recipient.objects.create(email=email, address=contact.email, name=contact.name, kind=RecipientKind.TO)
+        counters.record_new([email.pk])
+        job.last_contact_id = contact.pk
+        # Saving per message doubles as the heartbeat checked by resume_stalled()
+        job.save(update_fields=["sent_count", "failed_count", "last_contact_id", "updated_at"])
+    if message is not None:
+        sent_copies.enqueue(email, message)
+
+
+def resume_stalled(now: datetime | None = None) -> int:
+    """
+    Restart jobs whose worker stopped reporting progress, or never started:
+    a job is queued in the request's transaction and only claimed by the
+    thread started once it commits, so a restart in between leaves it queued.
+
+    Called from the dispatcher loop. Jobs resume after the last contact they
+    recorded, so delivery is at-least-once: a worker that dies between sending
+    a message and recording it mails that contact again. Returns the number
+    of jobs restarted.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, "BULK_SEND_STALL_SECONDS", 300))
+    resumed = 0
+    statuses = (BulkSendStatus.QUEUED, BulkSendStatus.RUNNING)
+    stalled = BulkSend.objects.filter(status__in=statuses, updated_at__lte=cutoff)
+    for pk in stalled.values_list("pk", flat=True):
+        # Conditional UPDATE so two dispatchers cannot both restart the same job
+        if BulkSend.objects.filter(pk=pk, status__in=statuses, updated_at__lte=cutoff).update(
+            status=BulkSendStatus.QUEUED, updated_at=now
+        ):
+            _spawn(pk)
+            resumed += 1
+    return resumed
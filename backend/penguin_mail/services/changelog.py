@@ -0,0 +1,236 @@
+"""
+Append-only per-user change log behind ``GET /changes``.
+
+Every create, update and delete of an email, label, folder or contact adds
+a ``ChangeLogEntry`` inside the writing transaction. Model saves, deletes
+and m2m edits are caught by the signal handlers below, which covers the API
+and sync ingestion alike. Paths that write with queryset ``update()`` call
+``record_emails`` themselves: the bulk endpoint and the send claims in
+``dispatcher`` and ``outbox``.
+
+Entries carry only ids. Clients fetch what they need, so refresh traffic
+follows change volume. Readers walk the log with ``after`` in position
+order, ``(txid, id)``, which never serves an entry ahead of one that can
+still commit. ``compact`` keeps the log bounded without breaking
+any cursor still within the retention window. ``services.events`` tails
+the log to push the same entries to open event streams.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Exists, Func, OuterRef, Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from penguin_mail.models import (
+    Account,
+    ChangeKind,
+    ChangeLogEntry,
+    ChangeOp,
+    Contact,
+    ContactGroup,
+    CustomFolder,
+    Email,
+    Label,
+    User,
+)
+
+# (txid, id): where an entry sits in the log
+Position = tuple[int, int]
+
+
+class SnapshotHorizon(Func):
+    """
+    The oldest transaction still running on PostgreSQL: every entry with a
+    lower txid is committed or gone, and none can be added. Elsewhere 1,
+    above the txid 0 of every entry.
+    """
+
+    template = "txid_snapshot_xmin(txid_current_snapshot())"
+    output_field = BigIntegerField()
+
+    def as_sqlite(self, compiler: Any, connection: Any, **extra_context: Any) -> Any:
+        return self.as_sql(compiler, connection, template="1", **extra_context)
+
+
+def after(position: Position) -> QuerySet[ChangeLogEntry]:
+    """
+    Entries past ``position`` that are safe to serve, oldest first.
+
+    On PostgreSQL concurrent transactions commit out of id order, so an entry
+    could become visible after a later one was served and be skipped for
+    good. Ordering by transaction first and stopping at the snapshot horizon
+    holds readers back until every entry before the ones served is visible.
+    """
+    txid, pk = position
+    return ChangeLogEntry.objects.filter(
+        Q(txid__gt=txid) | Q(txid=txid, pk__gt=pk), txid__lt=SnapshotHorizon()
+    ).order_by("txid", "pk")
+
+
+def newest(entries: QuerySet[ChangeLogEntry]) -> Position:
+    """The position of the last of ``entries`` that is safe to serve; (0, 0) when there are none."""
+    last = entries.filter(txid__lt=SnapshotHorizon()).order_by("-txid", "-pk").values_list("txid", "pk").first()
+    return last or (0, 0)
+
+
+def retention() -> timedelta:
+    return timedelta(days=getattr(settings, "CHANGE_LOG_RETENTION_DAYS", 30))
+
+
+def record(user_id: int, kind: str, object_ids: Iterable[Any], op: str) -> None:
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(user_id=user_id, kind=kind, object_id=object_id, op=op) for object_id in object_ids
+    )
+    _publish()
+
+
+def record_emails(emails: QuerySet[Email] | Iterable[int], op: str = ChangeOp.UPDATED) -> None:
+    """
+    Log ``op`` for each of ``emails`` (a queryset or pks). One INSERT ... SELECT
+    writes every entry inside the database, so a bulk edit of thousands of
+    emails costs one statement and no model instances.
+    """
+    qs = emails if isinstance(emails, QuerySet) else Email.objects.filter(pk__in=list(emails))
+    try:
+        select, params = qs.order_by("pk").values_list("account__user_id", "uuid").query.sql_with_params()
+    except EmptyResultSet:
+        # Nothing can match (e.g. no pks), so there is nothing to log
+        return
+    table = connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, object_id, kind, op, created_at) "  # noqa: S608
+            f"SELECT picked.*, %s, %s, %s FROM ({select}) picked",
+            [ChangeKind.EMAIL, op, created_at, *params],
+        )
+    _publish()
+
+
+def _publish() -> None:
+    from penguin_mail.services.events import broker
+
+    # Open event streams in this process hear about the entries once they are visible
+    if broker.running:
+        transaction.on_commit(broker.notify)
+
+
+def compact(now: datetime | None = None) -> int:
+    """
+    Drop entries past the retention window and entries superseded by a
+    later one for the same object. Returns the number of entries removed.
+
+    Superseded entries are safe to drop: a client positioned before one
+    still reaches the later entry, which names the same object.
+    """
+    now = now or timezone.now()
+    expired, _ = ChangeLogEntry.objects.filter(created_at__lt=now - retention()).delete()
+    later = ChangeLogEntry.objects.filter(
+        Q(txid__gt=OuterRef("txid")) | Q(txid=OuterRef("txid"), pk__gt=OuterRef("pk")),
+        user=OuterRef("user"),
+        kind=OuterRef("kind"),
+        object_id=OuterRef("object_id"),
+    )
+    superseded, _ = ChangeLogEntry.objects.filter(Exists(later)).delete()
+    return expired + superseded
+
+
+# ---------------------------------------------------------------------------
+# Signal handlers
+# ---------------------------------------------------------------------------
+
+
+def _deleting_user(origin: Any) -> bool:
+    # Entries written while a user is being deleted would outlive the cascade and break its foreign key
+    return isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User)
+
+
+@receiver(post_save, sender=Email)
+def email_saved(instance: Email, created: bool, raw: bool, **_kwargs: Any) -> None:
+    if not raw:
+        op = ChangeOp.CREATED if created else ChangeOp.UPDATED
+        record(instance.account.user_id, ChangeKind.EMAIL, [instance.uuid], op)
+
+
+@receiver(post_delete, sender=Email)
+def email_deleted(instance: Email, origin: Any = None, **_kwargs: Any) -> None:
+    if _deleting_user(origin):
+        return
+    # An account's deletion cascades to its emails; its owner is known without a query per email
+    user_id = origin.user_id if isinstance(origin, Account) else instance.account.user_id
+    record(user_id, ChangeKind.EMAIL, [instance.uuid], ChangeOp.DELETED)
+
+
+@receiver(m2m_changed, sender=Email.labels.through)
+def email_labels_changed(
+    instance: Email | Label, action: str, reverse: bool, pk_set: set[int] | None, **_kwargs: Any
+) -> None:
+    if not reverse:
+        if action.startswith("post_"):
+            record(instance.account.user_id, ChangeKind.EMAIL, [instance.uuid], ChangeOp.UPDATED)  # type: ignore[union-attr]
+    elif action in ("post_add", "post_remove"):
+        record_emails(pk_set or ())
+    elif action == "pre_clear":
+        # post_clear does not say which emails lost the label
+        record_emails(Email.objects.filter(labels=instance))  # type: ignore[misc]
+
+
+# Models owned directly by a user that the log covers
+_KINDS: dict[type, str] = {
+    Label: ChangeKind.LABEL,
+    CustomFolder: ChangeKind.FOLDER,
+    Contact: ChangeKind.CONTACT,
+}
+
+
+def _user_model_saved(sender: type, instance: Any, created: bool, raw: bool, **_kwargs: Any) -> None:
+    if not raw:
+        record(instance.user_id, _KINDS[sender], [instance.uuid], ChangeOp.CREATED if created else ChangeOp.UPDATED)
+
+
+def _user_model_deleted(sender: type, instance: Any, origin: Any = None, **_kwargs: Any) -> None:
+    if not _deleting_user(origin):
+        record(instance.user_id, _KINDS[sender], [instance.uuid], ChangeOp.DELETED)
+
+
+for _model in _KINDS:
+    post_save.connect(_user_model_saved, sender=_model, dispatch_uid=f"changelog.{_model.__name__}.save")
+    post_delete.connect(_user_model_deleted, sender=_model, dispatch_uid=f"changelog.{_model.__name__}.delete")
+
+
+@receiver(pre_delete, sender=Label)
+def label_deleting(instance: Label, origin: Any = None, **_kwargs: Any) -> None:
+    # Deleting a label unlinks it from its emails without an m2m signal
+    if not _deleting_user(origin):
+        record_emails(Email.objects.filter(labels=instance))
+
+
+@receiver(m2m_changed, sender=ContactGroup.contacts.through)
+def group_members_changed(
+    instance: Contact | ContactGroup, action: str, reverse: bool, pk_set: set[int] | None, **_kwargs: Any
+) -> None:
+    if reverse:
+        # ``instance`` is the contact whose groups changed
+        if action.startswith("post_"):
+            record(instance.user_id, ChangeKind.CONTACT, [instance.uuid], ChangeOp.UPDATED)
+    elif action in ("post_add", "post_remove"):
+        _record_contacts(instance.user_id, Contact.objects.filter(pk__in=pk_set or ()))
+    elif action == "pre_clear":
+        _record_contacts(instance.user_id, instance.contacts.all())  # type: ignore[union-attr]
+
+
+@receiver(pre_delete, sender=ContactGroup)
+def group_deleting(instance: ContactGroup, origin: Any = None, **_kwargs: Any) -> None:
+    if not _deleting_user(origin):
+        _record_contacts(instance.user_id, instance.contacts.all())
+
+
+def _record_contacts(user_id: int, contacts: QuerySet[Contact]) -> None:
+    record(user_id, ChangeKind.CONTACT, contacts.values_list("uuid", flat=True), ChangeOp.UPDATED)
@@ -0,0 +1,95 @@
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, QuerySet
+
+from penguin_mail.models import Account, ChangeScope, Email, MailboxCounter
+from penguin_mail.services import versions
+
+# (account id, folder, label id): folder rows have label None, label rows have folder ""
+Key = tuple[int, str, int | None]
+Tally = dict[Key, tuple[int, int]]
+
+
+def tally(emails: QuerySet[Email]) -> Tally:
+    """(total, unread) per folder and per label for ``emails``, in two grouped queries."""
+    result: Tally = {}
+    folders = (
+        emails.order_by()
+        .values_list("account_id", "folder")
+        .annotate(total=Count("pk"), unread=Count("pk", filter=Q(is_read=False)))
+    )
+    for account_id, folder, total, unread in folders:
+        result[(account_id, folder, None)] = (total, unread)
+    links = (
+        Email.labels.through.objects.filter(email__in=emails)
+        .order_by()
+        .values_list("email__account_id", "label_id")
+        .annotate(total=Count("pk"), unread=Count("pk", filter=Q(email__is_read=False)))
+    )
+    for account_id, label_id, total, unread in links:
+        result[(account_id, "", label_id)] = (total, unread)
+    return result
+
+
+def _apply(deltas: Tally) -> None:
+    for (account_id, folder, label_id), (total, unread) in deltas.items():
+        if not total and not unread:
+            continue
+        label = Q(label__isnull=True) if label_id is None else Q(label_id=label_id)
+        rows = MailboxCounter.objects.filter(label, account_id=account_id, folder=folder)
+        if rows.update(total=F("total") + total, unread=F("unread") + unread):
+            continue
+        try:
+            with transaction.atomic():
+                MailboxCounter.objects.create(
+                    account_id=account_id, folder=folder, label_id=label_id, total=total, unread=unread
+                )
+        except IntegrityError:
+            # A concurrent writer created the row first
+            rows.update(total=F("total") + total, unread=F("unread") + unread)
+
+
+def record_new(pks: Iterable[int]) -> None:
+    """Count freshly created emails. Call inside the transaction that created them."""
+    _apply(tally(Email.objects.filter(pk__in=list(pks))))
+
+
+@contextmanager
+def tracking(emails: QuerySet[Email] | Iterable[int]) -> Iterator[None]:
+    """
+    Keep counters in step with whatever the block does to ``emails``.
+
+    The affected rows are locked and tallied before and after the block, and
+    the difference is applied in the same transaction, so moves, read-state
+    changes, label edits and deletions (by ``update()``, ``save()`` or
+    ``delete()``) are all covered without per-path bookkeeping. The owners'
+    email versions are bumped too, as ``update()`` sends no signals.
+    """
+    with transaction.atomic():
+        qs = emails if isinstance(emails, QuerySet) else Email.objects.filter(pk__in=list(emails))
+        pks = list(qs.order_by().select_for_update(of=("self",)).values_list("pk", flat=True))
+        tracked = Email.objects.filter(pk__in=pks)
+        before = tally(tracked)
+        yield
+        after = tally(tracked)
+        deltas: Tally = {}
+        for key in before.keys() | after.keys():
+            total, unread = after.get(key, (0, 0))
+            old_total, old_unread = before.get(key, (0, 0))
+            deltas[key] = (total - old_total, unread - old_unread)
+        _apply(deltas)
+        versions.bump_accounts(ChangeScope.EMAILS, {account_id for account_id, _, _ in before.keys() | after.keys()})
+
+
+def recompute(account: Account) -> int:
+    """Rebuild the account's counters from its emails. Returns the number of counter rows written."""
+    with transaction.atomic():
+        counts = tally(Email.objects.filter(account=account))
+        MailboxCounter.objects.filter(account=account).delete()
+        MailboxCounter.objects.bulk_create(
+            MailboxCounter(account_id=account_id, folder=folder, label_id=label_id, total=total, unread=unread)
+            for (account_id, folder, label_id), (total, unread) in counts.items()
+        )
+    return len(counts)
@@ -0,0 +1,210 @@
+import heapq
+import logging
+import threading
+import uuid as uuid_mod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from penguin_mail.models import Email, FolderType, SendStatus
+from penguin_mail.services import bulk_ops, bulk_send, changelog, versions
+
+logger = logging.getLogger(__name__)
+
+# Outbox rows with no retry time that have not moved for this long were orphaned
+# by a restart before their worker ran; the dispatcher picks them up.
+ORPHANED_OUTBOX_SECONDS = 120
+
+
+def _due_filter(horizon: datetime, now: datetime) -> Q:
+    scheduled = Q(
+        send_status=SendStatus.SCHEDULED,
+        folder=FolderType.SCHEDULED,
+        scheduled_send_at__lte=horizon,
+    )
+    retry = Q(send_status=SendStatus.OUTBOX, next_send_attempt_at__lte=horizon)
+    orphaned = Q(
+        send_status=SendStatus.OUTBOX,
+        next_send_attempt_at__isnull=True,
+        updated_at__lte=now - timedelta(seconds=ORPHANED_OUTBOX_SECONDS),
+    )
+    # A claim is a lease: a row still "sending" after it expired lost its worker to a crash or restart
+    lease = getattr(settings, "OUTBOX_SENDING_LEASE_SECONDS", 900)
+    stale = Q(send_status=SendStatus.SENDING, updated_at__lte=now - timedelta(seconds=lease))
+    return scheduled | retry | orphaned | stale
+
+
+def claim(pks: list[int], now: datetime | None = None) -> list[int]:
+    """
+    Atomically claim due emails for sending. Returns the pks this caller owns.
+
+    A single UPDATE stamps a fresh claim token on every row that is still due,
+    so two dispatchers racing for the same rows each get a disjoint set, and
+    rows cancelled or already sent since they were queued are left alone.
+    """
+    if not pks:
+        return []
+    now = now or timezone.now()
+    token = uuid_mod.uuid4()
+    Email.objects.filter(_due_filter(now, now), pk__in=pks).update(
+        send_status=SendStatus.SENDING, send_claim=token, updated_at=timezone.now()
+    )
+    claimed = list(Email.objects.filter(send_claim=token).values_list("pk", flat=True))
+    if claimed:
+        versions.bump_emails(claimed)
+        changelog.record_emails(claimed)
+    return claimed
+
+
+def send_batch(pks: list[int], max_workers: int = 1) -> int:
+    """Send claimed emails, one pooled SMTP session per account. Returns the number sent."""
+    emails = (
+        Email.objects.filter(pk__in=pks)
+        .select_related("account", "stored_body")
+        .prefetch_related("recipients", "attachments")
+    )
+    by_account: dict[int, list[Email]] = defaultdict(list)
+    for email in emails:
+        by_account[email.account_id].append(email)
+
+    if max_workers > 1 and len(by_account) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dispatch") as pool:
+            return sum(pool.map(_send_account_group_in_thread, by_account.values()))
+    return sum(_send_account_group(group) for group in by_account.values())
+
+
+def _send_account_group_in_thread(group: list[Email]) -> int:
+    try:
+        return _send_account_group(group)
+    finally:
+        connection.close()
+
+
+def _send_account_group(group: list[Email]) -> int:
+    from penguin_mail.services.outbox import record_failure, send_claimed
+    from penguin_mail.services.smtp import smtp_session
+
+    sent = 0
+    try:
+        with smtp_session(group[0].account) as session:
+            for email in group:
+                sent += send_claimed(email, session=session)
+    except Exception as e:
+        # Session-level failure (connect/login/dropped): every message not yet sent backs off
+        logger.exception("SMTP session failed for account %s", group[0].account.uuid)
+        for email in group:
+            if email.send_status == SendStatus.SENDING:
+                record_failure(email, e)
+    return sent
+
+
+def dispatch_due(now: datetime | None = None, batch_size: int | None = None) -> tuple[int, int]:
+    """Claim and send one batch of due emails. Returns (claimed, sent)."""
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, "DISPATCHER_BATCH_SIZE", 100)
+    pks = list(
+        Email.objects.filter(_due_filter(now, now))
+        .order_by("scheduled_send_at", "next_send_attempt_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    claimed = claim(pks, now)
+    if not claimed:
+        return 0, 0
+    return len(claimed), send_batch(claimed, max_workers=getattr(settings, "DISPATCHER_WORKERS", 4))
+
+
+class Dispatcher:
+    """
+    Heap scheduler for scheduled sends and outbox retries.
+
+    Every ``refill_seconds`` one indexed query loads rows due within the
+    lookahead window onto a min-heap keyed by due time. The loop sleeps until the
+    earliest entry is due, then claims and sends in batches of ``batch_size``, so
+    thousands of messages due in the same minute drain as a steady stream of
+    batches instead of a burst of per-message workers.
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        lookahead_seconds: int | None = None,
+        refill_seconds: int = 15,
+        max_heap: int = 10000,
+    ) -> None:
+        self.batch_size = batch_size or int(getattr(settings, "DISPATCHER_BATCH_SIZE", 100))
+        lookahead = lookahead_seconds or int(getattr(settings, "DISPATCHER_LOOKAHEAD_SECONDS", 60))
+        self.lookahead = timedelta(seconds=lookahead)
+        self.refill_interval = timedelta(seconds=refill_seconds)
+        self.max_heap = max_heap
+        self.max_workers = getattr(settings, "DISPATCHER_WORKERS", 4)
+        self._heap: list[tuple[float, int]] = []
+        self._queued: set[int] = set()
+        self._next_refill: datetime | None = None
+        self.stop_event = threading.Event()
+
+    def refill(self, now: datetime) -> int:
+        """Load rows due before ``now + lookahead`` into the heap. Returns the number added."""
+        horizon = now + self.lookahead
+        rows = (
+            Email.objects.filter(_due_filter(horizon, now))
+            .values_list("pk", "scheduled_send_at", "next_send_attempt_at", "send_status")
+            .order_by("scheduled_send_at", "next_send_attempt_at")[: max(0, self.max_heap - len(self._heap))]
+        )
+        added = 0
+        for pk, scheduled_at, retry_at, status in rows:
+            if pk in self._queued:
+                continue
+            due = (scheduled_at if status == SendStatus.SCHEDULED else retry_at) or now
+            heapq.heappush(self._heap, (due.timestamp(), pk))
+            self._queued.add(pk)
+            added += 1
+        self._next_refill = now + self.refill_interval
+        return added
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """Pop up to one batch of heap entries whose due time has passed."""
+        cutoff = now.timestamp()
+        batch: list[int] = []
+        while self._heap and self._heap[0][0] <= cutoff and len(batch) < self.batch_size:
+            _, pk = heapq.heappop(self._heap)
+            self._queued.discard(pk)
+            batch.append(pk)
+        return batch
+
+    def seconds_until_next(self, now: datetime) -> float:
+        wake = self._next_refill or now
+        if self._heap:
+            wake = min(wake, datetime.fromtimestamp(self._heap[0][0], tz=now.tzinfo))
+        return max(0.0, (wake - now).total_seconds())
+
+    def tick(self, now: datetime | None = None) -> int:
+        """Run one scheduling step. Returns the number of emails sent."""
+        now = now or timezone.now()
+        if self._next_refill is None or now >= self._next_refill:
+            self.refill(now)
+            bulk_send.resume_stalled(now)
+            bulk_ops.resume_stalled(now)
+        batch = self.pop_due(now)
+        if not batch:
+            return 0
+        claimed = claim(batch, now)
+        return send_batch(claimed, max_workers=self.max_workers) if claimed else 0
+
+    def run_forever(self, max_sleep: float = 5.0) -> None:
+        logger.info("Dispatcher started (batch=%d, lookahead=%s)", self.batch_size, self.lookahead)
+        while not self.stop_event.is_set():
+            try:
+                sent = self.tick()
+            except Exception:
+                logger.exception("Dispatcher tick failed")
+                sent = 0
+                self._next_refill = None
+            if sent:
+                logger.info("Dispatched %d emails", sent)
+                continue
+            self.stop_event.wait(min(max_sleep, self.seconds_until_next(timezone.now())))
@@ -0,0 +1,134 @@
+"""
+Per-process fan-out of change log entries to open event streams.
+
+Writers never talk to the broker. Every write already lands in the change
+log (``services.changelog``) inside its own transaction, whichever process
+made it: API workers, IMAP sync threads, the dispatcher and the outbox. One
+``Broker`` per server process tails that table and hands each new entry to
+the open streams of its owner.
+
+The broker walks the log with ``changelog.after``, so an entry whose
+transaction commits after a later one was delivered is not skipped.
+
+A commit in this process wakes the broker straight away. Commits in other
+processes are picked up on the next poll, so they reach clients within
+``EVENTS_POLL_SECONDS``. Either way the database sees one indexed range read
+per process, however many clients are connected. The broker only runs while
+at least one stream is open.
+"""
+
+import asyncio
+import contextlib
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from penguin_mail.models import ChangeLogEntry
+from penguin_mail.services import changelog
+
+# (position, kind, object id, op): one change log entry, as streams receive it
+Entry = tuple[changelog.Position, str, Any, str]
+
+# Entries read per query while catching up after a burst of writes
+FETCH_SIZE = 1000
+
+
+def poll_interval() -> float:
+    return float(getattr(settings, "EVENTS_POLL_SECONDS", 1.0))
+
+
+def _newest() -> changelog.Position:
+    return changelog.newest(ChangeLogEntry.objects.all())
+
+
+def _after(position: changelog.Position) -> list[tuple[changelog.Position, int, str, Any, str]]:
+    rows = changelog.after(position).values_list("txid", "id", "user_id", "kind", "object_id", "op")
+    return [((txid, pk), user_id, kind, object_id, op) for txid, pk, user_id, kind, object_id, op in rows[:FETCH_SIZE]]
+
+
+class Broker:
+    """
+    Hands change log entries to per-user ``asyncio`` queues. Each queue gets
+    lists of entries, or None once it fell too far behind to be kept: the
+    stream then ends, and the client resumes from the log on reconnect.
+    """
+
+    def __init__(self, queue_size: int = 256) -> None:
+        self.queue_size = queue_size
+        self._streams: dict[int, set[asyncio.Queue[list[Entry] | None]]] = {}
+        self._position: changelog.Position = (0, 0)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue[list[Entry] | None]:
+        if not self._running():
+            # Start from the newest entry; each stream replays anything older it still needs
+            position = await sync_to_async(_newest)()
+            if not self._running():
+                self._streams.clear()
+                self._loop, self._wake, self._position = asyncio.get_running_loop(), asyncio.Event(), position
+                self._task = self._loop.create_task(self._run())
+        queue: asyncio.Queue[list[Entry] | None] = asyncio.Queue(self.queue_size)
+        self._streams.setdefault(user_id, set()).add(queue)
+        return queue
+
+    @property
+    def running(self) -> bool:
+        """True while streams are open. Safe to read from any thread."""
+        return self._task is not None and not self._task.done()
+
+    def _running(self) -> bool:
+        return self.running and self._loop is asyncio.get_running_loop()
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue[list[Entry] | None]) -> None:
+        queues = self._streams.get(user_id, set())
+        queues.discard(queue)
+        if not queues:
+            self._streams.pop(user_id, None)
+        if not self._streams:
+            self._wake.set()
+
+    def notify(self) -> None:
+        """Poll now rather than at the next interval. Safe to call from any thread."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while self._streams:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), poll_interval())
+            self._wake.clear()
+            await self.poll()
+
+    async def poll(self) -> None:
+        """Deliver every entry written since the last poll."""
+        while self._streams:
+            rows = await sync_to_async(_after)(self._position)
+            if not rows:
+                return
+            self._position = rows[-1][0]
+            batches: dict[int, list[Entry]] = {}
+            for position, user_id, kind, object_id, op in rows:
+                if user_id in self._streams:
+                    batches.setdefault(user_id, []).append((position, kind, object_id, op))
+            for user_id, entries in batches.items():
+                for queue in list(self._streams.get(user_id, ())):
+                    self._deliver(user_id, queue, entries)
+            if len(rows) < FETCH_SIZE:
+                return
+
+    def _deliver(self, user_id: int, queue: asyncio.Queue[list[Entry] | None], entries: list[Entry]) -> None:
+        try:
+            queue.put_nowait(entries)
+        except asyncio.QueueFull:
+            # A stalled client must not hold entries for ever; it catches up from the log instead
+            self.unsubscribe(user_id, queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+broker = Broker()
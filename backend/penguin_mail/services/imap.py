@@ -1,11 +1,16 @@
 import contextlib
 import email as email_lib
 import imaplib
+import re
 import ssl
+from collections.abc import Iterable
 from datetime import datetime
 from email.header import decode_header
 from email.utils import parseaddr, parsedate_to_datetime
 
+# UIDPLUS (RFC 4315) response code on a successful APPEND: [APPENDUID <uidvalidity> <uid-set>]
+_APPENDUID = re.compile(rb"\[APPENDUID \d+ ([\d:,]+)\]", re.IGNORECASE)
+
 
 def _decode_header_value(value: str) -> str:
     if not value:
@@ -124,8 +129,14 @@ def fetch_emails(
     folder: str = "INBOX",
     since: datetime | None = None,
     limit: int = 50,
+    known_uids: set[int] | None = None,
 ) -> list[dict]:
-    """Fetch emails from IMAP using UIDs. Returns list of parsed email dicts."""
+    """
+    Fetch emails from IMAP using UIDs. Returns list of parsed email dicts.
+
+    UIDs in ``known_uids`` are already stored locally and are skipped before
+    their bodies are downloaded.
+    """
     conn = _open_connection(account)
     try:
         conn.select(folder, readonly=True)
@@ -137,6 +148,8 @@ def fetch_emails(
             _, uid_data = conn.uid("search", None, "ALL")
 
         uids = uid_data[0].split()
+        if known_uids:
+            uids = [uid for uid in uids if int(uid) not in known_uids]
         if not uids:
             return []
 
@@ -189,6 +202,7 @@ def fetch_emails(
                     "date": date,
                     "is_read": is_read,
                     "has_attachment": _has_attachments(msg),
+                    "size": len(raw),
                     "recipients_to": _parse_recipients(msg, "To"),
                     "recipients_cc": _parse_recipients(msg, "Cc"),
                 }
@@ -200,18 +214,22 @@ def fetch_emails(
             conn.logout()
 
 
-def get_imap_folder_map(account) -> dict:
+def get_imap_folder_map(account, conn=None) -> dict:
     """
     Return a dict mapping logical folder names to IMAP folder paths.
     Keys: 'trash', 'sent', 'drafts', 'spam', 'archive'
     Uses IMAP special-use attributes (RFC 6154) or common name patterns.
+    Pass ``conn`` to reuse an open connection instead of logging in again.
     """
-    conn = _open_connection(account)
-    try:
+    if conn is not None:
         _, folders = conn.list('""', "*")
-    finally:
-        with contextlib.suppress(Exception):
-            conn.logout()
+    else:
+        conn = _open_connection(account)
+        try:
+            _, folders = conn.list('""', "*")
+        finally:
+            with contextlib.suppress(Exception):
+                conn.logout()
 
     result = {}
     special_use_map = {
@@ -273,6 +291,94 @@ def get_imap_folder_map(account) -> dict:
     return result
 
 
+def _quote_mailbox(name: str) -> str:
+    return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _parse_uid_set(uid_set: bytes) -> list[int]:
+    """Expand an IMAP uid-set such as ``101:103,107`` into a list of UIDs."""
+    uids: list[int] = []
+    for part in uid_set.split(b","):
+        low, _, high = part.partition(b":")
+        uids.extend(range(int(low), int(high or low) + 1))
+    return uids
+
+
+class _Literator:
+    """
+    The literal for a MULTIAPPEND command: on each continuation request it
+    writes the next message straight to the socket, then announces the one
+    after it (RFC 3502), or ends the command after the last.
+
+    imaplib only treats a literal as a "literator" when it is a bound method
+    (it compares its type with ``IMAP4._command``), so ``send_next`` is what
+    goes into ``conn.literal``; any other callable would be sent as bytes.
+    """
+
+    def __init__(self, conn, flags: str, messages: list) -> None:
+        self.conn = conn
+        self.flags = flags
+        sizes = [m.size() for m in messages]
+        self.first_size = sizes[0]
+        self.pending = iter(zip(messages, [*sizes[1:], None], strict=True))
+
+    def send_next(self, _continuation: bytes) -> bytes:
+        message, next_size = next(self.pending)
+        for chunk in message.iter_bytes():
+            self.conn.send(chunk)
+        return b"" if next_size is None else f" {self.flags} {{{next_size}}}".encode("ascii")
+
+
+def _append(conn, mailbox: str, flags: str, messages: list) -> list[int]:
+    """
+    Send one APPEND command carrying every message in ``messages``, streaming each literal.
+
+    imaplib only supports a single in-memory literal per command, so this uses
+    its literator hook (see ``_Literator``) to chain the messages.
+    """
+    literator = _Literator(conn, flags, messages)
+    conn.literal = literator.send_next
+    typ, data = conn._simple_command("APPEND", mailbox, flags, f"{{{literator.first_size}}}")
+    if typ != "OK":
+        raise imaplib.IMAP4.error(f"APPEND failed: {data!r}")
+    match = _APPENDUID.search(data[0] or b"")
+    return _parse_uid_set(match.group(1)) if match else []
+
+
+def append_messages(conn, mailbox: str, messages: list, flags: str = r"(\Seen)") -> list[int | None]:
+    """
+    APPEND rendered messages to ``mailbox``. Returns the new UID of each message, or None.
+
+    With MULTIAPPEND the whole batch is a single command; otherwise messages are
+    appended one by one over the same connection. UIDs come from the UIDPLUS
+    APPENDUID response code and are None when the server doesn't send it.
+    """
+    if not messages:
+        return []
+    mailbox = _quote_mailbox(mailbox)
+    if "MULTIAPPEND" in conn.capabilities:
+        uids = _append(conn, mailbox, flags, messages)
+        return list(uids) if len(uids) == len(messages) else [None] * len(messages)
+    result: list[int | None] = []
+    for message in messages:
+        uids = _append(conn, mailbox, flags, [message])
+        result.append(uids[0] if len(uids) == 1 else None)
+    return result
+
+
+def append_sent(account, messages: list) -> tuple[str, list[int | None]]:
+    """Append messages to the account's Sent folder over one connection. Returns (folder, uids)."""
+    conn = _open_connection(account)
+    try:
+        folder = get_imap_folder_map(account, conn).get("sent", "")
+        if not folder:
+            return "", [None] * len(messages)
+        return folder, append_messages(conn, folder, messages)
+    finally:
+        with contextlib.suppress(Exception):
+            conn.logout()
+
+
 def imap_mark_read(account, uid: int, folder: str) -> None:
     conn = _open_connection(account)
     try:
@@ -293,26 +399,81 @@ def imap_mark_unread(account, uid: int, folder: str) -> None:
             conn.logout()
 
 
+def _expunge(conn, uid_set: str) -> None:
+    """
+    Expunge just the messages in ``uid_set``, which must already be flagged \\Deleted.
+
+    A plain EXPUNGE would also remove every other message flagged \\Deleted in
+    the folder, such as ones another client is keeping until its user empties
+    the trash. Servers without UIDPLUS can't expunge by UID, so there the
+    messages are left flagged for the user's client to expunge.
+    """
+    if "UIDPLUS" in conn.capabilities:
+        conn.uid("expunge", uid_set)
+
+
 def imap_move(account, uid: int, src_folder: str, dst_folder: str) -> None:
-    """Move a message by UID: COPY to dst, mark \\Deleted in src, EXPUNGE."""
+    """Move a message by UID: COPY to dst, mark \\Deleted in src, UID EXPUNGE."""
     conn = _open_connection(account)
     try:
         conn.select(src_folder)
         conn.uid("copy", str(uid), dst_folder)
         conn.uid("store", str(uid), "+FLAGS", r"(\Deleted)")
-        conn.expunge()
+        _expunge(conn, str(uid))
     finally:
         with contextlib.suppress(Exception):
             conn.logout()
 
 
 def imap_delete(account, uid: int, folder: str) -> None:
-    """Permanently delete a message by UID (mark \\Deleted + EXPUNGE)."""
+    """Permanently delete a message by UID (mark \\Deleted + UID EXPUNGE)."""
     conn = _open_connection(account)
     try:
         conn.select(folder)
         conn.uid("store", str(uid), "+FLAGS", r"(\Deleted)")
-        conn.expunge()
+        _expunge(conn, str(uid))
+    finally:
+        with contextlib.suppress(Exception):
+            conn.logout()
+
+
+def _format_uid_set(uids: Iterable[int]) -> str:
+    """Compress UIDs into an IMAP uid-set such as ``101:103,107`` (the inverse of ``_parse_uid_set``)."""
+    ranges: list[list[int]] = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(str(low) if low == high else f"{low}:{high}" for low, high in ranges)
+
+
+# Bulk operations that move messages: the special folder they go to, and its usual name
+_MOVE_TARGETS = {"archive": ("archive", "Archive"), "delete": ("trash", "Trash"), "moveSpam": ("spam", "Junk")}
+
+
+def imap_write_back(account, op: str, uids_by_folder: dict[str, list[int]]) -> None:
+    """
+    Mirror bulk operation ``op`` on the server over one connection. Each
+    source folder gets one UID command over the set of all its messages,
+    instead of a login and command per message.
+    """
+    conn = _open_connection(account)
+    try:
+        folder_map = get_imap_folder_map(account, conn) if op in _MOVE_TARGETS else {}
+        for folder, uids in uids_by_folder.items():
+            uid_set = _format_uid_set(uids)
+            conn.select(_quote_mailbox(folder))
+            if op == "markRead":
+                conn.uid("store", uid_set, "+FLAGS", r"(\Seen)")
+            elif op == "markUnread":
+                conn.uid("store", uid_set, "-FLAGS", r"(\Seen)")
+            else:
+                if op in _MOVE_TARGETS:
+                    key, default = _MOVE_TARGETS[op]
+                    conn.uid("copy", uid_set, _quote_mailbox(folder_map.get(key, default)))
+                conn.uid("store", uid_set, "+FLAGS", r"(\Deleted)")
+                _expunge(conn, uid_set)
     finally:
         with contextlib.suppress(Exception):
             conn.logout()
@@ -0,0 +1,131 @@
+import base64
+import uuid
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.policy import SMTP, SMTPUTF8
+from email.utils import formatdate, make_msgid
+from typing import Any
+
+# 57 raw bytes encode to exactly one 76-character base64 line (RFC 2045).
+_B64_LINE_BYTES = 57
+# Raw bytes read from disk per chunk: 1024 base64 lines, ~77 KB of output.
+ATTACHMENT_READ_BYTES = _B64_LINE_BYTES * 1024
+# RFC 5322 line limit (excluding CRLF); longer text must be encoded even over 8BITMIME.
+_MAX_LINE_BYTES = 998
+
+
+@dataclass
+class OutboundMessage:
+    """
+    A MIME message that is rendered lazily by ``iter_bytes()``.
+
+    Attachments are read from storage and base64-encoded one chunk at a time,
+    so the full message never exists in memory. Every yielded chunk ends on a
+    CRLF line boundary, which lets SMTP transports dot-stuff chunk by chunk.
+
+    The transport sets ``eight_bit`` when the server offers 8BITMIME, so text
+    parts go out unencoded, and ``utf8`` when SMTPUTF8 is in use, so headers
+    carry raw UTF-8 instead of RFC 2047 encoded words.
+    """
+
+    from_header: str
+    to: list[str]
+    cc: list[str]
+    subject: str
+    body_html: str
+    body_text: str
+    attachments: list[Any] = field(default_factory=list)
+    message_id: str = field(default_factory=make_msgid)
+    date: str = field(default_factory=lambda: formatdate(localtime=True))
+    eight_bit: bool = False
+    utf8: bool = False
+    # Fixed per message so repeated renders (SMTP, then the IMAP Sent copy) are byte-identical
+    boundary: str = field(default_factory=lambda: f"=_penguin_{uuid.uuid4().hex}")
+
+    def _headers(self, content_type: str) -> bytes:
+        msg = EmailMessage(policy=SMTPUTF8 if self.utf8 else SMTP)
+        msg["From"] = self.from_header
+        msg["To"] = ", ".join(self.to)
+        if self.cc:
+            msg["Cc"] = ", ".join(self.cc)
+        msg["Subject"] = self.subject
+        msg["Date"] = self.date
+        msg["Message-ID"] = self.message_id
+        msg["MIME-Version"] = "1.0"
+        msg["Content-Type"] = content_type
+        return _header_block(msg)
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        alt_boundary = f"{self.boundary}_alt"
+        alternative = f'multipart/alternative; boundary="{alt_boundary}"'
+
+        if self.attachments:
+            mixed_boundary = f"{self.boundary}_mixed"
+            yield self._headers(f'multipart/mixed; boundary="{mixed_boundary}"')
+            yield f"--{mixed_boundary}\r\nContent-Type: {alternative}\r\n\r\n".encode("ascii")
+        else:
+            yield self._headers(alternative)
+
+        yield from _text_part(alt_boundary, "plain", self.body_text, self.eight_bit)
+        yield from _text_part(alt_boundary, "html", self.body_html, self.eight_bit)
+        yield f"--{alt_boundary}--\r\n".encode("ascii")
+
+        if self.attachments:
+            for attachment in self.attachments:
+                yield f"--{mixed_boundary}\r\n".encode("ascii")
+                yield _attachment_headers(attachment.name, attachment.mime_type)
+                with attachment.file.open("rb") as fh:
+                    yield from _base64_chunks(iter(lambda: fh.read(ATTACHMENT_READ_BYTES), b""))
+            yield f"--{mixed_boundary}--\r\n".encode("ascii")
+
+    def as_bytes(self) -> bytes:
+        return b"".join(self.iter_bytes())
+
+    def size(self) -> int:
+        """Rendered size in bytes, computed by streaming (attachments are read but not kept)."""
+        return sum(len(chunk) for chunk in self.iter_bytes())
+
+
+def _header_block(msg: EmailMessage) -> bytes:
+    return b"".join(msg.policy.fold_binary(name, value) for name, value in msg.items()) + b"\r\n"
+
+
+def _text_part(boundary: str, subtype: str, text: str, eight_bit: bool = False) -> Iterator[bytes]:
+    head = f'--{boundary}\r\nContent-Type: text/{subtype}; charset="utf-8"\r\n'
+    if eight_bit:
+        lines = [line.encode("utf-8") for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+        if all(len(line) <= _MAX_LINE_BYTES for line in lines):
+            yield (head + "Content-Transfer-Encoding: 8bit\r\n\r\n").encode("ascii")
+            yield b"".join(line + b"\r\n" for line in lines)
+            return
+    yield (head + "Content-Transfer-Encoding: base64\r\n\r\n").encode("ascii")
+    raw = text.encode("utf-8")
+    yield from _base64_chunks(raw[i : i + ATTACHMENT_READ_BYTES] for i in range(0, len(raw), ATTACHMENT_READ_BYTES))
+
+
+def _attachment_headers(name: str, mime_type: str) -> bytes:
+    part = EmailMessage(policy=SMTP)
+    part["Content-Type"] = mime_type or "application/octet-stream"
+    part.set_param("name", name)
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header("Content-Disposition", "attachment", filename=name)
+    return _header_block(part)
+
+
+def _base64_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Base64-encode a stream of raw chunks into CRLF-terminated 76-column lines."""
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        usable = len(data) - len(data) % _B64_LINE_BYTES
+        carry = data[usable:]
+        if usable:
+            yield _encode_lines(data[:usable])
+    if carry:
+        yield _encode_lines(carry)
+
+
+def _encode_lines(data: bytes) -> bytes:
+    encoded = base64.b64encode(data)
+    return b"".join(encoded[i : i + 76] + b"\r\n" for i in range(0, len(encoded), 76))
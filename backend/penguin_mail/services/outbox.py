@@ -0,0 +1,156 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from penguin_mail.models import Email, FolderType, SendStatus
+from penguin_mail.services import changelog, counters, sent_copies, versions
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "OUTBOX_WORKERS", 4),
+                thread_name_prefix="outbox",
+            )
+        return _executor
+
+
+def enqueue(email_pk: int) -> None:
+    """Queue an outbox email for delivery once the surrounding transaction commits."""
+    transaction.on_commit(lambda: _submit(email_pk))
+
+
+def _submit(email_pk: int, delay: float = 0) -> None:
+    if delay > 0:
+        timer = threading.Timer(delay, _submit, args=(email_pk,))
+        timer.daemon = True
+        timer.start()
+        return
+    _get_executor().submit(_run, email_pk)
+
+
+def _run(email_pk: int) -> None:
+    """Worker entry point: deliver one email, then release this thread's DB connection."""
+    try:
+        deliver(email_pk)
+    except Exception:
+        logger.exception("Outbox delivery crashed for email %s", email_pk)
+    finally:
+        connection.close()
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after ``attempts`` failures (exponential, capped)."""
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    cap = getattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return float(min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def _recipient_lists(email: Email) -> dict[str, list[str]]:
+    lists: dict[str, list[str]] = {"TO": [], "CC": [], "BCC": []}
+    for r in sorted(email.recipients.all(), key=lambda r: r.order):
+        lists[r.kind].append(r.address)
+    return lists
+
+
+def deliver(email_pk: int) -> bool:
+    """
+    Claim an outbox email and send it via SMTP. Returns True if it was sent.
+
+    The claim is a conditional UPDATE, so concurrent workers can never send
+    the same message twice.
+    """
+    claimed = Email.objects.filter(pk=email_pk, send_status=SendStatus.OUTBOX).update(
+        send_status=SendStatus.SENDING, updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+    versions.bump_emails([email_pk])
+    changelog.record_emails([email_pk])
+
+    email = (
+        Email.objects.select_related("account", "stored_body")
+        .prefetch_related("recipients", "attachments")
+        .get(pk=email_pk)
+    )
+    return send_claimed(email)
+
+
+def send_claimed(email: Email, session: Any = None) -> bool:
+    """Send an email already claimed by the caller, optionally over an open SMTP session."""
+    from penguin_mail.services.smtp import send_email as smtp_send
+
+    recipients = _recipient_lists(email)
+    try:
+        message = smtp_send(
+            account=email.account,
+            recipients_to=recipients["TO"],
+            recipients_cc=recipients["CC"],
+            recipients_bcc=recipients["BCC"],
+            subject=email.subject,
+            body_html=email.body,
+            session=session,
+            attachments=list(email.attachments.all()),
+        )
+    except Exception as e:
+        record_failure(email, e)
+        return False
+
+    email.send_status = SendStatus.SENT
+    email.send_attempts += 1
+    email.send_error = ""
+    email.next_send_attempt_at = None
+    email.message_id = message.message_id
+    # Leaving "scheduled" moves the email between folder counters
+    moving = email.folder == FolderType.SCHEDULED
+    with counters.tracking([email.pk]) if moving else nullcontext():
+        if moving:
+            email.folder = FolderType.SENT
+        email.save(
+            update_fields=[
+                "send_status",
+                "send_attempts",
+                "send_error",
+                "next_send_attempt_at",
+                "message_id",
+                "folder",
+                "updated_at",
+            ]
+        )
+    logger.info("Delivered email %s", email.uuid)
+    sent_copies.enqueue(email, message)
+    return True
+
+
+def record_failure(email: Email, error: Exception) -> None:
+    """Record a failed attempt for a claimed email: back off and retry, or give up."""
+    delay = 0.0
+    email.send_attempts += 1
+    email.send_error = str(error)[:1000]
+    if email.send_attempts >= getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5):
+        email.send_status = SendStatus.FAILED
+        email.next_send_attempt_at = None
+        logger.error("Giving up on email %s after %d attempts: %s", email.uuid, email.send_attempts, error)
+    else:
+        delay = backoff_delay(email.send_attempts)
+        email.send_status = SendStatus.OUTBOX
+        email.next_send_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning("Send attempt %d failed for email %s, retrying in %ss", email.send_attempts, email.uuid, delay)
+    email.save(update_fields=["send_status", "send_attempts", "send_error", "next_send_attempt_at", "updated_at"])
+    if delay:
+        pk = email.pk
+        transaction.on_commit(lambda: _submit(pk, delay))
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+
+from penguin_mail.providers import PROVIDER_PRESETS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, holding at most ``burst``.
+
+    ``acquire()`` blocks until a token is available, so callers sharing a bucket
+    are paced to the configured rate after an initial burst.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds spent waiting."""
+        wait = self._reserve()
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+_buckets: dict[int, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def send_limits(provider: str) -> tuple[int, int]:
+    """(messages per minute, burst) for ``provider``, falling back to the configured default."""
+    preset: dict[str, Any] = PROVIDER_PRESETS.get(provider, {})
+    rate: int = preset.get("send_rate_per_minute") or int(getattr(settings, "BULK_SEND_RATE_PER_MINUTE", 30))
+    burst: int = preset.get("send_burst") or int(getattr(settings, "BULK_SEND_BURST", 10))
+    return rate, burst
+
+
+def bucket_for(account) -> TokenBucket:
+    """The shared send bucket for ``account``, so concurrent jobs on one account share its limit."""
+    with _buckets_lock:
+        bucket = _buckets.get(account.pk)
+        if bucket is None:
+            per_minute, burst = send_limits(account.provider)
+            bucket = _buckets[account.pk] = TokenBucket(per_minute / 60.0, burst)
+        return bucket
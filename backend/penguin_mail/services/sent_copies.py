@@ -0,0 +1,77 @@
+import logging
+import threading
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+
+from penguin_mail.models import Account, Email
+from penguin_mail.providers import PROVIDER_PRESETS
+
+logger = logging.getLogger(__name__)
+
+# Pending Sent-folder copies per account: [(email pk, OutboundMessage)]
+_pending: dict[int, list[tuple[int, Any]]] = {}
+_pending_lock = threading.Lock()
+
+
+def wants_copy(account: Account) -> bool:
+    """Whether a sent message must be appended to the server's Sent folder by us."""
+    if not account.imap_host or not getattr(settings, "IMAP_SYNC_ENABLED", True):
+        return False
+    return not PROVIDER_PRESETS.get(account.provider, {}).get("saves_sent", False)
+
+
+def enqueue(email: Email, message: Any) -> None:
+    """
+    Queue ``message`` (the OutboundMessage just sent for ``email``) for APPEND to Sent.
+
+    Copies are collected per account for ``SENT_COPY_BATCH_SECONDS`` and then
+    appended together over one IMAP connection, so a dispatcher batch of sends
+    costs one login and, with MULTIAPPEND, one command.
+    """
+    if not wants_copy(email.account):
+        return
+    with _pending_lock:
+        batch = _pending.setdefault(email.account_id, [])
+        batch.append((email.pk, message))
+        first = len(batch) == 1
+    if first:
+        timer = threading.Timer(getattr(settings, "SENT_COPY_BATCH_SECONDS", 2), _run, args=(email.account_id,))
+        timer.daemon = True
+        timer.start()
+
+
+def _run(account_pk: int) -> None:
+    try:
+        flush(account_pk)
+    except Exception:
+        logger.exception("Appending sent copies failed for account %s", account_pk)
+    finally:
+        connection.close()
+
+
+def flush(account_pk: int) -> int:
+    """Append every pending copy for the account and record the returned UIDs. Returns copies appended."""
+    from penguin_mail.services.imap import append_sent
+
+    with _pending_lock:
+        batch = _pending.pop(account_pk, [])
+    if not batch:
+        return 0
+
+    account = Account.objects.get(pk=account_pk)
+    batch_size = getattr(settings, "SENT_COPY_BATCH_SIZE", 50)
+    appended = 0
+    for start in range(0, len(batch), batch_size):
+        chunk = batch[start : start + batch_size]
+        folder, uids = append_sent(account, [message for _, message in chunk])
+        if not folder:
+            logger.warning("No Sent folder found for account %s; skipping %d copies", account.uuid, len(batch))
+            return appended
+        appended += len(chunk)
+        # With the UID recorded, the next sync of Sent skips these messages instead of downloading them
+        for (email_pk, _), uid in zip(chunk, uids, strict=True):
+            if uid is not None:
+                Email.objects.filter(pk=email_pk).update(imap_uid=uid, imap_folder=folder)
+    return appended
@@ -1,8 +1,38 @@
+import contextlib
+import re
 import smtplib
 import ssl
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.utils import formataddr, formatdate, make_msgid
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from email.utils import formataddr
+
+from penguin_mail.html_text import html_to_text
+from penguin_mail.services.mime import OutboundMessage
+
+# Lines starting with "." must be doubled inside DATA (RFC 5321 §4.5.2).
+# Chunks from OutboundMessage always end on a line boundary, so per-chunk substitution is safe.
+_DOT_STUFF = re.compile(rb"^\.", re.MULTILINE)
+
+# Size of each BDAT chunk when the server offers CHUNKING.
+BDAT_CHUNK_BYTES = 1024 * 1024
+
+
+@contextmanager
+def smtp_session(account) -> Iterator[smtplib.SMTP]:
+    """Open an authenticated SMTP session that can deliver several messages."""
+    password = account.get_smtp_password()
+    context = ssl.create_default_context()
+
+    server: smtplib.SMTP
+    if account.smtp_security == "ssl":
+        server = smtplib.SMTP_SSL(account.smtp_host, account.smtp_port, context=context, timeout=30)
+    else:
+        server = smtplib.SMTP(account.smtp_host, account.smtp_port, timeout=30)
+    with server:
+        if account.smtp_security != "ssl":
+            server.starttls(context=context)
+        server.login(account.email, password)
+        yield server
 
 
 def send_email(
@@ -12,42 +42,177 @@ def send_email(
     recipients_bcc: list[str],
     subject: str,
     body_html: str,
-) -> str:
-    """Send an email via SMTP. Returns the Message-ID."""
-    import re
-
-    plaintext = re.sub(r"<[^>]+>", "", body_html)
-    plaintext = re.sub(r"\s+", " ", plaintext).strip()
-
-    msg = MIMEMultipart("alternative")
-    msg["From"] = formataddr((account.display_name or account.name, account.email))
-    msg["To"] = ", ".join(recipients_to)
-    if recipients_cc:
-        msg["Cc"] = ", ".join(recipients_cc)
-    msg["Subject"] = subject
-    msg["Date"] = formatdate(localtime=True)
-    message_id = make_msgid()
-    msg["Message-ID"] = message_id
-
-    msg.attach(MIMEText(plaintext, "plain", "utf-8"))
-    msg.attach(MIMEText(body_html, "html", "utf-8"))
+    session: smtplib.SMTP | None = None,
+    attachments: list | None = None,
+) -> OutboundMessage:
+    """Send an email via SMTP, reusing ``session`` when given. Returns the message that was sent.
 
-    all_recipients = recipients_to + recipients_cc + recipients_bcc
+    ``attachments`` are ``Attachment`` rows; their files are streamed from
+    storage into the socket rather than loaded into memory.
+    """
+    message = OutboundMessage(
+        from_header=formataddr((account.display_name or account.name, account.email)),
+        to=recipients_to,
+        cc=recipients_cc,
+        subject=subject,
+        body_html=body_html,
+        body_text=html_to_text(body_html),
+        attachments=attachments or [],
+    )
 
-    password = account.get_smtp_password()
-    context = ssl.create_default_context()
+    all_recipients = recipients_to + recipients_cc + recipients_bcc
 
-    if account.smtp_security == "ssl":
-        with smtplib.SMTP_SSL(account.smtp_host, account.smtp_port, context=context, timeout=30) as server:
-            server.login(account.email, password)
-            server.sendmail(account.email, all_recipients, msg.as_string())
+    if session is not None:
+        send_message(session, account.email, all_recipients, message)
     else:
-        with smtplib.SMTP(account.smtp_host, account.smtp_port, timeout=30) as server:
-            server.starttls(context=context)
-            server.login(account.email, password)
-            server.sendmail(account.email, all_recipients, msg.as_string())
+        with smtp_session(account) as server:
+            send_message(server, account.email, all_recipients, message)
+
+    return message
+
+
+def send_message(server: smtplib.SMTP, from_addr: str, recipients: list[str], message: OutboundMessage) -> None:
+    """
+    Deliver ``message`` using whichever ESMTP extensions the server offers.
+
+    With PIPELINING, MAIL FROM, every RCPT TO and DATA go out in a single write
+    and their replies are read afterwards, so the envelope costs one round trip
+    however long the recipient list is. With CHUNKING the body is sent as BDAT
+    chunks that need no dot-stuffing and, when pipelined, are acknowledged
+    together at the end. 8BITMIME lets text parts go out unencoded, and
+    SMTPUTF8 is requested when an address is not ASCII.
+
+    Mirrors ``SMTP.sendmail`` error handling: raises if the sender or every
+    recipient is refused, and tolerates partial recipient refusal.
+    """
+    server.ehlo_or_helo_if_needed()
+    pipelining = server.has_extn("pipelining")
+    chunking = server.has_extn("chunking")
+    options = _negotiate(server, from_addr, recipients, message)
+
+    commands = [_command(f"MAIL FROM:{smtplib.quoteaddr(from_addr)}", options)]
+    commands += [_command(f"RCPT TO:{smtplib.quoteaddr(rcpt)}") for rcpt in recipients]
+    if not chunking:
+        commands.append(b"DATA\r\n")
+    replies = _pipelined(server, commands) if pipelining else _lockstep(server, commands)
+
+    code, resp = replies[0]
+    if code != 250:
+        _abort(server, replies)
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+    refused = {
+        rcpt: reply
+        for rcpt, reply in zip(recipients, replies[1 : len(recipients) + 1], strict=True)
+        if reply[0] not in (250, 251)
+    }
+    if len(refused) == len(recipients):
+        _abort(server, replies)
+        raise smtplib.SMTPRecipientsRefused(refused)  # type: ignore[arg-type]
+
+    if chunking:
+        _send_bdat(server, message.iter_bytes(), pipelining)
+        return
+
+    code, resp = replies[-1]
+    if code != 354:
+        _reset(server)
+        raise smtplib.SMTPDataError(code, resp)
+    for chunk in message.iter_bytes():
+        server.send(_DOT_STUFF.sub(b"..", chunk))
+    server.send(b".\r\n")
+    code, resp = server.getreply()
+    if code != 250:
+        _reset(server)
+        raise smtplib.SMTPDataError(code, resp)
+
+
+def _negotiate(server: smtplib.SMTP, from_addr: str, recipients: list[str], message: OutboundMessage) -> list[str]:
+    """Pick MAIL FROM parameters and tell ``message`` which encodings the server accepts."""
+    options = []
+    if not all(addr.isascii() for addr in [from_addr, *recipients]):
+        if not server.has_extn("smtputf8"):
+            raise smtplib.SMTPNotSupportedError("SMTPUTF8 is required for non-ASCII addresses")
+        options.append("SMTPUTF8")
+        message.utf8 = True
+    if server.has_extn("8bitmime"):
+        options.append("BODY=8BITMIME")
+        message.eight_bit = True
+    return options
+
+
+def _command(line: str, options: list[str] | None = None) -> bytes:
+    return " ".join([line, *(options or [])]).encode("utf-8") + b"\r\n"
+
+
+def _pipelined(server: smtplib.SMTP, commands: list[bytes]) -> list[tuple[int, bytes]]:
+    """Send every command in one write, then collect one reply per command."""
+    server.send(b"".join(commands))
+    return [server.getreply() for _ in commands]
+
+
+def _lockstep(server: smtplib.SMTP, commands: list[bytes]) -> list[tuple[int, bytes]]:
+    """
+    Send commands one at a time, stopping once the transaction cannot succeed.
+
+    RCPT is skipped after a refused MAIL, and DATA after every RCPT is refused.
+    """
+    replies: list[tuple[int, bytes]] = []
+    for command in commands:
+        if replies and replies[0][0] != 250:
+            break
+        if command == b"DATA\r\n" and all(code not in (250, 251) for code, _ in replies[1:]):
+            break
+        server.send(command)
+        replies.append(server.getreply())
+    return replies
+
+
+def _abort(server: smtplib.SMTP, replies: list[tuple[int, bytes]]) -> None:
+    # A pipelined DATA may have been accepted even though the envelope failed;
+    # send an empty body so the server returns to command mode before RSET.
+    if replies[-1][0] == 354:
+        server.send(b".\r\n")
+        server.getreply()
+    _reset(server)
+
+
+def _send_bdat(server: smtplib.SMTP, chunks: Iterable[bytes], pipelining: bool) -> None:
+    """Send the body as BDAT chunks (RFC 3030), reading replies at the end when pipelining."""
+    pending = 0
+    failure: tuple[int, bytes] | None = None
+    for data, last in _coalesce(chunks, BDAT_CHUNK_BYTES):
+        server.send(f"BDAT {len(data)}{' LAST' if last else ''}\r\n".encode("ascii"))
+        server.send(data)
+        if pipelining:
+            pending += 1
+            continue
+        code, resp = server.getreply()
+        if code != 250:
+            _reset(server)
+            raise smtplib.SMTPDataError(code, resp)
+    for _ in range(pending):
+        reply = server.getreply()
+        if reply[0] != 250 and failure is None:
+            failure = reply
+    if failure is not None:
+        _reset(server)
+        raise smtplib.SMTPDataError(*failure)
+
+
+def _coalesce(chunks: Iterable[bytes], size: int) -> Iterator[tuple[bytes, bool]]:
+    """Regroup ``chunks`` into ``size``-byte blocks, flagging the last one."""
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        while len(buf) >= size:
+            yield bytes(buf[:size]), False
+            del buf[:size]
+    yield bytes(buf), True
+
 
-    return message_id
+def _reset(server: smtplib.SMTP) -> None:
+    with contextlib.suppress(smtplib.SMTPServerDisconnected):
+        server.rset()
 
 
 def test_smtp_connection(host: str, port: int, security: str, email: str, password: str) -> None:
@@ -1,9 +1,11 @@
 import logging
-import re
 
+from django.db import transaction
 from django.utils import timezone
 
+from penguin_mail.html_text import html_preview
 from penguin_mail.models import Email, Recipient
+from penguin_mail.services import counters, write_queue
 
 logger = logging.getLogger(__name__)
 
@@ -22,58 +24,68 @@ def sync_account_folder(account, imap_folder: str, local_folder: str, limit: int
     """Fetch new emails from a specific IMAP folder and save to DB. Returns count of new emails saved."""
     from penguin_mail.services.imap import fetch_emails
 
-    emails = fetch_emails(account, folder=imap_folder, since=account.last_sync_at, limit=limit)
-
-    saved = 0
-    for data in emails:
-        imap_uid = data.get("imap_uid")
-
-        # Deduplicate by IMAP UID first (most reliable).
-        # Re-process body if it still contains unresolved cid: references.
-        if imap_uid:
-            existing = Email.objects.filter(account=account, imap_uid=imap_uid, imap_folder=imap_folder).first()
-            if existing:
-                if "cid:" in existing.body:
-                    existing.body = data.get("body", existing.body)
-                    existing.save(update_fields=["body"])
-                continue
-
-        message_id = data.get("message_id", "")
-        if message_id and Email.objects.filter(account=account, body__contains=message_id).exists():
-            continue
-
-        if Email.objects.filter(
-            account=account,
-            sender_email=data["sender_email"],
-            subject=data["subject"],
-            created_at__date=data["date"].date() if data.get("date") else None,
-        ).exists():
-            continue
-
-        from html import unescape
-
-        raw_body = data.get("body", "")
-        preview_text = re.sub(r"<!--.*?-->", "", raw_body, flags=re.DOTALL)
-        preview_text = re.sub(
-            r"<(style|script)[^>]*>.*?</(style|script)>", "", preview_text, flags=re.DOTALL | re.IGNORECASE
-        )
-        preview_text = re.sub(r"<[^>]+>", "", preview_text)
-        preview_text = unescape(preview_text)
-        preview_text = re.sub(r"[\u034f\u200b-\u200f\u2028\u2029\u00ad\uFEFF]", "", preview_text)
-        preview_text = re.sub(r"\s+", " ", preview_text).strip()[:200]
-
-        email_obj = Email.objects.create(
+    # UIDs we already hold are skipped before download; rows with unresolved cid:
+    # references are left out so their bodies get re-processed below.
+    stored = (
+        Email.objects.filter(account=account, imap_folder=imap_folder, imap_uid__isnull=False)
+        .exclude(stored_body__unresolved_cid=True)
+        .values_list("imap_uid", flat=True)
+    )
+    known_uids = {uid for uid in stored if uid is not None}
+    emails = fetch_emails(account, folder=imap_folder, since=account.last_sync_at, limit=limit, known_uids=known_uids)
+
+    # The duplicate checks run inside the write, so with the write queue on two syncs cannot both store a message
+    return sum(write_queue.run(_store_message, account, data, imap_folder, local_folder) for data in emails)
+
+
+def _store_message(account, data: dict, imap_folder: str, local_folder: str) -> bool:
+    """Store a fetched message unless it is already held. Returns whether a new email was saved."""
+    imap_uid = data.get("imap_uid")
+
+    # Deduplicate by IMAP UID first (most reliable).
+    # Re-process body if it still contains unresolved cid: references.
+    if imap_uid:
+        existing = Email.objects.filter(account=account, imap_uid=imap_uid, imap_folder=imap_folder).first()
+        if existing:
+            if "cid:" in existing.body:
+                existing.body = data.get("body", existing.body)
+                existing.save()
+            return False
+
+    # A message we sent ourselves: link the local row to its server copy
+    message_id = data.get("message_id", "")
+    if message_id:
+        sent = Email.objects.filter(account=account, message_id=message_id).first()
+        if sent:
+            if sent.imap_uid is None:
+                sent.imap_uid = imap_uid
+                sent.imap_folder = imap_folder
+                sent.save(update_fields=["imap_uid", "imap_folder"])
+            return False
+
+    if Email.objects.filter(
+        account=account,
+        sender_email=data["sender_email"],
+        subject=data["subject"],
+        created_at__date=data["date"].date() if data.get("date") else None,
+    ).exists():
+        return False
+
+    with transaction.atomic():
+        email_obj = Email.objects.create(  # type: ignore[misc]  # body is a property
             account=account,
             subject=data["subject"],
             body=data["body"],
-            preview=preview_text,
+            preview=html_preview(data.get("body", "")),
             sender_name=data["sender_name"],
             sender_email=data["sender_email"],
             folder=local_folder,
             is_read=data.get("is_read", False),
             has_attachment=data.get("has_attachment", False),
+            size=data.get("size", len(data["body"].encode())),
             imap_uid=imap_uid,
             imap_folder=imap_folder,
+            message_id=message_id,
         )
 
         for i, r in enumerate(data.get("recipients_to", [])):
@@ -92,10 +104,9 @@ def sync_account_folder(account, imap_folder: str, local_folder: str, limit: int
                 kind="CC",
                 order=i,
             )
+        counters.record_new([email_obj.pk])
 
-        saved += 1
-
-    return saved
+    return True
 
 
 def sync_account_inbox(account) -> int:
@@ -104,7 +115,7 @@ def sync_account_inbox(account) -> int:
     account.refresh_from_db(fields=["last_sync_at"])
     saved = sync_account_folder(account, "INBOX", "inbox")
     account.last_sync_at = timezone.now()
-    account.save(update_fields=["last_sync_at"])
+    write_queue.run(account.save, update_fields=["last_sync_at"])
     return saved
 
 
@@ -140,6 +151,6 @@ def sync_all_folders(account) -> dict:
             counts[local_folder] = 0
 
     account.last_sync_at = timezone.now()
-    account.save(update_fields=["last_sync_at"])
+    write_queue.run(account.save, update_fields=["last_sync_at"])
 
     return counts
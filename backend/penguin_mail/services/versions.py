@@ -0,0 +1,118 @@
+"""
+Per-user change counters behind the ETags of the polled GET endpoints.
+
+Every write to a scope bumps its owner's ``ChangeCounter`` in the same
+transaction, so a request can tell whether anything it would return has
+changed from one indexed read, before running its own queries. Model saves,
+deletes and m2m edits are caught by the signal handlers below. Queryset
+``update()`` calls bypass signals, so those paths bump explicitly
+(``counters.tracking`` and the send claims in ``dispatcher`` and ``outbox``).
+"""
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from penguin_mail.models import (
+    Account,
+    BlockedAddress,
+    ChangeCounter,
+    ChangeScope,
+    Contact,
+    ContactGroup,
+    CustomFolder,
+    Email,
+    FilterRule,
+    KeyboardShortcut,
+    Label,
+    Signature,
+    User,
+    UserSettings,
+)
+
+
+def current(user: Any, scopes: Sequence[str]) -> list[int]:
+    """The user's version of each of ``scopes``, in order; 0 for a scope with no counter row."""
+    found = dict(ChangeCounter.objects.filter(user=user, scope__in=scopes).values_list("scope", "version"))
+    return [found.get(scope, 0) for scope in scopes]
+
+
+def bump(scope: str, user_id: int) -> None:
+    ChangeCounter.objects.filter(user_id=user_id, scope=scope).update(version=F("version") + 1)
+
+
+def bump_accounts(scope: str, account_ids: Iterable[int]) -> None:
+    """Bump ``scope`` for the owners of ``account_ids``."""
+    ChangeCounter.objects.filter(user__accounts__in=list(account_ids), scope=scope).update(version=F("version") + 1)
+
+
+def bump_emails(pks: Iterable[int]) -> None:
+    """Bump the emails scope for the owners of the emails ``pks``."""
+    ChangeCounter.objects.filter(user__accounts__emails__in=list(pks), scope=ChangeScope.EMAILS).update(
+        version=F("version") + 1
+    )
+
+
+# ---------------------------------------------------------------------------
+# Signal handlers
+# ---------------------------------------------------------------------------
+
+
+@receiver(post_save, sender=User)
+def create_counters(instance: User, created: bool, raw: bool, **_kwargs: Any) -> None:
+    if created and not raw:
+        ChangeCounter.objects.bulk_create(
+            [ChangeCounter(user=instance, scope=scope) for scope in ChangeScope.values], ignore_conflicts=True
+        )
+
+
+@receiver(post_save, sender=Email)
+@receiver(post_delete, sender=Email)
+def email_changed(instance: Email, raw: bool = False, **_kwargs: Any) -> None:
+    if not raw:
+        bump_accounts(ChangeScope.EMAILS, [instance.account_id])
+
+
+@receiver(m2m_changed, sender=Email.labels.through)
+def email_labels_changed(instance: Email | Label, action: str, reverse: bool, **_kwargs: Any) -> None:
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        bump(ChangeScope.EMAILS, instance.user_id)  # type: ignore[union-attr]
+    else:
+        bump_accounts(ChangeScope.EMAILS, [instance.account_id])  # type: ignore[union-attr]
+
+
+# Models owned directly by a user, and the scope a write to each one changes
+_USER_SCOPES: dict[type, str] = {
+    Account: ChangeScope.ACCOUNTS,
+    Label: ChangeScope.LABELS,
+    CustomFolder: ChangeScope.FOLDERS,
+    Contact: ChangeScope.CONTACTS,
+    ContactGroup: ChangeScope.CONTACTS,
+    UserSettings: ChangeScope.SETTINGS,
+    Signature: ChangeScope.SETTINGS,
+    FilterRule: ChangeScope.SETTINGS,
+    BlockedAddress: ChangeScope.SETTINGS,
+    KeyboardShortcut: ChangeScope.SETTINGS,
+}
+
+
+def _user_model_changed(sender: type, instance: Any, raw: bool = False, created: bool = False, **_kwargs: Any) -> None:
+    # A fresh settings row holds the defaults GET /settings already shows (and is created by that GET)
+    if not raw and not (created and sender is UserSettings):
+        bump(_USER_SCOPES[sender], instance.user_id)
+
+
+for _model in _USER_SCOPES:
+    post_save.connect(_user_model_changed, sender=_model, dispatch_uid=f"versions.{_model.__name__}.save")
+    post_delete.connect(_user_model_changed, sender=_model, dispatch_uid=f"versions.{_model.__name__}.delete")
+
+
+@receiver(m2m_changed, sender=ContactGroup.contacts.through)
+def group_members_changed(instance: Contact | ContactGroup, action: str, **_kwargs: Any) -> None:
+    if action.startswith("post_"):
+        bump(ChangeScope.CONTACTS, instance.user_id)
@@ -0,0 +1,94 @@
+"""
+One writer for background writes.
+
+With SQLite only one connection can write at a time, so IMAP sync threads
+writing message by message contend with each other and with requests for
+the lock. With ``SYNC_WRITE_QUEUE`` on, ``run`` hands the write to a single
+writer thread instead. The writer takes whatever has queued up (up to
+``SYNC_WRITE_BATCH_SIZE`` writes) and commits it in one transaction, with a
+savepoint per write so one failing write does not undo the others. Callers
+block until their write has committed and get its return value or
+exception, as if they had run it themselves.
+"""
+
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (function, args, kwargs, future) per queued write
+Job = tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any], Future[Any]]
+
+_jobs: queue.Queue[Job] = queue.Queue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "SYNC_WRITE_QUEUE", False))
+
+
+def run(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Call ``fn(*args, **kwargs)`` on the writer thread and return its result. Runs it in
+    the calling thread instead when the queue is off, when called from the
+    writer itself, or inside a transaction (whose locks the writer might need).
+    """
+    if not enabled() or threading.current_thread() is _writer or connection.in_atomic_block:
+        return fn(*args, **kwargs)
+    future: Future[T] = Future()
+    _jobs.put((fn, args, kwargs, future))
+    _ensure_writer()
+    return future.result()
+
+
+def _ensure_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_loop, name="write-queue", daemon=True)
+            _writer.start()
+
+
+def _loop() -> None:
+    while True:
+        batch = [_jobs.get()]
+        while len(batch) < getattr(settings, "SYNC_WRITE_BATCH_SIZE", 100):
+            try:
+                batch.append(_jobs.get_nowait())
+            except queue.Empty:
+                break
+        write(batch)
+
+
+def write(batch: list[Job]) -> None:
+    """Run ``batch`` in one transaction, then resolve each job's future."""
+    outcomes: list[tuple[Future[Any], Any, BaseException | None]] = []
+    try:
+        with transaction.atomic():
+            for fn, args, kwargs, future in batch:
+                try:
+                    with transaction.atomic():
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+    except Exception as e:
+        logger.exception("Write batch of %d failed to commit", len(batch))
+        outcomes = [(future, None, e) for *_, future in batch]
+    finally:
+        # The writer keeps its connection between batches, within CONN_MAX_AGE
+        connection.close_if_unusable_or_obsolete()
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 
-from decouple import Csv, config  # type: ignore[import-untyped]
+from decouple import Choices, Csv, config  # type: ignore[import-untyped]
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +51,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "penguin_mail.replicas.ReplicaMiddleware",
 ]
 
 ROOT_URLCONF = "penguin_mail.urls"
@@ -77,13 +78,70 @@ WSGI_APPLICATION = "penguin_mail.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite by default; DB_ENGINE=postgresql for production. Connections persist for
+# DB_CONN_MAX_AGE seconds and are health-checked before reuse. On Postgres,
+# DB_POOL_MAX_SIZE > 0 uses psycopg's connection pool instead (needs psycopg[pool]).
+# Move existing SQLite data over with `python manage.py import_sqlite <path>`.
+
+DB_ENGINE = config("DB_ENGINE", default="sqlite", cast=Choices(["sqlite", "postgresql"]))
+_DB_DEFAULTS = {
+    "sqlite": ("django.db.backends.sqlite3", str(BASE_DIR / "db.sqlite3")),
+    "postgresql": ("django.db.backends.postgresql", "penguin_mail"),
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": _DB_DEFAULTS[DB_ENGINE][0],
+        "NAME": config("DB_NAME", default=_DB_DEFAULTS[DB_ENGINE][1]),
+        "USER": config("DB_USER", default=""),
+        "PASSWORD": config("DB_PASSWORD", default=""),
+        "HOST": config("DB_HOST", default=""),
+        "PORT": config("DB_PORT", default=""),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
 
+if DB_ENGINE == "postgresql" and (DB_POOL_MAX_SIZE := config("DB_POOL_MAX_SIZE", default=0, cast=int)):
+    # Pooled connections go back to the pool after each request, so Django must not keep its own
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": config("DB_POOL_TIMEOUT", default=10.0, cast=float),
+    }
+
+# Opt-in SQLite profile for many readers alongside background writers: WAL lets reads run
+# during a write, writers take the lock up front (IMMEDIATE) and wait up to DB_SQLITE_BUSY_TIMEOUT
+# seconds for it, and each connection gets a larger page cache and memory-mapped reads.
+DB_SQLITE_CONCURRENT = DB_ENGINE == "sqlite" and config("DB_SQLITE_CONCURRENT", default=False, cast=bool)
+
+if DB_SQLITE_CONCURRENT:
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": (
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; "
+            f"PRAGMA mmap_size={config('DB_SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)}; "
+            f"PRAGMA cache_size=-{config('DB_SQLITE_CACHE_KB', default=64 * 1024, cast=int)}"
+        ),
+        "timeout": config("DB_SQLITE_BUSY_TIMEOUT", default=20.0, cast=float),
+        "transaction_mode": "IMMEDIATE",
+    }
+
+# Postgres read replicas, one per host in DB_REPLICA_HOSTS (same name, credentials and port as
+# the primary). GET and HEAD requests read from a replica that has caught up with the user's own
+# writes and is at most REPLICA_MAX_LAG_SECONDS behind; see penguin_mail/replicas.py. With more
+# than one web process, the per-user write times need a shared cache (CACHES).
+DATABASE_REPLICAS: list[str] = []
+if DB_ENGINE == "postgresql":
+    for _index, _host in enumerate(config("DB_REPLICA_HOSTS", default="", cast=Csv())):
+        DATABASE_REPLICAS.append(f"replica_{_index}")
+        DATABASES[f"replica_{_index}"] = {**DATABASES["default"], "HOST": _host, "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["penguin_mail.replicas.ReplicaRouter"]
+REPLICA_MAX_LAG_SECONDS = config("REPLICA_MAX_LAG_SECONDS", default=10.0, cast=float)
+REPLICA_LAG_CHECK_SECONDS = config("REPLICA_LAG_CHECK_SECONDS", default=1.0, cast=float)
+
 
 # Custom user model
 AUTH_USER_MODEL = "penguin_mail.User"
@@ -157,3 +215,49 @@ SMTP_SEND_ENABLED = config("SMTP_SEND_ENABLED", default=True, cast=bool)
 
 # Whether to run IMAP background sync (disable in E2E/test environments)
 IMAP_SYNC_ENABLED = config("IMAP_SYNC_ENABLED", default=True, cast=bool)
+
+# Outbound send queue: worker pool size and retry policy for failed SMTP deliveries
+OUTBOX_WORKERS = config("OUTBOX_WORKERS", default=4, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config("OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
+OUTBOX_RETRY_MAX_SECONDS = config("OUTBOX_RETRY_MAX_SECONDS", default=3600, cast=int)
+# A claimed email still "sending" after this long is taken to be abandoned; run_dispatcher sends it again
+OUTBOX_SENDING_LEASE_SECONDS = config("OUTBOX_SENDING_LEASE_SECONDS", default=900, cast=int)
+
+# Scheduled-send dispatcher (run with `python manage.py run_dispatcher`)
+DISPATCHER_BATCH_SIZE = config("DISPATCHER_BATCH_SIZE", default=100, cast=int)
+DISPATCHER_WORKERS = config("DISPATCHER_WORKERS", default=4, cast=int)
+DISPATCHER_LOOKAHEAD_SECONDS = config("DISPATCHER_LOOKAHEAD_SECONDS", default=60, cast=int)
+
+# Bulk send / mail merge: send rate for accounts whose provider has no preset limit
+BULK_SEND_RATE_PER_MINUTE = config("BULK_SEND_RATE_PER_MINUTE", default=30, cast=int)
+BULK_SEND_BURST = config("BULK_SEND_BURST", default=10, cast=int)
+BULK_SEND_STALL_SECONDS = config("BULK_SEND_STALL_SECONDS", default=300, cast=int)
+
+# Bulk operations by query: emails per transaction, and how long a silent job runs before run_dispatcher restarts it
+BULK_JOB_CHUNK_SIZE = config("BULK_JOB_CHUNK_SIZE", default=500, cast=int)
+BULK_JOB_STALL_SECONDS = config("BULK_JOB_STALL_SECONDS", default=300, cast=int)
+
+# IMAP sync hands its writes to one writer thread, which commits whatever has queued up in a
+# single transaction; on by default with the concurrent SQLite profile
+SYNC_WRITE_QUEUE = config("SYNC_WRITE_QUEUE", default=DB_SQLITE_CONCURRENT, cast=bool)
+SYNC_WRITE_BATCH_SIZE = config("SYNC_WRITE_BATCH_SIZE", default=100, cast=int)
+
+# Copies of sent mail are appended to the IMAP Sent folder in per-account batches
+SENT_COPY_BATCH_SECONDS = config("SENT_COPY_BATCH_SECONDS", default=2, cast=float)
+SENT_COPY_BATCH_SIZE = config("SENT_COPY_BATCH_SIZE", default=50, cast=int)
+
+# Full-text search: "auto" picks FTS5 on SQLite and tsvector on Postgres; "basic" is portable substring matching
+SEARCH_BACKEND = config("SEARCH_BACKEND", default="auto")
+
+# Cold tier: `archive_mail` moves bodies of emails older than ARCHIVE_AFTER_DAYS into per-account
+# archive files (under MEDIA_ROOT), ARCHIVE_BATCH_SIZE bodies per file; see penguin_mail/services/archive.py
+ARCHIVE_AFTER_DAYS = config("ARCHIVE_AFTER_DAYS", default=180, cast=int)
+ARCHIVE_BATCH_SIZE = config("ARCHIVE_BATCH_SIZE", default=1000, cast=int)
+
+# Delta sync: GET /changes cursors older than this must resync; compact_changes prunes entries past it
+CHANGE_LOG_RETENTION_DAYS = config("CHANGE_LOG_RETENTION_DAYS", default=30, cast=int)
+
+# Push: GET /events streams see other processes' writes within one poll interval; idle streams get a keepalive comment
+EVENTS_POLL_SECONDS = config("EVENTS_POLL_SECONDS", default=1.0, cast=float)
+EVENTS_KEEPALIVE_SECONDS = config("EVENTS_KEEPALIVE_SECONDS", default=15.0, cast=float)
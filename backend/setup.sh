@@ -29,6 +29,11 @@ else
     echo ".env already exists, skipping."
 fi
 
+if grep -q "^DB_ENGINE=postgresql" .env; then
+    echo "Installing PostgreSQL driver..."
+    pip install -r requirements-postgres.txt -q
+fi
+
 echo "Running migrations..."
 python manage.py migrate --verbosity 0
 
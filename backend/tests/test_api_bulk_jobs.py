@@ -0,0 +1,29 @@
+"""Tests for bulk job (bulk operation by query) API endpoints."""
+
+import json
+import uuid
+
+from penguin_mail.models import BulkJob
+
+
+def _queue(authed_client, **query):
+    resp = authed_client.post("/api/v1/emails/bulk", data=json.dumps({"operation": "archive", "query": query}))
+    return resp.json()["id"]
+
+
+class TestGetBulkJob:
+    def test_progress(self, authed_client):
+        job_id = _queue(authed_client, folder="inbox")
+        BulkJob.objects.update(processed_count=500, total=2000, status="running")
+        data = authed_client.get(f"/api/v1/bulk-jobs/{job_id}").json()
+        assert (data["status"], data["processed"], data["total"]) == ("running", 500, 2000)
+
+    def test_list_is_own_jobs_newest_first(self, authed_client, second_user):
+        BulkJob.objects.create(user=second_user, operation="star")
+        first, second = _queue(authed_client), _queue(authed_client, isRead=False)
+        assert [job["id"] for job in authed_client.get("/api/v1/bulk-jobs/").json()] == [second, first]
+
+    def test_not_found(self, authed_client, second_user):
+        other = BulkJob.objects.create(user=second_user, operation="star")
+        assert authed_client.get(f"/api/v1/bulk-jobs/{other.uuid}").status_code == 404
+        assert authed_client.get(f"/api/v1/bulk-jobs/{uuid.uuid4()}").status_code == 404
@@ -0,0 +1,73 @@
+"""Tests for bulk send (mail merge) API endpoints."""
+
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from factories import ContactFactory, ContactGroupFactory
+from penguin_mail.models import BulkSend
+
+
+@pytest.fixture
+def group(user):
+    group = ContactGroupFactory(user=user)
+    group.contacts.add(*[ContactFactory(user=user) for _ in range(3)])
+    return group
+
+
+def _post(authed_client, account, group, **overrides):
+    payload = {"accountId": str(account.uuid), "groupId": str(group.uuid), "subject": "Hi {{firstName}}"}
+    payload.update(overrides)
+    return authed_client.post("/api/v1/bulk-sends/", data=json.dumps(payload))
+
+
+class TestCreateBulkSend:
+    def test_queues_job(self, authed_client, account, group, django_capture_on_commit_callbacks):
+        with (
+            patch("penguin_mail.services.bulk_send._spawn") as mock_spawn,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            resp = _post(authed_client, account, group, body="<p>{{ name }}</p>")
+        assert resp.status_code == 202
+        data = resp.json()
+        assert data["status"] == "queued"
+        assert data["total"] == 3
+        assert data["groupId"] == str(group.uuid)
+        mock_spawn.assert_called_once_with(BulkSend.objects.get().pk)
+
+    def test_unknown_merge_field(self, authed_client, account, group):
+        resp = _post(authed_client, account, group, body="{{ nickname }}")
+        assert resp.status_code == 422
+        assert "nickname" in resp.json()["detail"]
+
+    def test_other_users_group(self, authed_client, account, second_user):
+        resp = _post(authed_client, account, ContactGroupFactory(user=second_user))
+        assert resp.status_code == 404
+
+    def test_smtp_disabled_fails_without_starting(self, authed_client, account, group, settings):
+        settings.SMTP_SEND_ENABLED = False
+        with patch("penguin_mail.services.bulk_send.enqueue") as mock_enqueue:
+            resp = _post(authed_client, account, group)
+        assert resp.status_code == 202
+        assert (resp.json()["status"], resp.json()["error"]) == ("failed", "Sending email is disabled on this server")
+        mock_enqueue.assert_not_called()
+
+
+class TestGetBulkSend:
+    def test_progress(self, authed_client, account, group):
+        job_id = _post(authed_client, account, group).json()["id"]
+        BulkSend.objects.update(sent_count=2, failed_count=1)
+        data = authed_client.get(f"/api/v1/bulk-sends/{job_id}").json()
+        assert (data["sent"], data["failed"]) == (2, 1)
+
+    def test_list(self, authed_client, account, group):
+        _post(authed_client, account, group)
+        group.delete()
+        data = authed_client.get("/api/v1/bulk-sends/").json()
+        assert len(data) == 1
+        assert data[0]["groupId"] is None
+
+    def test_not_found(self, authed_client):
+        assert authed_client.get(f"/api/v1/bulk-sends/{uuid.uuid4()}").status_code == 404
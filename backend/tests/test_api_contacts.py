@@ -24,7 +24,8 @@ class TestListContacts:
             g = ContactGroupFactory(user=user, name=f"Group {i}")
             c = ContactFactory(user=user, email=f"c{i}@e.com")
             g.contacts.add(c)
-        with django_assert_num_queries(4):
+        # auth, version lookup, count, contacts, groups prefetch
+        with django_assert_num_queries(5):
             resp = authed_client.get("/api/v1/contacts/")
         assert resp.status_code == 200
         assert resp.json()["total"] == 10
@@ -183,8 +184,9 @@ class TestUpdateContact:
     def test_update_query_count(self, authed_client, contact, django_assert_num_queries):
         # Simple update (no group changes) expected queries:
         # 1: auth SELECT user, 2: get_object_or_404 SELECT contact,
-        # 3: UPDATE contact, 4: SELECT contact (re-fetch), 5: prefetch SELECT groups
-        with django_assert_num_queries(5):
+        # 3: UPDATE contact, 4: version bump, 5: change log INSERT, 6: SELECT contact (re-fetch),
+        # 7: prefetch SELECT groups
+        with django_assert_num_queries(7):
             resp = authed_client.patch(
                 f"/api/v1/contacts/{contact.uuid}",
                 data=json.dumps({"name": "Updated Name"}),
@@ -2,12 +2,16 @@
 
 import json
 import uuid
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from factories import EmailFactory, LabelFactory, RecipientFactory
-from penguin_mail.models import Account, Email
+from factories import AttachmentFactory, EmailFactory, LabelFactory, RecipientFactory, UserFactory
+from penguin_mail.api.pagination import encode_cursor
+from penguin_mail.models import Account, BulkJob, Email
 
 
 @pytest.fixture
@@ -22,7 +26,7 @@ class TestListEmails:
         emails = [EmailFactory(account=account, folder="inbox") for _ in range(10)]
         for e in emails:
             RecipientFactory(email=e, kind="TO")
-        with django_assert_num_queries(7):
+        with django_assert_num_queries(8):
             resp = authed_client.get("/api/v1/emails/?folder=inbox")
         assert resp.status_code == 200
         assert resp.json()["total"] == 10
@@ -490,6 +494,116 @@ class TestBulkOperation:
         )
         assert label not in e.labels.all()
 
+    @pytest.mark.parametrize("operation", ["addLabel", "removeLabel"])
+    def test_label_ops_are_set_based(self, authed_client, account, user, operation):
+        labels = [LabelFactory(user=user) for _ in range(2)]
+        label_ids = [str(label.uuid) for label in labels]
+
+        def run(count):
+            emails = [EmailFactory(account=account) for _ in range(count)]
+            if operation == "removeLabel":
+                for email in emails:
+                    email.labels.add(*labels)
+            body = {"ids": [str(e.uuid) for e in emails], "operation": operation, "labelIds": label_ids}
+            with CaptureQueriesContext(connection) as ctx:
+                assert authed_client.post("/api/v1/emails/bulk", data=json.dumps(body)).status_code == 200
+            return emails, len(ctx.captured_queries)
+
+        # The first run also creates the counter rows
+        first, _ = run(1)
+        few, few_queries = run(2)
+        many, many_queries = run(20)
+        assert few_queries == many_queries
+        expected = 2 if operation == "addLabel" else 0
+        assert all(e.labels.count() == expected for e in first + few + many)
+
+    def test_add_label_twice_is_idempotent(self, authed_client, account, user):
+        label = LabelFactory(user=user)
+        e = EmailFactory(account=account)
+        body = json.dumps({"ids": [str(e.uuid)], "operation": "addLabel", "labelIds": [str(label.uuid)]})
+        authed_client.post("/api/v1/emails/bulk", data=body)
+        assert authed_client.post("/api/v1/emails/bulk", data=body).status_code == 200
+        assert e.labels.count() == 1
+
+    def test_add_label_to_unknown_ids(self, authed_client, user):
+        label = LabelFactory(user=user)
+        body = {"ids": [str(uuid.uuid4())], "operation": "addLabel", "labelIds": [str(label.uuid)]}
+        assert authed_client.post("/api/v1/emails/bulk", data=json.dumps(body)).status_code == 200
+        assert not label.emails.exists()
+
+    def test_large_id_lists_are_chunked(self, authed_client, account, monkeypatch):
+        monkeypatch.setattr("penguin_mail.api.routers.emails.BULK_CHUNK_SIZE", 2)
+        emails = [EmailFactory(account=account, is_read=False) for _ in range(5)]
+        ids = [str(e.uuid) for e in emails]
+        resp = authed_client.post("/api/v1/emails/bulk", data=json.dumps({"ids": ids, "operation": "markRead"}))
+        assert resp.status_code == 200
+        assert not Email.objects.filter(is_read=False).exists()
+
+    def test_more_ids_than_sqlite_variables(self, authed_client, account):
+        e = EmailFactory(account=account, is_read=False)
+        ids = [str(uuid.uuid4()) for _ in range(40_000)] + [str(e.uuid)]
+        resp = authed_client.post("/api/v1/emails/bulk", data=json.dumps({"ids": ids, "operation": "markRead"}))
+        assert resp.status_code == 200
+        e.refresh_from_db()
+        assert e.is_read is True
+
+    def test_failing_chunk_rolls_back_earlier_chunks(self, authed_client, account, monkeypatch):
+        monkeypatch.setattr("penguin_mail.api.routers.emails.BULK_CHUNK_SIZE", 1)
+        emails = [EmailFactory(account=account, folder="inbox") for _ in range(2)]
+        calls = []
+
+        def fail_second(imap_op, targets):
+            calls.append(imap_op)
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+
+        monkeypatch.setattr("penguin_mail.api.routers.emails._fire_imap_ops_for_queryset", fail_second)
+        authed_client.raise_request_exception = False
+        with pytest.raises(RuntimeError):
+            authed_client.post(
+                "/api/v1/emails/bulk", data=json.dumps({"ids": [str(e.uuid) for e in emails], "operation": "archive"})
+            )
+        assert Email.objects.filter(folder="inbox").count() == 2
+
+
+class TestBulkQuery:
+    def _post(self, authed_client, **payload):
+        return authed_client.post("/api/v1/emails/bulk", data=json.dumps({"operation": "markRead", **payload}))
+
+    def test_queues_a_job_for_every_match(self, authed_client, account, django_capture_on_commit_callbacks):
+        EmailFactory(account=account, folder="inbox", sender_email="news@example.com")
+        last = EmailFactory(account=account, folder="inbox", sender_email="news@example.com")
+        EmailFactory(account=account, folder="inbox", sender_email="friend@example.com")
+        with (
+            patch("penguin_mail.services.bulk_ops._spawn") as mock_spawn,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            resp = self._post(authed_client, query={"folder": "inbox", "search": "from:news@example.com"})
+        assert resp.status_code == 202
+        data = resp.json()
+        assert (data["operation"], data["status"], data["total"], data["processed"]) == ("markRead", "queued", 2, 0)
+        job = BulkJob.objects.get()
+        assert job.query == {"folder": "inbox", "search": "from:news@example.com"}
+        assert job.max_email_id == last.pk
+        mock_spawn.assert_called_once_with(job.pk)
+        assert not Email.objects.filter(is_read=True).exists()
+
+    def test_ids_and_query_are_exclusive(self, authed_client):
+        assert self._post(authed_client).status_code == 400
+        assert self._post(authed_client, ids=[], query={}).status_code == 400
+
+    def test_invalid_search(self, authed_client):
+        assert self._post(authed_client, query={"search": "before:someday"}).status_code == 400
+
+    def test_arguments_are_checked_up_front(self, authed_client):
+        resp = self._post(authed_client, operation="addLabel", query={"folder": "inbox"})
+        assert resp.status_code == 400
+        assert not BulkJob.objects.exists()
+
+    def test_threads_need_ids(self, authed_client):
+        resp = authed_client.post("/api/v1/threads/bulk", data={"query": {}, "operation": "markRead"})
+        assert resp.status_code == 400
+
 
 class TestBulkOperationErrorPaths:
     def test_invalid_operation_type(self, authed_client, account):
@@ -620,6 +734,74 @@ class TestSearchFields:
         resp = authed_client.get("/api/v1/emails/?search=unique-addr")
         assert resp.json()["total"] == 1
 
+    def test_search_recipient(self, authed_client, account):
+        email = EmailFactory(account=account)
+        RecipientFactory(email=email, address="ledger@example.com", name="Accounts")
+        EmailFactory(account=account)
+        resp = authed_client.get("/api/v1/emails/?search=ledger")
+        assert [e["id"] for e in resp.json()["data"]] == [str(email.uuid)]
+
+    def test_search_words_match_as_prefixes_in_any_order(self, authed_client, account):
+        EmailFactory(account=account, subject="Quarterly report", body="<p>numbers</p>")
+        resp = authed_client.get("/api/v1/emails/?search=rep+quart")
+        assert resp.json()["total"] == 1
+
+    def test_search_ignores_markup(self, authed_client, account):
+        EmailFactory(account=account, subject="Hi", body='<p class="footer">plain</p>')
+        resp = authed_client.get("/api/v1/emails/?search=footer")
+        assert resp.json()["total"] == 0
+
+    def test_search_punctuation_only_matches_nothing(self, authed_client, account):
+        EmailFactory(account=account)
+        resp = authed_client.get('/api/v1/emails/?search="*')
+        assert resp.status_code == 200
+        assert resp.json()["total"] == 0
+
+    def test_search_returns_highlighted_snippet(self, authed_client, account):
+        EmailFactory(account=account, subject="Hi", body="<p>the <b>launch</b> R&amp;D date moved</p>")
+        data = authed_client.get("/api/v1/emails/?search=launch").json()["data"]
+        assert "<mark>launch</mark>" in data[0]["snippet"]
+        assert "R&amp;D" in data[0]["snippet"]
+
+    def test_no_snippet_without_search(self, authed_client, account):
+        EmailFactory(account=account)
+        data = authed_client.get("/api/v1/emails/").json()["data"]
+        assert "snippet" not in data[0]
+
+    def test_sort_by_relevance(self, authed_client, account):
+        in_body = EmailFactory(account=account, subject="Notes", body="<p>budget</p>")
+        in_subject = EmailFactory(account=account, subject="Budget", body="<p>see attached</p>")
+        in_body.created_at = in_subject.created_at + timedelta(days=1)
+        in_body.save(update_fields=["created_at"])
+        by_date = authed_client.get("/api/v1/emails/?search=budget").json()["data"]
+        by_rank = authed_client.get("/api/v1/emails/?search=budget&sort=relevance").json()["data"]
+        assert [e["id"] for e in by_date] == [str(in_body.uuid), str(in_subject.uuid)]
+        assert [e["id"] for e in by_rank] == [str(in_subject.uuid), str(in_body.uuid)]
+
+    def test_relevance_pages_have_no_cursor(self, authed_client, account):
+        for _ in range(3):
+            EmailFactory(account=account, subject="Budget")
+        by_date = authed_client.get("/api/v1/emails/?search=budget&pageSize=2").json()
+        by_rank = authed_client.get("/api/v1/emails/?search=budget&pageSize=2&sort=relevance").json()
+        assert by_date["nextCursor"] is not None
+        assert (by_rank["totalPages"], by_rank["nextCursor"]) == (2, None)
+
+    def test_search_operators(self, authed_client, account):
+        match = EmailFactory(account=account, subject="Invoice March", sender_name="Ann", is_read=False)
+        EmailFactory(account=account, subject="Invoice April", sender_name="Ann", is_read=True)
+        EmailFactory(account=account, subject="Invoice May", sender_name="Bob", is_read=False)
+        resp = authed_client.get("/api/v1/emails/", {"search": "from:ann is:unread subject:invoice"})
+        assert [e["id"] for e in resp.json()["data"]] == [str(match.uuid)]
+
+    def test_invalid_operator_value_is_rejected(self, authed_client, account):
+        resp = authed_client.get("/api/v1/emails/", {"search": "before:someday"})
+        assert resp.status_code == 400
+        assert "before:" in resp.json()["detail"]
+
+    def test_relevance_with_cursor_is_rejected(self, authed_client, account):
+        resp = authed_client.get("/api/v1/emails/?search=x&sort=relevance&cursor=")
+        assert resp.status_code == 400
+
 
 class TestPaginationEdgeCases:
     def test_page_zero_returns_first_page(self, authed_client, account):
@@ -635,6 +817,105 @@ class TestPaginationEdgeCases:
         assert resp.json()["data"] == []
 
 
+class TestCursorPagination:
+    def _pages(self, client, query):
+        ids, cursor = [], ""
+        while cursor is not None:
+            data = client.get(f"/api/v1/emails/?{query}&pageSize=2&cursor={cursor}").json()
+            assert "total" not in data
+            ids.extend(e["id"] for e in data["data"])
+            cursor = data["nextCursor"]
+        return ids
+
+    def test_walks_filtered_set_newest_first(self, authed_client, account):
+        label = LabelFactory(user=account.user)
+        starred = [EmailFactory(account=account, folder="inbox", is_starred=True) for _ in range(5)]
+        EmailFactory(account=account, folder="inbox", is_starred=False)
+        EmailFactory(account=account, folder="sent", is_starred=True)
+        for e in starred[:3]:
+            e.labels.add(label)
+        expected = [str(e.uuid) for e in reversed(starred)]
+        assert self._pages(authed_client, "folder=inbox&isStarred=true") == expected
+        assert self._pages(authed_client, f"folder=inbox&labelIds={label.uuid}") == expected[2:]
+
+    def test_offset_page_hands_over_to_cursor(self, authed_client, account):
+        emails = [EmailFactory(account=account) for _ in range(5)]
+        first = authed_client.get("/api/v1/emails/?page=1&pageSize=2").json()
+        assert first["total"] == 5
+        rest = authed_client.get(f"/api/v1/emails/?pageSize=10&cursor={first['nextCursor']}").json()
+        assert [e["id"] for e in rest["data"]] == [str(e.uuid) for e in reversed(emails[:3])]
+        assert rest["nextCursor"] is None
+
+    def test_last_offset_page_has_no_cursor(self, authed_client, account):
+        EmailFactory(account=account)
+        assert authed_client.get("/api/v1/emails/?page=1").json()["nextCursor"] is None
+
+    def test_invalid_cursor(self, authed_client, account):
+        resp = authed_client.get("/api/v1/emails/?cursor=garbage!")
+        assert resp.status_code == 400
+
+    def test_cursor_does_not_leak_other_users_emails(self, authed_client, account, second_account):
+        EmailFactory(account=account)
+        theirs = EmailFactory(account=second_account)
+        EmailFactory(account=account)
+        data = authed_client.get(f"/api/v1/emails/?cursor={encode_cursor(theirs)}").json()
+        assert all(e["accountId"] == str(account.uuid) for e in data["data"])
+
+
+class TestCompactView:
+    def test_summary_fields(self, authed_client, account, user):
+        label = LabelFactory(user=user)
+        email = EmailFactory(account=account, subject="Hi", body="<p>big body</p>", has_attachment=True)
+        email.labels.add(label)
+        AttachmentFactory(email=email)
+        AttachmentFactory(email=email)
+        data = authed_client.get("/api/v1/emails/?view=compact").json()["data"]
+        assert data[0].pop("date").startswith(email.created_at.strftime("%Y-%m-%dT%H:%M:%S"))
+        assert data == [
+            {
+                "id": str(email.uuid),
+                "accountId": str(account.uuid),
+                "from": {"name": email.sender_name, "email": email.sender_email},
+                "subject": "Hi",
+                "preview": email.preview,
+                "isRead": False,
+                "isStarred": False,
+                "isDraft": False,
+                "hasAttachment": True,
+                "attachmentCount": 2,
+                "folder": "inbox",
+                "labels": [str(label.uuid)],
+                "threadId": str(email.thread_id),
+            }
+        ]
+
+    def test_body_column_is_never_read(self, authed_client, account):
+        EmailFactory(account=account)
+        with CaptureQueriesContext(connection) as ctx:
+            authed_client.get("/api/v1/emails/?view=compact&cursor=")
+        assert not any('"body"' in q["sql"] for q in ctx.captured_queries)
+
+    def test_query_count_is_flat(self, authed_client, account, django_assert_num_queries):
+        for _ in range(3):
+            EmailFactory(account=account).labels.add(LabelFactory(user=account.user))
+        # auth user, stale-sync account check, version lookup, emails (attachment counts inline), labels
+        with django_assert_num_queries(5):
+            authed_client.get("/api/v1/emails/?view=compact&cursor=")
+
+    def test_with_search_and_cursor(self, authed_client, account):
+        emails = [EmailFactory(account=account, subject=f"budget {i}") for i in range(3)]
+        # Faker's word list includes "budget", so the non-match gets a fixed body
+        EmailFactory(account=account, subject="other", body="nothing to see")
+        first = authed_client.get("/api/v1/emails/?view=compact&search=budget&pageSize=2&cursor=").json()
+        assert [e["id"] for e in first["data"]] == [str(emails[2].uuid), str(emails[1].uuid)]
+        assert "<mark>" in first["data"][0]["snippet"]
+        rest = authed_client.get(f"/api/v1/emails/?view=compact&search=budget&cursor={first['nextCursor']}").json()
+        assert [e["id"] for e in rest["data"]] == [str(emails[0].uuid)]
+
+    def test_unknown_view_is_rejected(self, authed_client, account):
+        assert authed_client.get("/api/v1/emails/?view=tiny").status_code == 422
+
+
 class TestCombinedFilters:
     def test_folder_and_starred_and_attachment(self, authed_client, account):
         e1 = EmailFactory(account=account, folder="inbox", is_starred=True, has_attachment=True)
@@ -806,13 +1087,14 @@ class TestFireImapOp:
         mock_mr.assert_called_once_with(account, 107, "INBOX")
 
 
-class TestSmtpSendError:
-    """Cover lines 239-241: SMTP send error deletes email and raises 502."""
+class TestCreateEmailQueuesSend:
+    """create_email persists the message in the outbox and defers SMTP to the worker pool."""
 
-    def test_smtp_error_deletes_email_and_returns_502(self, authed_client, account):
-        with patch(
-            "penguin_mail.services.smtp.send_email",
-            side_effect=Exception("Connection refused"),
+    def test_returns_outbox_status_without_sending(self, authed_client, account, django_capture_on_commit_callbacks):
+        with (
+            patch("penguin_mail.services.smtp.send_email") as mock_send,
+            patch("penguin_mail.services.outbox._submit") as mock_submit,
+            django_capture_on_commit_callbacks(execute=True),
         ):
             resp = authed_client.post(
                 "/api/v1/emails/",
@@ -820,14 +1102,99 @@ class TestSmtpSendError:
                     {
                         "accountId": str(account.uuid),
                         "to": [{"email": "bob@example.com", "name": "Bob"}],
-                        "subject": "Fail",
-                        "body": "<p>fail</p>",
+                        "subject": "Queued",
+                        "body": "<p>queued</p>",
                     }
                 ),
             )
-        assert resp.status_code == 502
-        # Email should have been deleted
-        assert not Email.objects.filter(subject="Fail").exists()
+        assert resp.status_code == 201
+        assert resp.json()["sendStatus"] == "outbox"
+        mock_send.assert_not_called()
+        email = Email.objects.get(subject="Queued")
+        mock_submit.assert_called_once_with(email.pk)
+
+    def test_scheduled_send_waits_for_dispatcher(self, authed_client, account, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            resp = authed_client.post(
+                "/api/v1/emails/",
+                data=json.dumps(
+                    {
+                        "accountId": str(account.uuid),
+                        "to": [{"email": "a@b.com"}],
+                        "subject": "Later",
+                        "body": "Later",
+                        "scheduledSendAt": "2099-01-01T12:00:00Z",
+                    }
+                ),
+            )
+        assert resp.json()["sendStatus"] == "scheduled"
+        assert callbacks == []
+
+    def test_unscheduling_cancels_send(self, authed_client, account):
+        e = EmailFactory(account=account, folder="scheduled", send_status="scheduled")
+        resp = authed_client.patch(f"/api/v1/emails/{e.uuid}", data=json.dumps({"folder": "drafts"}))
+        assert resp.json()["sendStatus"] == ""
+
+    def test_smtp_disabled_is_not_queued(self, authed_client, account, settings, django_capture_on_commit_callbacks):
+        settings.SMTP_SEND_ENABLED = False
+        with django_capture_on_commit_callbacks() as callbacks:
+            resp = authed_client.post(
+                "/api/v1/emails/",
+                data=json.dumps({"accountId": str(account.uuid), "to": [{"email": "a@b.com"}], "body": "x"}),
+            )
+        assert resp.json()["sendStatus"] == ""
+        assert callbacks == []
+
+
+class TestAttachmentLinking:
+    def test_send_links_staged_uploads(self, authed_client, account, user):
+        staged = AttachmentFactory(email=None, uploaded_by=user)
+        resp = authed_client.post(
+            "/api/v1/emails/",
+            data=json.dumps(
+                {
+                    "accountId": str(account.uuid),
+                    "to": [{"email": "a@b.com"}],
+                    "attachmentIds": [str(staged.uuid)],
+                }
+            ),
+        )
+        data = resp.json()
+        assert data["hasAttachment"] is True
+        assert [a["id"] for a in data["attachments"]] == [str(staged.uuid)]
+        assert Email.objects.get(uuid=data["id"]).size == staged.size
+
+    def test_size_counts_body_bytes(self, authed_client, account):
+        resp = authed_client.post(
+            "/api/v1/emails/draft",
+            data=json.dumps({"accountId": str(account.uuid), "to": [], "body": "<p>caf\u00e9</p>"}),
+        )
+        assert Email.objects.get(uuid=resp.json()["id"]).size == len("<p>café</p>".encode())
+
+    def test_draft_links_staged_uploads(self, authed_client, account, user):
+        staged = AttachmentFactory(email=None, uploaded_by=user)
+        resp = authed_client.post(
+            "/api/v1/emails/draft",
+            data=json.dumps({"accountId": str(account.uuid), "to": [], "attachmentIds": [str(staged.uuid)]}),
+        )
+        assert resp.json()["hasAttachment"] is True
+
+    def test_ignores_foreign_and_linked_uploads(self, authed_client, account):
+        foreign = AttachmentFactory(email=None, uploaded_by=UserFactory())
+        linked = AttachmentFactory(email=EmailFactory(account=account))
+        resp = authed_client.post(
+            "/api/v1/emails/",
+            data=json.dumps(
+                {
+                    "accountId": str(account.uuid),
+                    "to": [{"email": "a@b.com"}],
+                    "attachmentIds": [str(foreign.uuid), str(linked.uuid)],
+                }
+            ),
+        )
+        assert resp.json()["hasAttachment"] is False
+        foreign.refresh_from_db()
+        assert foreign.email is None
 
 
 class TestFireImapOpsForQueryset:
@@ -916,3 +1283,80 @@ class TestSnoozeFields:
         assert email.snooze_until is not None
         assert email.snoozed_from_folder == "inbox"
         assert email.folder == "snoozed"
+
+
+class TestEmailCounts:
+    def _counts(self, client):
+        resp = client.get("/api/v1/emails/counts")
+        assert resp.status_code == 200
+        return resp.json()
+
+    def _folders(self, client):
+        return {f["folder"]: (f["total"], f["unread"]) for f in self._counts(client)["folders"] if f["total"]}
+
+    def _create(self, client, account, **extra):
+        payload = {"accountId": str(account.uuid), "to": [{"email": "x@example.com"}], "subject": "S", "body": "B"}
+        resp = client.post("/api/v1/emails/draft", data=json.dumps({**payload, **extra}))
+        assert resp.status_code == 201
+        return resp.json()["id"]
+
+    def test_empty(self, authed_client, account):
+        assert self._counts(authed_client) == {"accounts": [], "folders": [], "labels": []}
+
+    def test_write_paths_keep_counters_exact(self, authed_client, account):
+        from penguin_mail.services import counters
+
+        label = LabelFactory(user=account.user)
+        ids = [self._create(authed_client, account) for _ in range(4)]
+        # New drafts are unread
+        assert self._folders(authed_client) == {"drafts": (4, 4)}
+
+        def bulk(operation, targets, **extra):
+            body = {"ids": targets, "operation": operation, **extra}
+            assert authed_client.post("/api/v1/emails/bulk", data=json.dumps(body)).status_code == 200
+
+        bulk("move", ids, folder="inbox")
+        bulk("markRead", ids)
+        bulk("markUnread", ids[:3])
+        bulk("addLabel", ids[:2], labelIds=[str(label.uuid)])
+        bulk("archive", ids[3:])
+        authed_client.patch(f"/api/v1/emails/{ids[0]}", data=json.dumps({"isRead": True}))
+        authed_client.delete(f"/api/v1/emails/{ids[1]}")
+        authed_client.delete(f"/api/v1/emails/{ids[2]}/permanent")
+        authed_client.delete(f"/api/v1/emails/{ids[0]}/labels", data=json.dumps({"labelIds": [str(label.uuid)]}))
+        authed_client.post(f"/api/v1/emails/{ids[3]}/labels", data=json.dumps({"labelIds": [str(label.uuid)]}))
+
+        data = self._counts(authed_client)
+        assert self._folders(authed_client) == {"inbox": (1, 0), "trash": (1, 1), "archive": (1, 0)}
+        assert [(c["total"], c["unread"]) for c in data["labels"]] == [(2, 1)]
+        assert data["accounts"] == [{"accountId": str(account.uuid), "total": 3, "unread": 1}]
+        # What the write paths maintained matches a full recount
+        counters.recompute(account)
+        assert self._counts(authed_client) == data
+
+    def test_labels_summed_across_accounts(self, authed_client, account, user):
+        from penguin_mail.models import Account as AccountModel
+
+        second = AccountModel.objects.create(user=user, email="second@example.com", name="Second")
+        label = LabelFactory(user=user)
+        for acct in (account, second):
+            self._create(authed_client, acct, labelIds=[])
+            email = Email.objects.filter(account=acct).get()
+            authed_client.post(f"/api/v1/emails/{email.uuid}/labels", data=json.dumps({"labelIds": [str(label.uuid)]}))
+        data = self._counts(authed_client)
+        assert data["labels"] == [{"labelId": str(label.uuid), "total": 2, "unread": 2}]
+        assert len(data["accounts"]) == 2
+
+    def test_user_isolation(self, authed_client, account, second_account):
+        self._create(authed_client, account)
+        other = EmailFactory(account=second_account, folder="inbox")
+        from penguin_mail.services import counters
+
+        counters.record_new([other.pk])
+        assert [a["accountId"] for a in self._counts(authed_client)["accounts"]] == [str(account.uuid)]
+
+    def test_single_query(self, authed_client, account, django_assert_num_queries):
+        self._create(authed_client, account)
+        # auth user lookup + version lookup + counters
+        with django_assert_num_queries(3):
+            self._counts(authed_client)
@@ -19,8 +19,8 @@ class TestListFolders:
         for i in range(5):
             CustomFolderFactory(user=user, name=f"Folder {i}")
         # list_folders uses select_related("parent") — should be 2 queries regardless of count:
-        # 1: auth (SELECT user), 2: SELECT folders JOIN parent
-        with django_assert_num_queries(2):
+        # 1: auth (SELECT user), 2: version lookup, 3: SELECT folders JOIN parent
+        with django_assert_num_queries(3):
             resp = authed_client.get("/api/v1/folders/")
         assert resp.status_code == 200
         assert len(resp.json()) == 5
@@ -18,8 +18,8 @@ class TestListLabels:
     def test_list_labels_query_count(self, authed_client, user, django_assert_num_queries):
         for i in range(5):
             LabelFactory(user=user, name=f"Label {i}")
-        # list_labels: 1 auth SELECT + 1 SELECT labels
-        with django_assert_num_queries(2):
+        # list_labels: 1 auth SELECT + 1 version lookup + 1 SELECT labels
+        with django_assert_num_queries(3):
             resp = authed_client.get("/api/v1/labels/")
         assert resp.status_code == 200
         assert len(resp.json()) == 5
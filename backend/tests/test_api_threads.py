@@ -0,0 +1,183 @@
+"""Tests for the conversation (thread) API endpoints."""
+
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from factories import AccountFactory, EmailFactory, LabelFactory
+from penguin_mail.api.routers import threads as threads_router
+from penguin_mail.models import Email
+
+
+def message(account, thread, minutes_ago, **kwargs):
+    """An email in ``thread`` created ``minutes_ago`` minutes ago."""
+    email = EmailFactory(account=account, thread_id=thread, **kwargs)
+    Email.objects.filter(pk=email.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+    return email
+
+
+@pytest.fixture
+def conversation(account, user):
+    """Three messages in one thread: two received, one reply sent; the newest is unread."""
+    thread = uuid.uuid4()
+    first = message(account, thread, 30, sender_email="alice@example.com", sender_name="Alice", is_read=True)
+    reply = message(account, thread, 20, folder="sent", sender_email="test@mail.example.com", sender_name="Me")
+    last = message(
+        account,
+        thread,
+        10,
+        sender_email="ALICE@example.com",
+        sender_name="Alice A.",
+        subject="Re: plans",
+        has_attachment=True,
+    )
+    first.labels.add(label := LabelFactory(user=user))
+    last.labels.add(label)
+    return thread, [first, reply, last], label
+
+
+class TestListThreads:
+    def test_aggregates_the_whole_thread(self, authed_client, account, conversation):
+        thread, (first, reply, last), label = conversation
+        resp = authed_client.get("/api/v1/threads/?folder=inbox")
+        assert resp.status_code == 200
+        (row,) = resp.json()["data"]
+        assert row["id"] == str(thread)
+        assert row["subject"] == "Re: plans"
+        assert row["messageCount"] == 3
+        assert row["unreadCount"] == 2
+        assert row["hasAttachment"] is True
+        assert row["participants"] == [
+            {"name": "Alice", "email": "alice@example.com"},
+            {"name": "Me", "email": "test@mail.example.com"},
+        ]
+        assert row["labels"] == [str(label.uuid)]
+        assert row["latest"]["id"] == str(last.uuid)
+        assert resp.json()["nextCursor"] is None
+
+    def test_ordered_by_latest_activity(self, authed_client, account, conversation):
+        thread, _, _ = conversation
+        older = message(account, uuid.uuid4(), 60)
+        newer = message(account, None, 1)
+        message(account, older.thread_id, 5, folder="sent")
+        ids = [row["id"] for row in authed_client.get("/api/v1/threads/").json()["data"]]
+        assert ids == [str(newer.uuid), str(older.thread_id), str(thread)]
+
+    def test_unthreaded_message_joins_its_replies(self, authed_client, account):
+        parent = message(account, None, 10)
+        message(account, parent.uuid, 5)
+        (row,) = authed_client.get("/api/v1/threads/").json()["data"]
+        assert row["id"] == str(parent.uuid)
+        assert row["messageCount"] == 2
+
+    def test_filters_select_threads(self, authed_client, account, user, conversation):
+        thread, _, label = conversation
+        other_account = AccountFactory(user=user)
+        message(other_account, uuid.uuid4(), 1, folder="archive")
+        assert [r["id"] for r in authed_client.get("/api/v1/threads/?folder=sent").json()["data"]] == [str(thread)]
+        assert len(authed_client.get("/api/v1/threads/").json()["data"]) == 2
+        by_account = authed_client.get(f"/api/v1/threads/?accountId={account.uuid}").json()["data"]
+        assert [r["id"] for r in by_account] == [str(thread)]
+        by_label = authed_client.get(f"/api/v1/threads/?labelId={label.uuid}").json()["data"]
+        assert [r["id"] for r in by_label] == [str(thread)]
+
+    def test_trash_counts_only_in_trash(self, authed_client, account, conversation):
+        thread, _, _ = conversation
+        message(account, thread, 1, folder="trash")
+        assert authed_client.get("/api/v1/threads/").json()["data"][0]["messageCount"] == 3
+        (trashed,) = authed_client.get("/api/v1/threads/?folder=trash").json()["data"]
+        assert trashed["messageCount"] == 4
+
+    def test_keyset_pages(self, authed_client, account):
+        threads = [message(account, uuid.uuid4(), minutes).thread_id for minutes in (1, 2, 3)]
+        first = authed_client.get("/api/v1/threads/?pageSize=2").json()
+        assert [r["id"] for r in first["data"]] == [str(t) for t in threads[:2]]
+        rest = authed_client.get(f"/api/v1/threads/?pageSize=2&cursor={first['nextCursor']}").json()
+        assert [r["id"] for r in rest["data"]] == [str(threads[2])]
+        assert rest["nextCursor"] is None
+
+    def test_same_time_threads_page_without_gaps(self, authed_client, account):
+        now = timezone.now()
+        emails = [EmailFactory(account=account) for _ in range(3)]
+        Email.objects.filter(pk__in=[e.pk for e in emails]).update(created_at=now)
+        seen = []
+        cursor = ""
+        while True:
+            page = authed_client.get(f"/api/v1/threads/?pageSize=1&cursor={cursor}").json()
+            seen += [r["id"] for r in page["data"]]
+            if not (cursor := page["nextCursor"]):
+                break
+        assert sorted(seen) == sorted(str(e.thread_id) for e in emails)
+
+    def test_query_count_is_independent_of_page_size(self, authed_client, account, django_assert_num_queries):
+        for _ in range(10):
+            thread = uuid.uuid4()
+            message(account, thread, 5).labels.add(LabelFactory(user=account.user))
+            message(account, thread, 1)
+        # auth user, version lookup, page of latest messages, members, latest summaries, their labels, thread labels
+        with django_assert_num_queries(7) as captured:
+            assert len(authed_client.get("/api/v1/threads/").json()["data"]) == 10
+        # The keyset seeks in WHERE, not over an aggregate of the whole mailbox
+        assert not any("HAVING" in query["sql"] for query in captured.captured_queries)
+
+    @pytest.mark.parametrize("when", ["_thread_rows", "summary_rows"])
+    def test_thread_deleted_while_listing(self, authed_client, account, when):
+        kept = message(account, uuid.uuid4(), 5)
+        gone = message(account, uuid.uuid4(), 1)
+        original = getattr(threads_router, when)
+
+        def delete_then(*args):
+            Email.objects.filter(pk=gone.pk).delete()
+            return original(*args)
+
+        with patch.object(threads_router, when, delete_then):
+            data = authed_client.get("/api/v1/threads/").json()["data"]
+        assert [row["id"] for row in data] == [str(kept.thread_id)]
+
+    def test_only_own_threads(self, authed_client, second_account):
+        EmailFactory(account=second_account)
+        assert authed_client.get("/api/v1/threads/").json()["data"] == []
+
+    def test_not_modified(self, authed_client, account, conversation):
+        etag = authed_client.get("/api/v1/threads/")["ETag"]
+        assert authed_client.get("/api/v1/threads/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_invalid_cursor(self, authed_client, account):
+        assert authed_client.get("/api/v1/threads/?cursor=!!!").status_code == 400
+
+    def test_requires_auth(self, api_client):
+        assert api_client.get("/api/v1/threads/").status_code == 401
+
+
+class TestBulkThreads:
+    def test_mark_read_covers_every_message(self, authed_client, conversation, second_account):
+        thread, emails, _ = conversation
+        bystander = EmailFactory(account=second_account, thread_id=thread)
+        resp = authed_client.post("/api/v1/threads/bulk", data={"ids": [str(thread)], "operation": "markRead"})
+        assert resp.status_code == 200
+        assert all(Email.objects.get(pk=e.pk).is_read for e in emails)
+        assert Email.objects.get(pk=bystander.pk).is_read is False
+
+    def test_archive_leaves_own_messages(self, authed_client, conversation):
+        thread, (first, reply, last), _ = conversation
+        authed_client.post("/api/v1/threads/bulk", data={"ids": [str(thread)], "operation": "archive"})
+        folders = {e.pk: Email.objects.get(pk=e.pk).folder for e in (first, reply, last)}
+        assert folders == {first.pk: "archive", reply.pk: "sent", last.pk: "archive"}
+
+    def test_unthreaded_message_and_its_replies(self, authed_client, account):
+        parent = message(account, None, 10)
+        child = message(account, parent.uuid, 5)
+        authed_client.post("/api/v1/threads/bulk", data={"ids": [str(parent.uuid)], "operation": "star"})
+        assert Email.objects.filter(pk__in=[parent.pk, child.pk], is_starred=True).count() == 2
+
+    def test_label_ops(self, authed_client, user, conversation):
+        thread, emails, _ = conversation
+        label = LabelFactory(user=user)
+        authed_client.post(
+            "/api/v1/threads/bulk",
+            data={"ids": [str(thread)], "operation": "addLabel", "labelIds": [str(label.uuid)]},
+        )
+        assert label.emails.count() == len(emails)
@@ -0,0 +1,162 @@
+"""Tests for the cold tier for old mail (penguin_mail.services.archive)."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from factories import EmailFactory
+from penguin_mail.models import BodyArchive, Email, EmailBody, EmailSearchDocument, SendStatus
+from penguin_mail.search import documents
+from penguin_mail.services.archive import archive_old_mail, archived_texts
+
+
+def old_email(account, days=200, **kwargs):
+    email = EmailFactory(account=account, **kwargs)
+    Email.objects.filter(pk=email.pk).update(created_at=timezone.now() - timedelta(days=days))
+    return email
+
+
+def stored(email):
+    return EmailBody.objects.get(email=email)
+
+
+class TestArchive:
+    def test_moves_old_bodies_in_batches(self, account):
+        old = [old_email(account, body=f"<p>old {i}</p>") for i in range(3)]
+        recent = EmailFactory(account=account, body="<p>recent</p>")
+
+        assert archive_old_mail(days=180, batch_size=2) == 3
+        assert BodyArchive.objects.count() == 2
+        assert all(stored(email).data is None for email in old)
+        assert stored(recent).data is not None
+        assert [Email.objects.get(pk=email.pk).body for email in old] == [
+            "<p>old 0</p>",
+            "<p>old 1</p>",
+            "<p>old 2</p>",
+        ]
+        assert archive_old_mail(days=180) == 0
+        archive = BodyArchive.objects.first()
+        assert archive.file.name.startswith("archive/")
+        assert str(archive) == f"Body archive {archive.file.name}"
+
+    def test_keeps_mail_that_may_still_change(self, account):
+        kept = [
+            old_email(account, is_draft=True),
+            old_email(account, send_status=SendStatus.OUTBOX),
+            old_email(account, body='<img src="cid:logo">'),
+        ]
+        sent = old_email(account, send_status=SendStatus.SENT)
+        assert archive_old_mail(days=180) == 1
+        assert stored(sent).archive is not None
+        assert all(stored(email).archive is None for email in kept)
+
+    def test_accounts_archive_separately(self, account, second_account):
+        old_email(account)
+        old_email(second_account)
+        assert archive_old_mail(days=180) == 2
+        assert set(BodyArchive.objects.values_list("account", flat=True)) == {account.pk, second_account.pk}
+
+    def test_body_leaves_the_search_index(self, account):
+        email = old_email(account, subject="Invoice", body="<p>zebra</p>")
+        archive_old_mail(days=180)
+        document = EmailSearchDocument.objects.get(email=email)
+        assert (document.subject, document.body) == ("Invoice", "")
+        documents.rebuild()
+        assert EmailSearchDocument.objects.get(email=email).body == ""
+
+        email = Email.objects.get(pk=email.pk)
+        email.subject = "Invoice 2"
+        email.save()
+        assert EmailSearchDocument.objects.get(email=email).body == ""
+
+    def test_new_body_is_hot_again(self, account):
+        email = old_email(account, body="<p>before</p>")
+        archive_old_mail(days=180)
+        email = Email.objects.get(pk=email.pk)
+        assert email.body_archived is True
+        email.body = "<p>after</p>"
+        assert email.body_archived is False
+        email.save()
+        assert email.body_archived is False
+        assert (stored(email).archive, stored(email).text) == (None, "<p>after</p>")
+        assert EmailSearchDocument.objects.get(email=email).body == "after"
+
+    def test_unused_archives_are_deleted(self, account, django_capture_on_commit_callbacks):
+        email = old_email(account)
+        archive_old_mail(days=180)
+        archive = BodyArchive.objects.get()
+        email.delete()
+        with django_capture_on_commit_callbacks(execute=True):
+            archive_old_mail(days=180)
+        assert not BodyArchive.objects.exists()
+        assert not archive.file.storage.exists(archive.file.name)
+
+    @pytest.mark.parametrize("owner", ["account", "user"])
+    def test_deleting_the_owner_deletes_the_files(self, account, owner, django_capture_on_commit_callbacks):
+        old_email(account)
+        archive_old_mail(days=180)
+        archive = BodyArchive.objects.get()
+        with django_capture_on_commit_callbacks(execute=True):
+            (account if owner == "account" else account.user).delete()
+        assert not BodyArchive.objects.exists()
+        assert not archive.file.storage.exists(archive.file.name)
+
+    def test_rolled_back_delete_keeps_the_file(self, account):
+        old_email(account)
+        archive_old_mail(days=180)
+        archive = BodyArchive.objects.get()
+        with pytest.raises(RuntimeError), transaction.atomic():
+            account.delete()
+            raise RuntimeError("rolled back")
+        assert archive.file.storage.exists(archive.file.name)
+
+    def test_failed_batch_leaves_no_file(self, account, settings):
+        email = old_email(account, body="<p>kept</p>")
+        with (
+            patch.object(EmailBody.objects, "bulk_update", side_effect=RuntimeError("boom")),
+            pytest.raises(RuntimeError),
+        ):
+            archive_old_mail(days=180)
+        assert not list(settings.MEDIA_ROOT.rglob("*.bin"))
+        assert not BodyArchive.objects.exists()
+        assert stored(email).text == "<p>kept</p>"
+
+    def test_no_body(self, account):
+        email = old_email(account, body="")
+        assert archive_old_mail(days=180) == 0
+        assert Email.objects.get(pk=email.pk).body_archived is False
+
+    def test_command(self, account, settings):
+        settings.ARCHIVE_AFTER_DAYS = 300
+        old_email(account)
+        old_email(account, days=400)
+        out = StringIO()
+        call_command("archive_mail", stdout=out)
+        assert out.getvalue().strip() == "Archived 1 email bodies"
+        call_command("archive_mail", "--days", "100", "--batch-size", "10", stdout=out)
+        assert "Archived 1 email bodies" in out.getvalue().splitlines()[-1]
+
+
+class TestReadingArchivedBodies:
+    def test_archived_texts(self, account):
+        emails = [old_email(account, body=f"<p>{i}</p>") for i in range(3)]
+        recent = EmailFactory(account=account)
+        archive_old_mail(days=180, batch_size=2)
+        texts = archived_texts([email.pk for email in emails] + [recent.pk])
+        assert texts == {email.pk: f"<p>{i}</p>" for i, email in enumerate(emails)}
+
+    def test_api_hydrates_bodies(self, authed_client, account):
+        email = old_email(account, body="<p>from the archive</p>")
+        EmailFactory(account=account, body="<p>hot</p>")
+        archive_old_mail(days=180)
+
+        resp = authed_client.get(f"/api/v1/emails/{email.uuid}")
+        assert resp.json()["body"] == "<p>from the archive</p>"
+        bodies = {item["id"]: item["body"] for item in authed_client.get("/api/v1/emails/").json()["data"]}
+        assert bodies[str(email.uuid)] == "<p>from the archive</p>"
+        assert "<p>hot</p>" in bodies.values()
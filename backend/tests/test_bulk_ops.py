@@ -0,0 +1,238 @@
+"""Tests for bulk operations by query (penguin_mail.services.bulk_ops) and their IMAP write-back."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db.models import Max
+from django.utils import timezone
+
+from factories import AccountFactory, EmailFactory, LabelFactory
+from penguin_mail.models import BulkJob, BulkJobStatus, ChangeLogEntry, Email, MailboxCounter
+from penguin_mail.services import bulk_ops, counters
+from penguin_mail.services.imap import _format_uid_set, imap_write_back
+
+
+def make_job(user, operation="markRead", **fields):
+    newest = Email.objects.aggregate(newest=Max("pk"))["newest"] or 0
+    return BulkJob.objects.create(user=user, operation=operation, max_email_id=newest, **fields)
+
+
+@pytest.fixture
+def inbox(account):
+    emails = [EmailFactory(account=account, is_read=False) for _ in range(5)]
+    counters.record_new([e.pk for e in emails])
+    return emails
+
+
+class TestRun:
+    def test_applies_in_chunks_and_records_progress(self, user, inbox, settings):
+        settings.BULK_JOB_CHUNK_SIZE = 2
+        job = make_job(user, query={"folder": "inbox"}, total=5)
+        with patch.object(bulk_ops, "apply", wraps=bulk_ops.apply) as mock_apply:
+            assert bulk_ops.run(job.pk) is True
+        assert mock_apply.call_count == 3
+        job.refresh_from_db()
+        assert (job.status, job.processed_count, job.last_email_id) == (BulkJobStatus.COMPLETED, 5, inbox[-1].pk)
+        assert not Email.objects.filter(is_read=False).exists()
+        assert MailboxCounter.objects.get(folder="inbox", label=None).unread == 0
+        assert ChangeLogEntry.objects.filter(op="updated").count() == 5
+
+    def test_only_matching_emails_of_the_owner(self, user, account, second_account, inbox):
+        label = LabelFactory(user=user)
+        inbox[0].labels.add(label)
+        bystander = EmailFactory(account=second_account, is_read=False)
+        job = make_job(user, query={"labelIds": [str(label.uuid)], "isRead": False})
+        bulk_ops.run(job.pk)
+        assert list(Email.objects.filter(is_read=True)) == [inbox[0]]
+        assert Email.objects.get(pk=bystander.pk).is_read is False
+
+    def test_mail_arriving_later_is_left_alone(self, user, account, inbox):
+        job = make_job(user, operation="archive")
+        late = EmailFactory(account=account)
+        bulk_ops.run(job.pk)
+        assert Email.objects.get(pk=late.pk).folder == "inbox"
+        assert Email.objects.filter(folder="archive").count() == len(inbox)
+
+    def test_resumes_after_last_email(self, user, inbox):
+        job = make_job(user, last_email_id=inbox[2].pk, processed_count=3)
+        bulk_ops.run(job.pk)
+        assert [e.pk for e in Email.objects.filter(is_read=True).order_by("pk")] == [e.pk for e in inbox[3:]]
+        job.refresh_from_db()
+        assert job.processed_count == 5
+
+    def test_label_and_move_operations(self, user, inbox):
+        label = LabelFactory(user=user)
+        bulk_ops.run(make_job(user, operation="addLabel", label_ids=[str(label.uuid)]).pk)
+        assert label.emails.count() == len(inbox)
+        bulk_ops.run(make_job(user, operation="move", folder="spam").pk)
+        assert Email.objects.filter(folder="spam").count() == len(inbox)
+
+    def test_not_claimable_twice(self, user, inbox):
+        job = make_job(user)
+        assert bulk_ops.run(job.pk) is True
+        assert bulk_ops.run(job.pk) is False
+
+    def test_failure_keeps_committed_chunks(self, user, inbox, settings):
+        settings.BULK_JOB_CHUNK_SIZE = 2
+        job = make_job(user)
+        real_apply = bulk_ops.apply
+
+        def fail_second(*args):
+            if mock_apply.call_count == 2:
+                raise RuntimeError("disk full")
+            return real_apply(*args)
+
+        with patch.object(bulk_ops, "apply", side_effect=fail_second) as mock_apply:
+            bulk_ops.run(job.pk)
+        job.refresh_from_db()
+        assert (job.status, job.error, job.processed_count) == (BulkJobStatus.FAILED, "disk full", 2)
+        assert Email.objects.filter(is_read=True).count() == 2
+
+    def test_resumed_job_stops_the_old_worker(self, user, inbox):
+        job = make_job(user)
+        chunks = []
+
+        def chunk_size():
+            chunks.append(2)
+            if len(chunks) == 2:
+                # Taken for stalled after its first chunk: resume_stalled() queued it for another worker
+                BulkJob.objects.filter(pk=job.pk).update(status=BulkJobStatus.QUEUED, updated_at=timezone.now())
+            return 2
+
+        with patch.object(bulk_ops, "chunk_size", side_effect=chunk_size):
+            assert bulk_ops.run(job.pk) is True
+        job.refresh_from_db()
+        # The second chunk is rolled back and left to the new worker
+        assert (job.status, job.processed_count) == (BulkJobStatus.QUEUED, 2)
+        assert Email.objects.filter(is_read=True).count() == 2
+
+
+class TestWriteBack:
+    def test_one_call_per_account_with_every_uid(self, user, account, settings):
+        settings.BULK_JOB_CHUNK_SIZE = 10
+        for uid, folder in ((7, "INBOX"), (8, "INBOX"), (9, "Lists")):
+            EmailFactory(account=account, imap_uid=uid, imap_folder=folder)
+        EmailFactory(account=account)
+        with patch("penguin_mail.services.imap.imap_write_back") as mock_write:
+            bulk_ops.run(make_job(user, operation="deletePermanent").pk)
+        assert not Email.objects.exists()
+        mock_write.assert_called_once_with(account, "deletePermanent", {"INBOX": [7, 8], "Lists": [9]})
+
+    def test_write_back_keeps_the_heartbeat(self, user, account):
+        EmailFactory(account=account, imap_uid=7)
+        EmailFactory(account=AccountFactory(user=user, email="work@mail.example.com"), imap_uid=8)
+        job = make_job(user)
+        beats = []
+        with patch(
+            "penguin_mail.services.imap.imap_write_back",
+            side_effect=lambda *args: beats.append(BulkJob.objects.get(pk=job.pk).updated_at),
+        ):
+            bulk_ops.run(job.pk)
+        assert len(beats) == 2
+        assert beats[1] > beats[0]
+
+    def test_local_only_operations_skip_imap(self, user, account):
+        EmailFactory(account=account, imap_uid=7)
+        with patch("penguin_mail.services.imap.imap_write_back") as mock_write:
+            bulk_ops.run(make_job(user, operation="star").pk)
+            bulk_ops.run(make_job(user, operation="move", folder="archive").pk)
+        mock_write.assert_not_called()
+
+    def test_failure_is_logged_and_the_job_completes(self, user, account):
+        EmailFactory(account=account, imap_uid=7)
+        job = make_job(user)
+        with patch("penguin_mail.services.imap.imap_write_back", side_effect=OSError("refused")):
+            bulk_ops.run(job.pk)
+        job.refresh_from_db()
+        assert job.status == BulkJobStatus.COMPLETED
+        assert Email.objects.get().is_read is True
+
+
+class TestImapWriteBack:
+    def test_uid_sets_are_compressed(self):
+        assert _format_uid_set([9, 3, 4, 5, 4, 11]) == "3:5,9,11"
+
+    def test_flags_are_stored_over_the_whole_set(self, account):
+        conn = MagicMock()
+        with patch("penguin_mail.services.imap._open_connection", return_value=conn):
+            imap_write_back(account, "markRead", {"INBOX": [1, 2, 3]})
+            imap_write_back(account, "markUnread", {"INBOX": [5]})
+        conn.select.assert_called_with('"INBOX"')
+        assert conn.uid.call_args_list[0].args == ("store", "1:3", "+FLAGS", r"(\Seen)")
+        assert conn.uid.call_args_list[1].args == ("store", "5", "-FLAGS", r"(\Seen)")
+        conn.list.assert_not_called()
+
+    def test_moves_copy_to_the_special_folder(self, account):
+        conn = MagicMock(capabilities=("IMAP4REV1", "UIDPLUS"))
+        conn.list.return_value = ("OK", [b'(\\HasNoChildren) "/" Deleted'])
+        with patch("penguin_mail.services.imap._open_connection", return_value=conn):
+            imap_write_back(account, "delete", {"INBOX": [1, 2], "Work": [4]})
+            imap_write_back(account, "archive", {"INBOX": [6]})
+        copies = [c.args for c in conn.uid.call_args_list if c.args[0] == "copy"]
+        assert copies == [("copy", "1:2", '"Deleted"'), ("copy", "4", '"Deleted"'), ("copy", "6", '"Archive"')]
+        expunges = [c.args for c in conn.uid.call_args_list if c.args[0] == "expunge"]
+        assert expunges == [("expunge", "1:2"), ("expunge", "4"), ("expunge", "6")]
+        conn.expunge.assert_not_called()
+        assert conn.logout.call_count == 2
+
+    def test_no_expunge_without_uidplus(self, account):
+        conn = MagicMock(capabilities=("IMAP4REV1",))
+        conn.list.return_value = ("OK", [])
+        with patch("penguin_mail.services.imap._open_connection", return_value=conn):
+            imap_write_back(account, "delete", {"INBOX": [1, 2]})
+        assert [c.args[0] for c in conn.uid.call_args_list] == ["copy", "store"]
+        conn.expunge.assert_not_called()
+
+
+class TestBackground:
+    def test_enqueue_spawns_on_commit(self, db, django_capture_on_commit_callbacks):
+        with (
+            patch.object(bulk_ops, "_spawn") as mock_spawn,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            bulk_ops.enqueue(9)
+        mock_spawn.assert_called_once_with(9)
+
+    def test_spawn_starts_daemon_thread(self):
+        with patch.object(bulk_ops.threading, "Thread") as mock_thread:
+            bulk_ops._spawn(9)
+        assert mock_thread.call_args.kwargs["daemon"] is True
+        mock_thread.return_value.start.assert_called_once()
+
+    def test_run_wrapper_closes_connection(self):
+        with (
+            patch.object(bulk_ops, "run", side_effect=RuntimeError("boom")),
+            patch.object(bulk_ops, "connection") as mock_conn,
+        ):
+            bulk_ops._run(9)
+        mock_conn.close.assert_called_once()
+
+    def test_resume_stalled(self, user):
+        job = make_job(user)
+        stale = timezone.now() - timedelta(hours=1)
+        BulkJob.objects.filter(pk=job.pk).update(status=BulkJobStatus.RUNNING, updated_at=stale)
+        with patch.object(bulk_ops, "_spawn") as mock_spawn:
+            assert bulk_ops.resume_stalled() == 1
+            assert bulk_ops.resume_stalled() == 0
+        mock_spawn.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        assert job.status == BulkJobStatus.QUEUED
+
+    def test_job_never_started_is_resumed(self, user):
+        # Queued, but the worker died before the on-commit thread claimed it
+        job = make_job(user)
+        BulkJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        fresh = make_job(user)
+        with patch.object(bulk_ops, "_spawn") as mock_spawn:
+            assert bulk_ops.resume_stalled() == 1
+        mock_spawn.assert_called_once_with(job.pk)
+        assert bulk_ops.run(job.pk) is True
+        assert BulkJob.objects.get(pk=fresh.pk).status == BulkJobStatus.QUEUED
+
+    def test_active_job_is_not_resumed(self, user):
+        job = make_job(user)
+        BulkJob.objects.filter(pk=job.pk).update(status=BulkJobStatus.RUNNING)
+        with patch.object(bulk_ops, "_spawn") as mock_spawn:
+            assert bulk_ops.resume_stalled() == 0
+        mock_spawn.assert_not_called()
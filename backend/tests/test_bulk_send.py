@@ -0,0 +1,192 @@
+"""Tests for mail merge sending (penguin_mail.services.bulk_send)."""
+
+import smtplib
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.utils import timezone
+
+from factories import ContactFactory, ContactGroupFactory
+from penguin_mail.models import BulkSend, BulkSendStatus, Email, FolderType, SendStatus
+from penguin_mail.services import bulk_send
+
+
+@pytest.fixture
+def group(user):
+    group = ContactGroupFactory(user=user)
+    for name in ("Ada Lovelace", "Grace Hopper", "Linus"):
+        group.contacts.add(ContactFactory(user=user, name=name, email=f"{name.split()[0].lower()}@example.com"))
+    return group
+
+
+@pytest.fixture
+def job(user, account, group):
+    return BulkSend.objects.create(
+        user=user,
+        account=account,
+        group=group,
+        subject_template="Hi {{ firstName }}",
+        body_template="<p>Dear {{name}} at {{ company }}</p>",
+        total=3,
+    )
+
+
+@pytest.fixture
+def smtp():
+    """Patch the SMTP session and rate limiter; yields the send_email mock."""
+    with (
+        patch("penguin_mail.services.smtp.smtp_session") as mock_session,
+        patch("penguin_mail.services.smtp.send_email") as mock_send,
+        patch("penguin_mail.services.ratelimit.bucket_for") as mock_bucket,
+    ):
+        mock_session.return_value.__enter__.return_value = MagicMock()
+        mock_send.return_value = MagicMock(message_id="<merge@example.com>")
+        mock_send.session_factory = mock_session
+        mock_send.bucket = mock_bucket.return_value
+        yield mock_send
+
+
+class TestTemplates:
+    def test_render_fields(self, user):
+        contact = ContactFactory(user=user, name="Ada King Lovelace", email="ada@example.com", company="A&B")
+        assert (
+            bulk_send.render("{{firstName}}/{{ lastName }}/{{email}}", contact) == "Ada/King Lovelace/ada@example.com"
+        )
+        assert bulk_send.render("{{company}}", contact, html=True) == "A&amp;B"
+
+    def test_single_name_has_no_last_name(self, user):
+        assert bulk_send.render("[{{lastName}}]", ContactFactory(user=user, name="Linus")) == "[]"
+
+    def test_header_line_breaks_become_spaces(self, user):
+        contact = ContactFactory(user=user, name="Ada\r\nBcc: evil@example.com")
+        assert bulk_send.render_header("Hi {{ name }}\n!", contact) == "Hi Ada Bcc: evil@example.com !"
+
+    def test_unknown_fields(self):
+        assert bulk_send.unknown_fields("{{ name }} {{ nickname }} {{bogus}}") == {"nickname", "bogus"}
+
+
+class TestIterMembers:
+    def test_pages_in_pk_order(self, user, group, monkeypatch):
+        monkeypatch.setattr(bulk_send, "MEMBER_PAGE_SIZE", 2)
+        contacts = sorted(group.contacts.all(), key=lambda c: c.pk)
+        assert list(bulk_send.iter_members(group.pk)) == contacts
+        assert list(bulk_send.iter_members(group.pk, contacts[0].pk)) == contacts[1:]
+
+
+class TestRun:
+    def test_sends_personalised_message_per_member(self, job, smtp):
+        assert bulk_send.run(job.pk) is True
+        job.refresh_from_db()
+        assert job.status == BulkSendStatus.COMPLETED
+        assert job.sent_count == 3
+        calls = sorted(smtp.call_args_list, key=lambda c: c.kwargs["recipients_to"])
+        assert calls[0].kwargs["recipients_to"] == ["ada@example.com"]
+        assert calls[0].kwargs["subject"] == "Hi Ada"
+        assert calls[0].kwargs["body_html"].startswith("<p>Dear Ada Lovelace at ")
+        assert smtp.session_factory.call_count == 1
+        assert smtp.bucket.acquire.call_count == 3
+
+    def test_not_claimable_twice(self, job, smtp):
+        bulk_send.run(job.pk)
+        assert bulk_send.run(job.pk) is False
+
+    def test_resumes_after_last_contact(self, job, smtp):
+        first = job.group.contacts.order_by("pk").first()
+        BulkSend.objects.filter(pk=job.pk).update(last_contact_id=first.pk, sent_count=1)
+        bulk_send.run(job.pk)
+        job.refresh_from_db()
+        assert smtp.call_count == 2
+        assert job.sent_count == 3
+
+    def test_messages_are_stored_in_sent(self, job, smtp, account):
+        bulk_send.run(job.pk)
+        emails = Email.objects.filter(account=account).order_by("pk")
+        assert [(e.folder, e.send_status, e.message_id) for e in emails] == [
+            (FolderType.SENT, SendStatus.SENT, "<merge@example.com>")
+        ] * 3
+        assert emails[0].subject == "Hi Ada"
+        assert emails[0].body.startswith("<p>Dear Ada Lovelace at ")
+        assert [r.address for r in emails[0].recipients.all()] == ["ada@example.com"]
+
+    @pytest.mark.parametrize(
+        "error", [smtplib.SMTPRecipientsRefused({}), ValueError("Header values may not contain linefeed")]
+    )
+    def test_failed_message_fails_alone(self, job, smtp, error):
+        smtp.side_effect = [smtp.return_value, error, smtp.return_value]
+        bulk_send.run(job.pk)
+        job.refresh_from_db()
+        assert (job.sent_count, job.failed_count, job.status) == (2, 1, BulkSendStatus.COMPLETED)
+        failed = Email.objects.get(send_status=SendStatus.FAILED)
+        assert (failed.folder, failed.send_error, failed.message_id) == (FolderType.SENT, str(error), "")
+
+    def test_reconnects_after_disconnect(self, job, smtp):
+        smtp.side_effect = [smtp.return_value, smtplib.SMTPServerDisconnected(), smtp.return_value, smtp.return_value]
+        bulk_send.run(job.pk)
+        job.refresh_from_db()
+        assert job.sent_count == 3
+        assert smtp.session_factory.call_count == 2
+
+    def test_gives_up_after_repeated_disconnects(self, job, smtp):
+        smtp.side_effect = smtplib.SMTPServerDisconnected("gone")
+        bulk_send.run(job.pk)
+        job.refresh_from_db()
+        assert job.status == BulkSendStatus.FAILED
+        assert job.error == "gone"
+        assert smtp.session_factory.call_count == bulk_send.MAX_RECONNECTS + 1
+
+    def test_deleted_group_fails(self, job, smtp):
+        job.group.delete()
+        bulk_send.run(job.pk)
+        job.refresh_from_db()
+        assert job.status == BulkSendStatus.FAILED
+        smtp.assert_not_called()
+
+
+class TestBackground:
+    def test_enqueue_spawns_on_commit(self, db, django_capture_on_commit_callbacks):
+        with (
+            patch.object(bulk_send, "_spawn") as mock_spawn,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            bulk_send.enqueue(9)
+        mock_spawn.assert_called_once_with(9)
+
+    def test_spawn_starts_daemon_thread(self):
+        with patch.object(bulk_send.threading, "Thread") as mock_thread:
+            bulk_send._spawn(9)
+        assert mock_thread.call_args.kwargs["daemon"] is True
+        mock_thread.return_value.start.assert_called_once()
+
+    def test_run_wrapper_closes_connection(self):
+        with (
+            patch.object(bulk_send, "run", side_effect=RuntimeError("boom")),
+            patch.object(bulk_send, "connection") as mock_conn,
+        ):
+            bulk_send._run(9)
+        mock_conn.close.assert_called_once()
+
+    def test_resume_stalled(self, job):
+        stale = timezone.now() - timedelta(hours=1)
+        BulkSend.objects.filter(pk=job.pk).update(status=BulkSendStatus.RUNNING, updated_at=stale)
+        with patch.object(bulk_send, "_spawn") as mock_spawn:
+            assert bulk_send.resume_stalled() == 1
+            assert bulk_send.resume_stalled() == 0
+        mock_spawn.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        assert job.status == BulkSendStatus.QUEUED
+
+    def test_job_never_started_is_resumed(self, job, smtp):
+        # Queued, but the worker died before the on-commit thread claimed it
+        BulkSend.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        with patch.object(bulk_send, "_spawn") as mock_spawn:
+            assert bulk_send.resume_stalled() == 1
+        mock_spawn.assert_called_once_with(job.pk)
+        assert bulk_send.run(job.pk) is True
+        assert smtp.call_count == 3
+
+    def test_active_job_is_not_resumed(self, job):
+        BulkSend.objects.filter(pk=job.pk).update(status=BulkSendStatus.RUNNING)
+        with patch.object(bulk_send, "_spawn") as mock_spawn:
+            assert bulk_send.resume_stalled() == 0
+        mock_spawn.assert_not_called()
@@ -0,0 +1,253 @@
+"""Tests for the per-user change log (penguin_mail.services.changelog) and GET /changes."""
+
+import base64
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from factories import (
+    AccountFactory,
+    ContactFactory,
+    ContactGroupFactory,
+    CustomFolderFactory,
+    EmailFactory,
+    LabelFactory,
+)
+from penguin_mail.models import ChangeLogEntry, Email, SendStatus, User
+from penguin_mail.services import changelog, dispatcher
+
+
+def logged(user, since=0):
+    """The user's entries after ``since`` as (kind, object id, op) tuples, oldest first."""
+    return [
+        (kind, str(object_id), op)
+        for kind, object_id, op in ChangeLogEntry.objects.filter(user=user, id__gt=since)
+        .order_by("id")
+        .values_list("kind", "object_id", "op")
+    ]
+
+
+def position():
+    return ChangeLogEntry.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+class TestRecording:
+    def test_email_lifecycle(self, account, user):
+        email = EmailFactory(account=account)
+        email.save()
+        uuid = str(email.uuid)
+        Email.objects.get(pk=email.pk).delete()
+        assert logged(user) == [("email", uuid, "created"), ("email", uuid, "updated"), ("email", uuid, "deleted")]
+        assert str(ChangeLogEntry.objects.last()) == f"email {uuid} deleted"
+
+    def test_label_links_from_both_sides(self, account, user):
+        email, label = EmailFactory(account=account), LabelFactory(user=user)
+        other = EmailFactory(account=account)
+        start = position()
+        email.labels.add(label)
+        label.emails.add(other)
+        label.emails.remove(other)
+        label.emails.clear()
+        email.labels.clear()
+        ids = [str(email.uuid), str(other.uuid), str(other.uuid), str(email.uuid), str(email.uuid)]
+        assert logged(user, start) == [("email", i, "updated") for i in ids]
+
+    def test_deleting_a_label_updates_its_emails(self, account, user):
+        email, label = EmailFactory(account=account), LabelFactory(user=user)
+        email.labels.add(label)
+        start = position()
+        label.delete()
+        assert logged(user, start) == [("email", str(email.uuid), "updated"), ("label", str(label.uuid), "deleted")]
+
+    def test_folders_and_contacts(self, user):
+        folder = CustomFolderFactory(user=user)
+        folder.name = "Renamed"
+        folder.save()
+        contact = ContactFactory(user=user)
+        assert logged(user) == [
+            ("folder", str(folder.uuid), "created"),
+            ("folder", str(folder.uuid), "updated"),
+            ("contact", str(contact.uuid), "created"),
+        ]
+
+    def test_group_membership_updates_contacts(self, user):
+        a, b = ContactFactory(user=user), ContactFactory(user=user)
+        group = ContactGroupFactory(user=user)
+        start = position()
+        group.contacts.add(a, b)
+        b.groups.remove(group)
+        group.contacts.clear()
+        group.contacts.add(b)
+        group.delete()
+        ids = [a.uuid, b.uuid, b.uuid, a.uuid, b.uuid, b.uuid]
+        assert logged(user, start) == [("contact", str(i), "updated") for i in ids]
+
+    def test_account_deletion_logs_its_emails(self, account, user):
+        emails = [EmailFactory(account=account) for _ in range(2)]
+        start = position()
+        account.delete()
+        assert sorted(logged(user, start)) == sorted(("email", str(e.uuid), "deleted") for e in emails)
+
+    @pytest.mark.parametrize("via_queryset", [False, True])
+    def test_user_deletion_leaves_nothing_behind(self, account, user, via_queryset):
+        label = LabelFactory(user=user)
+        EmailFactory(account=account).labels.add(label)
+        ContactGroupFactory(user=user).contacts.add(ContactFactory(user=user))
+        CustomFolderFactory(user=user)
+        if via_queryset:
+            User.objects.filter(pk=user.pk).delete()
+        else:
+            user.delete()
+        assert not ChangeLogEntry.objects.exists()
+
+    def test_bulk_update_is_logged(self, authed_client, account, user):
+        emails = [EmailFactory(account=account) for _ in range(2)]
+        start = position()
+        authed_client.post("/api/v1/emails/bulk", data={"ids": [str(e.uuid) for e in emails], "operation": "star"})
+        assert logged(user, start) == [("email", str(e.uuid), "updated") for e in emails]
+
+    def test_send_claim_is_logged(self, account, user):
+        email = EmailFactory(
+            account=account,
+            folder="scheduled",
+            send_status=SendStatus.SCHEDULED,
+            scheduled_send_at=timezone.now() - timedelta(minutes=1),
+        )
+        start = position()
+        dispatcher.claim([email.pk])
+        assert logged(user, start) == [("email", str(email.uuid), "updated")]
+
+    def test_fixture_loading_is_ignored(self, account, user):
+        changelog.email_saved(EmailFactory.build(account=account), created=True, raw=True)
+        label = LabelFactory.build(user=user)
+        changelog._user_model_saved(type(label), label, created=True, raw=True)
+        assert logged(user) == []
+
+
+class TestCompact:
+    def test_drops_expired_and_superseded(self, account, user):
+        kept = EmailFactory(account=account)
+        kept.save()
+        old = LabelFactory(user=user)
+        ChangeLogEntry.objects.filter(object_id=old.uuid).update(created_at=timezone.now() - timedelta(days=31))
+        assert changelog.compact() == 2
+        assert logged(user) == [("email", str(kept.uuid), "updated")]
+
+    def test_superseded_in_log_order(self, user):
+        object_id = uuid.uuid4()
+        later = ChangeLogEntry.objects.create(txid=2, user=user, kind="label", object_id=object_id, op="deleted")
+        ChangeLogEntry.objects.create(txid=1, user=user, kind="label", object_id=object_id, op="updated")
+        assert changelog.compact() == 1
+        assert list(ChangeLogEntry.objects.values_list("pk", flat=True)) == [later.pk]
+
+    def test_other_users_entries_are_separate(self, account, second_account):
+        email = EmailFactory(account=account)
+        ChangeLogEntry.objects.create(user=second_account.user, kind="email", object_id=email.uuid, op="updated")
+        assert changelog.compact() == 0
+
+    def test_command(self, account):
+        EmailFactory(account=account).save()
+        out = StringIO()
+        call_command("compact_changes", stdout=out)
+        assert out.getvalue().strip() == "Removed 1 change log entries"
+
+    def test_retention_setting(self, settings):
+        settings.CHANGE_LOG_RETENTION_DAYS = 7
+        assert changelog.retention() == timedelta(days=7)
+
+
+class TestChangesEndpoint:
+    def test_starts_at_the_current_position(self, authed_client, account):
+        EmailFactory(account=account)
+        start = authed_client.get("/api/v1/changes/").json()
+        assert start["changes"] == []
+        assert start["hasMore"] is False
+        assert authed_client.get(f"/api/v1/changes/?since={start['cursor']}").json()["changes"] == []
+
+    def test_empty_log(self, authed_client, user):
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        assert authed_client.get(f"/api/v1/changes/?since={cursor}").json()["changes"] == []
+
+    def test_returns_one_entry_per_object(self, authed_client, account, user):
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        email = EmailFactory(account=account)
+        label = LabelFactory(user=user)
+        email.save()
+        email.delete()
+        page = authed_client.get(f"/api/v1/changes/?since={cursor}").json()
+        assert page["changes"] == [
+            {"type": "label", "id": str(label.uuid), "op": "created"},
+            {"type": "email", "id": str(email.uuid), "op": "deleted"},
+        ]
+        assert authed_client.get(f"/api/v1/changes/?since={page['cursor']}").json()["changes"] == []
+
+    def test_pages(self, authed_client, user):
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        labels = [LabelFactory(user=user) for _ in range(3)]
+        first = authed_client.get(f"/api/v1/changes/?since={cursor}&limit=2").json()
+        assert [c["id"] for c in first["changes"]] == [str(label.uuid) for label in labels[:2]]
+        assert first["hasMore"] is True
+        rest = authed_client.get(f"/api/v1/changes/?since={first['cursor']}&limit=2").json()
+        assert [c["id"] for c in rest["changes"]] == [str(labels[2].uuid)]
+        assert rest["hasMore"] is False
+
+    def test_only_own_changes(self, authed_client, second_account):
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        EmailFactory(account=second_account)
+        LabelFactory(user=second_account.user)
+        assert authed_client.get(f"/api/v1/changes/?since={cursor}").json()["changes"] == []
+
+    @pytest.mark.parametrize("cursor", ["!!!", base64.urlsafe_b64encode(b"12").decode(), "MXxhYmM"])
+    def test_invalid_cursor(self, authed_client, user, cursor):
+        assert authed_client.get(f"/api/v1/changes/?since={cursor}").status_code == 400
+
+    def test_expired_cursor(self, authed_client, user):
+        issued = int((timezone.now() - timedelta(days=31)).timestamp())
+        cursor = base64.urlsafe_b64encode(f"0.0|{issued}".encode()).decode()
+        resp = authed_client.get(f"/api/v1/changes/?since={cursor}")
+        assert resp.status_code == 410
+
+    def test_requires_auth(self, api_client):
+        assert api_client.get("/api/v1/changes/").status_code == 401
+
+    def test_waits_for_transactions_still_running(self, authed_client, user):
+        # As on PostgreSQL: the transaction with txid 10 is still running when
+        # txids 9 and 11 have committed, and it took an id below theirs
+        horizon = [10]
+
+        def as_sqlite(_self, *_args, **_kwargs):
+            return str(horizon[0]), ()
+
+        def changes(cursor):
+            with patch.object(changelog.SnapshotHorizon, "as_sqlite", as_sqlite):
+                page = authed_client.get(f"/api/v1/changes/?since={cursor}").json()
+            return [c["id"] for c in page["changes"]], page["cursor"]
+
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        start = ChangeLogEntry.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        uuids = [uuid.uuid4() for _ in range(3)]
+        for offset, txid, object_id in [(2, 11, uuids[2]), (3, 9, uuids[0])]:
+            ChangeLogEntry.objects.create(
+                id=start + offset, txid=txid, user=user, kind="label", object_id=object_id, op="created"
+            )
+        seen, cursor = changes(cursor)
+        assert seen == [str(uuids[0])]
+
+        ChangeLogEntry.objects.create(id=start + 1, txid=10, user=user, kind="label", object_id=uuids[1], op="created")
+        horizon[0] = 12
+        seen, cursor = changes(cursor)
+        assert seen == [str(uuids[1]), str(uuids[2])]
+        assert changes(cursor)[0] == []
+
+    def test_deleted_account_user_sync(self, authed_client, user):
+        account = AccountFactory(user=user)
+        email = EmailFactory(account=account)
+        cursor = authed_client.get("/api/v1/changes/").json()["cursor"]
+        account.delete()
+        changes = authed_client.get(f"/api/v1/changes/?since={cursor}").json()["changes"]
+        assert changes == [{"type": "email", "id": str(email.uuid), "op": "deleted"}]
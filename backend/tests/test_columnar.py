@@ -0,0 +1,100 @@
+"""Contract tests: the columnar list serializer must match EmailOut exactly."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from factories import AttachmentFactory, EmailFactory, LabelFactory, RecipientFactory
+from penguin_mail.api.columnar import email_rows, serialize_emails, serialize_summaries, summary_rows
+from penguin_mail.api.schemas.email import EmailOut, EmailSummaryOut
+from penguin_mail.models import Email
+
+
+@pytest.fixture
+def mailbox(account, user):
+    """Emails covering every optional part of EmailOut."""
+    work, home = LabelFactory(user=user), LabelFactory(user=user)
+    full = EmailFactory(
+        account=account,
+        is_read=True,
+        is_starred=True,
+        has_attachment=True,
+        scheduled_send_at=datetime(2030, 1, 1, 9, tzinfo=UTC),
+        snooze_until=datetime(2030, 1, 2, 9, tzinfo=UTC),
+        snoozed_from_folder="inbox",
+        send_status="scheduled",
+    )
+    for kind, count in (("TO", 2), ("CC", 1), ("BCC", 1)):
+        for i in range(count):
+            RecipientFactory(email=full, kind=kind, order=i)
+    AttachmentFactory(email=full)
+    AttachmentFactory(email=full, file=None)
+    full.labels.add(home, work)
+    reply = EmailFactory(account=account, reply_to=full, forwarded_from=full, thread_id=None, is_draft=True)
+    reply.labels.add(work)
+    bare = EmailFactory(account=account, folder="sent")
+    return [full, reply, bare]
+
+
+def expected(snippets=None):
+    emails = Email.objects.select_related("account", "reply_to", "forwarded_from").prefetch_related(
+        "recipients", "attachments", "labels"
+    )
+    out = [EmailOut.from_model(e).model_dump() for e in emails]
+    for email, item in zip(emails, out, strict=True):
+        if snippets and email.pk in snippets:
+            item["snippet"] = snippets[email.pk]
+    return out
+
+
+class TestContract:
+    def test_matches_email_out(self, mailbox):
+        assert serialize_emails(list(email_rows(Email.objects.all()))) == expected()
+
+    def test_snippets(self, mailbox):
+        snippets = {mailbox[0].pk: "a <mark>b</mark>"}
+        assert serialize_emails(list(email_rows(Email.objects.all())), snippets) == expected(snippets)
+
+    def test_empty(self, db):
+        assert serialize_emails([]) == []
+
+    def test_list_items_match_detail_endpoint(self, authed_client, mailbox):
+        listed = authed_client.get("/api/v1/emails/").json()["data"]
+        assert [e["id"] for e in listed] == [str(e.uuid) for e in reversed(mailbox)]
+        for item in listed:
+            assert item == authed_client.get(f"/api/v1/emails/{item['id']}").json()
+
+
+class TestSummaryContract:
+    def test_rows_validate_against_email_summary_out(self, mailbox):
+        snippets = {mailbox[0].pk: "<mark>x</mark>"}
+        rows = serialize_summaries(list(summary_rows(Email.objects.all())), snippets)
+        for row in rows:
+            assert EmailSummaryOut.model_validate({**row, "from_": row["from"]}).model_dump() == row
+        assert [(r["attachmentCount"], len(r["labels"]), "snippet" in r) for r in rows] == [
+            (0, 0, False),
+            (0, 1, False),
+            (2, 2, True),
+        ]
+
+    def test_matches_full_view_fields(self, mailbox):
+        full = {e["id"]: e for e in serialize_emails(list(email_rows(Email.objects.all())))}
+        for row in serialize_summaries(list(summary_rows(Email.objects.all()))):
+            shared = {k: v for k, v in full[row["id"]].items() if k in row}
+            assert {k: row[k] for k in shared} == shared
+
+    def test_empty(self, db):
+        assert serialize_summaries([]) == []
+
+
+class TestQueries:
+    def test_query_count_is_flat(self, authed_client, mailbox, django_assert_num_queries):
+        # auth user, stale-sync account check, version lookup, count, emails, recipients, attachments, labels
+        with django_assert_num_queries(8):
+            authed_client.get("/api/v1/emails/")
+        for _ in range(5):
+            email = EmailFactory(account=mailbox[0].account)
+            RecipientFactory(email=email)
+            AttachmentFactory(email=email)
+        with django_assert_num_queries(8):
+            authed_client.get("/api/v1/emails/")
@@ -0,0 +1,154 @@
+"""Tests for materialized mailbox counters (penguin_mail.services.counters)."""
+
+from datetime import UTC, datetime
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+from django.db.models import QuerySet
+
+from factories import AccountFactory, EmailFactory, LabelFactory
+from penguin_mail.models import Email, MailboxCounter, SendStatus
+from penguin_mail.services import counters
+
+
+def stored(account):
+    """Counter rows for ``account`` as {folder or label name: (total, unread)}."""
+    return {
+        (c.label.name if c.label else c.folder): (c.total, c.unread)
+        for c in MailboxCounter.objects.filter(account=account).select_related("label")
+        if c.total or c.unread
+    }
+
+
+def actual(account):
+    """What the counters should hold, recomputed from the email table."""
+    counters.recompute(account)
+    return stored(account)
+
+
+class TestRecordNew:
+    def test_counts_folder_and_labels(self, account):
+        label = LabelFactory(user=account.user, name="Work")
+        read = EmailFactory(account=account, folder="inbox", is_read=True)
+        unread = EmailFactory(account=account, folder="inbox", is_read=False)
+        unread.labels.add(label)
+        counters.record_new([read.pk, unread.pk])
+        assert stored(account) == {"inbox": (2, 1), "Work": (1, 1)}
+
+    def test_accumulates_into_existing_rows(self, account):
+        counters.record_new([EmailFactory(account=account, folder="inbox").pk])
+        counters.record_new([EmailFactory(account=account, folder="inbox").pk])
+        assert MailboxCounter.objects.filter(account=account).count() == 1
+        assert stored(account) == {"inbox": (2, 2)}
+
+    def test_concurrent_row_creation(self, account):
+        # Another transaction inserts the row between our UPDATE (0 rows) and INSERT
+        email = EmailFactory(account=account, folder="inbox")
+        MailboxCounter.objects.create(account=account, folder="inbox", total=4, unread=0)
+        update = QuerySet.update
+        calls = []
+
+        def miss_first(qs, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(qs, **kwargs)
+
+        with patch.object(QuerySet, "update", miss_first):
+            counters.record_new([email.pk])
+        assert len(calls) == 2
+        assert stored(account) == {"inbox": (5, 1)}
+
+
+class TestTracking:
+    @pytest.fixture
+    def inbox(self, account):
+        emails = [EmailFactory(account=account, folder="inbox", is_read=False) for _ in range(3)]
+        counters.record_new(e.pk for e in emails)
+        return emails
+
+    def test_move_and_mark_read(self, account, inbox):
+        with counters.tracking([inbox[0].pk, inbox[1].pk]):
+            Email.objects.filter(pk=inbox[0].pk).update(folder="archive")
+            Email.objects.filter(pk=inbox[1].pk).update(is_read=True)
+        assert stored(account) == {"inbox": (2, 1), "archive": (1, 1)}
+        assert stored(account) == actual(account)
+
+    def test_label_changes(self, account, inbox):
+        label = LabelFactory(user=account.user, name="Work")
+        with counters.tracking(Email.objects.filter(account=account)):
+            for e in inbox:
+                e.labels.add(label)
+        with counters.tracking([inbox[0].pk]):
+            inbox[0].labels.remove(label)
+        assert stored(account)["Work"] == (2, 2)
+        assert stored(account) == actual(account)
+
+    def test_delete(self, account, inbox):
+        with counters.tracking([inbox[0].pk]):
+            inbox[0].delete()
+        assert stored(account) == {"inbox": (2, 2)}
+
+    def test_unrelated_change_writes_nothing(self, account, inbox, django_assert_num_queries):
+        # savepoint, lock, 2 tallies, the update itself, 2 tallies, version bump, release: no counter writes
+        with django_assert_num_queries(9), counters.tracking([inbox[0].pk]):
+            Email.objects.filter(pk=inbox[0].pk).update(is_starred=True)
+
+    def test_rolled_back_with_the_write(self, account, inbox):
+        with pytest.raises(RuntimeError), counters.tracking([inbox[0].pk]):
+            Email.objects.filter(pk=inbox[0].pk).update(folder="trash")
+            raise RuntimeError
+        assert stored(account) == {"inbox": (3, 3)}
+
+
+class TestWritePaths:
+    def test_sync_counts_new_messages(self, account):
+        message = {
+            "imap_uid": 7,
+            "subject": "Hi",
+            "body": "<p>Hello</p>",
+            "sender_name": "A",
+            "sender_email": "a@example.com",
+            "date": datetime(2025, 1, 1, tzinfo=UTC),
+            "is_read": False,
+        }
+        with patch("penguin_mail.services.imap.fetch_emails", return_value=[message]):
+            from penguin_mail.services.sync import sync_account_folder
+
+            assert sync_account_folder(account, "INBOX", "inbox") == 1
+        assert stored(account) == {"inbox": (1, 1)}
+
+    def test_scheduled_send_moves_counter(self, account):
+        email = EmailFactory(account=account, folder="scheduled", is_read=True, send_status=SendStatus.OUTBOX)
+        counters.record_new([email.pk])
+        with patch("penguin_mail.services.smtp.send_email", return_value=MagicMock(message_id="<m@x>")):
+            from penguin_mail.services.outbox import deliver
+
+            assert deliver(email.pk)
+        assert stored(account) == {"sent": (1, 0)}
+
+
+class TestRecompute:
+    def test_repairs_drift(self, account):
+        EmailFactory(account=account, folder="inbox")
+        MailboxCounter.objects.create(account=account, folder="inbox", total=99, unread=42)
+        MailboxCounter.objects.create(account=account, folder="spam", total=3, unread=3)
+        assert counters.recompute(account) == 1
+        assert stored(account) == {"inbox": (1, 1)}
+
+    def test_command_all_accounts(self, account):
+        other = AccountFactory()
+        EmailFactory(account=account, folder="inbox")
+        EmailFactory(account=other, folder="sent", is_read=True)
+        out = StringIO()
+        call_command("repair_counters", stdout=out)
+        assert out.getvalue().strip() == "Rebuilt 2 counters for 2 accounts"
+        assert stored(other) == {"sent": (1, 0)}
+
+    def test_command_single_account(self, account):
+        other = AccountFactory()
+        EmailFactory(account=other, folder="inbox")
+        out = StringIO()
+        call_command("repair_counters", account=str(account.uuid), stdout=out)
+        assert out.getvalue().strip() == "Rebuilt 0 counters for 1 accounts"
+        assert stored(other) == {}
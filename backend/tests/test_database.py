@@ -0,0 +1,144 @@
+"""Tests for database configuration, the Postgres-only indexes and the import_sqlite command."""
+
+import importlib
+import sqlite3
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.utils import load_backend
+
+from factories import ContactFactory, EmailFactory, LabelFactory
+from penguin_mail import settings as settings_module
+from penguin_mail.models import Contact, Email, EmailBody, User
+
+migration = importlib.import_module("penguin_mail.migrations.0017_partial_and_trigram_indexes")
+
+
+@pytest.fixture
+def load_settings(monkeypatch):
+    """Re-execute the settings module under the given environment; returns its DATABASES entry."""
+
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(settings_module).DATABASES["default"]
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(settings_module)
+
+
+class TestSettings:
+    def test_sqlite_by_default(self, load_settings):
+        db = load_settings()
+        assert db["ENGINE"] == "django.db.backends.sqlite3"
+        assert db["NAME"].endswith("db.sqlite3")
+        assert (db["CONN_MAX_AGE"], db["CONN_HEALTH_CHECKS"]) == (60, True)
+
+    def test_postgres(self, load_settings):
+        db = load_settings(DB_ENGINE="postgresql", DB_HOST="db", DB_CONN_MAX_AGE="300")
+        assert (db["ENGINE"], db["NAME"], db["HOST"]) == ("django.db.backends.postgresql", "penguin_mail", "db")
+        assert db["CONN_MAX_AGE"] == 300
+        assert "pool" not in db["OPTIONS"]
+
+    def test_postgres_pool_replaces_persistent_connections(self, load_settings):
+        db = load_settings(DB_ENGINE="postgresql", DB_POOL_MAX_SIZE="20")
+        assert db["CONN_MAX_AGE"] == 0
+        assert db["OPTIONS"]["pool"] == {"min_size": 2, "max_size": 20, "timeout": 10.0}
+
+    def test_sqlite_concurrent_profile(self, db, load_settings, tmp_path):
+        database = load_settings(DB_SQLITE_CONCURRENT="true", DB_SQLITE_BUSY_TIMEOUT="3", DB_NAME=str(tmp_path / "c"))
+        assert settings_module.SYNC_WRITE_QUEUE is True
+        assert (database["OPTIONS"]["timeout"], database["OPTIONS"]["transaction_mode"]) == (3.0, "IMMEDIATE")
+        wrapper = load_backend(database["ENGINE"]).DatabaseWrapper({**connection.settings_dict, **database}, "profile")
+        with wrapper.cursor() as cursor:
+            pragmas = [cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "synchronous")]
+        wrapper.close()
+        assert pragmas == ["wal", 1]  # 1 is NORMAL
+
+    def test_profile_is_sqlite_only(self, load_settings):
+        db = load_settings(DB_ENGINE="postgresql", DB_SQLITE_CONCURRENT="true")
+        assert "init_command" not in db["OPTIONS"]
+        assert settings_module.SYNC_WRITE_QUEUE is False
+
+    def test_read_replicas(self, load_settings):
+        db = load_settings(DB_ENGINE="postgresql", DB_HOST="primary", DB_REPLICA_HOSTS="r1,r2")
+        assert settings_module.DATABASE_REPLICAS == ["replica_0", "replica_1"]
+        replica = settings_module.DATABASES["replica_1"]
+        assert replica == {**db, "HOST": "r2", "TEST": {"MIRROR": "default"}}
+
+    def test_read_replicas_are_postgres_only(self, load_settings):
+        load_settings(DB_REPLICA_HOSTS="r1")
+        assert settings_module.DATABASE_REPLICAS == []
+        assert list(settings_module.DATABASES) == ["default"]
+
+    def test_unknown_engine(self, load_settings):
+        with pytest.raises(ValueError):
+            load_settings(DB_ENGINE="mysql")
+
+
+class TestTrigramIndex:
+    @pytest.mark.parametrize(
+        ("vendor", "install", "uninstall"),
+        [("postgresql", migration.POSTGRES_INSTALL, migration.POSTGRES_UNINSTALL), ("sqlite", [], [])],
+    )
+    def test_vendor_statements(self, vendor, install, uninstall):
+        schema_editor = MagicMock()
+        schema_editor.connection.vendor = vendor
+        migration.install_trigram_index(apps, schema_editor)
+        migration.uninstall_trigram_index(apps, schema_editor)
+        assert [c.args[0] for c in schema_editor.execute.call_args_list] == install + uninstall
+
+
+def export(path):
+    """Write the test database to an SQLite file at ``path`` (its writes must be committed)."""
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    connection.connection.backup(target)
+    target.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportSqlite:
+    def test_copies_everything(self, user, account, tmp_path):
+        label = LabelFactory(user=user)
+        email = EmailFactory(account=account, body="<p>kept</p>")
+        email.labels.add(label)
+        ContactFactory(user=user)
+        export(tmp_path / "old.sqlite3")
+        created_at = Email.objects.get().created_at
+        User.objects.all().delete()
+
+        out = StringIO()
+        # SQLite has no sequences to move on; stand in a statement for the Postgres setval() calls
+        with patch.object(connection.ops, "sequence_reset_sql", return_value=["SELECT 1"]) as mock_reset:
+            call_command("import_sqlite", str(tmp_path / "old.sqlite3"), "--batch-size", "1", stdout=out)
+        assert Email in mock_reset.call_args.args[1]
+
+        copied = Email.objects.get()
+        assert (copied.pk, copied.uuid, copied.created_at) == (email.pk, email.uuid, created_at)
+        assert copied.body == "<p>kept</p>"
+        assert list(copied.labels.all()) == [label]
+        assert Contact.objects.count() == 1
+        assert "penguin_mail.EmailBody: 1" in out.getvalue()
+        assert EmailBody.objects.count() == 1
+
+    def test_target_must_be_empty(self, user, tmp_path):
+        export(tmp_path / "old.sqlite3")
+        with pytest.raises(CommandError, match="already holds data"):
+            call_command("import_sqlite", str(tmp_path / "old.sqlite3"))
+
+    def test_migrations_must_match(self, tmp_path):
+        export(tmp_path / "old.sqlite3")
+        with sqlite3.connect(tmp_path / "old.sqlite3") as old:
+            old.execute("DELETE FROM django_migrations WHERE name = '0017_partial_and_trigram_indexes'")
+        with pytest.raises(CommandError, match="same migration"):
+            call_command("import_sqlite", str(tmp_path / "old.sqlite3"))
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(CommandError, match="does not exist"):
+            call_command("import_sqlite", str(tmp_path / "nope.sqlite3"))
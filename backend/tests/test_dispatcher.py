@@ -0,0 +1,210 @@
+"""Tests for the scheduled-send dispatcher (penguin_mail.services.dispatcher)."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from factories import AccountFactory, EmailFactory, RecipientFactory
+from penguin_mail.models import Email, SendStatus
+from penguin_mail.services import dispatcher
+from penguin_mail.services.dispatcher import Dispatcher, claim, dispatch_due, send_batch
+
+SENT = MagicMock(message_id="<sent@example.com>")
+
+
+def _scheduled(account, minutes=-1, **kwargs):
+    e = EmailFactory(
+        account=account,
+        folder="scheduled",
+        send_status=SendStatus.SCHEDULED,
+        scheduled_send_at=timezone.now() + timedelta(minutes=minutes),
+        **kwargs,
+    )
+    RecipientFactory(email=e, kind="TO")
+    return e
+
+
+@pytest.fixture
+def mock_session():
+    session = MagicMock()
+    with patch("penguin_mail.services.smtp.smtp_session") as mock_ctx:
+        mock_ctx.return_value.__enter__.return_value = session
+        yield mock_ctx
+
+
+class TestClaim:
+    def test_claims_only_due_rows(self, account):
+        due = _scheduled(account)
+        later = _scheduled(account, minutes=30)
+        assert claim([due.pk, later.pk]) == [due.pk]
+        due.refresh_from_db()
+        assert due.send_status == SendStatus.SENDING
+        assert due.send_claim is not None
+
+    def test_second_claim_gets_nothing(self, account):
+        due = _scheduled(account)
+        assert claim([due.pk]) == [due.pk]
+        assert claim([due.pk]) == []
+
+    def test_cancelled_row_is_not_claimed(self, account):
+        e = _scheduled(account)
+        Email.objects.filter(pk=e.pk).update(folder="drafts")
+        assert claim([e.pk]) == []
+
+    def test_empty(self, db):
+        assert claim([]) == []
+
+    def test_due_retry_and_orphaned_outbox(self, account):
+        now = timezone.now()
+        retry = EmailFactory(account=account, send_status=SendStatus.OUTBOX, next_send_attempt_at=now)
+        orphan = EmailFactory(account=account, send_status=SendStatus.OUTBOX)
+        fresh = EmailFactory(account=account, send_status=SendStatus.OUTBOX)
+        Email.objects.filter(pk=orphan.pk).update(updated_at=now - timedelta(minutes=10))
+        assert sorted(claim([retry.pk, orphan.pk, fresh.pk], now)) == sorted([retry.pk, orphan.pk])
+
+    def test_abandoned_sending_row_is_reclaimed(self, account, settings):
+        settings.OUTBOX_SENDING_LEASE_SECONDS = 300
+        now = timezone.now()
+        abandoned = EmailFactory(account=account, send_status=SendStatus.SENDING)
+        in_flight = EmailFactory(account=account, send_status=SendStatus.SENDING)
+        Email.objects.filter(pk=abandoned.pk).update(updated_at=now - timedelta(minutes=6))
+        Email.objects.filter(pk=in_flight.pk).update(updated_at=now - timedelta(minutes=4))
+        assert claim([abandoned.pk, in_flight.pk], now) == [abandoned.pk]
+
+
+class TestSendBatch:
+    def test_one_session_per_account(self, account, mock_session):
+        other = AccountFactory()
+        emails = [_scheduled(account), _scheduled(account), _scheduled(other)]
+        pks = claim([e.pk for e in emails])
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT) as mock_send:
+            assert send_batch(pks) == 3
+        assert mock_session.call_count == 2
+        assert mock_send.call_count == 3
+        for e in emails:
+            e.refresh_from_db()
+            assert e.send_status == SendStatus.SENT
+            assert e.folder == "sent"
+
+    def test_session_failure_backs_off_all(self, account, django_capture_on_commit_callbacks):
+        emails = [_scheduled(account), _scheduled(account)]
+        pks = claim([e.pk for e in emails])
+        with (
+            patch("penguin_mail.services.smtp.smtp_session", side_effect=OSError("connection refused")),
+            django_capture_on_commit_callbacks(),
+        ):
+            assert send_batch(pks) == 0
+        for e in emails:
+            e.refresh_from_db()
+            assert e.send_status == SendStatus.OUTBOX
+            assert e.send_attempts == 1
+            assert e.next_send_attempt_at is not None
+
+    def test_threaded_for_multiple_accounts(self, account):
+        other = AccountFactory()
+        pks = claim([_scheduled(account).pk, _scheduled(other).pk])
+        with patch.object(dispatcher, "ThreadPoolExecutor") as mock_pool:
+            mock_pool.return_value.__enter__.return_value.map.return_value = [1, 1]
+            assert send_batch(pks, max_workers=4) == 2
+        mock_pool.assert_called_once()
+
+    def test_thread_wrapper_closes_connection(self):
+        with (
+            patch.object(dispatcher, "_send_account_group", return_value=3),
+            patch.object(dispatcher, "connection") as mock_conn,
+        ):
+            assert dispatcher._send_account_group_in_thread([]) == 3
+        mock_conn.close.assert_called_once()
+
+
+class TestDispatchDue:
+    def test_sends_due_batch(self, account, mock_session, settings):
+        settings.DISPATCHER_WORKERS = 1
+        for _ in range(3):
+            _scheduled(account)
+        _scheduled(account, minutes=30)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT):
+            assert dispatch_due(batch_size=2) == (2, 2)
+            assert dispatch_due(batch_size=2) == (1, 1)
+            assert dispatch_due(batch_size=2) == (0, 0)
+        assert Email.objects.filter(folder="scheduled").count() == 1
+
+    def test_command_once(self, account, mock_session, settings):
+        settings.DISPATCHER_WORKERS = 1
+        for _ in range(3):
+            _scheduled(account)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT):
+            call_command("run_dispatcher", "--once", "--batch-size", "2")
+        assert Email.objects.filter(send_status=SendStatus.SENT).count() == 3
+
+    def test_command_loop(self, db):
+        with patch("penguin_mail.management.commands.run_dispatcher.Dispatcher") as mock_cls:
+            mock_cls.return_value.run_forever.side_effect = KeyboardInterrupt
+            call_command("run_dispatcher")
+        mock_cls.return_value.stop_event.set.assert_called_once()
+
+
+class TestDispatcher:
+    def test_refill_orders_heap_by_due_time(self, account):
+        late = _scheduled(account, minutes=-1)
+        early = _scheduled(account, minutes=-5)
+        _scheduled(account, minutes=30)  # outside lookahead
+        d = Dispatcher(batch_size=10, lookahead_seconds=60)
+        assert d.refill(timezone.now()) == 2
+        assert d.refill(timezone.now()) == 0  # already queued
+        assert d.pop_due(timezone.now()) == [early.pk, late.pk]
+
+    def test_pop_due_respects_batch_size_and_due_time(self, account):
+        for _ in range(3):
+            _scheduled(account)
+        upcoming = _scheduled(account, minutes=0.5)
+        d = Dispatcher(batch_size=2, lookahead_seconds=60)
+        now = timezone.now()
+        d.refill(now)
+        assert len(d.pop_due(now)) == 2
+        assert len(d.pop_due(now)) == 1
+        assert d.pop_due(now) == []
+        assert 0 < d.seconds_until_next(now) <= 30
+        assert d.pop_due(now + timedelta(minutes=1)) == [upcoming.pk]
+
+    def test_seconds_until_next_without_heap(self, db):
+        d = Dispatcher(refill_seconds=15)
+        now = timezone.now()
+        d.refill(now)
+        assert d.seconds_until_next(now) == 15
+
+    def test_tick_sends(self, account, mock_session, settings):
+        settings.DISPATCHER_WORKERS = 1
+        e = _scheduled(account)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT):
+            assert Dispatcher().tick() == 1
+            assert Dispatcher().tick() == 0
+        e.refresh_from_db()
+        assert e.send_status == SendStatus.SENT
+
+    def test_tick_skips_rows_sent_elsewhere(self, account):
+        e = _scheduled(account)
+        d = Dispatcher()
+        d.refill(timezone.now())
+        Email.objects.filter(pk=e.pk).update(send_status=SendStatus.SENT)
+        assert d.tick() == 0
+
+    def test_run_forever_stops_and_survives_errors(self, db):
+        d = Dispatcher()
+        calls = []
+
+        def fake_tick():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("db gone")
+            if len(calls) == 2:
+                return 5
+            d.stop_event.set()
+            return 0
+
+        with patch.object(d, "tick", side_effect=fake_tick):
+            d.run_forever(max_sleep=0)
+        assert len(calls) == 3
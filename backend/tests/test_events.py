@@ -0,0 +1,262 @@
+"""Tests for the event stream (GET /events) and its change log broker (penguin_mail.services.events)."""
+
+import asyncio
+import contextlib
+import json
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+
+from factories import EmailFactory, LabelFactory
+from penguin_mail.api import auth
+from penguin_mail.api.auth import user_for_stream_ticket
+from penguin_mail.api.routers import events as events_router
+from penguin_mail.api.routers.changes import encode_cursor
+from penguin_mail.models import ChangeLogEntry
+from penguin_mail.services import changelog, events
+from penguin_mail.services.events import broker
+
+URL = "/api/v1/events/"
+
+
+@pytest.fixture(autouse=True)
+def _fast_polls(settings):
+    settings.EVENTS_POLL_SECONDS = 0.02
+
+
+def parse(chunk):
+    """(event, data, id) for each event in a chunk of the stream."""
+    out = []
+    for block in chunk.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if "event" in fields:
+            out.append((fields["event"], json.loads(fields["data"]), fields.get("id")))
+    return out
+
+
+def get(path, **meta):
+    # AsyncClient takes headers by name, not as WSGI environ keys
+    headers = {key.removeprefix("HTTP_").replace("_", "-"): value for key, value in meta.items()}
+    return AsyncClient().get(path, headers=headers)
+
+
+def stream(scenario, headers, path=URL, **extra):
+    """Run ``scenario(read)`` against an open stream; ``read`` returns the events of the next chunk."""
+
+    async def run():
+        response = await get(path, **headers, **extra)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            async for chunk in response.streaming_content:
+                await chunks.put(chunk)
+            await chunks.put(None)
+
+        async def read(timeout=5.0):
+            chunk = await asyncio.wait_for(chunks.get(), timeout)
+            return None if chunk is None else parse(chunk)
+
+        # Cancelling the consumer is how the ASGI handler ends a stream when the client goes away
+        consumer = asyncio.ensure_future(pump())
+        try:
+            assert await asyncio.wait_for(chunks.get(), 5) == b"retry: 3000\n\n"
+            await scenario(read)
+        finally:
+            consumer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await consumer
+        assert not broker._streams
+
+    async_to_sync(run)()
+
+
+class TestStream:
+    def test_new_mail_flags_and_counts(self, account, auth_headers):
+        async def scenario(read):
+            email = await sync_to_async(EmailFactory)(account=account, folder="inbox", subject="Hello", is_read=False)
+            events = await read()
+            assert [name for name, _, _ in events] == ["change", "new-mail", "counts"]
+            assert events[0][1] == {"type": "email", "id": str(email.uuid), "op": "created"}
+            assert events[0][2] is not None
+            assert events[1][1]["subject"] == "Hello"
+            assert set(events[2][1]) == {"accounts", "folders", "labels"}
+
+            email.is_starred = True
+            await sync_to_async(email.save)()
+            name, flags, _ = (await read())[1]
+            assert name == "flags"
+            assert flags == {"id": str(email.uuid), "isRead": False, "isStarred": True, "folder": "inbox", "labels": []}
+
+            await sync_to_async(email.delete)()
+            assert [(name, data.get("op")) for name, data, _ in await read()] == [
+                ("change", "deleted"),
+                ("counts", None),
+            ]
+
+        stream(scenario, auth_headers)
+
+    def test_outgoing_mail_is_not_new(self, account, auth_headers):
+        async def scenario(read):
+            await sync_to_async(EmailFactory)(account=account, folder="drafts")
+            assert [name for name, _, _ in await read()] == ["change", "counts"]
+
+        stream(scenario, auth_headers)
+
+    def test_only_own_changes(self, account, second_account, user, auth_headers):
+        async def scenario(read):
+            await sync_to_async(EmailFactory)(account=second_account)
+            label = await sync_to_async(LabelFactory)(user=user)
+            assert [(name, data) for name, data, _ in await read()] == [
+                ("change", {"type": "label", "id": str(label.uuid), "op": "created"})
+            ]
+
+        stream(scenario, auth_headers)
+
+    def test_resumes_after_last_event_id(self, user, auth_headers):
+        start = changelog.newest(ChangeLogEntry.objects.all())
+        labels = [LabelFactory(user=user) for _ in range(2)]
+
+        async def scenario(read):
+            assert [data["id"] for _, data, _ in await read()] == [str(label.uuid) for label in labels]
+
+        stream(scenario, auth_headers, HTTP_LAST_EVENT_ID=encode_cursor(start))
+
+    def test_replays_a_long_backlog_in_pages(self, user, auth_headers, monkeypatch):
+        monkeypatch.setattr(events_router, "MAX_CHANGES", 2)
+        labels = [LabelFactory(user=user) for _ in range(3)]
+
+        async def scenario(read):
+            first, rest = await read(), await read()
+            assert [data["id"] for _, data, _ in first + rest] == [str(label.uuid) for label in labels]
+
+        stream(scenario, auth_headers, path=f"{URL}?since={encode_cursor((0, 0))}")
+
+    def test_ticket_in_query(self, user, authed_client):
+        resp = authed_client.post(f"{URL}ticket")
+        assert resp.json()["expires_in"] == 60
+        ticket = resp.json()["ticket"]
+
+        async def scenario(read):
+            await sync_to_async(LabelFactory)(user=user)
+            assert (await read())[0][0] == "change"
+
+        stream(scenario, {}, path=f"{URL}?ticket={ticket}")
+
+    def test_keepalive(self, user, auth_headers, settings):
+        settings.EVENTS_KEEPALIVE_SECONDS = 0.01
+
+        async def scenario(read):
+            assert await read() == []
+
+        stream(scenario, auth_headers)
+
+    def test_stalled_stream_is_dropped(self, user, auth_headers, monkeypatch):
+        monkeypatch.setattr(broker, "queue_size", 1)
+
+        async def scenario(read):
+            (queue,) = broker._streams[user.pk]
+            broker._deliver(user.pk, queue, [])
+            broker._deliver(user.pk, queue, [])
+            assert await read() is None
+
+        stream(scenario, auth_headers)
+
+
+class TestRejections:
+    def test_requires_auth(self, user):
+        async def run():
+            return await get(URL)
+
+        assert async_to_sync(run)().status_code == 401
+
+    def test_ticket_is_single_use(self, user, authed_client):
+        ticket = authed_client.post(f"{URL}ticket").json()["ticket"]
+        assert user_for_stream_ticket(ticket) == user
+        assert user_for_stream_ticket(ticket) is None
+
+    def test_access_token_is_not_a_ticket(self, user, auth_headers):
+        token = auth_headers["HTTP_AUTHORIZATION"].removeprefix("Bearer ")
+
+        async def run():
+            return await get(f"{URL}?ticket={token}")
+
+        assert async_to_sync(run)().status_code == 401
+        assert user_for_stream_ticket(token) is None
+
+    def test_expired_or_orphaned_ticket(self, user):
+        with patch.object(auth, "STREAM_TICKET_LIFETIME", timedelta(seconds=-1)):
+            expired, _ = auth.create_stream_ticket(user)
+        orphaned, _ = auth.create_stream_ticket(user)
+        user.delete()
+        assert user_for_stream_ticket(expired) is None
+        assert user_for_stream_ticket(orphaned) is None
+
+    def test_ticket_needs_an_access_token(self, user, api_client, authed_client):
+        ticket = authed_client.post(f"{URL}ticket").json()["ticket"]
+        assert api_client.post(f"{URL}ticket", HTTP_AUTHORIZATION=f"Bearer {ticket}").status_code == 401
+
+    def test_bad_cursor(self, user, auth_headers):
+        async def run():
+            return await get(URL, HTTP_LAST_EVENT_ID="!!!", **auth_headers)
+
+        assert async_to_sync(run)().status_code == 400
+
+    def test_needs_asgi(self, authed_client):
+        assert authed_client.get(URL).status_code == 501
+
+
+class TestBroker:
+    def test_catches_up_in_batches(self, user, monkeypatch):
+        monkeypatch.setattr(events, "FETCH_SIZE", 1)
+        other = events.Broker()
+
+        async def run():
+            queue = await other.subscribe(user.pk)
+            await sync_to_async(LabelFactory)(user=user)
+            await sync_to_async(LabelFactory)(user=user)
+            await other.poll()
+            batches = [queue.get_nowait(), queue.get_nowait()]
+            other.unsubscribe(user.pk, queue)
+            return batches
+
+        assert [len(batch) for batch in async_to_sync(run)()] == [1, 1]
+
+    def test_notify_wakes_from_other_threads(self, user, settings):
+        settings.EVENTS_POLL_SECONDS = 60
+        other = events.Broker()
+
+        async def run():
+            queue = await other.subscribe(user.pk)
+            await sync_to_async(LabelFactory)(user=user)
+            thread = threading.Thread(target=other.notify)
+            thread.start()
+            thread.join()
+            batch = await asyncio.wait_for(queue.get(), 5)
+            other.unsubscribe(user.pk, queue)
+            return batch
+
+        assert [entry[1] for entry in async_to_sync(run)()] == ["label"]
+
+    def test_notify_without_a_loop_is_a_no_op(self):
+        events.Broker().notify()
+
+    def test_changes_notify_on_commit_while_streams_are_open(self, user, django_capture_on_commit_callbacks):
+        def write():
+            with django_capture_on_commit_callbacks() as callbacks:
+                LabelFactory(user=user)
+            return callbacks
+
+        async def run():
+            queue = await broker.subscribe(user.pk)
+            callbacks = await sync_to_async(write)()
+            broker.unsubscribe(user.pk, queue)
+            return callbacks
+
+        assert broker.notify in async_to_sync(run)()
+        assert write() == []
@@ -0,0 +1,74 @@
+"""Tests for HTML-to-text extraction (penguin_mail.html_text)."""
+
+from html.parser import HTMLParser
+from unittest.mock import patch
+
+from penguin_mail import html_text
+from penguin_mail.html_text import html_preview, html_to_text
+
+
+class TestHtmlPreview:
+    def test_collapses_whitespace_across_blocks(self):
+        assert html_preview("<p>Hello</p>\n<p>  big   <b>world</b></p>") == "Hello big world"
+
+    def test_skips_script_style_title_and_comments(self):
+        html = "<title>T</title><style>p{}</style><!-- hidden --><script>x()</script>Body"
+        assert html_preview(html) == "Body"
+
+    def test_decodes_entities(self):
+        assert html_preview("Fish &amp; chips&nbsp;today") == "Fish & chips today"
+
+    def test_entity_encoded_tags_are_text(self):
+        assert html_preview("&lt;b&gt;hi&lt;/b&gt;") == "<b>hi</b>"
+        assert html_preview("a &#60;b&#x3e; c") == "a <b> c"
+
+    def test_removes_invisible_characters(self):
+        assert html_preview("a\u200bb\u00adc\ufeffd") == "abcd"
+        assert html_preview("a<b>\u200b</b>b") == "ab"
+
+    def test_junk_tag_is_treated_as_text(self):
+        assert html_preview("<scr\x00ipt>alert(1)</scr\x00ipt>") == "alert(1)"
+
+    def test_truncates_to_max_length(self):
+        assert html_preview("<p>" + "word " * 100 + "</p>", max_length=12) == "word word wo"
+
+    def test_data_uri_attributes_are_dropped(self):
+        html = '<img src="data:image/png;base64,' + "A" * 100_000 + '"><a href=data:text/plain,x>caption</a>'
+        with patch.object(html_text._TextExtractor, "feed", autospec=True, side_effect=HTMLParser.feed) as feed:
+            assert html_to_text(html) == "caption"
+        # The document reaches the parser unchanged, not copied through a pre-pass
+        assert feed.call_args.args[1] is html
+
+    def test_data_uri_in_text_is_kept(self):
+        assert html_preview("<p>x=data:text/plain,hi</p>") == "x=data:text/plain,hi"
+
+    def test_stops_once_preview_is_full(self):
+        html = "<p>" + "x" * 300 + "</p>" + "<p>more</p>" * 1000
+        extractor = html_text._TextExtractor
+        with patch.object(
+            extractor, "handle_starttag", autospec=True, side_effect=extractor.handle_starttag
+        ) as starttag:
+            assert html_preview(html) == "x" * 200
+        assert starttag.call_count == 1
+
+
+class TestHtmlToText:
+    def test_blocks_and_breaks_become_lines(self):
+        html = "<h1>Title</h1><p>First<br>second</p><ul><li>one</li><li>two</li></ul>"
+        assert html_to_text(html) == "Title\n\nFirst\nsecond\n\none\ntwo"
+
+    def test_self_closing_break(self):
+        assert html_to_text("a<br/>b<hr />c") == "a\nb\nc"
+
+    def test_inline_markup_keeps_words_together(self):
+        assert html_to_text("<p>Hello <b>big</b> <i>world</i></p>") == "Hello big world"
+
+    def test_not_truncated(self):
+        assert html_to_text("<p>" + "y" * 5000 + "</p>") == "y" * 5000
+
+    def test_unterminated_tag_at_end(self):
+        # Like the stdlib parser, an unterminated tag at end of input is kept as text
+        assert html_to_text("Hello <b") == "Hello <b"
+
+    def test_unclosed_skipped_element(self):
+        assert html_to_text("Visible</script><style>never closed") == "Visible"
@@ -0,0 +1,95 @@
+"""Tests for streaming MIME generation (penguin_mail.services.mime)."""
+
+import email
+from email import policy
+
+import pytest
+
+from factories import AttachmentFactory
+from penguin_mail.services import mime
+from penguin_mail.services.mime import OutboundMessage
+
+
+def _message(**kwargs):
+    defaults = {
+        "from_header": "Alice <alice@example.com>",
+        "to": ["bob@example.com"],
+        "cc": [],
+        "subject": "Hello",
+        "body_html": "<p>Hi</p>",
+        "body_text": "Hi",
+    }
+    defaults.update(kwargs)
+    return OutboundMessage(**defaults)
+
+
+def _parse(raw: bytes):
+    return email.message_from_bytes(raw, policy=policy.default)
+
+
+class TestOutboundMessage:
+    def test_alternative_without_attachments(self):
+        parsed = _parse(_message(cc=["carol@example.com"]).as_bytes())
+        assert parsed.get_content_type() == "multipart/alternative"
+        assert parsed["Cc"] == "carol@example.com"
+        assert parsed.get_body(("plain",)).get_content() == "Hi"
+        assert parsed.get_body(("html",)).get_content() == "<p>Hi</p>"
+
+    def test_non_ascii_subject_and_body(self):
+        parsed = _parse(_message(subject="Grüße", body_text="naïve café").as_bytes())
+        assert parsed["Subject"] == "Grüße"
+        assert parsed.get_body(("plain",)).get_content() == "naïve café"
+
+    def test_attachments_round_trip(self, db):
+        payload = bytes(range(256)) * 1000
+        att = AttachmentFactory(
+            email=None,
+            name="résumé.bin",
+            mime_type="",
+            file__data=payload,
+            file__filename="resume.bin",
+        )
+        parsed = _parse(_message(attachments=[att]).as_bytes())
+        assert parsed.get_content_type() == "multipart/mixed"
+        [part] = list(parsed.iter_attachments())
+        assert part.get_filename() == "résumé.bin"
+        assert part.get_content_type() == "application/octet-stream"
+        assert part.get_content() == payload
+
+    def test_renders_are_repeatable(self, db):
+        att = AttachmentFactory(email=None, file__data=b"x" * 1000)
+        msg = _message(attachments=[att])
+        assert msg.as_bytes() == msg.as_bytes()
+        assert msg.size() == len(msg.as_bytes())
+
+    def test_chunks_end_on_line_boundaries(self, db, monkeypatch):
+        monkeypatch.setattr(mime, "ATTACHMENT_READ_BYTES", 100)
+        att = AttachmentFactory(email=None, file__data=b"x" * 1000)
+        chunks = list(_message(attachments=[att]).iter_bytes())
+        assert len(chunks) > 10
+        assert all(chunk.endswith(b"\r\n") for chunk in chunks)
+        assert max(len(line) for line in b"".join(chunks).split(b"\r\n")) <= 998
+
+    def test_eight_bit_text_parts(self):
+        raw = _message(body_text="naïve\ncafé", eight_bit=True).as_bytes()
+        assert "naïve\r\ncafé\r\n".encode() in raw
+        parsed = _parse(raw)
+        assert parsed.get_body(("plain",))["Content-Transfer-Encoding"] == "8bit"
+        assert parsed.get_body(("plain",)).get_content().splitlines() == ["naïve", "café"]
+
+    def test_eight_bit_falls_back_to_base64_for_long_lines(self):
+        parsed = _parse(_message(body_html="x" * 2000, eight_bit=True).as_bytes())
+        assert parsed.get_body(("html",))["Content-Transfer-Encoding"] == "base64"
+        assert parsed.get_body(("html",)).get_content() == "x" * 2000
+
+    def test_utf8_headers(self):
+        raw = _message(to=["josé@exämple.com"], utf8=True).as_bytes()
+        assert "To: josé@exämple.com".encode() in raw
+
+
+class TestBase64Chunks:
+    @pytest.mark.parametrize("sizes", [[], [1], [57], [56, 2], [10, 200, 3]])
+    def test_matches_one_shot_encoding(self, sizes):
+        chunks = [bytes([i % 256]) * n for i, n in enumerate(sizes)]
+        streamed = b"".join(mime._base64_chunks(chunks))
+        assert streamed == mime._encode_lines(b"".join(chunks))
@@ -1,7 +1,11 @@
 """Tests for Django models — creation, string representation, constraints, cascades."""
 
+import importlib
+from unittest.mock import patch
+
 import pytest
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
 
 from factories import (
     AccountFactory,
@@ -22,12 +26,17 @@ from factories import (
 from penguin_mail.models import (
     Account,
     BlockedAddress,
+    BulkJob,
+    BulkSend,
     ContactGroup,
     CustomFolder,
     Email,
+    EmailBody,
     KeyboardShortcut,
     Label,
+    MailboxCounter,
     Recipient,
+    compress_body,
 )
 
 
@@ -97,6 +106,84 @@ class TestEmailModel:
         emails = list(Email.objects.filter(account=account))
         assert emails[0] == e2  # Most recent first
 
+    def test_size_backfill(self, body_column_apps, account):
+        backfill_sizes = importlib.import_module("penguin_mail.migrations.0012_email_size").backfill_sizes
+        old_email = body_column_apps.get_model("penguin_mail", "Email")
+        old_attachment = body_column_apps.get_model("penguin_mail", "Attachment")
+        plain = old_email.objects.create(account_id=account.pk, sender_email="a@example.com", body="<p>hi</p>")
+        attached = old_email.objects.create(account_id=account.pk, sender_email="a@example.com", body="abc")
+        for size in (100, 20):
+            old_attachment.objects.create(email=attached, name="a.pdf", size=size, mime_type="application/pdf")
+        backfill_sizes(body_column_apps, None)
+        assert old_email.objects.get(pk=plain.pk).size == 9
+        assert old_email.objects.get(pk=attached.pk).size == 123
+
+
+class TestEmailBodyModel:
+    def test_stored_compressed(self, db):
+        email = EmailFactory(body="<p>" + "hello " * 200 + "</p>")
+        stored = EmailBody.objects.get(email=email)
+        assert len(stored.data) < len(email.body)
+        assert Email.objects.get(pk=email.pk).body == email.body
+        assert str(stored) == f"Body of email {email.pk}"
+
+    def test_empty_body_has_no_row(self, db):
+        email = EmailFactory(body="")
+        assert not EmailBody.objects.filter(email=email).exists()
+        assert Email.objects.get(pk=email.pk).body == ""
+
+    def test_unresolved_cid_flag(self, db):
+        email = EmailFactory(body='<img src="cid:logo">')
+        assert EmailBody.objects.get(email=email).unresolved_cid is True
+        email.body = "<p>resolved</p>"
+        email.save()
+        assert EmailBody.objects.get(email=email).unresolved_cid is False
+
+    def test_body_set_after_create(self, db):
+        email = EmailFactory(body="")
+        email.body = "<p>later</p>"
+        email.save()
+        assert Email.objects.get(pk=email.pk).body == "<p>later</p>"
+
+    def test_saves_without_body_change_leave_it(self, db):
+        email = EmailFactory(body="<p>kept</p>")
+        fresh = Email.objects.get(pk=email.pk)
+        fresh.subject = "renamed"
+        fresh.save()
+        assert EmailBody.objects.get(email=email).text == "<p>kept</p>"
+
+    def test_refresh_from_db_reloads_body(self, db):
+        email = EmailFactory(body="<p>old</p>")
+        EmailBody.objects.filter(email=email).update(data=compress_body("<p>new</p>"))
+        email.refresh_from_db(fields=["subject"])
+        assert email.body == "<p>old</p>"
+        email.refresh_from_db()
+        assert email.body == "<p>new</p>"
+
+    def test_sync_refetches_unresolved_cid(self, account):
+        from penguin_mail.services.sync import sync_account_folder
+
+        pending = EmailFactory(account=account, imap_uid=7, imap_folder="INBOX", body='<img src="cid:a">')
+        EmailFactory(account=account, imap_uid=8, imap_folder="INBOX", body="<p>done</p>")
+        message = {"imap_uid": 7, "body": '<img src="data:image/png;base64,AA==">'}
+        with patch("penguin_mail.services.imap.fetch_emails", return_value=[message]) as mock_fetch:
+            assert sync_account_folder(account, "INBOX", "inbox") == 0
+        assert mock_fetch.call_args.kwargs["known_uids"] == {8}
+        assert Email.objects.get(pk=pending.pk).body == message["body"]
+        assert EmailBody.objects.get(email=pending).unresolved_cid is False
+
+    def test_migration_moves_bodies_and_back(self, body_column_apps, account):
+        old_email = body_column_apps.get_model("penguin_mail", "Email")
+        bodies = ["<p>one</p>", '<img src="cid:x">', ""]
+        pks = [old_email.objects.create(account_id=account.pk, sender_email="a@b.com", body=b).pk for b in bodies]
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        assert [Email.objects.get(pk=pk).body for pk in pks] == bodies
+        assert list(EmailBody.objects.order_by("pk").values_list("unresolved_cid", flat=True)) == [False, True]
+        executor = MigrationExecutor(connection)
+        executor.migrate([("penguin_mail", "0015_bulk_job")])
+        assert [old_email.objects.get(pk=pk).body for pk in pks] == bodies
+
 
 class TestRecipientModel:
     def test_create(self, db):
@@ -198,6 +285,30 @@ class TestContactGroupModel:
             ContactGroup.objects.create(user=group.user, name=group.name)
 
 
+class TestBulkSendModel:
+    def test_str(self, account):
+        job = BulkSend.objects.create(user=account.user, account=account)
+        assert str(job) == f"Bulk send {job.uuid} (queued)"
+
+
+class TestBulkJobModel:
+    def test_str(self, user):
+        job = BulkJob.objects.create(user=user, operation="archive")
+        assert str(job) == f"Bulk job {job.uuid} (archive, queued)"
+
+
+class TestMailboxCounterModel:
+    def test_str(self, account):
+        label = LabelFactory(user=account.user, name="Work")
+        assert str(MailboxCounter(account=account, folder="inbox", total=5, unread=2)) == "inbox: 2/5"
+        assert str(MailboxCounter(account=account, label=label, total=3, unread=1)) == "Work: 1/3"
+
+    def test_one_folder_row_per_account(self, account):
+        MailboxCounter.objects.create(account=account, folder="inbox")
+        with pytest.raises(IntegrityError):
+            MailboxCounter.objects.create(account=account, folder="inbox")
+
+
 class TestUserSettingsModel:
     def test_create(self, db):
         settings = UserSettingsFactory()
@@ -0,0 +1,145 @@
+"""Tests for the outbound send queue (penguin_mail.services.outbox)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from factories import AttachmentFactory, EmailFactory, RecipientFactory
+from penguin_mail.models import SendStatus
+from penguin_mail.services import outbox
+
+SENT = MagicMock(message_id="<sent@example.com>")
+
+
+@pytest.fixture
+def queued(account):
+    e = EmailFactory(account=account, folder="sent", send_status=SendStatus.OUTBOX, body="<p>Hi</p>")
+    RecipientFactory(email=e, address="to@example.com", kind="TO", order=0)
+    RecipientFactory(email=e, address="cc@example.com", kind="CC", order=0)
+    RecipientFactory(email=e, address="bcc@example.com", kind="BCC", order=0)
+    return e
+
+
+class TestDeliver:
+    def test_success_marks_sent(self, queued):
+        with (
+            patch("penguin_mail.services.smtp.send_email", return_value=SENT) as mock_send,
+            patch("penguin_mail.services.sent_copies.enqueue") as mock_copy,
+        ):
+            assert outbox.deliver(queued.pk) is True
+        kwargs = mock_send.call_args.kwargs
+        assert kwargs["recipients_to"] == ["to@example.com"]
+        assert kwargs["recipients_cc"] == ["cc@example.com"]
+        assert kwargs["recipients_bcc"] == ["bcc@example.com"]
+        assert kwargs["body_html"] == "<p>Hi</p>"
+        assert kwargs["session"] is None
+        assert kwargs["attachments"] == []
+        queued.refresh_from_db()
+        assert queued.send_status == SendStatus.SENT
+        assert queued.message_id == "<sent@example.com>"
+        mock_copy.assert_called_once_with(queued, SENT)
+        assert queued.send_attempts == 1
+        assert queued.next_send_attempt_at is None
+
+    def test_passes_linked_attachments(self, queued):
+        att = AttachmentFactory(email=queued)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT) as mock_send:
+            outbox.deliver(queued.pk)
+        assert mock_send.call_args.kwargs["attachments"] == [att]
+
+    def test_scheduled_email_moves_to_sent(self, account):
+        e = EmailFactory(account=account, folder="scheduled", send_status=SendStatus.OUTBOX)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT):
+            outbox.deliver(e.pk)
+        e.refresh_from_db()
+        assert e.folder == "sent"
+
+    def test_unclaimable_email_is_skipped(self, account):
+        e = EmailFactory(account=account, send_status=SendStatus.SENT)
+        with patch("penguin_mail.services.smtp.send_email", return_value=SENT) as mock_send:
+            assert outbox.deliver(e.pk) is False
+        mock_send.assert_not_called()
+
+    def test_failure_schedules_retry(self, queued, django_capture_on_commit_callbacks):
+        with (
+            patch("penguin_mail.services.smtp.send_email", side_effect=Exception("Connection refused")),
+            patch("penguin_mail.services.outbox._submit") as mock_submit,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            assert outbox.deliver(queued.pk) is False
+        queued.refresh_from_db()
+        assert queued.send_status == SendStatus.OUTBOX
+        assert queued.send_attempts == 1
+        assert queued.send_error == "Connection refused"
+        assert queued.next_send_attempt_at is not None
+        mock_submit.assert_called_once_with(queued.pk, outbox.backoff_delay(1))
+
+    def test_failure_after_max_attempts_gives_up(self, queued, settings, django_capture_on_commit_callbacks):
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        queued.send_attempts = 1
+        queued.save(update_fields=["send_attempts"])
+        with (
+            patch("penguin_mail.services.smtp.send_email", side_effect=Exception("550 rejected")),
+            django_capture_on_commit_callbacks() as callbacks,
+        ):
+            outbox.deliver(queued.pk)
+        queued.refresh_from_db()
+        assert queued.send_status == SendStatus.FAILED
+        assert queued.send_attempts == 2
+        assert queued.next_send_attempt_at is None
+        assert callbacks == []
+
+
+class TestBackoff:
+    def test_exponential(self, settings):
+        settings.OUTBOX_RETRY_BASE_SECONDS = 10
+        settings.OUTBOX_RETRY_MAX_SECONDS = 1000
+        assert [outbox.backoff_delay(n) for n in (1, 2, 3)] == [10, 20, 40]
+
+    def test_capped(self, settings):
+        settings.OUTBOX_RETRY_BASE_SECONDS = 10
+        settings.OUTBOX_RETRY_MAX_SECONDS = 60
+        assert outbox.backoff_delay(10) == 60
+
+
+class TestWorkerPlumbing:
+    def test_enqueue_submits_on_commit(self, db, django_capture_on_commit_callbacks):
+        with (
+            patch("penguin_mail.services.outbox._submit") as mock_submit,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            outbox.enqueue(42)
+        mock_submit.assert_called_once_with(42)
+
+    def test_submit_uses_executor(self):
+        executor = MagicMock()
+        with patch("penguin_mail.services.outbox._get_executor", return_value=executor):
+            outbox._submit(7)
+        executor.submit.assert_called_once_with(outbox._run, 7)
+
+    def test_submit_with_delay_starts_timer(self):
+        with patch("penguin_mail.services.outbox.threading.Timer") as mock_timer:
+            outbox._submit(7, 30)
+        mock_timer.assert_called_once_with(30, outbox._submit, args=(7,))
+        mock_timer.return_value.start.assert_called_once()
+
+    def test_executor_is_shared(self):
+        with patch("penguin_mail.services.outbox._executor", None):
+            assert outbox._get_executor() is outbox._get_executor()
+
+    def test_run_closes_connection(self):
+        with (
+            patch("penguin_mail.services.outbox.deliver") as mock_deliver,
+            patch("penguin_mail.services.outbox.connection") as mock_conn,
+        ):
+            outbox._run(5)
+        mock_deliver.assert_called_once_with(5)
+        mock_conn.close.assert_called_once()
+
+    def test_run_swallows_errors(self):
+        with (
+            patch("penguin_mail.services.outbox.deliver", side_effect=RuntimeError("boom")),
+            patch("penguin_mail.services.outbox.connection") as mock_conn,
+        ):
+            outbox._run(5)
+        mock_conn.close.assert_called_once()
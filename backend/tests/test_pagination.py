@@ -1,8 +1,19 @@
 """Tests for pagination utility."""
 
-from factories import LabelFactory
-from penguin_mail.api.pagination import MAX_PAGE_SIZE, paginate_queryset
-from penguin_mail.models import Label
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from ninja.errors import HttpError
+
+from factories import EmailFactory, LabelFactory
+from penguin_mail.api.pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    paginate_keyset,
+    paginate_queryset,
+)
+from penguin_mail.models import Email, Label
 
 
 class TestPaginateQueryset:
@@ -48,3 +59,64 @@ class TestPaginateQueryset:
         qs = Label.objects.filter(user=user)
         result = paginate_queryset(qs, page=1, page_size=0)
         assert result["pagination"]["pageSize"] == 1
+
+
+class TestPaginateKeyset:
+    def _emails(self, account, n, same_time=False):
+        emails = [EmailFactory(account=account) for _ in range(n)]
+        if same_time:
+            Email.objects.filter(pk__in=[e.pk for e in emails]).update(created_at=emails[0].created_at)
+        return Email.objects.filter(account=account)
+
+    def _walk(self, qs, page_size):
+        seen, cursor = [], ""
+        while True:
+            result = paginate_keyset(qs, cursor, page_size)
+            seen.extend(e.pk for e in result["items"])
+            cursor = result["pagination"]["nextCursor"]
+            if cursor is None:
+                return seen
+
+    def test_walks_every_row_once_in_order(self, account):
+        qs = self._emails(account, 7)
+        assert self._walk(qs, 3) == list(qs.values_list("pk", flat=True))
+
+    def test_ties_on_created_at_broken_by_id(self, account):
+        qs = self._emails(account, 5, same_time=True)
+        assert self._walk(qs, 2) == sorted(qs.values_list("pk", flat=True), reverse=True)
+
+    def test_no_next_cursor_when_page_exactly_full(self, account):
+        qs = self._emails(account, 3)
+        result = paginate_keyset(qs, "", 3)
+        assert len(result["items"]) == 3
+        assert result["pagination"]["nextCursor"] is None
+
+    def test_empty(self, db):
+        result = paginate_keyset(Email.objects.none())
+        assert result == {"items": [], "pagination": {"pageSize": 50, "nextCursor": None}}
+
+    def test_page_size_clamped(self, db):
+        assert paginate_keyset(Email.objects.none(), "", 999)["pagination"]["pageSize"] == MAX_PAGE_SIZE
+
+    def test_no_count_or_offset(self, account):
+        qs = self._emails(account, 5)
+        cursor = paginate_keyset(qs, "", 2)["pagination"]["nextCursor"]
+        with CaptureQueriesContext(connection) as ctx:
+            paginate_keyset(qs, cursor, 2)
+        assert len(ctx.captured_queries) == 1
+        sql = ctx.captured_queries[0]["sql"].upper()
+        assert "COUNT(" not in sql
+        assert "OFFSET" not in sql
+
+
+class TestCursorEncoding:
+    def test_round_trip(self, account):
+        email = EmailFactory(account=account)
+        assert decode_cursor(encode_cursor(email)) == (email.created_at, email.pk)
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "bm9waXBl", "MjAyNXwx", "MjAyNS0wMS0wMVQwMDowMDowMHwx"])
+    def test_invalid_cursor_is_400(self, cursor):
+        # "nopipe", "2025|1" (bad date), "2025-01-01T00:00:00|1" (no timezone)
+        with pytest.raises(HttpError) as exc:
+            decode_cursor(cursor)
+        assert exc.value.status_code == 400
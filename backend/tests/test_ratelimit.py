@@ -0,0 +1,57 @@
+"""Tests for the send rate limiter (penguin_mail.services.ratelimit)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from factories import AccountFactory
+from penguin_mail.services import ratelimit
+from penguin_mail.services.ratelimit import TokenBucket, bucket_for, send_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+        waits = [bucket.acquire() for _ in range(5)]
+        assert waits == [0, 0, 0, 0.5, 0.5]
+        assert clock.now == pytest.approx(1.0)
+
+    def test_refills_while_idle_up_to_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, burst=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 100
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 1.0]
+
+
+class TestProviderLimits:
+    def test_preset_rate(self):
+        assert send_limits("gmail") == (20, 10)
+
+    def test_default_for_custom(self, settings):
+        settings.BULK_SEND_RATE_PER_MINUTE = 12
+        settings.BULK_SEND_BURST = 3
+        assert send_limits("custom") == (12, 3)
+
+    def test_bucket_shared_per_account(self, db):
+        account = AccountFactory(provider="outlook")
+        with patch.object(ratelimit, "_buckets", {}):
+            bucket = bucket_for(account)
+            assert bucket is bucket_for(account)
+            assert bucket.rate == 0.5
+            assert bucket is not bucket_for(AccountFactory())
@@ -0,0 +1,102 @@
+"""Tests for the orjson / MessagePack response renderer."""
+
+import json
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+from decimal import Decimal
+
+import msgpack
+import pytest
+from django.test import RequestFactory
+from ninja.responses import NinjaJSONEncoder
+
+from factories import EmailFactory
+from penguin_mail.api.renderers import FastRenderer, wants_msgpack
+from penguin_mail.api.schemas.email import EmailAddressOut
+
+MSGPACK_ACCEPT = "application/msgpack"
+
+
+def render(data, accept=""):
+    request = RequestFactory().get("/", HTTP_ACCEPT=accept)
+    return FastRenderer().render(request, data, response_status=200)
+
+
+class TestNegotiation:
+    @pytest.mark.parametrize(
+        ("accept", "expected"),
+        [
+            ("", False),
+            ("*/*", False),
+            ("application/json", False),
+            ("application/msgpack", True),
+            ("text/html, application/x-msgpack;q=0.9", True),
+            ("Application/MsgPack", True),
+        ],
+    )
+    def test_wants_msgpack(self, accept, expected):
+        assert wants_msgpack(RequestFactory().get("/", HTTP_ACCEPT=accept)) is expected
+
+
+class TestJSON:
+    def test_native_types(self):
+        at = datetime(2025, 1, 15, 10, 30, 0, 123456, tzinfo=UTC)
+        key = uuid.UUID("12345678-1234-5678-1234-567812345678")
+        assert json.loads(render({"at": at, "id": key, 1: "int key"})) == {
+            "at": "2025-01-15T10:30:00.123Z",
+            "id": str(key),
+            "1": "int key",
+        }
+
+    @pytest.mark.parametrize(
+        "at",
+        [
+            datetime(2025, 1, 15, 10, 30, 0, 123456, tzinfo=UTC),
+            datetime(2025, 1, 15, 10, 30, tzinfo=UTC),
+            datetime(2025, 1, 15, 10, 30, 0, 5, tzinfo=timezone(timedelta(hours=2))),
+            datetime(2025, 1, 15, 10, 30, 0, 999999),
+        ],
+    )
+    def test_datetimes_match_ninja_encoder(self, at):
+        assert json.loads(render({"at": at})) == json.loads(json.dumps({"at": at}, cls=NinjaJSONEncoder))
+
+    def test_falls_back_to_ninja_encoder(self):
+        data = {"price": Decimal("1.50"), "wait": timedelta(minutes=5), "who": EmailAddressOut(name="A", email="a@b.c")}
+        assert json.loads(render(data)) == {
+            "price": "1.50",
+            "wait": "P0DT00H05M00S",
+            "who": {"name": "A", "email": "a@b.c"},
+        }
+
+
+class TestMsgpack:
+    def test_same_document_as_json(self):
+        data = {
+            "at": datetime(2025, 1, 15, 10, 30, tzinfo=UTC),
+            "day": datetime(2025, 1, 15, tzinfo=UTC).date(),
+            "id": uuid.uuid4(),
+            "price": Decimal("2"),
+            "items": [1, "two", None, True],
+        }
+        assert msgpack.unpackb(render(data, MSGPACK_ACCEPT)) == json.loads(render(data))
+
+
+class TestAPI:
+    def test_json_by_default(self, authed_client, account):
+        EmailFactory(account=account)
+        resp = authed_client.get("/api/v1/emails/")
+        assert resp["Content-Type"] == "application/json; charset=utf-8"
+        assert "Accept" in resp["Vary"]
+        assert resp.json()["data"][0]["date"].endswith("Z")
+
+    def test_msgpack_on_request(self, authed_client, account):
+        EmailFactory(account=account)
+        as_json = authed_client.get("/api/v1/emails/").json()
+        resp = authed_client.get("/api/v1/emails/", HTTP_ACCEPT=MSGPACK_ACCEPT)
+        assert resp["Content-Type"] == MSGPACK_ACCEPT
+        assert msgpack.unpackb(resp.content) == as_json
+
+    def test_errors_are_negotiated_too(self, api_client):
+        resp = api_client.get("/api/v1/emails/", HTTP_ACCEPT=MSGPACK_ACCEPT)
+        assert resp.status_code == 401
+        assert msgpack.unpackb(resp.content) == {"detail": "Unauthorized"}
@@ -0,0 +1,147 @@
+"""Tests for read-replica routing (penguin_mail.replicas)."""
+
+import math
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from penguin_mail import replicas
+from penguin_mail.models import Email
+
+router = replicas.ReplicaRouter()
+alice, bob = SimpleNamespace(pk=1), SimpleNamespace(pk=2)
+
+
+@pytest.fixture(autouse=True)
+def _clean_state():
+    cache.clear()
+    replicas._lag.clear()
+    yield
+    cache.clear()
+    replicas._lag.clear()
+
+
+@pytest.fixture
+def replica(settings):
+    """One replica, replica_0, with the given lag in seconds."""
+    settings.DATABASE_REPLICAS = ["replica_0"]
+    settings.REPLICA_MAX_LAG_SECONDS = 5.0
+    with patch.object(replicas, "replica_lag", return_value=0.0) as lag:
+        yield lag
+
+
+def handle(method, user, view=lambda: router.db_for_read(Email)):
+    """Run ``view`` as the handling of a ``method`` request by ``user`` and return what it returned."""
+    request = RequestFactory().generic(method, "/api/v1/emails/")
+    if user is not None:
+        request.auth = user
+    result = []
+
+    def get_response(_request):
+        result.append(view())
+        return HttpResponse()
+
+    replicas.ReplicaMiddleware(get_response)(request)
+    return result[0]
+
+
+class TestRouter:
+    def test_safe_requests_read_from_a_replica(self, replica):
+        assert handle("GET", alice) == "replica_0"
+        assert handle("HEAD", alice) == "replica_0"
+
+    def test_one_replica_per_request(self, replica, settings):
+        settings.DATABASE_REPLICAS = ["replica_0", "replica_1"]
+        assert len(set(handle("GET", alice, lambda: [router.db_for_read(Email) for _ in range(20)]))) == 1
+
+    def test_primary_before_authentication(self, replica):
+        assert handle("GET", None) is None
+
+    def test_primary_after_writing(self, replica):
+        def write_then_read():
+            assert router.db_for_write(Email) is None
+            return router.db_for_read(Email)
+
+        assert handle("GET", alice, write_then_read) is None
+        assert replicas.last_write(alice.pk) > 0
+
+    def test_unsafe_requests_use_the_primary_and_record_the_write(self, replica):
+        assert handle("POST", alice) is None
+        assert replicas.last_write(alice.pk) > 0
+        assert replicas.last_write(bob.pk) == 0
+
+    def test_own_writes_wait_for_the_replica_to_catch_up(self, replica):
+        replica.return_value = 3.0
+        handle("PATCH", alice)
+        assert handle("GET", alice) == "default"
+        assert handle("GET", bob) == "replica_0"
+        with patch.object(replicas.time, "time", return_value=time.time() + 4):
+            assert handle("GET", alice) == "replica_0"
+
+    @pytest.mark.parametrize("lag", [6.0, math.inf])
+    def test_lagging_replicas_are_skipped(self, replica, lag):
+        replica.return_value = lag
+        assert handle("GET", alice) == "default"
+
+    def test_primary_inside_transactions(self, replica, db):
+        assert handle("GET", alice) is None
+
+    def test_outside_requests(self, replica):
+        assert router.db_for_read(Email) is None
+        assert router.db_for_write(Email) is None
+
+    def test_off_without_replicas(self):
+        assert handle("POST", alice) is None
+        assert replicas.last_write(alice.pk) == 0
+
+    def test_relations_and_migrations(self, replica):
+        assert router.allow_relation(Email(), Email()) is True
+        assert router.allow_migrate("replica_0", "penguin_mail") is False
+        assert router.allow_migrate("default", "penguin_mail") is None
+
+
+class TestReplicaLag:
+    def test_only_postgres_is_measured(self):
+        assert replicas._measure_lag("default") == 0.0
+
+    def test_postgres(self):
+        replica = MagicMock(vendor="postgresql")
+        cursor = replica.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (2.5,)
+        with patch.object(replicas, "connections", {"replica_0": replica}):
+            assert replicas._measure_lag("replica_0") == 2.5
+        cursor.execute.assert_called_once_with(replicas.POSTGRES_LAG_SQL)
+
+    def test_unreachable(self):
+        replica = MagicMock(vendor="postgresql")
+        replica.cursor.side_effect = DatabaseError("connection refused")
+        with patch.object(replicas, "connections", {"replica_0": replica}):
+            assert replicas._measure_lag("replica_0") == math.inf
+
+    def test_sampled_once_per_interval(self, settings):
+        settings.REPLICA_LAG_CHECK_SECONDS = 60
+        with patch.object(replicas, "_measure_lag", return_value=1.0) as measure:
+            assert [replicas.replica_lag("replica_0") for _ in range(3)] == [1.0] * 3
+            assert measure.call_count == 1
+            settings.REPLICA_LAG_CHECK_SECONDS = 0
+            replicas.replica_lag("replica_0")
+            assert measure.call_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRequests:
+    def test_reads_and_writes(self, settings, authed_client, user):
+        settings.DATABASE_REPLICAS = ["default"]  # stands in for a replica
+        with patch.object(replicas, "_choose", wraps=replicas._choose) as choose:
+            assert authed_client.get("/api/v1/labels/").status_code == 200
+            choose.assert_called_once_with(user.pk)
+            assert replicas.last_write(user.pk) == 0
+            assert authed_client.post("/api/v1/labels/", {"name": "Work", "color": "#fff"}).status_code == 201
+            assert choose.call_count == 1
+        assert replicas.last_write(user.pk) > 0
@@ -0,0 +1,265 @@
+"""Tests for full-text email search (penguin_mail.search)."""
+
+import importlib
+from datetime import UTC, datetime
+from io import StringIO
+from unittest.mock import MagicMock
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+
+from factories import EmailFactory, LabelFactory, RecipientFactory
+from penguin_mail import search
+from penguin_mail.models import Email, EmailSearchDocument
+from penguin_mail.search import documents
+from penguin_mail.search.backends import SearchBackend, SQLiteBackend, highlight
+from penguin_mail.search.query import terms
+
+migration = importlib.import_module("penguin_mail.migrations.0011_email_search")
+
+
+def matching(query):
+    return set(search.filter_emails(Email.objects.all(), query).values_list("subject", flat=True))
+
+
+@pytest.fixture(params=["sqlite", "basic"])
+def backend(request, settings):
+    settings.SEARCH_BACKEND = request.param
+    return request.param
+
+
+class TestTerms:
+    def test_splits_words_and_drops_punctuation(self):
+        assert terms('"quarterly" re-port*') == ["quarterly", "re", "port"]
+
+    def test_highlight_escapes_before_marking(self):
+        assert highlight("<b>x") == "&lt;b&gt;<mark>x</mark>"
+
+
+class TestGetBackend:
+    def test_auto_uses_connection_vendor(self, settings):
+        settings.SEARCH_BACKEND = "auto"
+        assert type(search.get_backend()) is SQLiteBackend
+
+    def test_auto_falls_back_for_unknown_vendor(self, settings, monkeypatch):
+        settings.SEARCH_BACKEND = "auto"
+        monkeypatch.setattr(connection, "vendor", "oracle")
+        assert type(search.get_backend()) is SearchBackend
+
+    def test_postgres(self, settings):
+        settings.SEARCH_BACKEND = "postgres"
+        assert type(search.get_backend()).__name__ == "PostgresBackend"
+
+
+class TestFilter:
+    def test_every_word_must_match(self, db, backend):
+        EmailFactory(subject="Quarterly report", body="<p>numbers</p>")
+        EmailFactory(subject="Quarterly plan", body="<p>numbers</p>")
+        assert matching("quarterly report") == {"Quarterly report"}
+
+    def test_prefix_match(self, db, backend):
+        EmailFactory(subject="Quarterly report")
+        assert matching("quart") == {"Quarterly report"}
+
+    def test_searches_sender_recipients_and_plaintext_body(self, db, backend):
+        EmailFactory(subject="a", sender_name="Zara Smith")
+        RecipientFactory(email=EmailFactory(subject="b"), address="ledger@example.com")
+        EmailFactory(subject="c", body="<p>secret <i>code</i></p>")
+        assert matching("zara") == {"a"}
+        assert matching("ledger") == {"b"}
+        assert matching("secret code") == {"c"}
+
+    def test_markup_is_not_indexed(self, db, backend):
+        EmailFactory(subject="a", body='<div style="color: red">hi</div>')
+        assert matching("color") == set()
+
+    def test_no_terms_matches_nothing(self, db, backend):
+        EmailFactory()
+        assert matching("*&!") == set()
+
+    def test_quoted_phrase_needs_adjacent_words(self, db, backend):
+        EmailFactory(subject="a", body="<p>quarterly report due</p>")
+        EmailFactory(subject="b", body="<p>report on quarterly numbers</p>")
+        assert matching('"quarterly report"') == {"a"}
+        assert matching("quarterly report") == {"a", "b"}
+
+    def test_field_operators_target_one_column(self, db, backend):
+        EmailFactory(subject="budget", sender_name="Ann", body="<p>hello</p>")
+        EmailFactory(subject="hello", sender_name="Bob", body="<p>ann budget</p>")
+        RecipientFactory(email=EmailFactory(subject="to ann", sender_name="Cy"), name="Ann")
+        assert matching("from:ann") == {"budget"}
+        assert matching("subject:budget") == {"budget"}
+        assert matching("to:ann") == {"to ann"}
+        assert matching('subject:"to ann"') == {"to ann"}
+
+    def test_from_address_matches_as_phrase(self, db, backend):
+        EmailFactory(subject="a", sender_name="A", sender_email="ann@example.com")
+        EmailFactory(subject="b", sender_name="B", sender_email="example@ann.org")
+        assert matching("from:ann@example.com") == {"a"}
+
+    def test_negated_text(self, db, backend):
+        EmailFactory(subject="budget draft")
+        EmailFactory(subject="budget final")
+        assert matching("budget -draft") == {"budget final"}
+        assert matching("-subject:final") == {"budget draft"}
+
+    def test_column_operators(self, db, backend):
+        label = LabelFactory(name="Work")
+        EmailFactory(subject="a", is_read=True, has_attachment=True, size=5000).labels.add(label)
+        EmailFactory(subject="b", is_starred=True, folder="archive", size=50)
+        assert matching("is:read") == {"a"}
+        assert matching("is:unread") == {"b"}
+        assert matching("is:starred") == {"b"}
+        assert matching("has:attachment") == {"a"}
+        assert matching("label:work") == {"a"}
+        assert matching("-label:Work") == {"b"}
+        assert matching("in:archive") == {"b"}
+        assert matching("larger:1K") == {"a"}
+        assert matching("smaller:1k") == {"b"}
+
+    def test_date_operators(self, db, backend):
+        old = EmailFactory(subject="old")
+        Email.objects.filter(pk=old.pk).update(created_at=datetime(2024, 1, 10, 12, tzinfo=UTC))
+        EmailFactory(subject="new")
+        assert matching("before:2024-01-11") == {"old"}
+        assert matching("before:2024-01-10") == set()
+        assert matching("after:2024/01/10") == {"old", "new"}
+        assert matching("after:2024-01-11") == {"new"}
+
+    def test_contradiction_matches_nothing(self, db, backend):
+        EmailFactory(is_read=True)
+        assert matching("is:read is:unread") == set()
+
+    def test_composes_with_other_filters(self, db, backend):
+        EmailFactory(subject="budget", folder="inbox")
+        EmailFactory(subject="budget", folder="sent")
+        qs = search.filter_emails(Email.objects.filter(folder="sent"), "budget")
+        assert list(qs.values_list("folder", flat=True)) == ["sent"]
+
+
+class TestRank:
+    def test_queries_without_text_are_unranked(self, db):
+        EmailFactory(is_read=True)
+        qs = search.rank_emails(search.filter_emails(Email.objects.all(), "is:read"), "is:read")
+        assert list(qs.values_list("search_rank", flat=True)) == [0.0]
+
+    def test_subject_outranks_body(self, db):
+        in_body = EmailFactory(subject="Notes", body="<p>budget</p>")
+        in_subject = EmailFactory(subject="Budget", body="<p>see attached</p>")
+        qs = search.rank_emails(search.filter_emails(Email.objects.all(), "budget"), "budget")
+        ranks = dict(qs.values_list("pk", "search_rank"))
+        assert ranks[in_subject.pk] > ranks[in_body.pk]
+
+    def test_basic_backend_is_unranked(self, db, settings):
+        settings.SEARCH_BACKEND = "basic"
+        EmailFactory(subject="budget")
+        qs = search.rank_emails(search.filter_emails(Email.objects.all(), "budget"), "budget")
+        assert list(qs.values_list("search_rank", flat=True)) == [0.0]
+
+
+class TestSnippets:
+    def test_marks_matches_and_escapes(self, db, backend):
+        email = EmailFactory(body="<p>the launch R&amp;D date moved</p>")
+        snippet = search.snippets([email.pk], "launch")[email.pk]
+        assert "<mark>launch</mark>" in snippet
+        assert "R&amp;D" in snippet
+
+    def test_long_body_is_excerpted_around_match(self, db, backend):
+        email = EmailFactory(body="<p>" + "filler " * 100 + "needle " + "filler " * 100 + "</p>")
+        snippet = search.snippets([email.pk], "needle")[email.pk]
+        assert "<mark>needle</mark>" in snippet
+        assert snippet.startswith("…")
+        assert snippet.endswith("…")
+        assert len(snippet) < 200
+
+    def test_empty_inputs(self, db, backend):
+        email = EmailFactory()
+        assert search.snippets([], "x") == {}
+        assert search.snippets([email.pk], "!!") == {}
+        assert search.snippets([email.pk], "is:read") == {}
+
+
+class TestDocuments:
+    def test_created_with_email(self, db):
+        email = EmailFactory(subject="Hi", sender_name="Ann", sender_email="ann@example.com", body="<p>a<br>b</p>")
+        doc = EmailSearchDocument.objects.get(email=email)
+        assert (doc.subject, doc.sender, doc.body) == ("Hi", "Ann ann@example.com", "a\nb")
+        assert str(doc) == f"Search document for email {email.pk}"
+
+    def test_updated_on_indexed_field_change(self, db):
+        email = EmailFactory(subject="Old")
+        email.subject = "New"
+        email.save(update_fields=["subject"])
+        assert email.search_document.subject == "New"
+
+    def test_flag_only_save_skips_refresh(self, db):
+        email = EmailFactory(subject="Old")
+        Email.objects.filter(pk=email.pk).update(subject="Changed behind the index")
+        email.is_read = True
+        email.save(update_fields=["is_read"])
+        assert EmailSearchDocument.objects.get(email=email).subject == "Old"
+
+    def test_raw_save_skips_refresh(self, db):
+        email = EmailFactory(subject="Old")
+        EmailSearchDocument.objects.all().delete()
+        Email.save_base(email, raw=True)
+        assert not EmailSearchDocument.objects.exists()
+
+    def test_recipients_follow_adds_and_deletes(self, db):
+        email = EmailFactory()
+        to = RecipientFactory(email=email, name="Bo", address="bo@example.com", kind="TO")
+        RecipientFactory(email=email, name="", address="cc@example.com", kind="CC")
+        email.search_document.refresh_from_db()
+        assert email.search_document.recipients == "cc@example.com Bo bo@example.com"
+        to.delete()
+        email.search_document.refresh_from_db()
+        assert email.search_document.recipients == "cc@example.com"
+
+    def test_deleted_with_email(self, db):
+        email = EmailFactory(subject="gone")
+        email.delete()
+        assert matching("gone") == set()
+
+    def test_rebuild(self, db):
+        first = EmailFactory(subject="alpha")
+        RecipientFactory(email=first, address="r@rebuilt.test")
+        EmailFactory(subject="beta")
+        EmailSearchDocument.objects.all().delete()
+        assert documents.rebuild(batch_size=1) == 2
+        assert matching("alpha") == {"alpha"}
+        assert matching("rebuilt") == {"alpha"}
+
+    def test_rebuild_command(self, db):
+        EmailFactory()
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        assert out.getvalue().strip() == "Indexed 1 emails"
+
+
+class TestMigration:
+    def test_backfill(self, body_column_apps, account):
+        old_email = body_column_apps.get_model("penguin_mail", "Email")
+        old_recipient = body_column_apps.get_model("penguin_mail", "Recipient")
+        email = old_email.objects.create(account_id=account.pk, sender_email="a@b.com", body="<p>old body</p>")
+        old_recipient.objects.create(email=email, address="old@example.com", kind="TO")
+        migration.backfill_documents(body_column_apps, None)
+        doc = EmailSearchDocument.objects.get(email_id=email.pk)
+        assert doc.body == "old body"
+        assert "old@example.com" in doc.recipients
+
+    @pytest.mark.parametrize(
+        ("vendor", "install", "uninstall"),
+        [
+            ("postgresql", migration.POSTGRES_INSTALL, migration.POSTGRES_UNINSTALL),
+            ("mysql", [], []),
+        ],
+    )
+    def test_vendor_statements(self, vendor, install, uninstall):
+        schema_editor = MagicMock()
+        schema_editor.connection.vendor = vendor
+        migration.install_index(apps, schema_editor)
+        migration.uninstall_index(apps, schema_editor)
+        executed = [c.args[0] for c in schema_editor.execute.call_args_list]
+        assert executed == install + uninstall
@@ -0,0 +1,104 @@
+"""Tests for the search query language (penguin_mail.search.query)."""
+
+from datetime import date
+
+import pytest
+
+from penguin_mail.search.query import Filter, QuerySyntaxError, Text, parse, plan
+
+
+class TestParse:
+    def test_bare_words_and_phrases(self):
+        assert parse('budget "quarterly report"') == [
+            Text("budget"),
+            Text("quarterly report", phrase=True),
+        ]
+
+    def test_text_operators(self):
+        assert parse('from:ann TO:bob@example.com subject:"q3 plan"') == [
+            Text("ann", field="sender"),
+            Text("bob@example.com", field="recipients"),
+            Text("q3 plan", field="subject", phrase=True),
+        ]
+
+    def test_negation(self):
+        assert parse("-draft -is:read") == [Text("draft", negated=True), Filter("is_read", True, negated=True)]
+
+    def test_column_operators(self):
+        assert parse("is:Unread has:attachment in:Archive label:Work") == [
+            Filter("is_read", False),
+            Filter("has_attachment", True),
+            Filter("folder", "archive"),
+            Filter("label", "Work"),
+        ]
+
+    def test_dates_and_sizes(self):
+        assert parse("after:2024/01/31 before:2024-02-01 larger:10M smaller:500kb larger:42") == [
+            Filter("after", date(2024, 1, 31)),
+            Filter("before", date(2024, 2, 1)),
+            Filter("larger", 10 * 1024 * 1024),
+            Filter("smaller", 500 * 1024),
+            Filter("larger", 42),
+        ]
+
+    def test_unknown_operator_is_text(self):
+        assert parse("foo:bar 10:30") == [Text("foo:bar"), Text("10:30")]
+
+    def test_operator_without_value_is_text(self):
+        assert parse("from: bob") == [Text("from:"), Text("bob")]
+
+    def test_punctuation_only_terms_are_dropped(self):
+        assert parse('- "" * ->') == []
+
+    @pytest.mark.parametrize("query", ["is:important", "has:pdf", "in:nowhere", "before:yesterday", "larger:big"])
+    def test_invalid_operator_values(self, query):
+        with pytest.raises(QuerySyntaxError):
+            parse(query)
+
+
+class TestPlan:
+    def test_empty_query(self):
+        assert plan([]).empty
+
+    def test_texts_are_kept_in_order(self):
+        result = plan(parse("b -a c"))
+        assert result.texts == [Text("b"), Text("a", negated=True), Text("c")]
+        assert result.positive_texts == [Text("b"), Text("c")]
+
+    def test_filters_keep_query_order_with_bounds_last(self):
+        result = plan(parse("is:read before:2024-01-01 -in:spam label:work is:draft"))
+        assert [f.key for f in result.filters] == ["is_read", "folder", "label", "is_draft", "before"]
+
+    def test_bounds_collapse_to_tightest(self):
+        result = plan(parse("after:2024-01-01 after:2024-03-01 before:2024-06-01 before:2024-05-01 larger:1 larger:5"))
+        assert sorted((f.key, f.value) for f in result.filters) == [
+            ("after", date(2024, 3, 1)),
+            ("before", date(2024, 5, 1)),
+            ("larger", 5),
+        ]
+        assert not result.empty
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "is:read is:unread",
+            "is:starred -is:starred",
+            "in:inbox in:sent",
+            "label:Work -label:work",
+            "after:2024-02-01 before:2024-02-01",
+            "larger:10 smaller:11",
+        ],
+    )
+    def test_contradictions_are_empty(self, query):
+        assert plan(parse(query)).empty
+
+    @pytest.mark.parametrize(
+        "query",
+        ["is:read is:read", "is:read -is:unread", "-in:inbox -in:sent", "label:a label:b", "larger:10 smaller:12"],
+    )
+    def test_compatible_filters_are_not_empty(self, query):
+        assert not plan(parse(query)).empty
+
+    def test_negated_bounds_are_not_merged(self):
+        result = plan(parse("-after:2024-01-01 -after:2024-02-01"))
+        assert [(f.key, f.negated) for f in result.filters] == [("after", True), ("after", True)]
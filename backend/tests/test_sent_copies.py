@@ -0,0 +1,185 @@
+"""Tests for filing sent messages in the server's Sent folder (penguin_mail.services.sent_copies)."""
+
+import imaplib
+import re
+import socket
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from factories import AccountFactory, EmailFactory
+from penguin_mail.services import sent_copies
+
+
+@pytest.fixture
+def imap_account(db):
+    return AccountFactory(provider="custom", imap_host="imap.example.com")
+
+
+@pytest.fixture(autouse=True)
+def _empty_queue():
+    with patch.object(sent_copies, "_pending", {}):
+        yield
+
+
+class TestWantsCopy:
+    def test_custom_server(self, imap_account):
+        assert sent_copies.wants_copy(imap_account) is True
+
+    def test_provider_files_sent_itself(self, db):
+        assert sent_copies.wants_copy(AccountFactory(provider="gmail", imap_host="imap.gmail.com")) is False
+
+    def test_no_imap(self, db):
+        assert sent_copies.wants_copy(AccountFactory(imap_host="")) is False
+
+    def test_sync_disabled(self, imap_account, settings):
+        settings.IMAP_SYNC_ENABLED = False
+        assert sent_copies.wants_copy(imap_account) is False
+
+
+class TestEnqueue:
+    def test_batches_per_account_with_one_timer(self, imap_account):
+        e1, e2 = EmailFactory(account=imap_account), EmailFactory(account=imap_account)
+        with patch.object(sent_copies.threading, "Timer") as mock_timer:
+            sent_copies.enqueue(e1, "m1")
+            sent_copies.enqueue(e2, "m2")
+        mock_timer.assert_called_once()
+        mock_timer.return_value.start.assert_called_once()
+        assert sent_copies._pending[imap_account.pk] == [(e1.pk, "m1"), (e2.pk, "m2")]
+
+    def test_skipped_when_not_wanted(self, db):
+        e = EmailFactory(account=AccountFactory(imap_host=""))
+        with patch.object(sent_copies.threading, "Timer") as mock_timer:
+            sent_copies.enqueue(e, "m")
+        mock_timer.assert_not_called()
+
+
+class TestFlush:
+    def test_records_uids(self, imap_account):
+        e1, e2 = EmailFactory(account=imap_account), EmailFactory(account=imap_account)
+        sent_copies._pending[imap_account.pk] = [(e1.pk, "m1"), (e2.pk, "m2")]
+        with patch("penguin_mail.services.imap.append_sent", return_value=("Sent", [41, None])) as mock_append:
+            assert sent_copies.flush(imap_account.pk) == 2
+        mock_append.assert_called_once_with(imap_account, ["m1", "m2"])
+        e1.refresh_from_db()
+        e2.refresh_from_db()
+        assert (e1.imap_uid, e1.imap_folder) == (41, "Sent")
+        assert e2.imap_uid is None
+        assert sent_copies.flush(imap_account.pk) == 0
+
+    def test_splits_large_batches(self, imap_account, settings):
+        settings.SENT_COPY_BATCH_SIZE = 2
+        emails = [EmailFactory(account=imap_account) for _ in range(3)]
+        sent_copies._pending[imap_account.pk] = [(e.pk, "m") for e in emails]
+        with patch(
+            "penguin_mail.services.imap.append_sent", side_effect=[("Sent", [1, 2]), ("Sent", [3])]
+        ) as mock_append:
+            assert sent_copies.flush(imap_account.pk) == 3
+        assert mock_append.call_count == 2
+
+    def test_no_sent_folder(self, imap_account):
+        e = EmailFactory(account=imap_account)
+        sent_copies._pending[imap_account.pk] = [(e.pk, "m")]
+        with patch("penguin_mail.services.imap.append_sent", return_value=("", [None])):
+            assert sent_copies.flush(imap_account.pk) == 0
+
+    def test_run_closes_connection_and_swallows_errors(self):
+        with (
+            patch.object(sent_copies, "flush", side_effect=OSError("imap down")),
+            patch.object(sent_copies, "connection") as mock_conn,
+        ):
+            sent_copies._run(1)
+        mock_conn.close.assert_called_once()
+
+
+class FakeImapServer:
+    """
+    A scripted IMAP server on one end of a socket pair, for driving a real
+    imaplib client. Answers APPEND commands with ``append_replies`` in order
+    and records each one, literals included, in ``appends``.
+    """
+
+    def __init__(self, capabilities, append_replies):
+        self.capabilities = capabilities
+        self.append_replies = list(append_replies)
+        self.appends = []
+        self.client_sock, self.server_sock = socket.socketpair()
+        for sock in (self.client_sock, self.server_sock):
+            sock.settimeout(5)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        reader = self.server_sock.makefile("rb")
+        self.server_sock.sendall(b"* PREAUTH ready\r\n")
+        while line := reader.readline():
+            tag, _, command = line.partition(b" ")
+            if command.upper().startswith(b"CAPABILITY"):
+                capabilities = " ".join(["IMAP4rev1", *self.capabilities]).encode()
+                self.server_sock.sendall(b"* CAPABILITY " + capabilities + b"\r\n" + tag + b" OK done\r\n")
+            elif command.upper().startswith(b"APPEND"):
+                received = command
+                while size := re.search(rb"\{(\d+)\}\r\n$", command):
+                    self.server_sock.sendall(b"+ go ahead\r\n")
+                    command = reader.read(int(size.group(1))) + reader.readline()
+                    received += command
+                self.appends.append(received)
+                self.server_sock.sendall(tag + b" " + self.append_replies.pop(0) + b"\r\n")
+        self.server_sock.close()
+
+    def connect(self):
+        server = self
+
+        class Client(imaplib.IMAP4):
+            def open(self, host="", port=imaplib.IMAP4_PORT, timeout=None):
+                self.sock = server.client_sock
+                self.file = self.sock.makefile("rb")
+
+        return Client()
+
+
+class TestAppendMessages:
+    """The MULTIAPPEND/UIDPLUS plumbing in penguin_mail.services.imap, against a fake server."""
+
+    @contextmanager
+    def _server(self, capabilities, append_replies):
+        server = FakeImapServer(capabilities, append_replies)
+        conn = server.connect()
+        try:
+            yield server, conn
+        finally:
+            conn.shutdown()
+            server.thread.join(5)
+
+    def _message(self, body):
+        message = MagicMock()
+        message.size.return_value = len(body)
+        message.iter_bytes.return_value = [body[:1], body[1:]]
+        return message
+
+    def test_multiappend_single_command(self):
+        from penguin_mail.services.imap import append_messages
+
+        with self._server(("MULTIAPPEND",), [b"OK [APPENDUID 7 10:11] done"]) as (server, conn):
+            uids = append_messages(conn, 'Sent "Items"', [self._message(b"one"), self._message(b"three")])
+        assert uids == [10, 11]
+        assert server.appends == [b'APPEND "Sent \\"Items\\"" (\\Seen) {3}\r\none (\\Seen) {5}\r\nthree\r\n']
+
+    def test_one_append_per_message_without_multiappend(self):
+        from penguin_mail.services.imap import append_messages
+
+        with self._server((), [b"OK [APPENDUID 7 20] done", b"OK done"]) as (server, conn):
+            assert append_messages(conn, "Sent", [self._message(b"ab"), self._message(b"cd")]) == [20, None]
+        assert server.appends == [b'APPEND "Sent" (\\Seen) {2}\r\nab\r\n', b'APPEND "Sent" (\\Seen) {2}\r\ncd\r\n']
+
+    def test_uid_set_mismatch_and_failure(self):
+        from penguin_mail.services.imap import _parse_uid_set, append_messages
+
+        assert _parse_uid_set(b"3:5,9") == [3, 4, 5, 9]
+        assert append_messages(MagicMock(), "Sent", []) == []
+        with self._server(("MULTIAPPEND",), [b"OK [APPENDUID 7 10] done", b"NO quota"]) as (_server, conn):
+            assert append_messages(conn, "Sent", [self._message(b"ab"), self._message(b"cd")]) == [None, None]
+            with pytest.raises(imaplib.IMAP4.error, match="APPEND failed"):
+                append_messages(conn, "Sent", [self._message(b"ab")])
@@ -0,0 +1,149 @@
+"""Tests for SMTP message transfer (penguin_mail.services.smtp.send_message)."""
+
+import smtplib
+from unittest.mock import MagicMock
+
+import pytest
+
+from penguin_mail.services import smtp
+from penguin_mail.services.mime import OutboundMessage
+from penguin_mail.services.smtp import send_message
+
+
+def _message(**kwargs):
+    defaults = {
+        "from_header": "alice@example.com",
+        "to": ["bob@example.com"],
+        "cc": [],
+        "subject": "Hello",
+        "body_html": "<p>Hi</p>",
+        "body_text": "Hi",
+    }
+    defaults.update(kwargs)
+    return OutboundMessage(**defaults)
+
+
+def _server(*extensions, replies=None):
+    """A fake SMTP connection offering ``extensions`` and answering with ``replies`` (default: all OK)."""
+    server = MagicMock()
+    server.has_extn.side_effect = lambda name: name.lower() in extensions
+    server.getreply.side_effect = replies or (lambda: (250, b"OK"))
+    return server
+
+
+def _written(server) -> bytes:
+    return b"".join(call.args[0] for call in server.send.call_args_list)
+
+
+class TestDataTransfer:
+    def test_lockstep_envelope_then_dot_stuffed_body(self):
+        msg = _message()
+        msg.iter_bytes = lambda: iter([b"Header: x\r\n\r\n", b".hidden\r\nok\r\n"])  # type: ignore[method-assign]
+        server = _server(replies=[(250, b"OK"), (250, b"OK"), (354, b"go"), (250, b"queued")])
+        send_message(server, "a@example.com", ["b@example.com"], msg)
+        sends = [call.args[0] for call in server.send.call_args_list]
+        assert sends[:3] == [b"MAIL FROM:<a@example.com>\r\n", b"RCPT TO:<b@example.com>\r\n", b"DATA\r\n"]
+        assert b"".join(sends[3:]) == b"Header: x\r\n\r\n..hidden\r\nok\r\n.\r\n"
+
+    def test_sender_refused_stops_envelope(self):
+        server = _server(replies=[(550, b"no")])
+        with pytest.raises(smtplib.SMTPSenderRefused):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+        assert server.send.call_count == 1
+        server.rset.assert_called_once()
+
+    def test_partial_recipient_refusal_still_sends(self):
+        server = _server(replies=[(250, b""), (550, b"unknown"), (250, b""), (354, b""), (250, b"")])
+        send_message(server, "a@example.com", ["x@example.com", "b@example.com"], _message())
+        assert _written(server).endswith(b"\r\n.\r\n")
+
+    def test_all_recipients_refused_skips_data(self):
+        server = _server(replies=[(250, b""), (550, b"unknown")])
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+        assert b"DATA" not in _written(server)
+
+    def test_data_refused(self):
+        server = _server(replies=[(250, b""), (250, b""), (554, b"no")])
+        with pytest.raises(smtplib.SMTPDataError):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+
+    def test_message_rejected_after_data(self):
+        server = _server(replies=[(250, b""), (250, b""), (354, b""), (552, b"too big")])
+        server.rset.side_effect = smtplib.SMTPServerDisconnected
+        with pytest.raises(smtplib.SMTPDataError):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+
+
+class TestPipelining:
+    def test_envelope_is_one_write(self):
+        recipients = [f"r{i}@example.com" for i in range(100)]
+        server = _server("pipelining", replies=[(250, b"")] * 101 + [(354, b""), (250, b"")])
+        send_message(server, "a@example.com", recipients, _message())
+        first = server.send.call_args_list[0].args[0]
+        assert first.count(b"RCPT TO:") == 100
+        assert first.startswith(b"MAIL FROM:<a@example.com>\r\n")
+        assert first.endswith(b"DATA\r\n")
+
+    def test_refused_envelope_drains_accepted_data(self):
+        server = _server("pipelining", replies=[(550, b"no"), (503, b""), (354, b""), (250, b"")])
+        with pytest.raises(smtplib.SMTPSenderRefused):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+        assert _written(server).endswith(b"DATA\r\n.\r\n")
+        server.rset.assert_called_once()
+
+    def test_all_recipients_refused(self):
+        server = _server("pipelining", replies=[(250, b""), (550, b""), (554, b"no valid recipients")])
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+
+
+class TestChunking:
+    def test_bdat_pipelined_replies_read_at_end(self, monkeypatch):
+        monkeypatch.setattr(smtp, "BDAT_CHUNK_BYTES", 100)
+        msg = _message()
+        body = msg.as_bytes()
+        msg.iter_bytes = lambda: iter([body])  # type: ignore[method-assign]
+        server = _server("pipelining", "chunking")
+        send_message(server, "a@example.com", ["b@example.com"], msg)
+        written = _written(server)
+        assert b"DATA" not in written
+        bdats = written.count(b"BDAT ")
+        assert bdats == len(body) // 100 + 1
+        assert f"BDAT {len(body) % 100} LAST\r\n".encode() in written
+        assert server.getreply.call_count == 2 + bdats
+
+    def test_bdat_lockstep_stops_on_error(self, monkeypatch):
+        monkeypatch.setattr(smtp, "BDAT_CHUNK_BYTES", 10)
+        server = _server("chunking", replies=[(250, b""), (250, b""), (250, b""), (552, b"too big")])
+        with pytest.raises(smtplib.SMTPDataError):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+        assert _written(server).count(b"BDAT ") == 2
+
+    def test_bdat_pipelined_failure_reported_after_drain(self):
+        server = _server("pipelining", "chunking", replies=[(250, b""), (250, b""), (552, b"too big")])
+        with pytest.raises(smtplib.SMTPDataError):
+            send_message(server, "a@example.com", ["b@example.com"], _message())
+
+
+class TestNegotiation:
+    def test_8bitmime(self):
+        msg = _message()
+        server = _server("8bitmime")
+        server.getreply.side_effect = [(250, b""), (250, b""), (354, b""), (250, b"")]
+        send_message(server, "a@example.com", ["b@example.com"], msg)
+        assert server.send.call_args_list[0].args[0] == b"MAIL FROM:<a@example.com> BODY=8BITMIME\r\n"
+        assert msg.eight_bit is True
+
+    def test_smtputf8_for_non_ascii_addresses(self):
+        msg = _message()
+        server = _server("8bitmime", "smtputf8", replies=[(250, b""), (250, b""), (354, b""), (250, b"")])
+        send_message(server, "a@example.com", ["josé@example.com"], msg)
+        sends = [call.args[0] for call in server.send.call_args_list]
+        assert sends[0] == b"MAIL FROM:<a@example.com> SMTPUTF8 BODY=8BITMIME\r\n"
+        assert sends[1] == "RCPT TO:<josé@example.com>\r\n".encode()
+        assert msg.utf8 is True
+
+    def test_non_ascii_address_without_smtputf8(self):
+        with pytest.raises(smtplib.SMTPNotSupportedError):
+            send_message(_server(), "a@example.com", ["josé@example.com"], _message())
@@ -0,0 +1,162 @@
+"""Tests for per-user change counters (penguin_mail.services.versions) and the ETags built on them."""
+
+import importlib
+
+import msgpack
+import pytest
+from django.apps import apps
+
+from factories import (
+    AccountFactory,
+    ContactFactory,
+    ContactGroupFactory,
+    CustomFolderFactory,
+    EmailFactory,
+    LabelFactory,
+    SignatureFactory,
+    UserFactory,
+)
+from penguin_mail.models import ChangeCounter, ChangeScope, Email, SendStatus, UserSettings
+from penguin_mail.services import counters, dispatcher, outbox, versions
+
+
+def version(user, scope):
+    return versions.current(user, [scope])[0]
+
+
+class TestCounters:
+    def test_created_with_the_user(self, user):
+        assert sorted(user.change_counters.values_list("scope", flat=True)) == sorted(ChangeScope.values)
+        assert versions.current(user, [ChangeScope.EMAILS, ChangeScope.LABELS]) == [0, 0]
+        assert str(user.change_counters.get(scope=ChangeScope.EMAILS)) == "emails: 0"
+
+    def test_missing_rows_read_as_zero(self, user):
+        user.change_counters.all().delete()
+        assert versions.current(user, [ChangeScope.SETTINGS]) == [0]
+
+    def test_migration_backfill(self, user):
+        create_counters = importlib.import_module("penguin_mail.migrations.0013_change_counters").create_counters
+        ChangeCounter.objects.all().delete()
+        create_counters(apps, None)
+        assert user.change_counters.count() == len(ChangeScope.values)
+
+
+class TestBumps:
+    def test_email_writes(self, account, user):
+        email = EmailFactory(account=account)
+        assert version(user, ChangeScope.EMAILS) == 1
+        email.save()
+        email.delete()
+        assert version(user, ChangeScope.EMAILS) == 3
+
+    def test_email_label_links_both_directions(self, account, user):
+        email, label = EmailFactory(account=account), LabelFactory(user=user)
+        before = version(user, ChangeScope.EMAILS)
+        email.labels.add(label)
+        label.emails.clear()
+        assert version(user, ChangeScope.EMAILS) == before + 2
+
+    def test_user_owned_models(self, account, user):
+        LabelFactory(user=user)
+        CustomFolderFactory(user=user).delete()
+        group = ContactGroupFactory(user=user)
+        group.contacts.add(ContactFactory(user=user))
+        SignatureFactory(user=user)
+        account.save()
+        assert versions.current(user, ChangeScope.values) == [0, 1, 2, 3, 1, 2]
+
+    def test_default_settings_row_is_not_a_change(self, user):
+        settings = UserSettings.objects.create(user=user)
+        assert version(user, ChangeScope.SETTINGS) == 0
+        settings.save()
+        assert version(user, ChangeScope.SETTINGS) == 1
+
+    def test_other_users_untouched(self, account, user, second_user):
+        EmailFactory(account=account)
+        LabelFactory(user=user)
+        assert versions.current(second_user, ChangeScope.values) == [0] * len(ChangeScope.values)
+
+    def test_tracked_update(self, account, user):
+        email = EmailFactory(account=account)
+        before = version(user, ChangeScope.EMAILS)
+        with counters.tracking([email.pk]):
+            Email.objects.filter(pk=email.pk).update(is_starred=True)
+        assert version(user, ChangeScope.EMAILS) == before + 1
+
+    def test_send_claims(self, account, user):
+        queued = EmailFactory(account=account, send_status=SendStatus.OUTBOX)
+        scheduled = EmailFactory(
+            account=account,
+            folder="scheduled",
+            send_status=SendStatus.SCHEDULED,
+            scheduled_send_at=queued.created_at,
+        )
+        before = version(user, ChangeScope.EMAILS)
+        assert dispatcher.claim([scheduled.pk]) == [scheduled.pk]
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(outbox, "send_claimed", lambda _email: True)
+            assert outbox.deliver(queued.pk) is True
+        assert version(user, ChangeScope.EMAILS) == before + 2
+
+    def test_fixture_loading_is_ignored(self, user):
+        other = UserFactory.build(username="loaded")
+        versions.create_counters(other, created=True, raw=True)
+        label = LabelFactory.build(user=user)
+        versions.email_changed(EmailFactory.build(account=AccountFactory(user=user)), raw=True)
+        versions._user_model_changed(type(label), label, raw=True)
+        assert versions.current(user, [ChangeScope.EMAILS, ChangeScope.LABELS]) == [0, 0]
+
+
+ENDPOINTS = ["/api/v1/emails/", "/api/v1/emails/counts", "/api/v1/labels/", "/api/v1/folders/", "/api/v1/contacts/"]
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize("path", [*ENDPOINTS, "/api/v1/settings/"])
+    def test_not_modified(self, authed_client, account, path):
+        first = authed_client.get(path)
+        assert first.status_code == 200
+        again = authed_client.get(path, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again["ETag"] == first["ETag"]
+        assert "Accept" in again["Vary"]
+
+    @pytest.mark.parametrize("path", ENDPOINTS)
+    def test_changes_invalidate(self, authed_client, account, user, path):
+        etag = authed_client.get(path)["ETag"]
+        EmailFactory(account=account)
+        LabelFactory(user=user)
+        CustomFolderFactory(user=user)
+        ContactFactory(user=user)
+        assert authed_client.get(path, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_settings_invalidated_by_signature(self, authed_client, user):
+        etag = authed_client.get("/api/v1/settings/")["ETag"]
+        authed_client.post("/api/v1/settings/signatures", data={"name": "Work", "content": "Regards"})
+        assert authed_client.get("/api/v1/settings/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_not_modified_skips_the_list_queries(self, authed_client, account, django_assert_num_queries):
+        EmailFactory(account=account)
+        etag = authed_client.get("/api/v1/emails/")["ETag"]
+        # auth user, stale-sync account check, version lookup
+        with django_assert_num_queries(3):
+            assert authed_client.get("/api/v1/emails/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_tags_differ_per_user_and_representation(self, authed_client, api_client, second_auth_headers):
+        json_tag = authed_client.get("/api/v1/labels/")["ETag"]
+        msgpack_resp = authed_client.get("/api/v1/labels/", HTTP_ACCEPT="application/msgpack")
+        assert msgpack.unpackb(msgpack_resp.content) == []
+        other = api_client.get("/api/v1/labels/", **second_auth_headers)["ETag"]
+        assert len({json_tag, msgpack_resp["ETag"], other}) == 3
+        not_modified = authed_client.get(
+            "/api/v1/labels/", HTTP_ACCEPT="application/msgpack", HTTP_IF_NONE_MATCH=json_tag
+        )
+        assert not_modified.status_code == 200
+
+    def test_wildcard_and_lists(self, authed_client, user):
+        etag = authed_client.get("/api/v1/labels/")["ETag"]
+        assert authed_client.get("/api/v1/labels/", HTTP_IF_NONE_MATCH=f'"stale", {etag}').status_code == 304
+        assert authed_client.get("/api/v1/labels/", HTTP_IF_NONE_MATCH="*").status_code == 304
+
+    def test_failed_if_match(self, authed_client, user):
+        assert authed_client.get("/api/v1/labels/", HTTP_IF_MATCH='"stale"').status_code == 412
@@ -0,0 +1,82 @@
+"""Tests for the single-writer queue for background writes (penguin_mail.services.write_queue)."""
+
+import threading
+from concurrent.futures import Future
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import OperationalError
+
+from factories import EmailFactory
+from penguin_mail.models import Email
+from penguin_mail.services import write_queue
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+def job(fn, *args, **kwargs):
+    return fn, args, kwargs, Future()
+
+
+@pytest.fixture
+def queue_on(settings):
+    settings.SYNC_WRITE_QUEUE = True
+
+
+class TestRun:
+    def test_inline_when_off(self, settings):
+        settings.SYNC_WRITE_QUEUE = False
+        assert write_queue.run(thread_name) == threading.current_thread().name
+
+    def test_inline_inside_a_transaction(self, db, queue_on):
+        assert write_queue.run(thread_name) == threading.current_thread().name
+
+    @pytest.mark.django_db(transaction=True)
+    def test_on_the_writer_thread(self, queue_on, account):
+        email = EmailFactory(account=account, is_read=False)
+
+        def mark_read(pk):
+            Email.objects.filter(pk=pk).update(is_read=True)
+            return write_queue.run(thread_name)  # nested: runs inline on the writer
+
+        assert write_queue.run(mark_read, email.pk) == "write-queue"
+        assert Email.objects.get(pk=email.pk).is_read is True
+        with pytest.raises(ZeroDivisionError):
+            write_queue.run(divmod, 1, 0)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_queued_writes_share_a_batch(self, queue_on):
+        jobs = [job(thread_name) for _ in range(3)]
+        with patch.object(write_queue, "write", wraps=write_queue.write) as mock_write:
+            for queued in jobs:
+                write_queue._jobs.put(queued)
+            write_queue._ensure_writer()
+            assert [future.result(timeout=5) for *_, future in jobs] == ["write-queue"] * 3
+        mock_write.assert_called_once_with(jobs)
+
+
+class TestWrite:
+    def test_failed_write_is_rolled_back_alone(self, account):
+        email = EmailFactory(account=account, subject="before")
+
+        def rename_and_fail():
+            Email.objects.filter(pk=email.pk).update(subject="lost")
+            raise ValueError("bad message")
+
+        batch = [job(Email.objects.filter(pk=email.pk).update, is_read=True), job(rename_and_fail)]
+        write_queue.write(batch)
+        assert batch[0][3].result() == 1
+        assert isinstance(batch[1][3].exception(), ValueError)
+        email.refresh_from_db()
+        assert (email.subject, email.is_read) == ("before", True)
+
+    def test_failed_commit_fails_every_write(self, db):
+        outer = MagicMock()
+        outer.__exit__.side_effect = OperationalError("disk I/O error")
+        batch = [job(thread_name), job(thread_name)]
+        with patch.object(write_queue.transaction, "atomic", side_effect=[outer, nullcontext(), nullcontext()]):
+            write_queue.write(batch)
+        assert all(isinstance(future.exception(), OperationalError) for *_, future in batch)